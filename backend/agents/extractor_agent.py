@@ -11,6 +11,7 @@ from agno.tools.knowledge import KnowledgeTools
 from backend.tools.custom_tools import (
     SourceTextTools,
     RedmineTools,
+    AsyncRedmineTools,
     RedmineKnowledgeTools,
     RedmineReasoningTools
 )
@@ -28,7 +29,7 @@ class DataIngestorAgent(Agent):
     - Almacenar en caché datos frecuentemente accedidos
     """
     def __init__(self, **kwargs):
-        redmine_tools = RedmineTools()
+        redmine_tools = AsyncRedmineTools()
         
         super().__init__(
             id="data-ingestor-agent",
@@ -91,7 +92,7 @@ class ExtractorAgent(Agent):
             knowledge=knowledge_base,
             search_knowledge=True,
             tools=[
-                redmine_tools,              # Direct Redmine access
+                AsyncRedmineTools(),        # Direct Redmine access (async, pooled)
                 redmine_kb_tools,           # Redmine + Knowledge integration
                 redmine_reasoning,          # Pattern analysis
                 SourceTextTools(),          # Text extraction & evidence citation
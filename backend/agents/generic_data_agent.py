@@ -35,6 +35,7 @@ from agno.tools.reasoning import ReasoningTools
 from agno.tools.knowledge import KnowledgeTools
 from backend.tools.custom_tools import (
     RedmineTools,
+    AsyncRedmineTools,
     RedmineKnowledgeTools
 )
 from backend.core.context_broker import ContextBroker
@@ -74,7 +75,7 @@ class GenericDataAgent(Agent):
             knowledge=broker.project_kb,
             search_knowledge=True,
             tools=[
-                redmine_tools,           # Direct Redmine access
+                AsyncRedmineTools(),     # Direct Redmine access (async, pooled)
                 redmine_kb_tools,        # Redmine + Knowledge integration
                 ReasoningTools(add_instructions=True),
                 KnowledgeTools(knowledge=broker.project_kb)
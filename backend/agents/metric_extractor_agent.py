@@ -40,6 +40,7 @@ from backend.core.context_broker import ContextBroker
 from backend.tools.custom_tools import (
     SourceTextTools,
     RedmineTools,
+    AsyncRedmineTools,
     RedmineReasoningTools
 )
 
@@ -66,7 +67,7 @@ class MetricExtractorAgent(Agent):
             search_knowledge=True,
             output_schema=ExtractedMetrics, # Forzar Schema Pydantic con FinancialMetricsSchema
             tools=[
-                redmine_tools,           
+                AsyncRedmineTools(),
                 redmine_reasoning,       
                 SourceTextTools(),       
                 ReasoningTools(add_instructions=True),
@@ -0,0 +1,12 @@
+"""
+MAAS Benchmarks - Rendimiento del workflow sin gastar tokens
+
+Los escenarios corren contra los stand-ins locales de OpenAI
+(backend.benchmarks.openai_stub) y Redmine (backend.benchmarks.redmine_stub) y guardan
+cada resultado con el commit en backend/benchmarks/results/ para comparar
+regresiones entre commits:
+
+    python -m backend.benchmarks.run workflow --sections 22 --runs 3 --latency realistic --scale 0.05
+    python -m backend.benchmarks.run api --api-url http://localhost:7777
+    python -m backend.benchmarks.run compare
+"""
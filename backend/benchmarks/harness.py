@@ -0,0 +1,567 @@
+"""
+Benchmark Harness - Escenarios, medición y almacén de resultados
+
+Piezas:
+    - StubServer: levanta una app ASGI (stand-in de OpenAI o Redmine) con uvicorn
+      en un hilo y puerto libre.
+    - CountingDb: envoltorio de la DB (AsyncPostgresDb o una DB nula en memoria)
+      que cuenta las operaciones por tipo de sentencia.
+    - run_workflow_benchmark: ejecuta DocumentCreationWorkflow completo (planner,
+      author con RedmineTools, judge) contra los stand-ins y mide makespan,
+      llamadas por ejecución, operaciones de DB y memoria pico (RSS del proceso;
+      heap Python con tracemalloc bajo demanda, que ralentiza la ejecución).
+    - run_api_benchmark: POST /preinversion-plans contra un backend en marcha
+      (arrancado con OPENAI_BASE_URL/REDMINE_BASE_URL apuntando a los stand-ins).
+    - ResultStore: JSONL por escenario con el commit de cada resultado y
+      comparación contra la ejecución anterior con los mismos parámetros.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import uvicorn
+
+from agno.utils.log import logger
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Métricas comparadas entre commits: mayor = peor
+REGRESSION_METRICS = ("makespan_seconds", "p95_run_seconds", "llm_calls_per_run", "db_ops_per_run", "peak_memory_mb")
+
+
+class StubServer:
+    """App ASGI servida por uvicorn en un hilo (puerto libre en 127.0.0.1)."""
+
+    def __init__(self, app: Any, port: Optional[int] = None):
+        self.app = app
+        self.port = port or self._free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"El stand-in no arrancó en el puerto {self.port}")
+            time.sleep(0.02)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class NullDb:
+    """DB en memoria sin estado: lecturas vacías (caché y checkpoints siempre fallan)."""
+
+    def execute(self, query: str, *args) -> int:
+        return 0
+
+    def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        return []
+
+    def fetchone(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        return None
+
+
+class CountingDb:
+    """Cuenta las operaciones (execute/fetch/fetchone) por verbo SQL; delega el resto en la DB envuelta."""
+
+    def __init__(self, db: Any = None):
+        self.db = db if db is not None else NullDb()
+        self.ops: Counter = Counter()
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, method: str, query: str, *args) -> Any:
+        start = time.perf_counter()
+        try:
+            return getattr(self.db, method)(query, *args)
+        finally:
+            verb = (query.strip().split(None, 1) or ["?"])[0].upper()
+            with self._lock:
+                self.ops[verb] += 1
+                self.seconds += time.perf_counter() - start
+
+    def execute(self, query: str, *args) -> int:
+        return self._count("execute", query, *args)
+
+    def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        return self._count("fetch", query, *args)
+
+    def fetchone(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        return self._count("fetchone", query, *args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.db, name)
+
+    @property
+    def total(self) -> int:
+        return sum(self.ops.values())
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    params: Dict[str, Any]
+    makespan_seconds: float
+    runs: int
+    run_seconds: List[float] = field(default_factory=list)
+    p95_run_seconds: Optional[float] = None
+    llm_calls_per_run: Optional[float] = None
+    llm_calls_by_schema: Dict[str, int] = field(default_factory=dict)
+    agent_calls_per_run: Optional[float] = None
+    tool_calls_per_run: Optional[float] = None
+    redmine_requests_per_run: Optional[float] = None
+    db_ops_per_run: Optional[float] = None
+    db_ops: Dict[str, int] = field(default_factory=dict)
+    peak_memory_mb: Optional[float] = None
+    peak_heap_mb: Optional[float] = None
+    errors: int = 0
+    git_sha: Optional[str] = None
+    git_dirty: bool = False
+    recorded_at: str = ""
+
+    def summary(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in ("makespan_seconds", "runs", "errors") + REGRESSION_METRICS[1:]}
+
+
+def git_revision() -> Dict[str, Any]:
+    """(sha corto, árbol con cambios sin commit) del repositorio; None si git no está disponible."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, timeout=30
+        ).stdout.strip())
+        return {"git_sha": sha, "git_dirty": dirty}
+    except Exception:
+        return {"git_sha": None, "git_dirty": False}
+
+
+def _peak_rss_self_mb() -> float:
+    """RSS pico del proceso actual (ru_maxrss: KiB en Linux, bytes en macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def _p95(values: List[float]) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return round(values[0], 3)
+    return round(statistics.quantiles(values, n=20, method="inclusive")[-1], 3)
+
+
+@contextmanager
+def _redmine_env(base_url: str) -> Iterator[None]:
+    """RedmineTools lee la URL y la clave del entorno al construirse."""
+    previous = {key: os.environ.get(key) for key in ("REDMINE_BASE_URL", "REDMINE_API_KEY")}
+    os.environ["REDMINE_BASE_URL"] = base_url
+    os.environ["REDMINE_API_KEY"] = "benchmark"
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def build_workflow(
+    openai_base_url: str,
+    redmine_tools: Any,
+    db: Any,
+    max_concurrency: int = 4,
+    max_in_flight: int = 8,
+    pipelined: bool = False,
+    llm_cache: bool = False,
+    agent_metrics: Any = None,
+) -> Any:
+    """
+    DocumentCreationWorkflow cableado como en main.py, con agentes agno ligeros en lugar
+    de los agentes holónicos (que requieren ContextBroker y la base de conocimiento pgvector).
+    """
+    from agno.agent import Agent
+
+    from backend.agents.schemas import DocumentPlan, FeedbackCritiqueSchema, SIC_DTO
+    from backend.core.agent_factory import AgentFactory
+    from backend.core.checkpoint_store import SectionCheckpointStore
+    from backend.core.context_packer import ContextPacker
+    from backend.core.duration_stats import SectionDurationStats
+    from backend.core.fair_executor import FairExecutor
+    from backend.core.llm_cache import CachedOpenAIChat, LLMResponseCache
+    from backend.core.not_applicable import NotApplicableGenerator
+    from backend.core.section_cache import SectionResultCache
+    from backend.core.structural_checker import StructuralChecker
+    from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+    model = CachedOpenAIChat(
+        id="gpt-4o", api_key="benchmark", base_url=f"{openai_base_url}/v1", max_retries=0,
+        response_cache=LLMResponseCache(db) if llm_cache else None,
+    )
+    planner = Agent(id="master-planner-agent", name="MasterPlannerAgent", model=model, output_schema=DocumentPlan,
+                    instructions=["Genera el plan de 22 secciones SIC con sus dependencias."])
+    author = Agent(id="general-author-agent", name="GeneralAuthorAgent", model=model, output_schema=SIC_DTO,
+                   tools=[redmine_tools], instructions=["Redacta la sección SIC con datos de Redmine."])
+    judge = Agent(id="expert-judge-agent", name="ExpertJudgeAgent", model=model, output_schema=FeedbackCritiqueSchema,
+                  instructions=["Audita la sección contra la plantilla maestra."])
+    return DocumentCreationWorkflow(
+        planner=planner,
+        extractor=None,
+        author=author,
+        reviewer=judge,
+        workspace_id="benchmark",
+        max_concurrency=max_concurrency,
+        checkpoint_store=SectionCheckpointStore(db),
+        section_cache=SectionResultCache(db),
+        snapshot_provider=redmine_tools.project_snapshot_fingerprint,
+        issue_version_provider=redmine_tools.get_issue_versions,
+        llm_executor=FairExecutor(max_in_flight=max_in_flight),
+        duration_stats=SectionDurationStats(db),
+        pipelined=pipelined,
+        structural_checker=StructuralChecker(),
+        not_applicable=NotApplicableGenerator(),
+        agent_factory=AgentFactory(),
+        context_packer=ContextPacker(),
+        agent_metrics=agent_metrics,
+    )
+
+
+async def _stub_stats(client: httpx.AsyncClient, base_url: Optional[str]) -> Dict[str, Any]:
+    if not base_url:
+        return {}
+    try:
+        response = await client.get(f"{base_url}/_stub/stats")
+        return response.json()
+    except Exception as e:
+        logger.warning(f"⚠️ [BENCH] Sin estadísticas del stand-in {base_url}: {str(e)[:100]}")
+        return {}
+
+
+async def run_workflow_benchmark(
+    runs: int = 1,
+    concurrency: int = 1,
+    sections: int = 22,
+    projects: int = 2,
+    issues_per_project: int = 50,
+    latency: str = "fast",
+    latency_scale: float = 1.0,
+    reject_rate: float = 0.0,
+    tool_calls: bool = True,
+    max_concurrency: int = 4,
+    max_in_flight: int = 8,
+    pipelined: bool = False,
+    llm_cache: bool = False,
+    database_url: Optional[str] = None,
+    seed: int = 42,
+    warmup: int = 1,
+    trace_memory: bool = False,
+    redmine_mirror: bool = False,
+) -> BenchmarkResult:
+    """
+    Ejecuta `runs` generaciones completas (hasta `concurrency` a la vez, repartidas entre
+    los proyectos sintéticos) contra los stand-ins locales. Las `warmup` ejecuciones
+    previas (imports perezosos, conexiones) no se miden. `trace_memory` añade el pico
+    del heap Python (tracemalloc), a costa de inflar el makespan. `redmine_mirror` toma
+    una instantánea del proyecto al inicio de cada ejecución (como /preinversion-plans)
+    y las herramientas leen de ella.
+    """
+    # backend.agents antes que backend.tools (import circular entre ambos paquetes)
+    import backend.agents  # noqa: F401
+    from backend.core.agent_metrics import AgentMetricsRegistry
+    from backend.benchmarks.openai_stub import LATENCY_PRESETS, LatencyModel, MaasResponder, create_openai_stub_app
+    from backend.core.redmine_mirror import RedmineMirror
+    from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+    from backend.tools.custom_tools import RedmineTools
+
+    params = {
+        "runs": runs, "concurrency": concurrency, "sections": sections, "projects": projects,
+        "issues_per_project": issues_per_project, "latency": latency, "latency_scale": latency_scale,
+        "reject_rate": reject_rate, "tool_calls": tool_calls, "max_concurrency": max_concurrency,
+        "max_in_flight": max_in_flight, "pipelined": pipelined, "llm_cache": llm_cache,
+        "database": "postgres" if database_url else "null", "seed": seed, "warmup": warmup,
+        "redmine_mirror": redmine_mirror,
+    }
+    responder = MaasResponder(
+        sections=sections, reject_rate=reject_rate,
+        tool_calls={"get_project_issues": {"project_id": "{project_id}", "limit": 25}} if tool_calls else None,
+    )
+    openai_app = create_openai_stub_app(
+        responder, LatencyModel(profiles=LATENCY_PRESETS[latency], seed=seed, scale=latency_scale)
+    )
+    redmine_data = SyntheticRedmine(projects=projects, issues_per_project=issues_per_project, seed=seed)
+    redmine_app = create_redmine_stub_app(redmine_data)
+
+    if database_url:
+        from backend.core.async_postgres_db import AsyncPostgresDb
+        db = CountingDb(AsyncPostgresDb(db_url=database_url))
+    else:
+        db = CountingDb()
+
+    with StubServer(openai_app) as openai_server, StubServer(redmine_app) as redmine_server:
+        mirror = RedmineMirror(
+            db if database_url else None, base_url=redmine_server.url, api_key="stub"
+        ) if redmine_mirror else None
+        with _redmine_env(redmine_server.url):
+            redmine_tools = RedmineTools(mirror=mirror)
+        workflow = build_workflow(
+            openai_server.url, redmine_tools, db, max_concurrency=max_concurrency,
+            max_in_flight=max_in_flight, pipelined=pipelined, llm_cache=llm_cache,
+        )
+
+        from agno.workflow import StepInput
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        run_seconds: List[float] = []
+        errors = 0
+
+        async def one_run(index: int) -> None:
+            nonlocal errors
+            # El calentamiento usa un proyecto fuera del conjunto medido: no precarga la caché de secciones
+            project_id = index % projects + 1 if index >= 0 else projects + 1
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if mirror is not None:
+                        await mirror.ensure_project(project_id)
+                    output = await workflow.main_execution(StepInput(input={
+                        "project_id": project_id, "workflow_id": f"bench_{index}_{project_id}",
+                    }))
+                    if not output.success:
+                        errors += 1
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"❌ [BENCH] Ejecución {index} fallida: {str(e)[:200]}")
+                run_seconds.append(time.perf_counter() - start)
+
+        for index in range(warmup):
+            await one_run(-1 - index)
+        # Arranque (CREATE TABLE ..., imports) y calentamiento fuera de la medición
+        agent_metrics = workflow.agent_metrics = AgentMetricsRegistry()
+        db.ops.clear()
+        redmine_data.requests.clear()
+        openai_app.state.stub["calls_by_schema"].clear()
+        run_seconds.clear()
+        errors = 0
+
+        heap_peak = None
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one_run(index) for index in range(runs)))
+            makespan = time.perf_counter() - started
+            if trace_memory:
+                heap_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+
+        snapshot = agent_metrics.snapshot()
+        calls_by_schema = dict(openai_app.state.stub["calls_by_schema"])
+        recent = snapshot["recent_runs"]
+
+    return BenchmarkResult(
+        scenario="workflow",
+        params=params,
+        makespan_seconds=round(makespan, 3),
+        runs=runs,
+        run_seconds=[round(s, 3) for s in sorted(run_seconds)],
+        p95_run_seconds=_p95(run_seconds),
+        llm_calls_per_run=round(sum(calls_by_schema.values()) / runs, 2),
+        llm_calls_by_schema=calls_by_schema,
+        agent_calls_per_run=round(sum(r.get("agent_calls", 0) for r in recent) / runs, 2),
+        tool_calls_per_run=round(sum(r.get("tool_calls", 0) for r in recent) / runs, 2),
+        redmine_requests_per_run=round(sum(redmine_data.requests.values()) / runs, 2),
+        db_ops_per_run=round(db.total / runs, 2),
+        db_ops=dict(db.ops),
+        peak_memory_mb=_peak_rss_self_mb(),
+        peak_heap_mb=heap_peak,
+        errors=errors,
+        recorded_at=datetime.now(timezone.utc).isoformat(),
+        **git_revision(),
+    )
+
+
+def _peak_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """VmHWM (RSS pico) de un proceso local en Linux; None si no está disponible."""
+    if not pid:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 2)
+    except Exception:
+        return None
+    return None
+
+
+async def run_api_benchmark(
+    api_url: str,
+    token: Optional[str] = None,
+    project_ids: Optional[List[int]] = None,
+    runs: int = 1,
+    concurrency: int = 1,
+    openai_stub_url: Optional[str] = None,
+    redmine_stub_url: Optional[str] = None,
+    backend_pid: Optional[int] = None,
+    timeout_seconds: float = 1800,
+) -> BenchmarkResult:
+    """
+    Peticiones a POST /preinversion-plans de un backend en marcha. Las llamadas LLM y
+    Redmine se obtienen de /_stub/stats de los stand-ins (si se indican); las operaciones
+    de DB no son observables desde fuera del proceso y quedan sin medir.
+    """
+    if token is None:
+        from backend.auth import create_test_token
+        token = create_test_token()
+    project_ids = project_ids or [1]
+    params = {
+        "runs": runs, "concurrency": concurrency, "project_ids": project_ids,
+        "stubs": bool(openai_stub_url), "api_url": api_url,
+    }
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    run_seconds: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=timeout_seconds) as client:
+        openai_before = await _stub_stats(client, openai_stub_url)
+        redmine_before = await _stub_stats(client, redmine_stub_url)
+
+        async def one_run(index: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        f"{api_url}/preinversion-plans",
+                        headers={"Authorization": f"Bearer {token}"},
+                        json={"project_id": project_ids[index % len(project_ids)], "include_audit": False},
+                    )
+                    if response.status_code != 200 or response.json().get("status") not in ("success", "partial"):
+                        errors += 1
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"❌ [BENCH] Petición {index} fallida: {str(e)[:200]}")
+                run_seconds.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_run(index) for index in range(runs)))
+        makespan = time.perf_counter() - started
+
+        openai_after = await _stub_stats(client, openai_stub_url)
+        redmine_after = await _stub_stats(client, redmine_stub_url)
+
+    calls_by_schema = {
+        name: count - openai_before.get("calls_by_schema", {}).get(name, 0)
+        for name, count in openai_after.get("calls_by_schema", {}).items()
+    }
+    llm_calls = openai_after.get("chat_calls", 0) - openai_before.get("chat_calls", 0)
+    redmine_requests = redmine_after.get("requests", 0) - redmine_before.get("requests", 0)
+    return BenchmarkResult(
+        scenario="api",
+        params=params,
+        makespan_seconds=round(makespan, 3),
+        runs=runs,
+        run_seconds=[round(s, 3) for s in sorted(run_seconds)],
+        p95_run_seconds=_p95(run_seconds),
+        llm_calls_per_run=round(llm_calls / runs, 2) if openai_stub_url else None,
+        llm_calls_by_schema=calls_by_schema,
+        redmine_requests_per_run=round(redmine_requests / runs, 2) if redmine_stub_url else None,
+        peak_memory_mb=_peak_rss_mb(backend_pid),
+        errors=errors,
+        recorded_at=datetime.now(timezone.utc).isoformat(),
+        **git_revision(),
+    )
+
+
+class ResultStore:
+    """Resultados en JSONL (un fichero por escenario) para comparar entre commits."""
+
+    def __init__(self, directory: Path = RESULTS_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, scenario: str) -> Path:
+        return self.directory / f"{scenario}.jsonl"
+
+    def append(self, result: BenchmarkResult) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(result.scenario)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        return path
+
+    def load(self, scenario: str) -> List[Dict[str, Any]]:
+        path = self._path(scenario)
+        if not path.exists():
+            return []
+        with open(path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def baseline(self, result: BenchmarkResult) -> Optional[Dict[str, Any]]:
+        """Último resultado guardado con los mismos parámetros y de otro commit (o el último si no hay)."""
+        same_params = [r for r in self.load(result.scenario) if r.get("params") == result.params]
+        other_commits = [r for r in same_params if r.get("git_sha") != result.git_sha]
+        candidates = other_commits or same_params
+        return candidates[-1] if candidates else None
+
+
+def compare(current: BenchmarkResult, baseline: Optional[Dict[str, Any]], threshold: float = 0.10) -> Dict[str, Any]:
+    """
+    Variación relativa de cada métrica frente a la línea base; `regressions` lista las
+    que empeoran más de `threshold` (0.10 = 10%).
+    """
+    if not baseline:
+        return {"baseline": None, "deltas": {}, "regressions": []}
+    deltas: Dict[str, Optional[float]] = {}
+    regressions: List[str] = []
+    for metric in REGRESSION_METRICS:
+        now, before = getattr(current, metric), baseline.get(metric)
+        if now is None or before is None:
+            continue
+        deltas[metric] = round((now - before) / before, 4) if before else (0.0 if now == before else None)
+        if (before and (now - before) / before > threshold) or (not before and now > 0):
+            regressions.append(metric)
+    return {
+        "baseline": {"git_sha": baseline.get("git_sha"), "recorded_at": baseline.get("recorded_at")},
+        "deltas": deltas,
+        "regressions": regressions,
+    }
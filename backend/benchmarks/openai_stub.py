@@ -0,0 +1,458 @@
+"""
+OpenAI Stub - Servidor local compatible con la API de OpenAI (chat + Batch)
+
+Stand-in determinista para tests, ensayos del modo bulk y benchmarks sin
+gastar tokens. Implementa el subconjunto que usan agno y OpenAIBatchRunner:
+
+    POST /v1/chat/completions
+    POST /v1/files                 (multipart, purpose="batch"; requiere python-multipart,
+                                    ver requirements-dev.txt)
+    GET  /v1/files/{id}/content
+    POST /v1/batches
+    GET  /v1/batches/{id}
+    POST /v1/batches/{id}/cancel
+    GET  /_stub/stats              (llamadas por schema, para benchmarks)
+
+Cada petición se resuelve con un `responder(body)` que devuelve el contenido
+del mensaje del asistente (str) o el mensaje completo (dict, p.ej. con
+`tool_calls`). El responder por defecto genera un JSON válido para el
+`response_format.json_schema` de la petición y texto fijo en otro caso;
+`MaasResponder` produce salidas realistas para el workflow (DocumentPlan de
+22 SIC con dependencias de la plantilla, SIC_DTO estructuralmente válidos,
+FeedbackCritiqueSchema, ExtractedMetrics). Un responder que lanza excepción
+produce un error 500 (o una línea en el fichero de errores del batch).
+
+`LatencyModel` simula la latencia del modelo (fija, uniforme o lognormal,
+por schema de salida) con una semilla: misma petición -> misma latencia.
+
+Los batches se procesan en la primera consulta de estado, de modo que el
+cliente recorre el ciclo real: in_progress -> completed.
+
+    uvicorn backend.benchmarks.openai_stub:app --port 8900
+    OPENAI_BASE_URL=http://localhost:8900/v1
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+Responder = Callable[[Dict[str, Any]], Union[str, Dict[str, Any], Awaitable[Union[str, Dict[str, Any]]]]]
+
+
+def example_from_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None, name: str = "value") -> Any:
+    """Instancia determinista y válida de un JSON Schema (el generado por Pydantic)."""
+    root = root or schema
+    if "$ref" in schema:
+        ref = schema["$ref"].split("/")[-1]
+        return example_from_schema(root.get("$defs", {}).get(ref, {}), root, name)
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            options = [option for option in schema[combinator] if option.get("type") != "null"] or schema[combinator]
+            return example_from_schema(options[0], root, name)
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {
+            key: example_from_schema(value, root, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        items = schema.get("items") or {}
+        if "prefixItems" in schema:
+            return [example_from_schema(item, root, name) for item in schema["prefixItems"]]
+        return [example_from_schema(items, root, name)] if items else []
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "number":
+        # Puntajes acotados (p.ej. qc_score 0-100) toman el máximo: el stand-in aprueba por defecto
+        return float(schema.get("maximum", schema.get("minimum", 1.0)))
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return f"{name} (stub)"
+
+
+def default_responder(body: Dict[str, Any]) -> str:
+    response_format = body.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    if schema:
+        return json.dumps(example_from_schema(schema), ensure_ascii=False)
+    return "ok (stub)"
+
+
+def _request_hash(body: Dict[str, Any], salt: Any = "") -> int:
+    payload = json.dumps([body.get("model"), body.get("messages"), salt], sort_keys=True, default=str)
+    return int(hashlib.sha256(payload.encode()).hexdigest()[:16], 16)
+
+
+def schema_name(body: Dict[str, Any]) -> Optional[str]:
+    response_format = body.get("response_format") or {}
+    return (response_format.get("json_schema") or {}).get("name")
+
+
+def _last_user_text(body: Dict[str, Any]) -> str:
+    for message in reversed(body.get("messages") or []):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            return str(content or "")
+    return ""
+
+
+@dataclass
+class LatencyModel:
+    """
+    Latencia simulada por petición (ms). `profiles` admite una entrada por nombre
+    de schema de salida (p.ej. "DocumentPlan") y "default":
+        {"distribution": "fixed", "ms": 300}
+        {"distribution": "uniform", "low_ms": 200, "high_ms": 900}
+        {"distribution": "lognormal", "median_ms": 800, "sigma": 0.5, "max_ms": 10000}
+    `scale` multiplica todas las latencias (p.ej. 0.01 para ensayos rápidos con la forma real).
+    """
+    profiles: Dict[str, Dict[str, Any]] = field(default_factory=lambda: {"default": {"distribution": "fixed", "ms": 0}})
+    seed: int = 7
+    scale: float = 1.0
+
+    def sample_ms(self, body: Dict[str, Any]) -> float:
+        profile = self.profiles.get(schema_name(body) or "", self.profiles.get("default", {}))
+        rng = random.Random(_request_hash(body, self.seed))
+        kind = profile.get("distribution", "fixed")
+        if kind == "uniform":
+            value = rng.uniform(profile.get("low_ms", 0), profile.get("high_ms", 0))
+        elif kind == "lognormal":
+            value = rng.lognormvariate(math.log(max(profile.get("median_ms", 1), 1e-3)), profile.get("sigma", 0.5))
+        else:
+            value = profile.get("ms", 0)
+        return min(float(value), float(profile.get("max_ms", value))) * self.scale
+
+
+# Perfiles de latencia de referencia (medianas observadas con gpt-4o en producción)
+LATENCY_PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "none": {"default": {"distribution": "fixed", "ms": 0}},
+    "fast": {"default": {"distribution": "uniform", "low_ms": 5, "high_ms": 25}},
+    "realistic": {
+        "default": {"distribution": "lognormal", "median_ms": 1500, "sigma": 0.4, "max_ms": 15000},
+        "DocumentPlan": {"distribution": "lognormal", "median_ms": 6000, "sigma": 0.3, "max_ms": 30000},
+        "SIC_DTO": {"distribution": "lognormal", "median_ms": 9000, "sigma": 0.5, "max_ms": 60000},
+        "FeedbackCritiqueSchema": {"distribution": "lognormal", "median_ms": 3500, "sigma": 0.4, "max_ms": 30000},
+        "ExtractedMetrics": {"distribution": "lognormal", "median_ms": 2500, "sigma": 0.3, "max_ms": 15000},
+    },
+}
+
+
+# Plan sintético: dependencias de la Sección A de la plantilla maestra (sin el ciclo SIC 12 <-> SIC 17)
+SYNTHETIC_PLAN_DEPENDENCIES: List[Tuple[str, List[str]]] = [
+    ("SIC_02", []),
+    ("SIC_03", ["SIC_02"]),
+    ("SIC_04", ["SIC_02", "SIC_03"]),
+    ("SIC_05", ["SIC_02", "SIC_03"]),
+    ("SIC_06", ["SIC_02", "SIC_03"]),
+    ("SIC_10", ["SIC_02", "SIC_03"]),
+    ("SIC_11", ["SIC_02"]),
+    ("SIC_13", ["SIC_02"]),
+    ("SIC_19", ["SIC_02"]),
+    ("SIC_20", ["SIC_02"]),
+    ("SIC_16", ["SIC_11", "SIC_03"]),
+    ("SIC_14", ["SIC_03", "SIC_16", "SIC_11"]),
+    ("SIC_15", ["SIC_14"]),
+    ("SIC_12", ["SIC_15"]),
+    ("SIC_17", ["SIC_16", "SIC_12"]),
+    ("SIC_01", ["SIC_14", "SIC_16", "SIC_03"]),
+    ("SIC_07", ["SIC_02"]),
+    ("SIC_08", ["SIC_02"]),
+    ("SIC_09", ["SIC_02"]),
+    ("SIC_18", ["SIC_02"]),
+    ("SIC_21", ["SIC_16"]),
+    ("SIC_22", ["SIC_11"]),
+]
+
+
+class MaasResponder:
+    """
+    Responder realista y determinista para los schemas del workflow.
+
+    Args:
+        sections: número de secciones del DocumentPlan (las primeras del orden de la plantilla)
+        reject_rate: fracción de auditorías rechazadas (decidida por hash del prompt)
+        tool_calls: herramientas a invocar en el primer turno si el agente las ofrece,
+            con argumentos; "{project_id}" se sustituye por el proyecto del prompt
+    """
+
+    def __init__(
+        self,
+        sections: int = 22,
+        reject_rate: float = 0.0,
+        tool_calls: Optional[Dict[str, Dict[str, Any]]] = None,
+        template_path: Optional[str] = None,
+    ):
+        from backend.core.structural_checker import StructuralChecker
+
+        checker = StructuralChecker(template_path=template_path) if template_path else StructuralChecker()
+        self.specs = checker.specs
+        self.sections = SYNTHETIC_PLAN_DEPENDENCIES[:sections]
+        self.reject_rate = reject_rate
+        self.tool_calls = tool_calls or {}
+
+    def plan(self, project_id: str) -> Dict[str, Any]:
+        included = {section_id for section_id, _ in self.sections}
+        return {
+            "project_id": project_id,
+            "sections": [
+                {
+                    "section_id": section_id,
+                    "title": self.specs[section_id].title if section_id in self.specs else section_id,
+                    "dependencies": [dep for dep in deps if dep in included],
+                }
+                for section_id, deps in self.sections
+            ],
+            "dag_edges": [],
+        }
+
+    def section_markdown(self, section_id: str) -> str:
+        """Contenido que supera el pre-chequeo estructural: encabezados y tablas obligatorias."""
+        spec = self.specs.get(section_id)
+        if spec is None:
+            return f"## {section_id}\n\nContenido sintético."
+        lines = [f"# {spec.title}"]
+        for number, title in spec.headings:
+            lines.append(f"## {number + '. ' if number else ''}{title}")
+            lines.append("Contenido sintético generado por el stub de benchmarks.")
+        for group in spec.table_groups:
+            lines.append(f"Tabla {group[0]}: resumen.")
+        lines += ["", "| Parámetro | Valor |", "| --- | --- |", f"| Sección | {section_id} |"]
+        return "\n".join(lines)
+
+    def _tool_call_message(self, body: Dict[str, Any], project_id: str) -> Optional[Dict[str, Any]]:
+        if not self.tool_calls or any(m.get("role") == "tool" for m in body.get("messages") or []):
+            return None
+        offered = {tool.get("function", {}).get("name") for tool in body.get("tools") or []}
+        calls = []
+        for name, arguments in self.tool_calls.items():
+            if name in offered:
+                resolved = {
+                    key: (project_id if value == "{project_id}" else value) for key, value in arguments.items()
+                }
+                calls.append({
+                    "id": f"call_{len(calls)}_{_request_hash(body) % 10**8}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(resolved)},
+                })
+        return {"role": "assistant", "content": None, "tool_calls": calls} if calls else None
+
+    def __call__(self, body: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+        prompt = _last_user_text(body)
+        project = re.search(r"proyecto\s+(\d+)", prompt)
+        project_id = project.group(1) if project else "1"
+        tool_message = self._tool_call_message(body, project_id)
+        if tool_message:
+            return tool_message
+
+        name = schema_name(body)
+        if name == "DocumentPlan":
+            return json.dumps(self.plan(project_id), ensure_ascii=False)
+        if name == "SIC_DTO":
+            section = re.search(r"SIC_\d{2}", prompt)
+            section_id = section.group(0) if section else "SIC_01"
+            return json.dumps({
+                "sic_code": section_id,
+                "project_id": int(project_id),
+                "metadata": [{"key": "ETP", "value": "12%"}, {"key": "CAPEX_KUSD", "value": "1500"}],
+                "key_tables_markdown": "| Ítem | Valor |\n| --- | --- |\n| CAPEX | 1500 |",
+                "summary_markdown": self.section_markdown(section_id),
+            }, ensure_ascii=False)
+        if name == "FeedbackCritiqueSchema":
+            rejected = (_request_hash(body) % 1000) < self.reject_rate * 1000
+            return json.dumps({
+                "root_cause": "Faltan supuestos de contingencia" if rejected else "",
+                "actionable_recommendation": "(Documentar la contingencia), para evitar (subestimar el CAPEX)"
+                if rejected else "",
+                "qc_score": 70.0 if rejected else 96.0,
+                "approved": not rejected,
+                "critical_gaps": ["Contingencia"] if rejected else [],
+                "regulatory_compliance": True,
+            }, ensure_ascii=False)
+        if name == "ExtractedMetrics":
+            return json.dumps({
+                "sic_code": "SIC_16",
+                "financial_data": {
+                    "van_kusd": 2500.0, "tir_percent": 14.5, "payback_years": 4.2, "capex_total": 1500.0,
+                    "op_costs_unit": 1.8, "confidence_score": 0.9,
+                },
+                "valid": True,
+                "missing_fields": [],
+            })
+        return default_responder(body)
+
+
+def create_openai_stub_app(responder: Optional[Responder] = None, latency: Optional[LatencyModel] = None) -> FastAPI:
+    """
+    App FastAPI del stand-in. `app.state.stub` expone ficheros, batches, peticiones
+    recibidas y contadores de llamadas por schema de salida.
+    """
+    responder = responder or default_responder
+    app = FastAPI(title="MAAS OpenAI Stub")
+    files: Dict[str, Dict[str, Any]] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+    app.state.stub = {"files": files, "batches": batches, "requests": [], "calls_by_schema": {}}
+
+    def completion(body: Dict[str, Any], message: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(message, str):
+            message = {"role": "assistant", "content": message}
+        content = message.get("content") or json.dumps(message.get("tool_calls") or [])
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", []))
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                "message": message,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def respond(body: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+        app.state.stub["requests"].append(body)
+        name = schema_name(body) or "text"
+        app.state.stub["calls_by_schema"][name] = app.state.stub["calls_by_schema"].get(name, 0) + 1
+        if latency is not None:
+            delay_ms = latency.sample_ms(body)
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / 1000)
+        message = responder(body)
+        if inspect.isawaitable(message):
+            message = await message
+        return message
+
+    @app.get("/_stub/stats")
+    async def stats():
+        return {
+            "chat_calls": sum(app.state.stub["calls_by_schema"].values()),
+            "calls_by_schema": dict(app.state.stub["calls_by_schema"]),
+            "batches": len(batches),
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            raise HTTPException(status_code=400, detail="El stub no implementa streaming")
+        try:
+            message = await respond(body)
+        except Exception as e:
+            return JSONResponse(status_code=500, content={"error": {"message": str(e), "type": "stub_error"}})
+        return completion(body, message)
+
+    def store_file(content: str, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        files[file_id] = {
+            "id": file_id, "object": "file", "bytes": len(content.encode("utf-8")), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed", "content": content,
+        }
+        return files[file_id]
+
+    def public(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in record.items() if key != "content"}
+
+    async def answer(line: Dict[str, Any]) -> Dict[str, Any]:
+        body = line.get("body") or {}
+        request_id = f"req_{uuid.uuid4().hex[:12]}"
+        try:
+            message = await respond(body)
+        except Exception as e:
+            return {"id": request_id, "custom_id": line.get("custom_id"), "response": None,
+                    "error": {"code": "stub_error", "message": str(e)}}
+        return {
+            "id": request_id,
+            "custom_id": line.get("custom_id"),
+            "response": {"status_code": 200, "request_id": request_id, "body": completion(body, message)},
+            "error": None,
+        }
+
+    async def process(batch: Dict[str, Any]) -> None:
+        lines = [json.loads(line) for line in files[batch["input_file_id"]]["content"].splitlines() if line.strip()]
+        outputs, errors = [], []
+        for line in lines:
+            record = await answer(line)
+            (errors if record["error"] else outputs).append(json.dumps(record, ensure_ascii=False))
+        if outputs:
+            batch["output_file_id"] = store_file("\n".join(outputs) + "\n", "batch_output.jsonl", "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = store_file("\n".join(errors) + "\n", "batch_errors.jsonl", "batch_output")["id"]
+        batch["request_counts"] = {"total": len(lines), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    @app.post("/v1/files")
+    async def upload_file(request: Request):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None:
+            raise HTTPException(status_code=400, detail="Falta el fichero")
+        content = (await upload.read()).decode("utf-8")
+        return public(store_file(content, getattr(upload, "filename", None) or "upload.jsonl", form.get("purpose", "batch")))
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        if file_id not in files:
+            raise HTTPException(status_code=404, detail="Fichero no encontrado")
+        return PlainTextResponse(files[file_id]["content"])
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        payload = await request.json()
+        if payload.get("input_file_id") not in files:
+            raise HTTPException(status_code=400, detail="input_file_id desconocido")
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": payload.get("endpoint"),
+            "input_file_id": payload["input_file_id"], "completion_window": payload.get("completion_window", "24h"),
+            "status": "in_progress", "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+            "metadata": payload.get("metadata"), "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        return batches[batch_id]
+
+    @app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        batch = batches.get(batch_id)
+        if batch is None:
+            raise HTTPException(status_code=404, detail="Batch no encontrado")
+        if batch["status"] == "in_progress":
+            await process(batch)
+        return batch
+
+    @app.post("/v1/batches/{batch_id}/cancel")
+    async def cancel_batch(batch_id: str):
+        batch = batches.get(batch_id)
+        if batch is None:
+            raise HTTPException(status_code=404, detail="Batch no encontrado")
+        if batch["status"] == "in_progress":
+            batch["status"] = "cancelled"
+        return batch
+
+    return app
+
+
+app = create_openai_stub_app()
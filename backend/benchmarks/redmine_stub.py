@@ -0,0 +1,373 @@
+"""
+Redmine Stub - API REST de Redmine con proyectos sintéticos
+
+Stand-in determinista de Redmine para tests y benchmarks: genera `projects`
+proyectos de `issues_per_project` issues cada uno (custom fields, journals,
+relaciones y versiones) a partir de una semilla, y los sirve con el mismo
+formato JSON que Redmine 5 para que python-redmine y los clientes HTTP del
+backend funcionen sin cambios:
+
+    GET /projects.json                     (offset/limit)
+    GET /projects/{id}.json                (id numérico o identifier)
+    GET /projects/{id}/versions.json
+    GET /issues.json                       (project_id, issue_id, status_id, subject,
+                                            updated_on, sort, include=relations, offset/limit)
+    GET /projects/{id}/issues.json
+    GET /issues/{id}.json                  (include=journals,relations,...)
+    GET /issues/{id}/relations.json
+    PUT /issues/{id}.json
+    GET /custom_fields.json
+    GET /_stub/stats                       (peticiones por ruta, para benchmarks)
+
+`touch(issue_id, ...)` modifica un issue (y su updated_on) para simular
+actividad entre sincronizaciones; `app.state.redmine.requests` cuenta las
+peticiones por ruta.
+
+    uvicorn backend.benchmarks.redmine_stub:app --port 8901
+    REDMINE_BASE_URL=http://localhost:8901 REDMINE_API_KEY=stub
+"""
+
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+
+BASE_TIME = datetime(2025, 1, 6, 9, 0, 0, tzinfo=timezone.utc)
+MAX_LIMIT = 100
+
+TRACKERS = [(1, "Bug"), (2, "Feature"), (3, "Support"), (7, "Inventario")]
+STATUSES = [(1, "New", False), (2, "In Progress", False), (3, "Resolved", False), (5, "Closed", True)]
+PRIORITIES = [(1, "Low"), (2, "Normal"), (3, "High"), (4, "Urgent")]
+CUSTOM_FIELDS = [
+    (1, "CAPEX_KUSD", "float"),
+    (2, "OPEX_KUSD", "float"),
+    (3, "Plazo_meses", "int"),
+    (4, "Riesgo", "list"),
+    (5, "Area", "string"),
+]
+AREAS = ["Mina", "Planta", "Infraestructura", "Medio Ambiente", "Comunidades", "Finanzas"]
+RELATION_TYPES = ["relates", "blocks", "precedes"]
+
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _parse_timestamp(value: str) -> datetime:
+    value = value.strip()
+    if len(value) == 10:
+        value += "T00:00:00Z"
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class SyntheticRedmine:
+    """
+    Datos sintéticos deterministas: misma semilla y tamaño -> mismos proyectos e issues.
+
+    Args:
+        projects: número de proyectos
+        issues_per_project: issues por proyecto
+        journals_per_issue: notas/cambios por issue
+        relation_ratio: fracción de issues con una relación hacia un issue anterior del proyecto
+        description_chars: longitud aproximada de la descripción de cada issue
+        seed: semilla de generación
+    """
+
+    def __init__(
+        self,
+        projects: int = 3,
+        issues_per_project: int = 50,
+        journals_per_issue: int = 2,
+        relation_ratio: float = 0.3,
+        description_chars: int = 600,
+        seed: int = 42,
+    ):
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.projects: List[Dict[str, Any]] = []
+        self.versions: Dict[int, List[Dict[str, Any]]] = {}
+        self.issues: Dict[int, Dict[str, Any]] = {}
+        self.relations: Dict[int, List[Dict[str, Any]]] = {}
+        self._clock = BASE_TIME
+        self._next_journal_id = 1
+        self.requests: Counter = Counter()
+
+        issue_id = 1
+        relation_id = 1
+        for project_id in range(1, projects + 1):
+            rng = random.Random(seed * 1000 + project_id)
+            project = {
+                "id": project_id,
+                "name": f"Proyecto Sintético {project_id}",
+                "identifier": f"proyecto-{project_id}",
+                "description": f"Proyecto minero sintético {project_id} para benchmarks.",
+                "status": 1,
+                "is_public": True,
+                "created_on": _timestamp(BASE_TIME - timedelta(days=365)),
+                "updated_on": _timestamp(BASE_TIME),
+            }
+            self.projects.append(project)
+            self.versions[project_id] = [
+                {
+                    "id": project_id * 10 + n,
+                    "project": {"id": project_id, "name": project["name"]},
+                    "name": f"Fase {n}",
+                    "status": "open" if n == 3 else "closed",
+                    "due_date": (BASE_TIME + timedelta(days=90 * n)).strftime("%Y-%m-%d"),
+                    "created_on": _timestamp(BASE_TIME - timedelta(days=300)),
+                    "updated_on": _timestamp(BASE_TIME),
+                }
+                for n in (1, 2, 3)
+            ]
+
+            first_issue = issue_id
+            for n in range(issues_per_project):
+                tracker = TRACKERS[rng.randrange(len(TRACKERS))]
+                status = STATUSES[rng.randrange(len(STATUSES))]
+                priority = PRIORITIES[rng.randrange(len(PRIORITIES))]
+                version = self.versions[project_id][rng.randrange(3)]
+                created = BASE_TIME - timedelta(days=rng.randrange(30, 300), minutes=rng.randrange(1440))
+                updated = created + timedelta(days=rng.randrange(0, 30), minutes=rng.randrange(1440))
+                words = " ".join(rng.choice(AREAS).lower() for _ in range(max(1, description_chars // 8)))
+                issue = {
+                    "id": issue_id,
+                    "project": {"id": project_id, "name": project["name"]},
+                    "tracker": {"id": tracker[0], "name": tracker[1]},
+                    "status": {"id": status[0], "name": status[1], "is_closed": status[2]},
+                    "priority": {"id": priority[0], "name": priority[1]},
+                    "author": {"id": 1, "name": "Analista Sintético"},
+                    "assigned_to": {"id": 2 + rng.randrange(5), "name": f"Ingeniero {rng.randrange(5) + 1}"},
+                    "fixed_version": {"id": version["id"], "name": version["name"]},
+                    "subject": f"{tracker[1]} {rng.choice(AREAS)} #{n + 1} del proyecto {project_id}",
+                    "description": f"Requisito: {words[:description_chars]}",
+                    "start_date": created.strftime("%Y-%m-%d"),
+                    "done_ratio": rng.randrange(0, 101, 10),
+                    "is_private": False,
+                    "estimated_hours": float(rng.randrange(1, 80)),
+                    "custom_fields": [
+                        {"id": 1, "name": "CAPEX_KUSD", "value": str(rng.randrange(50, 5000))},
+                        {"id": 2, "name": "OPEX_KUSD", "value": str(rng.randrange(5, 500))},
+                        {"id": 3, "name": "Plazo_meses", "value": str(rng.randrange(1, 36))},
+                        {"id": 4, "name": "Riesgo", "value": rng.choice(["Bajo", "Medio", "Alto"])},
+                        {"id": 5, "name": "Area", "value": rng.choice(AREAS)},
+                    ],
+                    "created_on": _timestamp(created),
+                    "updated_on": _timestamp(updated),
+                    "closed_on": _timestamp(updated) if status[2] else None,
+                    "journals": [],
+                }
+                for j in range(journals_per_issue):
+                    issue["journals"].append(self._journal(
+                        f"Seguimiento {j + 1}", created + timedelta(hours=j + 1),
+                        [{"property": "attr", "name": "done_ratio", "old_value": "0", "new_value": str(10 * (j + 1))}],
+                    ))
+                self.issues[issue_id] = issue
+                self.relations[issue_id] = []
+                if issue_id > first_issue and rng.random() < relation_ratio:
+                    target = rng.randrange(first_issue, issue_id)
+                    relation = {
+                        "id": relation_id,
+                        "issue_id": target,
+                        "issue_to_id": issue_id,
+                        "relation_type": rng.choice(RELATION_TYPES),
+                        "delay": None,
+                    }
+                    relation_id += 1
+                    self.relations[target].append(relation)
+                    self.relations[issue_id].append(relation)
+                issue_id += 1
+
+    def _journal(self, notes: str, created: datetime, details: List[Dict[str, Any]]) -> Dict[str, Any]:
+        journal = {
+            "id": self._next_journal_id,
+            "user": {"id": 1, "name": "Analista Sintético"},
+            "notes": notes,
+            "created_on": _timestamp(created),
+            "private_notes": False,
+            "details": details,
+        }
+        self._next_journal_id += 1
+        return journal
+
+    def project(self, project_ref: Any) -> Optional[Dict[str, Any]]:
+        for project in self.projects:
+            if str(project_ref) in (str(project["id"]), project["identifier"]):
+                return project
+        return None
+
+    def touch(self, issue_id: int, notes: str = "Actualización sintética", **changes: Any) -> Dict[str, Any]:
+        """
+        Simula una edición en Redmine: aplica `changes` (atributos o custom fields por
+        nombre), añade un journal y adelanta updated_on por encima de cualquier valor previo.
+        """
+        with self._lock:
+            issue = self.issues[issue_id]
+            latest = max(_parse_timestamp(i["updated_on"]) for i in self.issues.values())
+            self._clock = max(self._clock, latest) + timedelta(minutes=1)
+            details = []
+            custom_fields = {cf["name"]: cf for cf in issue["custom_fields"]}
+            for name, value in changes.items():
+                if name in custom_fields:
+                    details.append({"property": "cf", "name": str(custom_fields[name]["id"]),
+                                    "old_value": custom_fields[name]["value"], "new_value": str(value)})
+                    custom_fields[name]["value"] = str(value)
+                else:
+                    details.append({"property": "attr", "name": name,
+                                    "old_value": str(issue.get(name)), "new_value": str(value)})
+                    issue[name] = value
+            issue["journals"].append(self._journal(notes, self._clock, details))
+            issue["updated_on"] = _timestamp(self._clock)
+            return issue
+
+    def _issue_view(self, issue: Dict[str, Any], include: set) -> Dict[str, Any]:
+        view = {key: value for key, value in issue.items() if key != "journals"}
+        if "journals" in include:
+            view["journals"] = issue["journals"]
+        if "relations" in include:
+            view["relations"] = self.relations.get(issue["id"], [])
+        if "changesets" in include:
+            view["changesets"] = []
+        if "watchers" in include:
+            view["watchers"] = []
+        return view
+
+    def filter_issues(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        issues = list(self.issues.values())
+        if params.get("project_id"):
+            project = self.project(params["project_id"])
+            issues = [i for i in issues if project and i["project"]["id"] == project["id"]]
+        if params.get("issue_id"):
+            wanted = {int(i) for i in params["issue_id"].split(",") if i.strip()}
+            issues = [i for i in issues if i["id"] in wanted]
+        status = params.get("status_id", "open")
+        if status == "open":
+            issues = [i for i in issues if not i["status"]["is_closed"]]
+        elif status == "closed":
+            issues = [i for i in issues if i["status"]["is_closed"]]
+        elif status != "*":
+            issues = [i for i in issues if str(i["status"]["id"]) == status]
+        if params.get("tracker_id"):
+            issues = [i for i in issues if str(i["tracker"]["id"]) == params["tracker_id"]]
+        subject = params.get("subject", "")
+        if subject.startswith("~"):
+            issues = [i for i in issues if subject[1:].lower() in i["subject"].lower()]
+        updated = params.get("updated_on")
+        if updated:
+            if updated.startswith("><"):
+                low, high = (_parse_timestamp(v) for v in updated[2:].split("|"))
+                issues = [i for i in issues if low <= _parse_timestamp(i["updated_on"]) <= high]
+            elif updated.startswith(">="):
+                low = _parse_timestamp(updated[2:])
+                issues = [i for i in issues if _parse_timestamp(i["updated_on"]) >= low]
+            elif updated.startswith("<="):
+                high = _parse_timestamp(updated[2:])
+                issues = [i for i in issues if _parse_timestamp(i["updated_on"]) <= high]
+        sort = params.get("sort", "id:desc")
+        field_name, _, direction = sort.partition(":")
+        field_name = field_name if field_name in ("id", "updated_on", "created_on") else "id"
+        issues.sort(key=lambda i: (i[field_name], i["id"]), reverse=direction == "desc")
+        return issues
+
+
+def _list_include(params: Dict[str, str]) -> set:
+    # Los listados de Redmine solo aceptan include=relations (y attachments)
+    return set(params.get("include", "").split(",")) & {"relations"}
+
+
+def _page(params: Dict[str, str], items: List[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    offset = max(0, int(params.get("offset", 0)))
+    limit = min(MAX_LIMIT, max(1, int(params.get("limit", 25))))
+    return {key: items[offset:offset + limit], "total_count": len(items), "offset": offset, "limit": limit}
+
+
+def create_redmine_stub_app(data: Optional[SyntheticRedmine] = None) -> FastAPI:
+    """App FastAPI del stand-in. `app.state.redmine` expone los datos y el contador de peticiones."""
+    data = data or SyntheticRedmine()
+    app = FastAPI(title="MAAS Redmine Stub")
+    app.state.redmine = data
+
+    @app.middleware("http")
+    async def count_requests(request: Request, call_next):
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if not request.url.path.startswith("/_stub"):
+            data.requests[f"{request.method} {getattr(route, 'path', request.url.path)}"] += 1
+        return response
+
+    def project_or_404(project_ref: str) -> Dict[str, Any]:
+        project = data.project(project_ref)
+        if project is None:
+            raise HTTPException(status_code=404)
+        return project
+
+    def issue_or_404(issue_id: int) -> Dict[str, Any]:
+        issue = data.issues.get(issue_id)
+        if issue is None:
+            raise HTTPException(status_code=404)
+        return issue
+
+    @app.get("/_stub/stats")
+    async def stats():
+        return {"requests": sum(data.requests.values()), "requests_by_route": dict(data.requests)}
+
+    @app.get("/projects.json")
+    async def list_projects(request: Request):
+        return _page(dict(request.query_params), data.projects, "projects")
+
+    @app.get("/projects/{project_ref}.json")
+    async def get_project(project_ref: str):
+        return {"project": project_or_404(project_ref)}
+
+    @app.get("/projects/{project_ref}/versions.json")
+    async def list_versions(project_ref: str):
+        versions = data.versions[project_or_404(project_ref)["id"]]
+        return {"versions": versions, "total_count": len(versions)}
+
+    @app.get("/issues.json")
+    async def list_issues(request: Request):
+        params = dict(request.query_params)
+        include = _list_include(params)
+        return _page(params, [data._issue_view(i, include) for i in data.filter_issues(params)], "issues")
+
+    @app.get("/projects/{project_ref}/issues.json")
+    async def list_project_issues(project_ref: str, request: Request):
+        params = {**dict(request.query_params), "project_id": str(project_or_404(project_ref)["id"])}
+        include = _list_include(params)
+        return _page(params, [data._issue_view(i, include) for i in data.filter_issues(params)], "issues")
+
+    @app.get("/issues/{issue_id}.json")
+    async def get_issue(issue_id: int, include: str = ""):
+        return {"issue": data._issue_view(issue_or_404(issue_id), set(include.split(",")))}
+
+    @app.put("/issues/{issue_id}.json")
+    async def update_issue(issue_id: int, request: Request):
+        issue_or_404(issue_id)
+        payload = (await request.json()).get("issue", {})
+        names = {str(cf_id): name for cf_id, name, _ in CUSTOM_FIELDS}
+        changes = {
+            cf.get("name") or names.get(str(cf.get("id")), str(cf.get("id"))): cf.get("value")
+            for cf in payload.get("custom_fields", [])
+        }
+        changes.update({k: v for k, v in payload.items() if k not in ("custom_fields", "notes")})
+        data.touch(issue_id, notes=payload.get("notes", ""), **changes)
+        return Response(status_code=204)
+
+    @app.get("/issues/{issue_id}/relations.json")
+    async def list_relations(issue_id: int):
+        issue_or_404(issue_id)
+        return {"relations": data.relations.get(issue_id, [])}
+
+    @app.get("/custom_fields.json")
+    async def list_custom_fields():
+        return {"custom_fields": [
+            {"id": cf_id, "name": name, "customized_type": "issue", "field_format": fmt}
+            for cf_id, name, fmt in CUSTOM_FIELDS
+        ]}
+
+    return app
+
+
+app = create_redmine_stub_app()
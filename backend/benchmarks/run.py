@@ -0,0 +1,157 @@
+"""
+CLI de benchmarks
+
+    # Workflow completo en proceso contra los stand-ins (sin tokens ni red)
+    python -m backend.benchmarks.run workflow --runs 4 --concurrency 2 --latency realistic --scale 0.05
+
+    # Stand-ins en primer plano para arrancar el backend contra ellos
+    python -m backend.benchmarks.run serve --openai-port 8900 --redmine-port 8901
+
+    # /preinversion-plans de un backend en marcha (arrancado con OPENAI_BASE_URL/REDMINE_BASE_URL de `serve`)
+    python -m backend.benchmarks.run api --api-url http://localhost:7777 \\
+        --openai-stub-url http://127.0.0.1:8900 --redmine-stub-url http://127.0.0.1:8901 --backend-pid 1234
+
+    # Histórico del escenario
+    python -m backend.benchmarks.run compare --scenario workflow
+
+Cada resultado se añade a backend/benchmarks/results/<escenario>.jsonl con el
+commit actual y se compara con el último resultado de otro commit con los
+mismos parámetros; --fail-on-regression devuelve código 1 si alguna métrica
+empeora más que --threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.benchmarks.harness import (  # noqa: E402
+    RESULTS_DIR, ResultStore, StubServer, compare, run_api_benchmark, run_workflow_benchmark,
+)
+
+
+def _report(store: ResultStore, result, threshold: float, save: bool) -> int:
+    comparison = compare(result, store.baseline(result), threshold)
+    if save:
+        path = store.append(result)
+        print(f"💾 Resultado guardado en {path}")
+    print(json.dumps({"result": result.summary(), "comparison": comparison}, indent=2, ensure_ascii=False))
+    if comparison["regressions"]:
+        print(f"⚠️ Regresiones (> {threshold:.0%}): {', '.join(comparison['regressions'])}")
+    return len(comparison["regressions"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento MAAS")
+    parser.add_argument("--results-dir", default=str(RESULTS_DIR))
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento relativo tolerado")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    workflow = sub.add_parser("workflow", help="DocumentCreationWorkflow en proceso contra los stand-ins")
+    workflow.add_argument("--runs", type=int, default=2)
+    workflow.add_argument("--concurrency", type=int, default=1)
+    workflow.add_argument("--sections", type=int, default=22)
+    workflow.add_argument("--projects", type=int, default=2)
+    workflow.add_argument("--issues-per-project", type=int, default=50)
+    workflow.add_argument("--latency", choices=["none", "fast", "realistic"], default="fast")
+    workflow.add_argument("--scale", type=float, default=1.0, help="Factor sobre las latencias del perfil")
+    workflow.add_argument("--reject-rate", type=float, default=0.0)
+    workflow.add_argument("--no-tool-calls", action="store_true")
+    workflow.add_argument("--max-concurrency", type=int, default=4, help="Secciones en paralelo por ejecución")
+    workflow.add_argument("--max-in-flight", type=int, default=8, help="Cupo global de llamadas de agente")
+    workflow.add_argument("--pipelined", action="store_true")
+    workflow.add_argument("--llm-cache", action="store_true")
+    workflow.add_argument("--database-url", default=None, help="Postgres real (por defecto DB nula en memoria)")
+    workflow.add_argument("--seed", type=int, default=42)
+    workflow.add_argument("--warmup", type=int, default=1, help="Ejecuciones previas no medidas")
+    workflow.add_argument("--trace-memory", action="store_true", help="Pico del heap Python (más lento)")
+    workflow.add_argument("--redmine-mirror", action="store_true", help="Herramientas Redmine sobre el mirror local")
+
+    api = sub.add_parser("api", help="POST /preinversion-plans contra un backend en marcha")
+    api.add_argument("--api-url", required=True)
+    api.add_argument("--token", default=None, help="JWT (por defecto token de prueba OPERATOR)")
+    api.add_argument("--project-ids", type=int, nargs="+", default=[1])
+    api.add_argument("--runs", type=int, default=1)
+    api.add_argument("--concurrency", type=int, default=1)
+    api.add_argument("--openai-stub-url", default=None)
+    api.add_argument("--redmine-stub-url", default=None)
+    api.add_argument("--backend-pid", type=int, default=None, help="PID del backend para medir su RSS pico")
+
+    serve = sub.add_parser("serve", help="Stand-ins de OpenAI y Redmine en primer plano")
+    serve.add_argument("--openai-port", type=int, default=8900)
+    serve.add_argument("--redmine-port", type=int, default=8901)
+    serve.add_argument("--projects", type=int, default=3)
+    serve.add_argument("--issues-per-project", type=int, default=50)
+    serve.add_argument("--latency", choices=["none", "fast", "realistic"], default="realistic")
+    serve.add_argument("--scale", type=float, default=1.0)
+    serve.add_argument("--reject-rate", type=float, default=0.0)
+    serve.add_argument("--seed", type=int, default=42)
+
+    history = sub.add_parser("compare", help="Histórico de resultados de un escenario")
+    history.add_argument("--scenario", default="workflow")
+    history.add_argument("--last", type=int, default=10)
+
+    args = parser.parse_args()
+    store = ResultStore(Path(args.results_dir))
+
+    if args.command == "workflow":
+        result = asyncio.run(run_workflow_benchmark(
+            runs=args.runs, concurrency=args.concurrency, sections=args.sections, projects=args.projects,
+            issues_per_project=args.issues_per_project, latency=args.latency, latency_scale=args.scale,
+            reject_rate=args.reject_rate, tool_calls=not args.no_tool_calls, max_concurrency=args.max_concurrency,
+            max_in_flight=args.max_in_flight, pipelined=args.pipelined, llm_cache=args.llm_cache,
+            database_url=args.database_url, seed=args.seed, warmup=args.warmup,
+            trace_memory=args.trace_memory, redmine_mirror=args.redmine_mirror,
+        ))
+        regressions = _report(store, result, args.threshold, not args.no_save)
+        return 1 if regressions and args.fail_on_regression else 0
+
+    if args.command == "api":
+        result = asyncio.run(run_api_benchmark(
+            args.api_url, token=args.token, project_ids=args.project_ids, runs=args.runs,
+            concurrency=args.concurrency, openai_stub_url=args.openai_stub_url,
+            redmine_stub_url=args.redmine_stub_url, backend_pid=args.backend_pid,
+        ))
+        regressions = _report(store, result, args.threshold, not args.no_save)
+        return 1 if regressions and args.fail_on_regression else 0
+
+    if args.command == "serve":
+        from backend.benchmarks.openai_stub import LATENCY_PRESETS, LatencyModel, MaasResponder, create_openai_stub_app
+        from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+
+        openai_app = create_openai_stub_app(
+            MaasResponder(reject_rate=args.reject_rate),
+            LatencyModel(profiles=LATENCY_PRESETS[args.latency], seed=args.seed, scale=args.scale),
+        )
+        redmine_app = create_redmine_stub_app(
+            SyntheticRedmine(projects=args.projects, issues_per_project=args.issues_per_project, seed=args.seed)
+        )
+        with StubServer(openai_app, args.openai_port) as openai_server, \
+                StubServer(redmine_app, args.redmine_port) as redmine_server:
+            print(f"OPENAI_BASE_URL={openai_server.url}/v1 OPENAI_API_KEY=stub")
+            print(f"REDMINE_BASE_URL={redmine_server.url} REDMINE_API_KEY=stub")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    for row in store.load(args.scenario)[-args.last:]:
+        print(json.dumps({
+            "git_sha": row.get("git_sha"), "dirty": row.get("git_dirty"), "recorded_at": row.get("recorded_at"),
+            "params": row.get("params"), **{k: row.get(k) for k in ("makespan_seconds", "p95_run_seconds",
+                                                                    "llm_calls_per_run", "db_ops_per_run",
+                                                                    "peak_memory_mb", "errors")},
+        }, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Agent Factory - Instancias de agente ligeras por ejecución
+
+main.py construye una única instancia global de cada agente (planner, author,
+judge, extractor). En agno el `session_id` de un Agent es pegajoso: la primera
+ejecución sin session_id fija uno en la instancia y todas las siguientes
+comparten esa sesión (historial, estado y caché de sesión). Con varias
+ejecuciones del workflow en paralelo, y varias secciones en paralelo dentro de
+cada una, el Author y el Judge mezclaban conversaciones.
+
+`AgentFactory.spawn(prototype, session_id)` devuelve una copia superficial del
+prototipo: comparte la configuración inmutable (instrucciones, herramientas,
+cliente del modelo, knowledge) y aísla el estado mutable de sesión. Cada
+intento de sección usa su propia instancia, lo que sustituye al antiguo
+`memory.clear()` sobre los agentes globales. Las instancias no persisten
+sesión (db=None): nadie relee ese historial y cada llamada de Author/Judge
+añadiría una fila a la tabla de sesiones.
+"""
+
+import copy
+import logging
+from typing import Any, Dict, Optional
+
+from agno.agent import Agent
+
+logger = logging.getLogger(__name__)
+
+# Estado que agno muta durante una ejecución y que no debe compartirse
+_RUN_STATE_ATTRIBUTES = ("_cached_session", "_tool_instructions")
+_RUN_STATE_LISTS = ("_mcp_tools_initialized_on_run", "_connectable_tools_initialized_on_run")
+
+
+class AgentFactory:
+    """Fábrica de instancias por ejecución a partir de prototipos compartidos."""
+
+    def __init__(self):
+        self.spawned: Dict[str, int] = {}
+
+    def spawn(self, prototype: Any, session_id: str, model: Optional[Any] = None) -> Any:
+        """
+        Instancia ligera de `prototype` con sesión propia.
+        `model` sustituye el modelo solo en la instancia (ver ModelRouter).
+        Objetos que no son agno.Agent (p.ej. dobles de test) se devuelven tal cual.
+        """
+        if not isinstance(prototype, Agent):
+            return prototype
+        instance = copy.copy(prototype)
+        instance.session_id = session_id
+        # Sesión de un solo uso: sin fila en la tabla de sesiones de agno
+        instance.db = None
+        if model is not None:
+            instance.model = model
+        for attribute in _RUN_STATE_ATTRIBUTES:
+            setattr(instance, attribute, None)
+        for attribute in _RUN_STATE_LISTS:
+            setattr(instance, attribute, [])
+        key = prototype.id or prototype.name or type(prototype).__name__
+        self.spawned[key] = self.spawned.get(key, 0) + 1
+        return instance
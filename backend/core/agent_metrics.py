@@ -0,0 +1,403 @@
+"""
+Agent Metrics - Instrumentación real de agentes, secciones, herramientas y ejecuciones
+
+Sustituye las cifras fijas de /api/agents/performance. Cada `arun` del
+workflow (y de la auditoría en background) se registra desde su RunOutput:
+
+    - latencia de la llamada, error o éxito
+    - tokens de entrada/salida (RunOutput.metrics) y coste estimado por modelo
+    - llamadas a herramientas (RunOutput.tools: nombre, duración, error)
+
+Los datos se agregan en memoria por ámbito ("agent", "section", "tool",
+"model", "workflow") con dos vistas por clave:
+
+    - totales desde el arranque (restaurados desde Postgres al iniciar)
+    - ventana móvil (`window_seconds`, en ranuras de `slot_seconds`) con
+      histograma de latencias por buckets -> p50 / p95 / p99
+
+Además se acumulan tokens, coste y llamadas por ejecución del workflow
+(`start_run` / `finish_run`) y se conservan las últimas ejecuciones.
+
+`flush()` persiste una instantánea en la tabla `maas_agent_metrics`;
+`run_periodic_flush()` la ejecuta cada `flush_interval` segundos.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("agent", "section", "tool", "model", "workflow")
+
+# Límites superiores (ms) de los buckets del histograma; el último es +inf
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 20_000, 30_000, 60_000, 120_000, 300_000, 600_000,
+)
+
+# USD por millón de tokens (entrada, salida). Se elige el prefijo de id más largo que coincida.
+MODEL_PRICES_PER_MTOK: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "o3-mini": (1.10, 4.40),
+}
+
+
+def estimate_cost(
+    model_id: Optional[str],
+    input_tokens: int,
+    output_tokens: int,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> float:
+    """Coste estimado en USD; 0 para modelos sin precio conocido."""
+    prices = prices or MODEL_PRICES_PER_MTOK
+    matches = [prefix for prefix in prices if model_id and model_id.startswith(prefix)]
+    if not matches:
+        return 0.0
+    input_price, output_price = prices[max(matches, key=len)]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class _Slot:
+    __slots__ = ("start", "count", "errors", "latency_ms", "input_tokens", "output_tokens", "cost", "buckets")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.errors = 0
+        self.latency_ms = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+
+def _percentile_ms(buckets: List[int], fraction: float) -> Optional[float]:
+    """Percentil aproximado del histograma (interpolación lineal dentro del bucket)."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            lower = LATENCY_BUCKETS_MS[index - 1] if index > 0 else 0.0
+            if index >= len(LATENCY_BUCKETS_MS):
+                return float(lower)
+            upper = LATENCY_BUCKETS_MS[index]
+            return round(lower + (upper - lower) * (rank - seen) / count, 1)
+        seen += count
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+class RollingStats:
+    """Contadores acumulados + ventana móvil con histograma de latencias."""
+
+    def __init__(self, window_seconds: float = 3600.0, slot_seconds: float = 60.0):
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self._slots: Deque[_Slot] = deque()
+        self.totals: Dict[str, Any] = {
+            "count": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "latency_ms": 0.0,
+        }
+        self.last_at: Optional[float] = None
+
+    def _slot(self, now: float) -> _Slot:
+        start = now - now % self.slot_seconds
+        if not self._slots or self._slots[-1].start < start:
+            self._slots.append(_Slot(start))
+        self._expire(now)
+        return self._slots[-1]
+
+    def _expire(self, now: float) -> None:
+        while self._slots and self._slots[0].start <= now - self.window_seconds:
+            self._slots.popleft()
+
+    def record(
+        self,
+        latency_ms: float,
+        error: bool = False,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost: float = 0.0,
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.time() if now is None else now
+        slot = self._slot(now)
+        slot.count += 1
+        slot.errors += int(error)
+        slot.latency_ms += latency_ms
+        slot.input_tokens += input_tokens
+        slot.output_tokens += output_tokens
+        slot.cost += cost
+        slot.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+        self.totals["count"] += 1
+        self.totals["errors"] += int(error)
+        self.totals["input_tokens"] += input_tokens
+        self.totals["output_tokens"] += output_tokens
+        self.totals["cost_usd"] += cost
+        self.totals["latency_ms"] += latency_ms
+        self.last_at = now
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        self._expire(now)
+        buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        window = {"count": 0, "errors": 0, "latency_ms": 0.0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+        for slot in self._slots:
+            window["count"] += slot.count
+            window["errors"] += slot.errors
+            window["latency_ms"] += slot.latency_ms
+            window["input_tokens"] += slot.input_tokens
+            window["output_tokens"] += slot.output_tokens
+            window["cost"] += slot.cost
+            for index, count in enumerate(slot.buckets):
+                buckets[index] += count
+
+        count = window["count"]
+        totals = self.totals
+        return {
+            "total": {
+                "count": totals["count"],
+                "errors": totals["errors"],
+                "success_rate": round(1 - totals["errors"] / totals["count"], 4) if totals["count"] else None,
+                "avg_latency_ms": round(totals["latency_ms"] / totals["count"], 1) if totals["count"] else None,
+                "input_tokens": totals["input_tokens"],
+                "output_tokens": totals["output_tokens"],
+                "total_tokens": totals["input_tokens"] + totals["output_tokens"],
+                "cost_usd": round(totals["cost_usd"], 4),
+                "last_at": self.last_at,
+            },
+            "window": {
+                "seconds": self.window_seconds,
+                "count": count,
+                "errors": window["errors"],
+                "error_rate": round(window["errors"] / count, 4) if count else None,
+                "avg_latency_ms": round(window["latency_ms"] / count, 1) if count else None,
+                "p50_ms": _percentile_ms(buckets, 0.50),
+                "p95_ms": _percentile_ms(buckets, 0.95),
+                "p99_ms": _percentile_ms(buckets, 0.99),
+                "total_tokens": window["input_tokens"] + window["output_tokens"],
+                "cost_usd": round(window["cost"], 4),
+                "histogram": dict(zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], buckets)),
+            },
+        }
+
+    def restore(self, totals: Dict[str, Any]) -> None:
+        """Recupera los totales persistidos (la ventana móvil empieza vacía)."""
+        for key in self.totals:
+            if key in totals:
+                self.totals[key] += totals[key]
+
+
+class AgentMetricsRegistry:
+    """Registro de métricas de agentes en memoria con persistencia periódica en Postgres."""
+
+    def __init__(
+        self,
+        db: Any = None,
+        table_name: str = "maas_agent_metrics",
+        window_seconds: float = 3600.0,
+        slot_seconds: float = 60.0,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+        recent_runs: int = 50,
+        retain_snapshots: int = 2016,
+    ):
+        self.db = db
+        self.table_name = table_name
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.prices = prices or MODEL_PRICES_PER_MTOK
+        self.scopes: Dict[str, Dict[str, RollingStats]] = {scope: {} for scope in SCOPES}
+        self._open_runs: Dict[str, Dict[str, Any]] = {}
+        self.recent_runs: Deque[Dict[str, Any]] = deque(maxlen=recent_runs)
+        self.retain_snapshots = retain_snapshots
+        self.started_at = time.time()
+        self._table_ready = False
+
+    def _stats(self, scope: str, key: str) -> RollingStats:
+        stats = self.scopes[scope].get(key)
+        if stats is None:
+            stats = self.scopes[scope][key] = RollingStats(self.window_seconds, self.slot_seconds)
+        return stats
+
+    def record_agent_run(
+        self,
+        agent: str,
+        run: Any,
+        latency_seconds: float,
+        section_id: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        error: bool = False,
+    ) -> None:
+        """Registra una ejecución de agente a partir de su RunOutput (None si falló antes de producirlo)."""
+        metrics = getattr(run, "metrics", None)
+        input_tokens = int(getattr(metrics, "input_tokens", 0) or 0)
+        output_tokens = int(getattr(metrics, "output_tokens", 0) or 0)
+        if not input_tokens and not output_tokens:
+            # Resultados sin desglose (p.ej. modo batch): todo cuenta como entrada
+            input_tokens = int(getattr(metrics, "total_tokens", 0) or 0)
+        model_id = getattr(run, "model", None)
+        cost = estimate_cost(model_id, input_tokens, output_tokens, self.prices)
+        latency_ms = latency_seconds * 1000
+        sample = dict(latency_ms=latency_ms, error=error, input_tokens=input_tokens, output_tokens=output_tokens, cost=cost)
+
+        self._stats("agent", agent).record(**sample)
+        if section_id:
+            self._stats("section", section_id).record(**sample)
+        if model_id:
+            self._stats("model", model_id).record(**sample)
+
+        tool_calls = 0
+        for tool in getattr(run, "tools", None) or []:
+            tool_calls += 1
+            duration = getattr(getattr(tool, "metrics", None), "duration", None) or 0.0
+            self._stats("tool", getattr(tool, "tool_name", None) or "unknown").record(
+                latency_ms=duration * 1000, error=bool(getattr(tool, "tool_call_error", False))
+            )
+
+        current = self._open_runs.get(workflow_id) if workflow_id else None
+        if current is not None:
+            current["agent_calls"] += 1
+            current["tool_calls"] += tool_calls
+            current["errors"] += int(error)
+            current["input_tokens"] += input_tokens
+            current["output_tokens"] += output_tokens
+            current["cost_usd"] += cost
+
+    def start_run(self, workflow_id: str, project_id: Any = None) -> None:
+        self._open_runs[workflow_id] = {
+            "workflow_id": workflow_id, "project_id": project_id, "started_at": time.time(),
+            "agent_calls": 0, "tool_calls": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+        }
+
+    def finish_run(self, workflow_id: str, status: str, kind: str = "DocumentCreationWorkflow") -> Optional[Dict[str, Any]]:
+        """Cierra la ejecución: registra su duración y totales en el ámbito "workflow"."""
+        current = self._open_runs.pop(workflow_id, None)
+        if current is None:
+            return None
+        current["duration_ms"] = round((time.time() - current["started_at"]) * 1000, 1)
+        current["status"] = status
+        current["cost_usd"] = round(current["cost_usd"], 4)
+        self._stats("workflow", kind).record(
+            latency_ms=current["duration_ms"], error=status not in ("success", "partial"),
+            input_tokens=current["input_tokens"], output_tokens=current["output_tokens"], cost=current["cost_usd"],
+        )
+        self.recent_runs.append(current)
+        return current
+
+    @property
+    def active_runs(self) -> int:
+        return len(self._open_runs)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "active_runs": self.active_runs,
+            **{scope: {key: stats.snapshot(now) for key, stats in entries.items()} for scope, entries in self.scopes.items()},
+            "recent_runs": list(self.recent_runs),
+        }
+
+    # ---------------------------------------------------------------- persistencia
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                id BIGSERIAL PRIMARY KEY,
+                totals JSONB NOT NULL,
+                snapshot JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        self._table_ready = True
+
+    def _totals(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        return {
+            scope: {key: dict(stats.totals) for key, stats in entries.items()}
+            for scope, entries in self.scopes.items()
+        }
+
+    def _payloads(self) -> Tuple[str, str]:
+        """
+        JSON de totales (para restaurar) e instantánea completa (para análisis histórico).
+        Debe construirse en el hilo que registra (el event loop): recorre scopes y ventanas.
+        """
+        return json.dumps(self._totals()), json.dumps(self.snapshot(), default=str)
+
+    def _write_sync(self, totals: str, snapshot: str) -> bool:
+        if self.db is None:
+            return False
+        try:
+            self._ensure_table()
+            self.db.execute(f"INSERT INTO {self.table_name} (totals, snapshot) VALUES (%s, %s)", totals, snapshot)
+            # Con el intervalo por defecto (5 min) se conserva una semana de instantáneas
+            self.db.execute(
+                f"DELETE FROM {self.table_name} WHERE id <= (SELECT MAX(id) FROM {self.table_name}) - %s",
+                self.retain_snapshots,
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Error persistiendo métricas de agentes: {str(e)[:100]}")
+            return False
+
+    def _read_sync(self) -> Optional[Dict[str, Any]]:
+        try:
+            self._ensure_table()
+            row = self.db.fetchone(f"SELECT totals FROM {self.table_name} ORDER BY id DESC LIMIT 1")
+        except Exception as e:
+            logger.warning(f"⚠️ Error cargando métricas de agentes: {str(e)[:100]}")
+            return None
+        if not row:
+            return None
+        totals = row.get("totals")
+        return json.loads(totals) if isinstance(totals, str) else totals
+
+    def _restore(self, totals: Optional[Dict[str, Any]]) -> bool:
+        if not totals:
+            return False
+        for scope, entries in totals.items():
+            if scope in self.scopes:
+                for key, values in entries.items():
+                    self._stats(scope, key).restore(values)
+        return True
+
+    def flush_sync(self) -> bool:
+        """Persiste totales e instantánea (desde el hilo que registra; ver flush())."""
+        if self.db is None:
+            return False
+        return self._write_sync(*self._payloads())
+
+    def load_sync(self) -> bool:
+        """Restaura los totales de la última instantánea persistida."""
+        if self.db is None:
+            return False
+        return self._restore(self._read_sync())
+
+    async def flush(self) -> bool:
+        """El JSON se construye en el event loop; solo la escritura en BD va a un hilo."""
+        if self.db is None:
+            return False
+        return await asyncio.to_thread(self._write_sync, *self._payloads())
+
+    async def load(self) -> bool:
+        if self.db is None:
+            return False
+        return self._restore(await asyncio.to_thread(self._read_sync))
+
+    async def run_periodic_flush(self, flush_interval: float = 300.0) -> None:
+        """Bucle de persistencia; cancelarlo hace un último flush."""
+        try:
+            while True:
+                await asyncio.sleep(flush_interval)
+                await self.flush()
+        finally:
+            await self.flush()
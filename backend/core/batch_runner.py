@@ -0,0 +1,248 @@
+"""
+Batch Runner - Modo bulk sobre la Batch API de OpenAI
+
+Para regenerar de noche muchos proyectos no hace falta latencia interactiva.
+En modo bulk, DocumentCreationWorkflow ejecuta el DAG ola a ola (niveles
+topológicos) y cada llamada de Author/Judge, en lugar de `agent.arun`, se
+encola en el `OpenAIBatchRunner` activo (ContextVar, igual que el deadline):
+
+    1. Las peticiones que llegan dentro de `linger_seconds` se agrupan en un
+       único fichero JSONL (`/v1/chat/completions`), también entre workflows
+       concurrentes de un backfill de cartera.
+    2. Se sube el fichero (`purpose="batch"`), se crea el batch y se consulta
+       su estado cada `poll_interval` segundos hasta un estado terminal. Si
+       todos los llamadores del batch se cancelan (p.ej. por el deadline de la
+       ejecución) se deja de consultar y el batch se cancela en OpenAI.
+    3. Se descargan los ficheros de salida/errores y cada resultado vuelve a
+       su llamada por `custom_id`.
+
+La Batch API no ejecuta herramientas: el prompt ya incluye el contexto
+empaquetado (dependencias, reglas) y la salida se fuerza con el JSON Schema
+del `output_schema` del agente. Un fallo por petición lanza
+`BatchRequestError` y el workflow reintenta esa llamada en modo interactivo.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+_active_runner: ContextVar[Optional["OpenAIBatchRunner"]] = ContextVar("maas_batch_runner", default=None)
+
+
+class BatchRequestError(RuntimeError):
+    """Una petición del batch no produjo una respuesta utilizable."""
+
+
+@contextmanager
+def use_batch_runner(runner: Optional["OpenAIBatchRunner"]) -> Iterator[None]:
+    """Envía las llamadas de agente del contexto actual a `runner` (None = interactivo)."""
+    token = _active_runner.set(runner)
+    try:
+        yield
+    finally:
+        _active_runner.reset(token)
+
+
+def active_batch_runner() -> Optional["OpenAIBatchRunner"]:
+    return _active_runner.get()
+
+
+def _instructions_text(agent: Any) -> str:
+    instructions = getattr(agent, "instructions", None) or []
+    if isinstance(instructions, str):
+        instructions = [instructions]
+    parts = [getattr(agent, "description", None) or ""] + [f"- {line}" for line in instructions if isinstance(line, str)]
+    return "\n".join(part for part in parts if part)
+
+
+def build_chat_body(agent: Any, prompt: str, default_model: str = "gpt-4o") -> Dict[str, Any]:
+    """Cuerpo `/v1/chat/completions` equivalente a `agent.arun(prompt)` sin herramientas."""
+    model = getattr(getattr(agent, "model", None), "id", None) or default_model
+    messages = []
+    system = _instructions_text(agent)
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    body: Dict[str, Any] = {"model": model, "messages": messages}
+
+    output_schema = getattr(agent, "output_schema", None)
+    if output_schema is not None and hasattr(output_schema, "model_json_schema"):
+        body["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": output_schema.__name__, "schema": output_schema.model_json_schema(), "strict": False},
+        }
+    return body
+
+
+def parse_chat_result(agent: Any, response_body: Dict[str, Any]) -> Any:
+    """Convierte la respuesta del batch en un objeto con la forma de RunOutput (content, metrics)."""
+    try:
+        text = response_body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        raise BatchRequestError("Respuesta de batch sin choices")
+    content: Any = text
+    output_schema = getattr(agent, "output_schema", None)
+    if output_schema is not None and hasattr(output_schema, "model_validate_json"):
+        try:
+            content = output_schema.model_validate_json(text or "")
+        except Exception as e:
+            raise BatchRequestError(f"Salida no válida para {output_schema.__name__}: {str(e)[:100]}")
+    usage = response_body.get("usage") or {}
+    return SimpleNamespace(content=content, metrics=SimpleNamespace(total_tokens=usage.get("total_tokens", 0)))
+
+
+class OpenAIBatchRunner:
+    """
+    Agrupa llamadas de chat en jobs de la Batch API y las resuelve por `custom_id`.
+
+    Args:
+        client: openai.AsyncOpenAI (o compatible, p.ej. apuntando al stand-in local)
+        poll_interval: segundos entre consultas del estado del batch
+        linger_seconds: ventana de agrupación de peticiones en un mismo batch
+        max_requests: máximo de líneas por fichero (límite de la Batch API: 50.000)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        poll_interval: float = 30.0,
+        completion_window: str = "24h",
+        linger_seconds: float = 2.0,
+        max_requests: int = 50_000,
+    ):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.linger_seconds = linger_seconds
+        self.max_requests = max_requests
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats: Dict[str, Any] = {
+            "batches": 0, "requests": 0, "failed_requests": 0, "cancelled_batches": 0, "wait_seconds": 0.0,
+        }
+
+    async def run_agent(self, agent: Any, prompt: str, custom_id: Optional[str] = None) -> Any:
+        """Equivalente batch de `agent.arun(prompt)`: espera a que el batch que la contiene termine."""
+        response_body = await self.submit(build_chat_body(agent, prompt), custom_id)
+        return parse_chat_result(agent, response_body)
+
+    async def submit(self, body: Dict[str, Any], custom_id: Optional[str] = None) -> Dict[str, Any]:
+        """Encola una petición y devuelve el `response.body` de su línea de salida."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # custom_id debe ser único dentro del fichero
+        self._pending.append((f"{custom_id or 'req'}#{uuid.uuid4().hex[:8]}", body, future))
+        if len(self._pending) >= self.max_requests:
+            batch, self._pending = self._pending, []
+            self._spawn(self._run_batch(batch))
+        elif self._flush_task is None:
+            self._flush_task = self._spawn(self._linger_then_flush())
+        return await future
+
+    def _spawn(self, coro: Any) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _linger_then_flush(self) -> None:
+        await asyncio.sleep(self.linger_seconds)
+        batch, self._pending, self._flush_task = self._pending, [], None
+        if batch:
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        # Peticiones cuyo llamador ya se canceló (p.ej. deadline) no se envían
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        started = time.monotonic()
+        try:
+            results = await self._execute(batch)
+        except BaseException as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else BatchRequestError(str(e)))
+                    future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        self.stats["wait_seconds"] += time.monotonic() - started
+        for custom_id, _, future in batch:
+            if future.done():
+                continue
+            result = results.get(custom_id)
+            response = (result or {}).get("response") or {}
+            if result and not result.get("error") and response.get("status_code", 200) < 400:
+                future.set_result(response.get("body") or {})
+            else:
+                self.stats["failed_requests"] += 1
+                error = (result or {}).get("error") or response.get("body", {}).get("error") or "sin resultado"
+                future.set_exception(BatchRequestError(f"{custom_id}: {str(error)[:200]}"))
+                future.exception()
+
+    async def _cancel(self, batch_id: str) -> None:
+        try:
+            await self.client.batches.cancel(batch_id)
+            self.stats["cancelled_batches"] += 1
+            logger.info(f"🛑 [BATCH] {batch_id} cancelado: todas sus llamadas se abandonaron")
+        except Exception as e:
+            logger.warning(f"⚠️ [BATCH] No se pudo cancelar {batch_id}: {str(e)[:100]}")
+
+    async def _execute(self, batch: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> Dict[str, Dict[str, Any]]:
+        """Sube el JSONL, crea el batch, espera su fin y devuelve las líneas de resultado por custom_id."""
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}, ensure_ascii=False)
+            for custom_id, body, _ in batch
+        ]
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+        input_file = await self.client.files.create(file=("maas_batch.jsonl", payload), purpose="batch")
+        job = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"source": "maas_bulk"},
+        )
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(batch)
+        logger.info(f"📦 [BATCH] {job.id} enviado con {len(batch)} peticiones")
+
+        futures = [future for _, _, future in batch]
+        while job.status not in TERMINAL_STATUSES:
+            await asyncio.wait(futures, timeout=self.poll_interval)
+            if all(future.done() for future in futures):
+                # Nadie espera ya el resultado: no seguir consultando ni pagando el batch
+                await self._cancel(job.id)
+                return {}
+            job = await self.client.batches.retrieve(job.id)
+
+        counts = getattr(job, "request_counts", None)
+        logger.info(
+            f"📦 [BATCH] {job.id} {job.status} "
+            f"({getattr(counts, 'completed', '?')} ok / {getattr(counts, 'failed', '?')} fallidas)"
+        )
+        results: Dict[str, Dict[str, Any]] = {}
+        for file_id in (getattr(job, "output_file_id", None), getattr(job, "error_file_id", None)):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    results[record["custom_id"]] = record
+        if job.status != "completed" and not results:
+            raise BatchRequestError(f"Batch {job.id} terminó en estado {job.status}")
+        return results
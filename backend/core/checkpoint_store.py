@@ -0,0 +1,173 @@
+"""
+Section Checkpoint Store - Durabilidad de secciones SIC por workflow
+
+Persiste cada sección terminada (SIC_DTO, QC score y crítica del Judge) en
+Postgres a través del pool de AsyncPostgresDb en cuanto finaliza, de modo
+que una ejecución interrumpida pueda reanudarse por `workflow_id` sin volver
+a pagar las secciones ya aprobadas.
+
+Cada checkpoint guarda además las lecturas Redmine de la sección
+(ver `backend.core.provenance`), base de la regeneración incremental.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema
+from backend.core.provenance import SectionReads
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SectionCheckpoint:
+    """Resultado persistido de un nodo del DAG."""
+    workflow_id: str
+    section_id: str
+    dto: Optional[SIC_DTO]
+    qc_score: float
+    critique: Optional[FeedbackCritiqueSchema]
+    approved: bool
+    reads: Optional[SectionReads] = None
+
+
+class SectionCheckpointStore:
+    """
+    Checkpoints de secciones sobre AsyncPostgresDb.
+
+    Las operaciones del driver son bloqueantes (psycopg3 + ConnectionPool), por lo
+    que se ejecutan en un hilo para no detener el event loop del workflow.
+    """
+
+    def __init__(self, db: Any, table_name: str = "maas_section_checkpoints"):
+        self.db = db
+        self.table_name = table_name
+        self._table_ready = False
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                workflow_id VARCHAR(255) NOT NULL,
+                section_id VARCHAR(50) NOT NULL,
+                project_id VARCHAR(255),
+                dto JSONB,
+                qc_score DOUBLE PRECISION DEFAULT 0,
+                critique JSONB,
+                approved BOOLEAN DEFAULT FALSE,
+                reads JSONB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (workflow_id, section_id)
+            );
+
+            ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS reads JSONB;
+
+            CREATE INDEX IF NOT EXISTS idx_{self.table_name}_project_id
+            ON {self.table_name}(project_id);
+        """)
+        self._table_ready = True
+
+    def _save_sync(
+        self,
+        workflow_id: str,
+        project_id: Any,
+        section_id: str,
+        dto: Optional[SIC_DTO],
+        qc_score: float,
+        critique: Optional[FeedbackCritiqueSchema],
+        approved: bool,
+        reads: Optional[SectionReads] = None,
+    ) -> None:
+        self._ensure_table()
+        self.db.execute(
+            f"""
+            INSERT INTO {self.table_name}
+                (workflow_id, section_id, project_id, dto, qc_score, critique, approved, reads, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (workflow_id, section_id) DO UPDATE SET
+                dto = EXCLUDED.dto,
+                qc_score = EXCLUDED.qc_score,
+                critique = EXCLUDED.critique,
+                approved = EXCLUDED.approved,
+                reads = EXCLUDED.reads,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            workflow_id,
+            section_id,
+            str(project_id),
+            json.dumps(dto.model_dump()) if dto else None,
+            float(qc_score or 0),
+            json.dumps(critique.model_dump()) if critique else None,
+            approved,
+            json.dumps(reads.to_dict()) if reads else None,
+        )
+
+    def _load_sync(self, workflow_id: str) -> Dict[str, SectionCheckpoint]:
+        self._ensure_table()
+        rows = self.db.fetch(
+            f"""
+            SELECT workflow_id, section_id, dto, qc_score, critique, approved, reads
+            FROM {self.table_name}
+            WHERE workflow_id = %s
+            """,
+            workflow_id,
+        )
+        checkpoints: Dict[str, SectionCheckpoint] = {}
+        for row in rows:
+            dto = row.get("dto")
+            critique = row.get("critique")
+            reads = row.get("reads")
+            if isinstance(dto, str):
+                dto = json.loads(dto)
+            if isinstance(critique, str):
+                critique = json.loads(critique)
+            if isinstance(reads, str):
+                reads = json.loads(reads)
+            checkpoints[row["section_id"]] = SectionCheckpoint(
+                workflow_id=row["workflow_id"],
+                section_id=row["section_id"],
+                dto=SIC_DTO(**dto) if dto else None,
+                qc_score=row.get("qc_score") or 0,
+                critique=FeedbackCritiqueSchema(**critique) if critique else None,
+                approved=bool(row.get("approved")),
+                reads=SectionReads.from_dict(reads),
+            )
+        return checkpoints
+
+    async def save_section(
+        self,
+        workflow_id: str,
+        project_id: Any,
+        section_id: str,
+        dto: Optional[SIC_DTO],
+        qc_score: float,
+        critique: Optional[FeedbackCritiqueSchema],
+        approved: bool,
+        reads: Optional[SectionReads] = None,
+    ) -> bool:
+        """
+        Persiste el resultado de una sección. Un fallo de persistencia no debe
+        romper la generación del documento: se registra y se devuelve False.
+        """
+        try:
+            await asyncio.to_thread(
+                self._save_sync, workflow_id, project_id, section_id, dto, qc_score, critique, approved, reads
+            )
+            logger.debug(f"💾 Checkpoint {workflow_id}/{section_id} persistido")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo persistir checkpoint {workflow_id}/{section_id}: {str(e)[:100]}")
+            return False
+
+    async def load_workflow(self, workflow_id: str) -> Dict[str, SectionCheckpoint]:
+        """Devuelve los checkpoints de un workflow (section_id -> SectionCheckpoint)."""
+        try:
+            return await asyncio.to_thread(self._load_sync, workflow_id)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron cargar checkpoints de {workflow_id}: {str(e)[:100]}")
+            return {}
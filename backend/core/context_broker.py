@@ -1,7 +1,7 @@
 import os
 import asyncio
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from agno.db.postgres import PostgresDb
 from backend.core.async_postgres_db import AsyncPostgresDb
 from agno.knowledge.knowledge import Knowledge
@@ -9,9 +9,37 @@ from agno.vectordb.pgvector import PgVector, SearchType
 from agno.knowledge.embedder.openai import OpenAIEmbedder
 from agno.knowledge.reader.markdown_reader import MarkdownReader
 from agno.knowledge.reader.text_reader import TextReader
+from agno.knowledge.document import Document
+from backend.core.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Búsquedas idénticas concurrentes (misma consulta desde dos secciones) comparten embedding y consulta
+knowledge_flight = SingleFlight("pgvector")
+
+
+class SingleFlightPgVector(PgVector):
+    """PgVector cuyas búsquedas idénticas en vuelo se coalescen en una sola (ver SingleFlight)."""
+
+    def _search_key(self, query: str, limit: int, filters: Any) -> tuple:
+        return (self.schema, self.table_name, query, limit, repr(filters))
+
+    def search(
+        self, query: str, limit: int = 5, filters: Optional[Union[Dict[str, Any], List[Any]]] = None
+    ) -> List[Document]:
+        return list(knowledge_flight.do_sync(
+            self._search_key(query, limit, filters),
+            lambda: super(SingleFlightPgVector, self).search(query, limit=limit, filters=filters)
+        ))
+
+    async def async_search(
+        self, query: str, limit: int = 5, filters: Optional[Union[Dict[str, Any], List[Any]]] = None
+    ) -> List[Document]:
+        return list(await knowledge_flight.do(
+            self._search_key(query, limit, filters),
+            lambda: super(SingleFlightPgVector, self).async_search(query, limit=limit, filters=filters)
+        ))
+
 class ContextBroker:
     """
     The Context Broker acts as the Single Source of Truth for all Holons.
@@ -50,7 +78,7 @@ class ContextBroker:
         
         # 2. Project Knowledge Base (Dynamic Data) - Uses PgVector (async-compatible)
         self.project_kb = Knowledge(
-            vector_db=PgVector(
+            vector_db=SingleFlightPgVector(
                 table_name="project_knowledge",
                 db_url=db_url,
                 search_type=SearchType.hybrid,
@@ -61,7 +89,7 @@ class ContextBroker:
         # 3. Rules Knowledge Base (Static Business Rules) - Uses PostgresDb for Agno compatibility
         # TODO: CAMBIO 2.5: Migrate to AsyncPostgresDb once Agno Knowledge supports async contents_db
         self.rules_kb = Knowledge(
-            vector_db=PgVector(
+            vector_db=SingleFlightPgVector(
                 table_name="business_rules",
                 db_url=db_url,
                 search_type=SearchType.hybrid,
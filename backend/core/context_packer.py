@@ -0,0 +1,274 @@
+"""
+Context Packer - Ensamblaje de contexto por presupuesto de tokens
+
+Sustituye los truncamientos por caracteres (`summary_markdown[:10000]` en el
+Judge, `[:50000]` en la auditoría background) y el contexto ad-hoc de
+dependencias (búsqueda de ETP para SIC 16) por un empaquetado con
+presupuesto fijo de tokens del modelo destino.
+
+Cada prompt se compone de partes con prioridad (metadatos de dependencias,
+tablas clave, reglas de la plantilla, crítica previa, borrador...). Si el
+total excede el presupuesto, se recorta empezando por la parte de menor
+prioridad, en tres etapas:
+    1. Resumen extractivo: se conservan encabezados, filas de tabla y la
+       primera frase de cada párrafo (la cola de la sección sigue visible).
+    2. Truncamiento cabeza + cola con marcador explícito de lo omitido.
+    3. Descarte de partes no obligatorias, listadas en el prompt.
+
+El conteo usa tiktoken si está instalado (encoding del modelo); sin él se
+aplica una estimación conservadora por caracteres.
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:  # Dependencia opcional: estimación por caracteres
+    tiktoken = None
+
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = "gpt-4o"
+# Estimación sin tiktoken: texto técnico en español ronda 3.5-4 caracteres por token
+CHARS_PER_TOKEN = 3.5
+# Fracción del espacio de truncamiento reservada a la cola de la parte
+TAIL_RATIO = 0.3
+
+
+@lru_cache(maxsize=16)
+def _encoding(model_id: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_id)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken descarga el BPE en el primer uso: sin red se usa la estimación por
+        # caracteres (None queda cacheado, no se reintenta la descarga en cada prompt)
+        logger.warning(f"⚠️ tiktoken no disponible para {model_id}, estimación por caracteres: {str(e)[:100]}")
+        return None
+
+
+class TokenCounter:
+    """Conteo y truncamiento en tokens del modelo `model_id`."""
+
+    def __init__(self, model_id: Optional[str] = None):
+        self.model_id = model_id or DEFAULT_MODEL_ID
+        self._encoding = _encoding(self.model_id)
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Conserva cabeza y cola hasta `max_tokens`, marcando explícitamente lo omitido."""
+        total = self.count(text)
+        if total <= max_tokens:
+            return text
+        marker = f"\n[... {{omitted}} tokens omitidos por presupuesto ...]\n"
+        available = max(0, max_tokens - self.count(marker.format(omitted=total)))
+        tail = int(available * TAIL_RATIO)
+        head = available - tail
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            head_text = self._encoding.decode(tokens[:head])
+            tail_text = self._encoding.decode(tokens[len(tokens) - tail:]) if tail else ""
+        else:
+            head_text = text[:int(head * CHARS_PER_TOKEN)]
+            tail_text = text[len(text) - int(tail * CHARS_PER_TOKEN):] if tail else ""
+        return f"{head_text}{marker.format(omitted=total - head - tail)}{tail_text}"
+
+
+def outline(text: str) -> str:
+    """
+    Resumen extractivo de Markdown: encabezados, filas de tabla, líneas en
+    negrita y la primera frase de cada párrafo.
+    """
+    kept: List[str] = []
+    in_paragraph = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            in_paragraph = False
+            continue
+        if stripped.startswith(("#", "|", "**", "- **")) or re.match(r"^\d+(\.\d+)*\.?\s", stripped):
+            kept.append(line)
+            in_paragraph = False
+        elif not in_paragraph:
+            sentence = re.split(r"(?<=[.!?])\s", stripped, maxsplit=1)[0]
+            kept.append(sentence if sentence.endswith((".", "!", "?")) else f"{sentence} …")
+            in_paragraph = True
+    return "\n".join(kept)
+
+
+@dataclass
+class ContextPart:
+    """Fragmento de prompt con prioridad (mayor = se conserva antes)."""
+    name: str
+    text: str
+    priority: int = 0
+    required: bool = False
+    summarizable: bool = True
+    title: Optional[str] = None
+
+    def render(self, text: Optional[str] = None) -> str:
+        body = self.text if text is None else text
+        return f"### {self.title}\n{body}" if self.title else body
+
+
+@dataclass
+class PackedContext:
+    text: str
+    tokens: int
+    budget: int
+    summarized: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.summarized or self.truncated or self.dropped)
+
+
+class ContextPacker:
+    """Empaqueta partes de contexto dentro de un presupuesto de tokens."""
+
+    def __init__(self, default_budget: int = 6000):
+        self.default_budget = default_budget
+
+    @staticmethod
+    def counter_for(agent: Any = None) -> TokenCounter:
+        """Contador para el modelo configurado en el agente (o el modelo por defecto)."""
+        return TokenCounter(getattr(getattr(agent, "model", None), "id", None))
+
+    def pack(
+        self,
+        parts: List[ContextPart],
+        budget: Optional[int] = None,
+        counter: Optional[TokenCounter] = None,
+    ) -> PackedContext:
+        budget = budget or self.default_budget
+        counter = counter or TokenCounter()
+        parts = [part for part in parts if part.text]
+        texts: Dict[int, Optional[str]] = {i: part.text for i, part in enumerate(parts)}
+        sizes: Dict[int, int] = {i: counter.count(part.render()) for i, part in enumerate(parts)}
+        result = PackedContext(text="", tokens=0, budget=budget)
+
+        # Menor prioridad primero; a igual prioridad, la parte más tardía del prompt
+        trim_order = sorted(range(len(parts)), key=lambda i: (parts[i].priority, -i))
+
+        def total() -> int:
+            return sum(size for i, size in sizes.items() if texts[i] is not None)
+
+        for stage in ("summarize", "truncate", "drop"):
+            for i in trim_order:
+                excess = total() - budget
+                if excess <= 0:
+                    break
+                part = parts[i]
+                if texts[i] is None:
+                    continue
+                if stage == "summarize" and part.summarizable:
+                    summary = outline(texts[i])
+                    if counter.count(part.render(summary)) < sizes[i]:
+                        texts[i] = summary
+                        sizes[i] = counter.count(part.render(summary))
+                        result.summarized.append(part.name)
+                elif stage == "truncate" and part.summarizable:
+                    header = counter.count(part.render("")) + 1
+                    allowed = max(32, sizes[i] - excess - header)
+                    truncated = counter.truncate(texts[i], allowed)
+                    if truncated != texts[i]:
+                        texts[i] = truncated
+                        sizes[i] = counter.count(part.render(truncated))
+                        result.truncated.append(part.name)
+                elif stage == "drop" and not part.required:
+                    texts[i] = None
+                    result.dropped.append(part.name)
+
+        blocks = [part.render(texts[i]) for i, part in enumerate(parts) if texts[i] is not None]
+        if result.dropped:
+            blocks.append(f"[Contexto omitido por presupuesto de tokens: {', '.join(result.dropped)}]")
+        result.text = "\n\n".join(blocks)
+        result.tokens = counter.count(result.text)
+        if result.trimmed:
+            logger.info(
+                f"📦 Contexto empaquetado en {result.tokens}/{budget} tokens "
+                f"(resumidas: {result.summarized}, truncadas: {result.truncated}, omitidas: {result.dropped})"
+            )
+        return result
+
+
+# ==================== PARTES ESTÁNDAR DEL WORKFLOW ====================
+
+def dependency_parts(dependencies: List[str], completed_sections: Dict[str, SIC_DTO]) -> List[ContextPart]:
+    """Metadatos (prioridad alta), tablas clave y contenido (baja) de cada DTO aguas arriba."""
+    parts: List[ContextPart] = []
+    for dep in dependencies:
+        dto = completed_sections.get(dep)
+        if not dto:
+            continue
+        if dto.metadata:
+            parts.append(ContextPart(
+                name=f"{dep}.metadata", title=f"{dep} · Metadatos", priority=80, summarizable=False,
+                text="\n".join(f"- {kv.key}: {kv.value}" for kv in dto.metadata),
+            ))
+        if dto.key_tables_markdown:
+            parts.append(ContextPart(
+                name=f"{dep}.tables", title=f"{dep} · Tablas clave", priority=50, text=dto.key_tables_markdown,
+            ))
+        if dto.summary_markdown:
+            parts.append(ContextPart(
+                name=f"{dep}.summary", title=f"{dep} · Contenido", priority=10, text=dto.summary_markdown,
+            ))
+    return parts
+
+
+def critique_part(critique: Optional[FeedbackCritiqueSchema]) -> ContextPart:
+    """Crítica previa del Judge (o del pre-chequeo): se conserva siempre."""
+    if critique is None:
+        return ContextPart(name="critique", title="CRÍTICA PREVIA", text="INICIO", priority=100, required=True)
+    lines = [critique.actionable_recommendation]
+    lines += [f"- {gap}" for gap in critique.critical_gaps]
+    return ContextPart(
+        name="critique", title="CRÍTICA PREVIA", priority=100, required=True, summarizable=False,
+        text="\n".join(line for line in lines if line),
+    )
+
+
+def draft_parts(dto: SIC_DTO) -> List[ContextPart]:
+    """Borrador a auditar: tablas clave por encima del texto, que se resume antes de truncarse."""
+    return [
+        ContextPart(name="draft.tables", title="TABLAS CLAVE", text=dto.key_tables_markdown, priority=70),
+        ContextPart(name="draft.summary", title="TEXTO", text=dto.summary_markdown, priority=60, required=True),
+    ]
+
+
+def rules_part(template_block: str) -> ContextPart:
+    """Índice y contenido requerido de la sección según la plantilla maestra."""
+    return ContextPart(name="rules", title="REGLAS DE LA PLANTILLA", text=template_block, priority=40)
+
+
+def document_parts(markdown: str) -> List[ContextPart]:
+    """Documento ensamblado dividido por secciones de primer nivel ("# SIC_XX: ...")."""
+    chunks = re.split(r"(?m)^(?=# )", markdown)
+    return [
+        ContextPart(name=chunk.split("\n", 1)[0][2:40].strip() or f"parte_{index}", text=chunk.strip(), priority=50)
+        for index, chunk in enumerate(chunks) if chunk.strip()
+    ]
@@ -0,0 +1,229 @@
+"""
+DAG Scheduler - Ejecución concurrente de nodos dirigida por dependencias
+
+Ejecuta cada nodo del Grafo de Dependencias (DAG) en cuanto todas sus
+dependencias han finalizado, respetando un límite configurable de
+concurrencia. Sustituye el recorrido secuencial de `plan.sections` en
+DocumentCreationWorkflow (AGDR v5.0).
+
+Entre los nodos listos se despacha primero el de mayor prioridad de camino
+crítico: la duración estimada del nodo más el camino más largo hasta un
+sumidero (p.ej. SIC_03 -> SIC_16 -> SIC_14 -> SIC_15 -> SIC_12 -> SIC_17).
+"""
+
+import asyncio
+import heapq
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DAGCycleError(ValueError):
+    """El grafo contiene un ciclo y no puede ejecutarse."""
+
+
+class DAGScheduler:
+    """
+    Planificador asíncrono de un DAG de nodos (secciones SIC).
+
+    - Arranca cada nodo apenas sus dependencias están completas.
+    - Limita el número de nodos en vuelo con `max_concurrency`.
+    - Fail-fast: ante la primera excepción cancela los nodos en vuelo y la relanza.
+    - Prioriza los nodos listos por camino crítico según `durations` (segundos
+      históricos por nodo; los desconocidos valen `default_duration`).
+    """
+
+    def __init__(
+        self,
+        dependencies: Dict[str, Iterable[str]],
+        max_concurrency: int = 4,
+        durations: Optional[Dict[str, float]] = None,
+        default_duration: float = 1.0,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser >= 1")
+        self.max_concurrency = max_concurrency
+        self.dependencies: Dict[str, List[str]] = {}
+
+        for node_id, deps in dependencies.items():
+            known_deps = []
+            for dep in deps:
+                if dep == node_id:
+                    raise DAGCycleError(f"El nodo {node_id} depende de sí mismo")
+                if dep not in dependencies:
+                    # Dependencia fuera del plan: no puede bloquear la ejecución
+                    logger.warning(f"⚠️ [DAG] {node_id} depende de {dep}, que no existe en el plan. Se ignora.")
+                    continue
+                known_deps.append(dep)
+            self.dependencies[node_id] = known_deps
+
+        self.dependents: Dict[str, List[str]] = {node_id: [] for node_id in self.dependencies}
+        for node_id, deps in self.dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(node_id)
+
+        self._order = self._topological_order()
+        self._position = {node_id: index for index, node_id in enumerate(self._order)}
+
+        durations = durations or {}
+        self.durations: Dict[str, float] = {
+            node_id: float(durations.get(node_id) or default_duration) for node_id in self.dependencies
+        }
+        self.priorities = self._critical_path_priorities()
+
+    @classmethod
+    def from_edges(
+        cls,
+        nodes: Iterable[str],
+        edges: Iterable[Tuple[str, str]],
+        max_concurrency: int = 4,
+        durations: Optional[Dict[str, float]] = None,
+    ) -> "DAGScheduler":
+        """Construye el planificador desde una lista de aristas (origen -> destino)."""
+        dependencies: Dict[str, List[str]] = {node_id: [] for node_id in nodes}
+        for source, target in edges:
+            if target in dependencies and source not in dependencies[target]:
+                dependencies[target].append(source)
+        return cls(dependencies, max_concurrency=max_concurrency, durations=durations)
+
+    def _critical_path_priorities(self) -> Dict[str, float]:
+        """Camino más largo (ponderado por duración) desde cada nodo hasta un sumidero, incluyéndolo."""
+        priorities: Dict[str, float] = {}
+        for node_id in reversed(self._order):
+            downstream = max((priorities[child] for child in self.dependents[node_id]), default=0.0)
+            priorities[node_id] = self.durations[node_id] + downstream
+        return priorities
+
+    @property
+    def critical_path(self) -> List[str]:
+        """Cadena de nodos que acota el makespan con concurrencia ilimitada."""
+        if not self._order:
+            return []
+        roots = [node_id for node_id in self._order if not self.dependencies[node_id]]
+        node_id = max(roots, key=lambda n: (self.priorities[n], -self._position[n]))
+        path = [node_id]
+        while self.dependents[node_id]:
+            node_id = max(self.dependents[node_id], key=lambda n: (self.priorities[n], -self._position[n]))
+            path.append(node_id)
+        return path
+
+    @property
+    def critical_path_length(self) -> float:
+        """Cota inferior del makespan (segundos estimados)."""
+        return max(self.priorities.values(), default=0.0)
+
+    def _ready_key(self, node_id: str) -> Tuple[float, int, str]:
+        # heapq es min-heap: mayor prioridad primero, desempate por orden topológico
+        return (-self.priorities[node_id], self._position[node_id], node_id)
+
+    def _topological_order(self) -> List[str]:
+        """Orden topológico estable (Kahn). Lanza DAGCycleError si hay ciclos."""
+        pending = {node_id: len(deps) for node_id, deps in self.dependencies.items()}
+        ready = [node_id for node_id in self.dependencies if pending[node_id] == 0]
+        order: List[str] = []
+
+        while ready:
+            node_id = ready.pop(0)
+            order.append(node_id)
+            for child in self.dependents[node_id]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+
+        if len(order) != len(self.dependencies):
+            blocked = sorted(set(self.dependencies) - set(order))
+            raise DAGCycleError(f"Ciclo detectado en el DAG entre: {blocked}")
+        return order
+
+    @property
+    def topological_order(self) -> List[str]:
+        return list(self._order)
+
+    @property
+    def waves(self) -> List[List[str]]:
+        """Niveles topológicos: cada ola depende solo de nodos de olas anteriores."""
+        level: Dict[str, int] = {}
+        for node_id in self._order:
+            level[node_id] = max((level[dep] + 1 for dep in self.dependencies[node_id]), default=0)
+        waves: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for node_id in self._order:
+            waves[level[node_id]].append(node_id)
+        return waves
+
+    def descendants(self, seeds: Iterable[str]) -> Set[str]:
+        """Cierre aguas abajo de `seeds` (incluidos): nodos afectados por un cambio en ellos."""
+        affected: Set[str] = set()
+        stack = [node_id for node_id in seeds if node_id in self.dependencies]
+        while stack:
+            node_id = stack.pop()
+            if node_id in affected:
+                continue
+            affected.add(node_id)
+            stack.extend(self.dependents[node_id])
+        return affected
+
+    async def run(self, node_fn: Callable[[str], Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Ejecuta `node_fn(node_id)` para todos los nodos respetando dependencias.
+
+        Returns:
+            Diccionario node_id -> resultado de `node_fn`.
+        """
+        results: Dict[str, Any] = {}
+        pending = {node_id: len(deps) for node_id, deps in self.dependencies.items()}
+        ready: List[Tuple[float, int, str]] = [
+            self._ready_key(node_id) for node_id in self._order if pending[node_id] == 0
+        ]
+        heapq.heapify(ready)
+        running: Dict[asyncio.Task, str] = {}
+
+        try:
+            while ready or running:
+                # Despachar nodos listos (camino crítico primero) hasta el límite de concurrencia
+                while ready and len(running) < self.max_concurrency:
+                    node_id = heapq.heappop(ready)[2]
+                    logger.debug(f"[DAG] Despachando {node_id} ({len(running) + 1}/{self.max_concurrency} en vuelo)")
+                    task = asyncio.create_task(node_fn(node_id), name=f"dag-node-{node_id}")
+                    running[task] = node_id
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    node_id = running.pop(task)
+                    results[node_id] = task.result()  # Propaga la excepción del nodo
+                    for child in self.dependents[node_id]:
+                        pending[child] -= 1
+                        if pending[child] == 0:
+                            heapq.heappush(ready, self._ready_key(child))
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+        return results
+
+    async def run_waves(self, node_fn: Callable[[str], Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Variante por olas (modo bulk): lanza juntos todos los nodos de una ola y
+        espera a que terminen antes de pasar a la siguiente. Sin límite de
+        concurrencia, para que las llamadas de la ola coincidan en un mismo batch.
+        """
+        results: Dict[str, Any] = {}
+        for index, wave in enumerate(self.waves, start=1):
+            logger.debug(f"[DAG] Ola {index}: {wave}")
+            tasks = {asyncio.create_task(node_fn(node_id), name=f"dag-node-{node_id}"): node_id for node_id in wave}
+            try:
+                done, _ = await asyncio.wait(tasks.keys(), return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if task.exception() is not None:
+                        raise task.exception()
+                for task, node_id in tasks.items():
+                    results[node_id] = task.result()
+            finally:
+                pending = [task for task in tasks if not task.done()]
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+        return results
@@ -0,0 +1,99 @@
+"""
+Run Deadline - Presupuesto de tiempo por ejecución del workflow
+
+`PreinversionRequest.timeout_seconds` fija un instante límite absoluto para
+toda la ejecución. El DocumentCreationWorkflow lo instala con `run_deadline`
+en su contexto (ContextVar), de modo que cada llamada aguas abajo (agentes,
+modelo OpenAI, Redmine) consulta el tiempo restante sin pasarlo por
+parámetro, igual que la provenance y los eventos de progreso. Ejecuciones
+concurrentes no comparten deadline.
+
+- Llamadas async (agentes / OpenAI): `with_deadline(aw)` cancela la tarea al
+  agotarse el presupuesto y lanza `DeadlineExceeded`.
+- Llamadas bloqueantes (Redmine): `call_timeout(default)` acota el timeout de
+  la petición HTTP al tiempo restante; `check_deadline` corta antes de empezar.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("maas_run_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Presupuesto de tiempo de la ejecución agotado."""
+
+    def __init__(self, stage: str = "run"):
+        super().__init__(f"Presupuesto de tiempo agotado ({stage})")
+        self.stage = stage
+
+
+def set_deadline(seconds: Optional[float]) -> Token:
+    """
+    Instala un deadline de `seconds` desde ahora (None/<=0: sin límite) y
+    devuelve el token para `reset_deadline`. Un deadline anidado nunca amplía
+    el del contexto exterior.
+    """
+    current = _deadline.get()
+    deadline = time.monotonic() + seconds if seconds and seconds > 0 else None
+    if current is not None and (deadline is None or current < deadline):
+        deadline = current
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+@contextmanager
+def run_deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Deadline de `seconds` durante el bloque."""
+    token = set_deadline(seconds)
+    try:
+        yield _deadline.get()
+    finally:
+        reset_deadline(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos restantes del deadline activo (None si no hay)."""
+    deadline = _deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def check_deadline(stage: str = "run") -> None:
+    """Lanza DeadlineExceeded si el presupuesto ya se agotó."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(stage)
+
+
+def call_timeout(default: float) -> float:
+    """Timeout para una llamada bloqueante: el menor entre `default` y el tiempo restante."""
+    check_deadline("call")
+    left = remaining()
+    return default if left is None else min(default, left)
+
+
+async def with_deadline(awaitable: Awaitable[T], stage: str = "run") -> T:
+    """Espera `awaitable` dentro del deadline activo; al agotarse lo cancela."""
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        if remaining() > 0:  # Timeout propio de la llamada, no del deadline
+            raise
+        raise DeadlineExceeded(stage) from None
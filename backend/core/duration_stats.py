@@ -0,0 +1,94 @@
+"""
+Section Duration Stats - Duraciones históricas por sección SIC
+
+Media móvil exponencial (EWMA) del tiempo de generación de cada sección,
+persistida en Postgres vía AsyncPostgresDb. El DAGScheduler la usa como
+peso de cada nodo para calcular prioridades de camino crítico.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SectionDurationStats:
+    """
+    Estadística EWMA de duración por section_id.
+    Sin `db` funciona solo en memoria (útil en tests y como degradación).
+    """
+
+    def __init__(self, db: Any = None, alpha: float = 0.3, table_name: str = "maas_section_durations"):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha debe estar en (0, 1]")
+        self.db = db
+        self.alpha = alpha
+        self.table_name = table_name
+        self.durations: Dict[str, float] = {}
+        self.samples: Dict[str, int] = {}
+        self._table_ready = False
+        self._loaded = False
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                section_id VARCHAR(50) PRIMARY KEY,
+                ewma_seconds DOUBLE PRECISION NOT NULL,
+                samples INTEGER DEFAULT 1,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        self._table_ready = True
+
+    def _load_sync(self) -> Dict[str, float]:
+        self._ensure_table()
+        rows = self.db.fetch(f"SELECT section_id, ewma_seconds, samples FROM {self.table_name}")
+        for row in rows:
+            self.durations[row["section_id"]] = float(row["ewma_seconds"])
+            self.samples[row["section_id"]] = int(row.get("samples") or 1)
+        return dict(self.durations)
+
+    def _save_sync(self, section_id: str, ewma_seconds: float, samples: int) -> None:
+        self._ensure_table()
+        self.db.execute(
+            f"""
+            INSERT INTO {self.table_name} (section_id, ewma_seconds, samples, updated_at)
+            VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (section_id) DO UPDATE SET
+                ewma_seconds = EXCLUDED.ewma_seconds,
+                samples = EXCLUDED.samples,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            section_id,
+            ewma_seconds,
+            samples,
+        )
+
+    async def load(self) -> Dict[str, float]:
+        """Duraciones estimadas (section_id -> segundos). Lee Postgres una sola vez por proceso."""
+        if self.db is not None and not self._loaded:
+            try:
+                await asyncio.to_thread(self._load_sync)
+                self._loaded = True
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron cargar duraciones históricas: {str(e)[:100]}")
+        return dict(self.durations)
+
+    def estimate(self, section_id: str) -> Optional[float]:
+        return self.durations.get(section_id)
+
+    async def record(self, section_id: str, seconds: float) -> None:
+        """Incorpora una observación a la EWMA y la persiste (best-effort)."""
+        previous = self.durations.get(section_id)
+        ewma = seconds if previous is None else self.alpha * seconds + (1 - self.alpha) * previous
+        self.durations[section_id] = ewma
+        self.samples[section_id] = self.samples.get(section_id, 0) + 1
+        if self.db is None:
+            return
+        try:
+            await asyncio.to_thread(self._save_sync, section_id, ewma, self.samples[section_id])
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo persistir duración de {section_id}: {str(e)[:100]}")
@@ -0,0 +1,145 @@
+"""
+Progress Event Bus - Fan-out de eventos del workflow a clientes en streaming
+
+Cada ejecución (workflow_id) es un tópico. `publish` nunca bloquea al
+workflow: entrega con `put_nowait` a la cola acotada de cada suscriptor y,
+si un cliente lento la llena, lo desconecta en lugar de aplicar
+backpressure al executor del DAG.
+
+Los tópicos conservan un historial corto para que un cliente que se
+suscribe a mitad de ejecución reciba el estado acumulado.
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = ("workflow_completed", "workflow_failed")
+
+
+class Subscription:
+    """Cola de eventos de un cliente. Iterable asíncrono hasta el cierre."""
+
+    def __init__(self, topic: Optional[str], max_queue: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+        self.closed = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """Entrega no bloqueante. Devuelve False si el cliente no da abasto."""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self, reason: Dict[str, Any]) -> None:
+        """Desconexión forzada: descarta lo pendiente y deja solo el evento de motivo."""
+        self.dropped = True
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(reason)
+
+    @property
+    def exhausted(self) -> bool:
+        """Cerrada y sin eventos pendientes de entregar."""
+        return self.closed and self.queue.empty()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Siguiente evento, o None si vence `timeout` (útil para heartbeats)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while not self.exhausted:
+            yield await self.queue.get()
+
+
+class ProgressEventBus:
+    """
+    Bus en memoria (por proceso) de eventos de progreso.
+    Debe usarse desde el event loop: los eventos del workflow se emiten en corrutinas.
+    """
+
+    def __init__(self, max_queue: int = 256, history_size: int = 200, max_topics: int = 100):
+        self.max_queue = max_queue
+        self.history_size = history_size
+        self.max_topics = max_topics
+        self._history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._subscribers: Dict[Optional[str], List[Subscription]] = {}
+        self.dropped_subscribers = 0
+
+    def subscribe(self, topic: Optional[str] = None, replay: bool = True) -> Subscription:
+        """
+        Suscribe a un workflow_id (o a todos con topic=None).
+        Con `replay` se entregan primero los eventos ya emitidos del tópico.
+        """
+        subscription = Subscription(topic, self.max_queue)
+        if replay and topic in self._history:
+            for event in list(self._history[topic])[-self.max_queue:]:
+                subscription.offer(event)
+            if self._history[topic][-1].get("event") in TERMINAL_EVENTS:
+                # Ejecución ya terminada: solo historial
+                subscription.closed = True
+                return subscription
+        self._subscribers.setdefault(topic, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.topic, [])
+        if subscription in subscribers:
+            subscribers.remove(subscription)
+        if not subscribers:
+            self._subscribers.pop(subscription.topic, None)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Publica un evento en su tópico (`workflow_id`) y en el tópico global."""
+        topic = event.get("workflow_id")
+        if topic is not None:
+            history = self._history.get(topic)
+            if history is None:
+                history = self._history[topic] = deque(maxlen=self.history_size)
+                while len(self._history) > self.max_topics:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(topic)
+            history.append(event)
+
+        terminal = event.get("event") in TERMINAL_EVENTS
+        for key in ({topic, None} if topic is not None else {None}):
+            for subscription in list(self._subscribers.get(key, [])):
+                if not subscription.offer(event):
+                    # Cliente lento: se desconecta en vez de frenar el workflow
+                    self.dropped_subscribers += 1
+                    logger.warning(f"🐢 Suscriptor lento desconectado del tópico {key}")
+                    subscription.drop({"event": "stream_dropped", "reason": "slow_consumer", "workflow_id": topic})
+                    self.unsubscribe(subscription)
+                elif terminal and key is not None:
+                    subscription.closed = True
+                    self.unsubscribe(subscription)
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        return len(self._subscribers.get(topic, []))
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Serializa un evento en formato text/event-stream."""
+    return f"event: {event.get('event', 'message')}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def sse_stream(bus: ProgressEventBus, subscription: Subscription, heartbeat_seconds: float = 15.0) -> AsyncIterator[str]:
+    """Generador SSE para StreamingResponse: eventos + comentarios keep-alive hasta el cierre."""
+    try:
+        while not subscription.exhausted:
+            event = await subscription.get(timeout=heartbeat_seconds)
+            yield format_sse(event) if event is not None else ": keep-alive\n\n"
+    finally:
+        bus.unsubscribe(subscription)
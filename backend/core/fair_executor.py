@@ -0,0 +1,108 @@
+"""
+Fair Executor - Cupo global de llamadas LLM con reparto equitativo por proyecto
+
+Todas las ejecuciones del DocumentCreationWorkflow comparten un número
+máximo de ejecuciones de agente en vuelo (`max_in_flight`). Cuando el cupo
+está lleno, las peticiones esperan en una cola por clave (project_id) y los
+huecos se asignan en round-robin entre claves: un plan de 22 secciones no
+acapara el cupo frente a los demás proyectos de un lote.
+
+Dentro de un mismo proyecto se atiende primero la petición de mayor
+prioridad (camino crítico de la sección, ver DAGScheduler.priorities).
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FairExecutor:
+    """
+    Semáforo con colas por clave y despacho round-robin.
+
+    Uso:
+        async with executor.slot(project_id):
+            await agent.arun(prompt)
+    """
+
+    def __init__(self, max_in_flight: int = 8):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight debe ser >= 1")
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.in_flight_by_key: Dict[str, int] = {}
+        # Orden de rotación: la clave atendida pasa al final. Cada clave es un heap por prioridad
+        self._waiting: "OrderedDict[str, List[Tuple[float, int, asyncio.Future]]]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    def _grant(self, key: str) -> None:
+        self.in_flight += 1
+        self.in_flight_by_key[key] = self.in_flight_by_key.get(key, 0) + 1
+
+    def _dispatch(self) -> None:
+        """Asigna huecos libres a la siguiente clave en espera (round-robin)."""
+        while self.in_flight < self.max_in_flight and self._waiting:
+            key, waiters = next(iter(self._waiting.items()))
+            future = heapq.heappop(waiters)[2]
+            if waiters:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if future.cancelled():
+                continue
+            self._grant(key)
+            future.set_result(None)
+
+    async def acquire(self, key: Any, priority: float = 0.0) -> None:
+        key = str(key)
+        if self.in_flight < self.max_in_flight and not self._waiting:
+            self._grant(key)
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (-priority, next(self._sequence), future)
+        heapq.heappush(self._waiting.setdefault(key, []), entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # El hueco ya se había concedido: se devuelve
+                self.release(key)
+            elif entry in self._waiting.get(key, ()):
+                self._waiting[key].remove(entry)
+                heapq.heapify(self._waiting[key])
+                if not self._waiting[key]:
+                    del self._waiting[key]
+            raise
+
+    def release(self, key: Any) -> None:
+        key = str(key)
+        self.in_flight -= 1
+        remaining = self.in_flight_by_key.get(key, 1) - 1
+        if remaining > 0:
+            self.in_flight_by_key[key] = remaining
+        else:
+            self.in_flight_by_key.pop(key, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, key: Any, priority: float = 0.0) -> AsyncIterator[None]:
+        await self.acquire(key, priority)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual para observabilidad."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "in_flight_by_project": dict(self.in_flight_by_key),
+            "waiting_by_project": {key: len(waiters) for key, waiters in self._waiting.items()},
+        }
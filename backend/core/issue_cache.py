@@ -0,0 +1,183 @@
+"""
+Issue Cache - Caché de proceso de lecturas de issues Redmine
+
+Cada agente construye su propio RedmineTools (data agent, extractor, author,
+judge, metric extractor...), así que una caché por instancia ni se compartía
+ni se liberaba: crecía sin límite durante toda la vida del backend. Esta
+caché es única por proceso y está acotada:
+
+    - LRU por número de entradas y por bytes (tamaño del JSON de cada valor).
+    - TTL: una entrada caducada cuenta como fallo y se descarta.
+    - Índice por issue: invalidate_issues() borra todas las vistas cacheadas
+      de un issue (detalle, contexto, relaciones). on_change() aplica un
+      ChangeSet del mirror de Redmine (suscribir con mirror.subscribe).
+    - Métricas: aciertos, fallos, caducadas, desalojos, invalidaciones.
+
+Los valores se devuelven como copia: un agente no puede alterar lo que leen
+los demás. Thread-safe (las herramientas síncronas corren en hilos).
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 300.0
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+    issue_ids: tuple
+
+
+def _size_of(value: Any) -> int:
+    return len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+class IssueCache:
+    """
+    LRU con TTL acotada por entradas y bytes, con invalidación por issue.
+
+    Args:
+        max_entries: número máximo de entradas
+        max_bytes: bytes máximos (suma del JSON de los valores)
+        ttl_seconds: vida de cada entrada (None = sin caducidad)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        name: str = "issue_cache",
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_issue: Dict[int, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0, "invalidations": 0, "rejected": 0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for issue_id in entry.issue_ids:
+            keys = self._by_issue.get(issue_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_issue[issue_id]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Copia del valor cacheado, o None si no existe o caducó."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry.expires_at <= monotonic():
+                self._remove(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            value = entry.value
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any, issue_ids: Iterable[Any] = ()) -> bool:
+        """
+        Guarda `value` (asociado a `issue_ids` para la invalidación) y desaloja las
+        entradas menos usadas hasta volver a los límites. Un valor mayor que
+        max_bytes no se guarda.
+        """
+        size = _size_of(value)
+        if size > self.max_bytes:
+            self.stats["rejected"] += 1
+            return False
+        ids = tuple(sorted({int(i) for i in issue_ids}))
+        expires_at = monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(copy.deepcopy(value), size, expires_at, ids)
+            self._bytes += size
+            for issue_id in ids:
+                self._by_issue.setdefault(issue_id, set()).add(key)
+            self.stats["writes"] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.stats["invalidations"] += 1
+            return True
+
+    def invalidate_issues(self, issue_ids: Iterable[Any]) -> int:
+        """Borra todas las entradas asociadas a los issues dados. Devuelve cuántas."""
+        removed = 0
+        with self._lock:
+            for issue_id in {int(i) for i in issue_ids}:
+                for key in list(self._by_issue.get(issue_id, ())):
+                    self._remove(key)
+                    removed += 1
+            self.stats["invalidations"] += removed
+        return removed
+
+    def on_change(self, changes: Any) -> None:
+        """Suscriptor de RedmineMirror: invalida los issues creados, modificados o borrados."""
+        removed = self.invalidate_issues(changes.issue_ids)
+        if removed:
+            logger.info(f"🧹 [{self.name}] {removed} entradas invalidadas por cambios en Redmine")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_issue.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Ocupación, límites y métricas (para /api/redmine/cache)."""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "issues": len(self._by_issue),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                **self.stats,
+            }
+
+
+# Caché única del proceso para todas las instancias de RedmineTools
+redmine_issue_cache = IssueCache(
+    max_entries=int(os.getenv("MAAS_ISSUE_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+    max_bytes=int(os.getenv("MAAS_ISSUE_CACHE_MAX_MB", "32")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("MAAS_ISSUE_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+    name="redmine_issue_cache",
+)
@@ -0,0 +1,209 @@
+"""
+Job Manager - Ejecución asíncrona de planes de preinversión
+
+POST /preinversion-plans/jobs encola la ejecución y devuelve un job_id de
+inmediato; un pool acotado de workers asyncio consume la cola y ejecuta el
+workflow. El estado y el progreso por sección (vía `backend.core.progress`)
+se consultan por job_id, y el documento final se obtiene por separado.
+
+El registro es en memoria y por proceso: los resultados duraderos viven en
+los checkpoints de sección (SectionCheckpointStore), por lo que un job
+perdido puede reanudarse con su workflow_id.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.core.progress import listen_progress
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobQueueFullError(RuntimeError):
+    """La cola de jobs alcanzó su capacidad máxima."""
+
+
+@dataclass
+class Job:
+    """Estado de una ejecución encolada."""
+    job_id: str
+    request: Dict[str, Any]
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=lambda: {
+        "sections_total": 0,
+        "sections_completed": 0,
+        "running_sections": [],
+        "workflows": {},
+    })
+    result: Any = None
+    error: Optional[str] = None
+
+    def apply_progress(self, event: Dict[str, Any]) -> None:
+        """Oyente de progreso: actualiza contadores a partir de eventos del workflow."""
+        kind = event.get("event")
+        section_id = event.get("section_id")
+        running: List[str] = self.progress["running_sections"]
+        # Desglose por workflow: un job batch agrupa varios proyectos
+        workflow = self.progress["workflows"].setdefault(
+            str(event.get("workflow_id")), {"sections_total": 0, "sections_completed": 0}
+        )
+
+        if kind == "plan_ready":
+            workflow["sections_total"] = event.get("sections_total", 0)
+            self.progress["sections_total"] = sum(w["sections_total"] for w in self.progress["workflows"].values())
+        elif kind == "section_started":
+            running.append(section_id)
+        elif kind == "section_completed":
+            if section_id in running:
+                running.remove(section_id)
+            workflow["sections_completed"] += 1
+            self.progress["sections_completed"] += 1
+        elif kind in ("workflow_completed", "workflow_failed"):
+            workflow["status"] = kind
+        self.progress["last_event"] = kind
+
+    def to_status(self) -> Dict[str, Any]:
+        """Vista pública del job (sin el documento)."""
+        now = self.finished_at or time.time()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "project_id": self.request.get("project_id"),
+            "project_ids": self.request.get("project_ids"),
+            "workflow_id": self.request.get("workflow_id"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(now - self.started_at, 2) if self.started_at else None,
+            "progress": dict(
+                self.progress,
+                running_sections=list(self.progress["running_sections"]),
+                workflows={wf: dict(w) for wf, w in self.progress["workflows"].items()},
+            ),
+            "error": self.error,
+            "document_ready": self.status == JOB_SUCCEEDED,
+        }
+
+
+class JobManager:
+    """
+    Cola FIFO acotada + pool de workers.
+
+    `runner(job)` ejecuta el trabajo real y devuelve el resultado; cualquier
+    excepción marca el job como fallido sin afectar al worker.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Job], Awaitable[Any]],
+        max_workers: int = 2,
+        max_queue_size: int = 100,
+        retention_seconds: float = 3600,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser >= 1")
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.retention_seconds = retention_seconds
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        """Arranca el pool de workers en el event loop actual."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"maas-job-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+        logger.info(f"👷 JobManager iniciado con {self.max_workers} workers (cola máx {self.max_queue_size})")
+
+    async def stop(self) -> None:
+        """Detiene los workers. Los jobs en curso se cancelan y quedan como fallidos."""
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("🛑 JobManager detenido")
+
+    def submit(self, request: Dict[str, Any], job_id: Optional[str] = None) -> Job:
+        """Encola un job y lo devuelve de inmediato. Lanza JobQueueFullError si no hay capacidad."""
+        if self._queue is None:
+            raise RuntimeError("JobManager no iniciado")
+        self._prune()
+        job = Job(job_id=job_id or f"job_{uuid.uuid4().hex[:12]}", request=request)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Cola de jobs llena ({self.max_queue_size})")
+        self.jobs[job.job_id] = job
+        logger.info(f"📥 Job {job.job_id} encolado (proyecto {request.get('project_id')}, en cola: {self._queue.qsize()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """Posición (1-based) de un job aún en cola."""
+        queued = [job for job in self.jobs.values() if job.status == JOB_QUEUED]
+        queued.sort(key=lambda job: job.created_at)
+        for position, job in enumerate(queued, start=1):
+            if job.job_id == job_id:
+                return position
+        return None
+
+    def _prune(self) -> None:
+        """Olvida jobs terminados más antiguos que `retention_seconds`."""
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in FINISHED_STATES and (job.finished_at or 0) < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job: Job = await self._queue.get()
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            logger.info(f"▶️ [worker-{index}] Ejecutando job {job.job_id}")
+            try:
+                with listen_progress(job.apply_progress):
+                    job.result = await self.runner(job)
+                job.status = JOB_SUCCEEDED
+                logger.info(f"✅ [worker-{index}] Job {job.job_id} completado en {time.time() - job.started_at:.2f}s")
+            except asyncio.CancelledError:
+                job.status = JOB_FAILED
+                job.error = "Cancelado por apagado del servidor"
+                raise
+            except Exception as e:
+                job.status = JOB_FAILED
+                job.error = str(e)
+                logger.error(f"❌ [worker-{index}] Job {job.job_id} falló: {str(e)}")
+            finally:
+                job.finished_at = time.time()
+                job.progress["running_sections"] = []
+                self._queue.task_done()
@@ -0,0 +1,446 @@
+"""
+LLM Response Cache - Caché persistente de respuestas del modelo OpenAI
+
+Ejecuciones de prueba, reintentos tras una caída y auditorías repetidas del
+Judge sobre el mismo texto envían prompts idénticos byte a byte y pagan de
+nuevo la latencia y el coste completos. `CachedOpenAIChat` intercepta cada
+invocación no-streaming del modelo compartido por los agentes y la resuelve
+desde Postgres cuando ya existe una respuesta para la misma clave:
+    - id del modelo
+    - mensajes normalizados (rol, contenido, tool calls / resultados)
+    - definiciones de herramientas y tool_choice
+    - output_schema (response_format)
+
+Las entradas expiran por TTL y la tabla se acota por número de entradas y
+bytes totales, desalojando primero las menos usadas recientemente (LRU).
+`bypass_llm_cache()` desactiva la caché en el contexto actual (ContextVar),
+p.ej. para forzar una regeneración real.
+
+Además, las invocaciones idénticas concurrentes (mismo prompt desde dos
+agentes o planes a la vez) se coalescen en una sola llamada a la API, y las
+que llegan a la API pasan por el AdaptiveRateLimiter compartido (rutas async
+con y sin streaming: workflow, Team y auditorías). Los reintentos viven aquí
+y no en el SDK: los 429 vuelven a la cola del limitador y los errores
+transitorios (408/409/5xx, timeouts, conexión) se reintentan con backoff.
+Las rutas síncronas (invoke / invoke_stream, solo Agent.run) reintentan
+igual pero no pasan por el limitador, que es asyncio.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import sleep, time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from agno.exceptions import ModelProviderError
+from agno.models.message import Message
+from agno.models.openai import OpenAIChat
+from agno.models.response import ModelResponse
+from pydantic import BaseModel
+
+from backend.core.context_packer import TokenCounter
+from backend.core.deadline import call_timeout
+from backend.core.rate_limiter import AdaptiveRateLimiter, estimate_request_tokens
+from backend.core.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Cada cuántas escrituras se ejecuta el desalojo (evita un DELETE por llamada)
+EVICT_EVERY = 50
+# Errores que se reintentan con backoff (ModelProviderError usa 502 para timeouts/conexión)
+TRANSIENT_STATUS_CODES = (408, 409)
+
+# Invocaciones idénticas en vuelo desde agentes/planes distintos comparten una sola llamada a la API
+llm_flight = SingleFlight("llm")
+
+_bypass: ContextVar[bool] = ContextVar("maas_llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_llm_cache(enabled: bool = True) -> Iterator[None]:
+    """Ignora la caché (ni lee ni escribe) para las llamadas del contexto actual."""
+    token = _bypass.set(enabled or _bypass.get())
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _normalize_message(message: Union[Message, Dict[str, Any]]) -> Dict[str, Any]:
+    """Campos semánticos del mensaje; ids, métricas y timestamps no forman parte de la clave."""
+    data = message.to_dict() if isinstance(message, Message) else dict(message)
+    content = data.get("content")
+    if isinstance(content, str):
+        content = content.strip()
+    return {
+        "role": data.get("role"),
+        "content": content,
+        "name": data.get("name"),
+        "tool_call_id": data.get("tool_call_id"),
+        "tool_calls": [
+            {"type": call.get("type"), "function": call.get("function")}
+            for call in (data.get("tool_calls") or [])
+        ],
+    }
+
+
+def _schema(response_format: Optional[Union[Dict, Type[BaseModel]]]) -> Any:
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        return {"name": response_format.__name__, "schema": response_format.model_json_schema()}
+    return response_format
+
+
+class LLMResponseCache:
+    """
+    Caché de respuestas del modelo sobre AsyncPostgresDb.
+    Las operaciones bloqueantes del driver se ejecutan en un hilo desde la ruta async.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        table_name: str = "maas_llm_cache",
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.db = db
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._table_ready = False
+        self._writes = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "errors": 0}
+
+    @staticmethod
+    def compute_key(
+        model_id: str,
+        messages: List[Union[Message, Dict[str, Any]]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+    ) -> str:
+        payload = {
+            "model": model_id,
+            "messages": [_normalize_message(message) for message in messages],
+            "tools": tools or [],
+            "tool_choice": tool_choice,
+            "output_schema": _schema(response_format),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                cache_key CHAR(64) PRIMARY KEY,
+                model_id VARCHAR(100),
+                response JSONB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL,
+                last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_{self.table_name}_last_used
+            ON {self.table_name}(last_used_at);
+        """)
+        self._table_ready = True
+
+    def _get_sync(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        self._ensure_table()
+        row = self.db.fetchone(
+            f"""
+            UPDATE {self.table_name}
+            SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+            WHERE cache_key = %s AND expires_at > CURRENT_TIMESTAMP
+            RETURNING response
+            """,
+            cache_key,
+        )
+        if not row:
+            return None
+        response = row.get("response")
+        return json.loads(response) if isinstance(response, str) else response
+
+    def _put_sync(self, cache_key: str, model_id: str, payload: str) -> None:
+        self._ensure_table()
+        self.db.execute(
+            f"""
+            INSERT INTO {self.table_name} (cache_key, model_id, response, size_bytes, expires_at)
+            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+            ON CONFLICT (cache_key) DO UPDATE SET
+                response = EXCLUDED.response,
+                size_bytes = EXCLUDED.size_bytes,
+                expires_at = EXCLUDED.expires_at,
+                last_used_at = CURRENT_TIMESTAMP
+            """,
+            cache_key,
+            model_id,
+            payload,
+            len(payload.encode()),
+            self.ttl_seconds,
+        )
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 1:
+            self.evict_sync()
+
+    def evict_sync(self) -> int:
+        """Elimina entradas expiradas y las menos usadas por encima de max_entries / max_bytes."""
+        self._ensure_table()
+        expired = self.db.execute(f"DELETE FROM {self.table_name} WHERE expires_at <= CURRENT_TIMESTAMP")
+        overflow = self.db.execute(
+            f"""
+            DELETE FROM {self.table_name} WHERE cache_key IN (
+                SELECT cache_key FROM (
+                    SELECT cache_key,
+                           ROW_NUMBER() OVER (ORDER BY last_used_at DESC, cache_key) AS position,
+                           SUM(size_bytes) OVER (
+                               ORDER BY last_used_at DESC, cache_key ROWS UNBOUNDED PRECEDING
+                           ) AS running_bytes
+                    FROM {self.table_name}
+                ) ranked
+                WHERE position > %s OR running_bytes > %s
+            )
+            """,
+            self.max_entries,
+            self.max_bytes,
+        )
+        evicted = (expired or 0) + (overflow or 0)
+        if evicted:
+            logger.info(f"🧹 [LLM CACHE] {evicted} entradas desalojadas (TTL/LRU)")
+        return evicted
+
+    def get_sync(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Respuesta cacheada o None. Los errores de BD cuentan como fallo de caché."""
+        try:
+            response = self._get_sync(cache_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Error leyendo caché LLM: {str(e)[:100]}")
+            self.stats["errors"] += 1
+            response = None
+        self.stats["hits" if response is not None else "misses"] += 1
+        return response
+
+    def put_sync(self, cache_key: str, model_id: str, response: Dict[str, Any]) -> bool:
+        """Almacena una respuesta. Un fallo no interrumpe la llamada al modelo."""
+        try:
+            self._put_sync(cache_key, model_id, json.dumps(response))
+            self.stats["writes"] += 1
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Error escribiendo caché LLM: {str(e)[:100]}")
+            self.stats["errors"] += 1
+            return False
+
+    async def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_sync, cache_key)
+
+    async def put(self, cache_key: str, model_id: str, response: Dict[str, Any]) -> bool:
+        return await asyncio.to_thread(self.put_sync, cache_key, model_id, response)
+
+
+@dataclass
+class CachedOpenAIChat(OpenAIChat):
+    """
+    OpenAIChat con caché persistente de respuestas (solo invocaciones no-streaming).
+    Un acierto no consume tokens: la respuesta se devuelve sin métricas de uso.
+    Las invocaciones idénticas concurrentes se coalescen en una sola llamada (SingleFlight)
+    y las que llegan a la API pasan por el limitador compartido (RPM/TPM, prioridad, 429).
+    """
+
+    response_cache: Optional[LLMResponseCache] = None
+    coalesce: bool = True
+    rate_limiter: Optional[AdaptiveRateLimiter] = None
+    # Reintentos tras un 429: vuelven a la cola del limitador, que respeta el Retry-After
+    rate_limit_retries: int = 3
+    # Reintentos de errores transitorios (408/409/5xx, timeouts, conexión) con backoff exponencial
+    transient_retries: int = 2
+    retry_backoff_seconds: float = 1.0
+
+    def _keys(self, messages, response_format, tools, tool_choice) -> Tuple[Optional[str], Optional[str]]:
+        """(clave de petición para coalescer, clave de caché o None si la caché no aplica)."""
+        if self.response_cache is None and not self.coalesce:
+            return None, None
+        key = LLMResponseCache.compute_key(self.id, messages, tools, tool_choice, response_format)
+        if self.response_cache is None:
+            return key, None
+        if _bypass.get():
+            self.response_cache.stats["bypassed"] += 1
+            return f"bypass:{key}", None
+        return key, key
+
+    @staticmethod
+    def _from_cache(data: Dict[str, Any]) -> ModelResponse:
+        response = ModelResponse.from_dict(dict(data, response_usage=None, created_at=int(time())))
+        logger.debug("⚡ [LLM CACHE HIT] respuesta servida desde caché")
+        return response
+
+    def _retry_delay(self, error: ModelProviderError, retries: Dict[str, int]) -> Optional[float]:
+        """Espera antes de reintentar `error`, o None si no se reintenta (acotada al deadline)."""
+        status = error.status_code
+        if status == 429:
+            kind, limit = "rate_limit", self.rate_limit_retries
+        elif status in TRANSIENT_STATUS_CODES or (status or 0) >= 500:
+            kind, limit = "transient", self.transient_retries
+        else:
+            return None
+        if retries.get(kind, 0) >= limit:
+            return None
+        retries[kind] = retries.get(kind, 0) + 1
+        logger.warning(f"🔁 [{self.id}] Error {status}; reintento {retries[kind]}/{limit}: {str(error)[:100]}")
+        if kind == "rate_limit" and self.rate_limiter is not None:
+            return 0.0  # La pausa la aplica el limitador
+        return call_timeout(self.retry_backoff_seconds * 2 ** (retries[kind] - 1))
+
+    def _estimate_tokens(self, messages: List[Message]) -> int:
+        return estimate_request_tokens(
+            [str(message.content or "") for message in messages], TokenCounter(self.id),
+            self.max_completion_tokens or self.max_tokens
+        )
+
+    @asynccontextmanager
+    async def _lease(self, messages: List[Message]) -> AsyncIterator[Any]:
+        """Permiso del limitador compartido (None si no hay limitador)."""
+        if self.rate_limiter is None:
+            yield None
+            return
+        async with self.rate_limiter.acquire(self._estimate_tokens(messages)) as lease:
+            yield lease
+
+    async def _limited_ainvoke(self, messages: List[Message], assistant_message: Message, **kwargs: Any) -> ModelResponse:
+        """Invocación real a la API bajo el limitador compartido (si está configurado), con reintentos."""
+        retries: Dict[str, int] = {}
+        while True:
+            try:
+                async with self._lease(messages) as lease:
+                    response = await super(CachedOpenAIChat, self).ainvoke(messages, assistant_message, **kwargs)
+                    if lease is not None:
+                        usage = response.response_usage
+                        lease.settle(getattr(usage, "total_tokens", None) if usage else None)
+                    return response
+            except ModelProviderError as e:
+                delay = self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def ainvoke_stream(self, messages: List[Message], assistant_message: Message, **kwargs: Any) -> AsyncIterator[ModelResponse]:
+        """
+        Streaming bajo el limitador: el permiso se mantiene mientras dura el stream.
+        Solo se reintenta si el error llega antes del primer fragmento.
+        """
+        retries: Dict[str, int] = {}
+        while True:
+            streamed = False
+            try:
+                async with self._lease(messages) as lease:
+                    total_tokens = None
+                    async for chunk in super(CachedOpenAIChat, self).ainvoke_stream(messages, assistant_message, **kwargs):
+                        streamed = True
+                        if chunk.response_usage is not None:
+                            total_tokens = chunk.response_usage.total_tokens
+                        yield chunk
+                    if lease is not None:
+                        lease.settle(total_tokens)
+                return
+            except ModelProviderError as e:
+                delay = None if streamed else self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def _retrying_invoke(self, messages: List[Message], assistant_message: Message, **kwargs: Any) -> ModelResponse:
+        """Invocación síncrona con los mismos reintentos (sin limitador: es asyncio)."""
+        retries: Dict[str, int] = {}
+        while True:
+            try:
+                return super(CachedOpenAIChat, self).invoke(messages, assistant_message, **kwargs)
+            except ModelProviderError as e:
+                delay = self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+                sleep(delay)
+
+    def invoke_stream(self, messages: List[Message], assistant_message: Message, **kwargs: Any) -> Iterator[ModelResponse]:
+        retries: Dict[str, int] = {}
+        while True:
+            streamed = False
+            try:
+                for chunk in super(CachedOpenAIChat, self).invoke_stream(messages, assistant_message, **kwargs):
+                    streamed = True
+                    yield chunk
+                return
+            except ModelProviderError as e:
+                delay = None if streamed else self._retry_delay(e, retries)
+                if delay is None:
+                    raise
+                sleep(delay)
+
+    def invoke(
+        self,
+        messages: List[Message],
+        assistant_message: Message,
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        request_key, cache_key = self._keys(messages, response_format, tools, tool_choice)
+
+        def call() -> ModelResponse:
+            if cache_key:
+                cached = self.response_cache.get_sync(cache_key)
+                if cached is not None:
+                    return self._from_cache(cached)
+            response = self._retrying_invoke(
+                messages, assistant_message, response_format=response_format, tools=tools,
+                tool_choice=tool_choice, **kwargs
+            )
+            if cache_key:
+                self.response_cache.put_sync(cache_key, self.id, response.to_dict())
+            return response
+
+        if not (self.coalesce and request_key):
+            return call()
+        # Cada agente recibe su copia: agno muta la respuesta al poblar su mensaje
+        return copy.deepcopy(llm_flight.do_sync(request_key, call))
+
+    async def ainvoke(
+        self,
+        messages: List[Message],
+        assistant_message: Message,
+        response_format: Optional[Union[Dict, Type[BaseModel]]] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> ModelResponse:
+        request_key, cache_key = self._keys(messages, response_format, tools, tool_choice)
+
+        async def call() -> ModelResponse:
+            if cache_key:
+                cached = await self.response_cache.get(cache_key)
+                if cached is not None:
+                    return self._from_cache(cached)
+            response = await self._limited_ainvoke(
+                messages, assistant_message, response_format=response_format, tools=tools,
+                tool_choice=tool_choice, **kwargs
+            )
+            if cache_key:
+                await self.response_cache.put(cache_key, self.id, response.to_dict())
+            return response
+
+        if not (self.coalesce and request_key):
+            return await call()
+        return copy.deepcopy(await llm_flight.do(request_key, call))
@@ -0,0 +1,217 @@
+"""
+Maker-Checker Pipeline - Autoría y auditoría solapadas entre secciones
+
+En el bucle Maker-Checker secuencial cada sección ocupa su hueco del DAG
+mientras el Author escribe y luego mientras el Judge audita, de modo que el
+tiempo total es la suma de ambos. Aquí las dos etapas tienen colas y pools
+de workers propios:
+
+    author_queue -> [maker workers] -> judge_queue -> [checker workers]
+         ^                                                   |
+         +------------- reintento con la crítica ------------+
+
+El borrador de la sección N pasa a la cola del Judge y el worker del Author
+toma de inmediato la siguiente sección lista (o un reintento). Las críticas
+que no aprueban vuelven a la cola del Author como reintento con la crítica
+adjunta, hasta `max_attempts`. Un `precheck` opcional (p.ej. StructuralChecker)
+corre en el propio worker del Author y devuelve el borrador sin pasar por el
+Judge cuando detecta fallos mecánicos. Ambas colas atienden primero la mayor
+prioridad (camino crítico, ver DAGScheduler.priorities).
+
+Cada trabajo se ejecuta en una copia del contexto de quien lo envió, por lo
+que la provenance (`track_section_reads`) y los oyentes de progreso siguen
+asociados a su sección aunque la ejecute un worker compartido.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineJob:
+    """Una sección en tránsito por el pipeline."""
+    item: Any
+    priority: float = 0.0
+    attempt: int = 1
+    draft: Any = None
+    critique: Any = None
+    # Estado libre del llamador (p.ej. tokens acumulados, instante de inicio)
+    state: Dict[str, Any] = field(default_factory=dict)
+    context: Optional[contextvars.Context] = None
+    future: Optional[asyncio.Future] = None
+
+
+class MakerCheckerPipeline:
+    """
+    Dos etapas con colas por prioridad y workers independientes.
+
+    - `maker(job)` produce el borrador (None = intento inválido, consume intento).
+    - `checker(job)` audita `job.draft` y devuelve la crítica.
+    - `accept(critique)` decide si la sección queda aprobada.
+    - `precheck(job)` (opcional, síncrono) devuelve una crítica de rechazo o None.
+
+    `submit(item)` espera a que la sección quede aprobada o agote sus
+    intentos y devuelve el PipelineJob final. Una excepción en cualquier
+    etapa se propaga a quien envió esa sección, sin detener los workers.
+    """
+
+    def __init__(
+        self,
+        maker: Callable[[PipelineJob], Awaitable[Any]],
+        checker: Callable[[PipelineJob], Awaitable[Any]],
+        accept: Callable[[Any], bool],
+        max_attempts: int = 2,
+        maker_workers: int = 2,
+        checker_workers: int = 2,
+        precheck: Optional[Callable[[PipelineJob], Any]] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts debe ser >= 1")
+        if maker_workers < 1 or checker_workers < 1:
+            raise ValueError("maker_workers y checker_workers deben ser >= 1")
+        self.maker = maker
+        self.checker = checker
+        self.accept = accept
+        self.precheck = precheck
+        self.max_attempts = max_attempts
+        self.maker_workers = maker_workers
+        self.checker_workers = checker_workers
+        self._author_queue: Optional[asyncio.PriorityQueue] = None
+        self._judge_queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        # Observabilidad: trabajos por etapa, reintentos y tiempo ocupado
+        self.stats: Dict[str, float] = {
+            "authored": 0, "judged": 0, "prechecked_rejections": 0, "retries": 0,
+            "maker_busy_seconds": 0.0, "checker_busy_seconds": 0.0,
+        }
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._author_queue = asyncio.PriorityQueue()
+        self._judge_queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._maker_worker(), name=f"maker-worker-{i}") for i in range(self.maker_workers)
+        ] + [
+            asyncio.create_task(self._checker_worker(), name=f"checker-worker-{i}") for i in range(self.checker_workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def __aenter__(self) -> "MakerCheckerPipeline":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    def _put(self, queue: asyncio.PriorityQueue, job: PipelineJob) -> None:
+        queue.put_nowait((-job.priority, next(self._sequence), job))
+
+    async def submit(
+        self, item: Any, priority: float = 0.0, state: Optional[Dict[str, Any]] = None
+    ) -> PipelineJob:
+        """Encola una sección en la etapa de autoría y espera su resultado final."""
+        if not self._workers:
+            raise RuntimeError("MakerCheckerPipeline no iniciado")
+        job = PipelineJob(
+            item=item,
+            priority=priority,
+            state=state if state is not None else {},
+            context=contextvars.copy_context(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._put(self._author_queue, job)
+        return await job.future
+
+    async def _run_stage(self, fn: Callable[[PipelineJob], Awaitable[Any]], job: PipelineJob) -> Any:
+        # Ejecuta la etapa en el contexto de quien envió la sección
+        return await asyncio.create_task(fn(job), context=job.context)
+
+    def _finish(self, job: PipelineJob, error: Optional[BaseException] = None) -> None:
+        if job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(job)
+
+    def _retry_or_finish(self, job: PipelineJob) -> None:
+        if job.attempt >= self.max_attempts:
+            self._finish(job)
+            return
+        job.attempt += 1
+        self.stats["retries"] += 1
+        self._put(self._author_queue, job)
+
+    async def _maker_worker(self) -> None:
+        while True:
+            _, _, job = await self._author_queue.get()
+            if job.future.cancelled():
+                continue
+            start = time.time()
+            try:
+                job.draft = await self._run_stage(self.maker, job)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [PIPELINE] Etapa maker falló (intento {job.attempt}): {str(e)[:100]}")
+                self._finish(job, e)
+                continue
+            finally:
+                self.stats["maker_busy_seconds"] += time.time() - start
+            self.stats["authored"] += 1
+            if job.draft is None:
+                # Borrador inválido: cuenta como intento fallido
+                self._retry_or_finish(job)
+                continue
+            if self.precheck is not None:
+                try:
+                    critique = job.context.run(self.precheck, job)
+                except Exception as e:
+                    # El pre-chequeo es orientativo: ante un fallo decide el Judge
+                    logger.warning(f"⚠️ [PIPELINE] Pre-chequeo falló: {str(e)[:100]}")
+                    critique = None
+                if critique is not None:
+                    job.critique = critique
+                    self.stats["prechecked_rejections"] += 1
+                    self._retry_or_finish(job)
+                    continue
+            self._put(self._judge_queue, job)
+
+    async def _checker_worker(self) -> None:
+        while True:
+            _, _, job = await self._judge_queue.get()
+            if job.future.cancelled():
+                continue
+            start = time.time()
+            try:
+                job.critique = await self._run_stage(self.checker, job)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [PIPELINE] Etapa checker falló (intento {job.attempt}): {str(e)[:100]}")
+                self._finish(job, e)
+                continue
+            finally:
+                self.stats["checker_busy_seconds"] += time.time() - start
+            self.stats["judged"] += 1
+            if self.accept(job.critique):
+                self._finish(job)
+            else:
+                self._retry_or_finish(job)
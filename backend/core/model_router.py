@@ -0,0 +1,219 @@
+"""
+Model Router - Selección de modelo por llamada de agente
+
+main.py entrega el mismo `OpenAIChat(id="gpt-4o")` a todos los agentes. El
+router elige el modelo de cada llamada del workflow según el rol del agente
+(author/judge), la dificultad de la sección y el número de intento:
+
+    - Secciones críticas (SIC_03 riesgo, SIC_16 costos) y reintentos del
+      Author -> modelo grande.
+    - Secciones ligeras (exclusiones SIC 07/08/09/13/18 cuando sí se
+      redactan) -> modelo pequeño.
+    - Resto -> modelo estándar.
+
+Las reglas se evalúan en orden y gana la primera que coincide; si ninguna
+coincide la llamada usa el modelo propio del agente (el planner conserva
+o3-mini). La configuración es un JSON (MAAS_MODEL_ROUTES, inline o ruta):
+
+    {
+      "routes": {"small": "gpt-4o-mini", "standard": "gpt-4o", "large": "gpt-4.1"},
+      "difficulty": {"hard": ["SIC_03", "SIC_16"], "light": ["SIC_07", "SIC_08"]},
+      "rules": [
+        {"route": "large", "difficulties": ["hard"]},
+        {"route": "large", "roles": ["author"], "min_attempt": 2},
+        {"route": "small", "difficulties": ["light"]},
+        {"route": "standard", "roles": ["author", "judge"]}
+      ]
+    }
+
+Por ruta se registran latencia (p50/p95 en ventana móvil), tokens, errores
+y calidad: el qc_score que obtuvo del Judge cada borrador del Author
+generado con esa ruta. Con esas métricas se ajustan las reglas.
+"""
+
+import copy
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "routes": {"small": "gpt-4o-mini", "standard": "gpt-4o", "large": "gpt-4.1"},
+    "difficulty": {
+        "hard": ["SIC_03", "SIC_16"],
+        "light": ["SIC_07", "SIC_08", "SIC_09", "SIC_13", "SIC_18"],
+    },
+    "rules": [
+        {"route": "large", "difficulties": ["hard"]},
+        {"route": "large", "roles": ["author"], "min_attempt": 2},
+        {"route": "small", "difficulties": ["light"]},
+        {"route": "standard", "roles": ["author", "judge"]},
+    ],
+}
+
+
+@dataclass
+class RouteRule:
+    """Condiciones de una regla (None = cualquiera)."""
+    route: str
+    roles: Optional[List[str]] = None
+    sections: Optional[List[str]] = None
+    difficulties: Optional[List[str]] = None
+    min_attempt: int = 1
+
+    def matches(self, role: str, section_id: Optional[str], attempt: int, difficulty: str) -> bool:
+        return (
+            (self.roles is None or role in self.roles)
+            and (self.sections is None or section_id in self.sections)
+            and (self.difficulties is None or difficulty in self.difficulties)
+            and attempt >= self.min_attempt
+        )
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    model_id: str
+    rule_index: int
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+@dataclass
+class RouteMetrics:
+    """Métricas de una ruta: contadores acumulados y ventanas móviles de latencia y calidad."""
+    window: int = 500
+    calls: int = 0
+    errors: int = 0
+    tokens: int = 0
+    calls_by_role: Dict[str, int] = field(default_factory=dict)
+    latencies: Deque[float] = field(default_factory=deque)
+    qc_scores: Deque[float] = field(default_factory=deque)
+    approvals: Deque[bool] = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.latencies = deque(maxlen=self.window)
+        self.qc_scores = deque(maxlen=self.window)
+        self.approvals = deque(maxlen=self.window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "calls_by_role": dict(self.calls_by_role),
+            "latency_p50_seconds": _percentile(latencies, 0.5),
+            "latency_p95_seconds": _percentile(latencies, 0.95),
+            "avg_qc_score": round(sum(self.qc_scores) / len(self.qc_scores), 2) if self.qc_scores else None,
+            "approval_rate": round(sum(self.approvals) / len(self.approvals), 3) if self.approvals else None,
+        }
+
+
+class ModelRouter:
+    """Elige el modelo por llamada y acumula métricas por ruta."""
+
+    def __init__(
+        self,
+        base_model: Any,
+        routes: Dict[str, str],
+        rules: List[RouteRule],
+        difficulty: Optional[Dict[str, List[str]]] = None,
+        window: int = 500,
+    ):
+        unknown = {rule.route for rule in rules} - set(routes)
+        if unknown:
+            raise ValueError(f"Reglas con rutas no definidas: {sorted(unknown)}")
+        self.base_model = base_model
+        self.routes = dict(routes)
+        self.rules = list(rules)
+        self._difficulty = {
+            section_id: level for level, sections in (difficulty or {}).items() for section_id in sections
+        }
+        self._models: Dict[str, Any] = {}
+        self.metrics: Dict[str, RouteMetrics] = {name: RouteMetrics(window=window) for name in self.routes}
+
+    @classmethod
+    def from_config(cls, base_model: Any, config: Dict[str, Any]) -> "ModelRouter":
+        return cls(
+            base_model,
+            routes=config.get("routes", DEFAULT_CONFIG["routes"]),
+            rules=[RouteRule(**rule) for rule in config.get("rules", DEFAULT_CONFIG["rules"])],
+            difficulty=config.get("difficulty", DEFAULT_CONFIG["difficulty"]),
+            window=int(config.get("window", 500)),
+        )
+
+    @classmethod
+    def from_env(cls, base_model: Any, variable: str = "MAAS_MODEL_ROUTES") -> Optional["ModelRouter"]:
+        """
+        Router desde la variable de entorno: "off"/vacía desactiva, "default" usa
+        DEFAULT_CONFIG; cualquier otro valor es JSON inline o ruta a un fichero JSON.
+        """
+        raw = (os.getenv(variable) or "").strip()
+        if not raw or raw.lower() == "off":
+            return None
+        if raw.lower() == "default":
+            return cls.from_config(base_model, DEFAULT_CONFIG)
+        if not raw.startswith("{"):
+            with open(raw, "r", encoding="utf-8") as f:
+                raw = f.read()
+        return cls.from_config(base_model, json.loads(raw))
+
+    def difficulty(self, section_id: Optional[str]) -> str:
+        return self._difficulty.get(section_id, "normal") if section_id else "normal"
+
+    def route(self, role: str, section_id: Optional[str] = None, attempt: int = 1) -> Optional[RouteDecision]:
+        """Primera regla que coincide, o None para usar el modelo propio del agente."""
+        difficulty = self.difficulty(section_id)
+        for index, rule in enumerate(self.rules):
+            if rule.matches(role, section_id, attempt, difficulty):
+                return RouteDecision(route=rule.route, model_id=self.routes[rule.route], rule_index=index)
+        return None
+
+    def model_for(self, decision: RouteDecision) -> Any:
+        """Instancia del modelo de la ruta: copia del modelo base (mismo cliente, caché y limitador)."""
+        model = self._models.get(decision.route)
+        if model is None:
+            model = copy.copy(self.base_model)
+            model.id = decision.model_id
+            self._models[decision.route] = model
+        return model
+
+    def record_call(
+        self,
+        decision: RouteDecision,
+        role: str,
+        latency_seconds: float,
+        tokens: int = 0,
+        error: bool = False,
+    ) -> None:
+        metrics = self.metrics[decision.route]
+        metrics.calls += 1
+        metrics.calls_by_role[role] = metrics.calls_by_role.get(role, 0) + 1
+        metrics.tokens += tokens
+        metrics.latencies.append(latency_seconds)
+        if error:
+            metrics.errors += 1
+
+    def record_quality(self, decision: Optional[RouteDecision], qc_score: float, approved: bool) -> None:
+        """Veredicto del Judge (o del pre-chequeo) sobre un borrador generado con `decision`."""
+        if decision is None:
+            return
+        metrics = self.metrics[decision.route]
+        metrics.qc_scores.append(float(qc_score))
+        metrics.approvals.append(bool(approved))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            name: {"model_id": self.routes[name], **metrics.snapshot()}
+            for name, metrics in self.metrics.items()
+        }
@@ -0,0 +1,117 @@
+"""
+Not Applicable Sections - Ruta rápida sin LLM para exclusiones formales
+
+El mandato AGDR (GeneralAuthorAgent, regla 5) declara SIC 07, 08, 09, 13 y 18
+como "No Aplicable" cuando el alcance del proyecto es de Infraestructura o
+Servicios. Generarlas con el par Author + Judge cuesta hasta 4 llamadas por
+sección para producir un texto fijo. Este generador construye el SIC_DTO
+justificado directamente desde los índices de la Sección B de
+PLANTILLA_MAESTRA_SIC_GENERICO.md, seleccionado por el alcance del proyecto.
+
+El alcance se resuelve, por orden, desde la entrada del workflow
+(`scope` o `metadata.scope` / `metadata.alcance`) y desde los metadatos del
+SIC 02 (Caso de Negocio), del que dependen todas las secciones excluibles.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema, KeyValue
+from backend.core.section_cache import DEFAULT_TEMPLATE_PATH
+from backend.core.structural_checker import SectionSpec, normalize_text, parse_template
+
+logger = logging.getLogger(__name__)
+
+EXCLUDABLE_SECTIONS = ("SIC_07", "SIC_08", "SIC_09", "SIC_13", "SIC_18")
+# Alcances para los que aplica la exclusión formal (comparación sin tildes ni mayúsculas)
+EXCLUDED_SCOPE_KEYWORDS = ("INFRAESTRUCTURA", "SERVICIOS")
+SCOPE_METADATA_KEYS = ("scope", "alcance", "project_scope", "tipo_proyecto")
+
+JUSTIFICATIONS = {
+    "SIC_07": "el proyecto no genera variaciones en la base geológica ni en los recursos minerales actuales",
+    "SIC_08": "el proyecto no genera variaciones en la base de recursos minerales y reservas mineras ni en la planificación minera actual",
+    "SIC_09": "el proyecto no genera variaciones en los parámetros de diseño del proceso ni en el plan de producción",
+    "SIC_13": "el proyecto no contempla el uso de nuevas tecnologías de información y comunicaciones; solo la conexión de los equipos reemplazados al sistema de control existente",
+    "SIC_18": "el proyecto no genera variaciones en los tipos de productos ni en las cantidades producidas",
+}
+
+
+def scope_is_excluded(scope: Optional[str]) -> bool:
+    """True si el alcance es de Infraestructura/Servicios."""
+    return bool(scope) and any(keyword in normalize_text(str(scope)) for keyword in EXCLUDED_SCOPE_KEYWORDS)
+
+
+def resolve_scope(input_data: Dict[str, Any], completed_sections: Dict[str, SIC_DTO]) -> Optional[str]:
+    """Alcance del proyecto desde la entrada del workflow o los metadatos del SIC 02."""
+    if input_data.get("scope"):
+        return str(input_data["scope"])
+    metadata = input_data.get("metadata") or {}
+    for key in SCOPE_METADATA_KEYS:
+        if metadata.get(key):
+            return str(metadata[key])
+    sic02 = completed_sections.get("SIC_02")
+    if sic02:
+        for kv in sic02.metadata:
+            if any(marker in normalize_text(kv.key) for marker in ("ALCANCE", "SCOPE", "TIPO DE PROYECTO")):
+                return kv.value
+    return None
+
+
+class NotApplicableGenerator:
+    """Generador determinista de secciones excluidas ("No Aplicable")."""
+
+    def __init__(self, specs: Optional[Dict[str, SectionSpec]] = None, template_path: str = DEFAULT_TEMPLATE_PATH):
+        if specs is None:
+            with open(template_path, "r", encoding="utf-8") as f:
+                specs = parse_template(f.read())
+        self.specs = specs
+
+    def applies(self, section_id: str, scope: Optional[str]) -> bool:
+        return section_id in EXCLUDABLE_SECTIONS and section_id in self.specs and scope_is_excluded(scope)
+
+    def generate(self, section_id: str, project_id: Any, scope: str) -> Tuple[SIC_DTO, FeedbackCritiqueSchema]:
+        """SIC_DTO con la declaración formal de No Aplicable y la crítica de aprobación por regla."""
+        spec = self.specs[section_id]
+        justification = JUSTIFICATIONS.get(section_id, "el alcance del proyecto no afecta a este capítulo")
+        lines = []
+        for number, title in spec.headings:
+            heading = f"{number} {title}" if number else title
+            if number and "." not in number:
+                lines.append(f"## {heading}")
+                lines.append(f"Capítulo **No Aplicable** para el alcance del proyecto ({scope}).")
+            elif "RESUMEN DEL CAPITULO" in normalize_text(title):
+                lines.append(f"### {heading}")
+                lines.append(f"El capítulo no fue desarrollado / no aplica porque {justification}.")
+            elif "RESUMEN DEL PROYECTO" in normalize_text(title):
+                lines.append(f"### {heading}")
+                lines.append("Descripción del alcance del proyecto según SIC 02 (Caso de Negocio).")
+            else:
+                lines.append(f"### {heading}")
+                lines.append("No desarrollado (no aplica al alcance del proyecto).")
+
+        table_rows = [
+            f"| Tabla {'/'.join(group)} | Según SIC 02 (Tabla 21: Condiciones geográficas y ambientales del sitio) |"
+            for group in spec.table_groups
+        ]
+        key_tables = "\n".join(["| Tabla | Referencia |", "| :--- | :--- |"] + table_rows) if table_rows else ""
+
+        dto = SIC_DTO(
+            sic_code=section_id,
+            project_id=int(project_id),
+            metadata=[
+                KeyValue(key="Aplicabilidad", value="No Aplicable"),
+                KeyValue(key="Alcance", value=str(scope)),
+            ],
+            key_tables_markdown=key_tables,
+            summary_markdown="\n\n".join(lines),
+        )
+        critique = FeedbackCritiqueSchema(
+            root_cause=f"Exclusión formal AGDR de {section_id} para alcance de Infraestructura/Servicios",
+            actionable_recommendation="Sin observaciones: declaración No Aplicable generada desde la plantilla maestra",
+            qc_score=100,
+            approved=True,
+            critical_gaps=[],
+            regulatory_compliance=True,
+        )
+        logger.info(f"⏩ [{section_id}] No Aplicable por alcance '{scope}' (sin llamadas LLM)")
+        return dto, critique
@@ -0,0 +1,43 @@
+"""
+Workflow Progress - Eventos de avance por sección
+
+El DocumentCreationWorkflow emite eventos (plan listo, sección iniciada,
+sección completada...) con `emit_progress`. Quien ejecuta el workflow instala
+oyentes con `listen_progress` en su contexto (ContextVar), de modo que varias
+ejecuciones concurrentes del mismo workflow no mezclan sus eventos.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProgressListener = Callable[[Dict[str, Any]], None]
+
+_listeners: ContextVar[Tuple[ProgressListener, ...]] = ContextVar("maas_progress_listeners", default=())
+
+
+@contextmanager
+def listen_progress(listener: ProgressListener) -> Iterator[None]:
+    """Registra un oyente para los eventos emitidos en el contexto actual."""
+    token = _listeners.set(_listeners.get() + (listener,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+def emit_progress(event: str, **data: Any) -> None:
+    """Notifica un evento a los oyentes activos. Un oyente defectuoso no interrumpe el workflow."""
+    listeners = _listeners.get()
+    if not listeners:
+        return
+    payload = {"event": event, "timestamp": time.time(), **data}
+    for listener in listeners:
+        try:
+            listener(payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Oyente de progreso falló en '{event}': {str(e)[:100]}")
@@ -0,0 +1,111 @@
+"""
+Section Provenance - Registro de datos Redmine consumidos por sección
+
+Cada nodo del DAG se ejecuta dentro de `track_section_reads()`, que instala
+un registro en una ContextVar. Las herramientas Redmine anotan en él cada
+issue leído (con su `updated_on`) y cada consulta agregada ("hecho") que
+devolvieron al agente. Las herramientas síncronas de agno se ejecutan vía
+`asyncio.to_thread`, que copia el contexto, por lo que las lecturas de
+secciones concurrentes no se mezclan.
+
+Con ese registro persistido en los checkpoints, un cambio en Redmine solo
+invalida las secciones que leyeron los issues afectados y sus descendientes
+en el DAG.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+
+@dataclass
+class SectionReads:
+    """Issues (id -> updated_on) y hechos consultados durante una sección."""
+    issues: Dict[int, Optional[str]] = field(default_factory=dict)
+    facts: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "issues": {str(issue_id): updated_on for issue_id, updated_on in self.issues.items()},
+            "facts": list(self.facts),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["SectionReads"]:
+        if data is None:
+            return None
+        return cls(
+            issues={int(issue_id): updated_on for issue_id, updated_on in (data.get("issues") or {}).items()},
+            facts=list(data.get("facts") or []),
+        )
+
+
+_current_reads: ContextVar[Optional[SectionReads]] = ContextVar("maas_section_reads", default=None)
+
+
+@contextmanager
+def track_section_reads() -> Iterator[SectionReads]:
+    """Activa el registro de lecturas para el contexto actual (un nodo del DAG)."""
+    reads = SectionReads()
+    token = _current_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _current_reads.reset(token)
+
+
+def record_issue_read(issue_id: Any, updated_on: Optional[Any] = None) -> None:
+    """Anota un issue leído. Sin sección activa es un no-op."""
+    reads = _current_reads.get()
+    if reads is None or issue_id is None:
+        return
+    try:
+        issue_id = int(issue_id)
+    except (TypeError, ValueError):
+        return
+    if updated_on is not None or issue_id not in reads.issues:
+        reads.issues[issue_id] = str(updated_on) if updated_on is not None else None
+
+
+def record_fact(fact: str) -> None:
+    """Anota una consulta agregada (p.ej. 'project_issues:7'). Sin sección activa es un no-op."""
+    reads = _current_reads.get()
+    if reads is not None and fact not in reads.facts:
+        reads.facts.append(fact)
+
+
+def sections_reading(
+    reads_by_section: Dict[str, Optional[SectionReads]],
+    changed_issues: Iterable[int] = (),
+    changed_facts: Iterable[str] = (),
+) -> Set[str]:
+    """
+    Secciones afectadas directamente por los cambios.
+    Una sección sin registro de lecturas se considera afectada (no hay forma de descartarla).
+    """
+    changed_issues = {int(issue_id) for issue_id in changed_issues}
+    changed_facts = set(changed_facts)
+    affected: Set[str] = set()
+    for section_id, reads in reads_by_section.items():
+        if reads is None:
+            affected.add(section_id)
+        elif changed_issues & set(reads.issues) or changed_facts & set(reads.facts):
+            affected.add(section_id)
+    return affected
+
+
+def stale_issues(
+    reads_by_section: Dict[str, Optional[SectionReads]],
+    current_versions: Dict[int, Optional[str]],
+) -> Set[int]:
+    """Issues cuyo `updated_on` actual difiere del registrado (o que ya no existen)."""
+    stale: Set[int] = set()
+    for reads in reads_by_section.values():
+        if reads is None:
+            continue
+        for issue_id, updated_on in reads.issues.items():
+            current = current_versions.get(issue_id)
+            if current is None or updated_on is None or str(current) != updated_on:
+                stale.add(issue_id)
+    return stale
@@ -0,0 +1,286 @@
+"""
+Adaptive Rate Limiter - Limitador cliente compartido para la cuenta OpenAI
+
+Los seis agentes, el coordinador del Team y las auditorías en background usan
+la misma cuenta de OpenAI sin coordinación: bajo carga aparecen ráfagas de
+429 y los reintentos las amplifican. Este limitador se sitúa delante de cada
+invocación del modelo compartido (ver CachedOpenAIChat) y combina:
+
+    - Dos token buckets: peticiones por minuto (RPM) y tokens estimados por
+      minuto (TPM). Tras la llamada se liquida la diferencia entre los tokens
+      estimados y los consumidos realmente.
+    - Clases de prioridad: "interactive" (endpoint síncrono y jobs) pasa
+      antes que "batch" (lotes y auditorías en background) cuando hay cola.
+    - Concurrencia adaptativa AIMD: un 429 reduce a la mitad el número de
+      llamadas en vuelo y pausa el despacho el tiempo indicado por
+      Retry-After; cada respuesta con latencia por debajo del objetivo suma
+      1/concurrencia (un hueco extra por "ronda" de llamadas).
+    - Cabeceras x-ratelimit-*: los límites reales de la cuenta sustituyen a
+      los configurados y el saldo local nunca supera el restante del servidor.
+
+La clase de prioridad se propaga por ContextVar (`rate_limit_class`), igual
+que el deadline y la provenance.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLASSES = {"interactive": 0, "batch": 1}
+DEFAULT_PRIORITY_CLASS = "interactive"
+
+_priority_class: ContextVar[str] = ContextVar("maas_rate_limit_class", default=DEFAULT_PRIORITY_CLASS)
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+@contextmanager
+def rate_limit_class(name: str) -> Iterator[None]:
+    """Clase de prioridad de las llamadas al modelo del contexto actual."""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Clase de prioridad desconocida: {name}")
+    token = _priority_class.set(name)
+    try:
+        yield
+    finally:
+        _priority_class.reset(token)
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Segundos de una cabecera de reset/Retry-After de OpenAI ("1s", "6m0s", "20ms", "2")."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    matches = _DURATION_PATTERN.findall(value)
+    return sum(float(amount) * units[unit] for amount, unit in matches) if matches else None
+
+
+class _Bucket:
+    """Token bucket con recarga continua de `per_minute` unidades por minuto."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Segundos hasta disponer de `amount` (acotado a la capacidad)."""
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing * 60.0 / self.capacity
+
+    def resize(self, per_minute: float) -> None:
+        if per_minute > 0 and per_minute != self.capacity:
+            self.capacity = float(per_minute)
+            self.level = min(self.level, self.capacity)
+
+
+class RateLimitLease:
+    """Permiso concedido para una llamada; `settle` liquida los tokens reales."""
+
+    def __init__(self, limiter: "AdaptiveRateLimiter", estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.started = time.monotonic()
+        self.settled = False
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if self.settled:
+            return
+        self.settled = True
+        self.limiter._settle(self, actual_tokens, time.monotonic() - self.started)
+
+
+class AdaptiveRateLimiter:
+    """Limitador RPM + TPM con prioridades y concurrencia adaptativa."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 500,
+        tokens_per_minute: int = 300_000,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        target_latency_seconds: float = 30.0,
+    ):
+        self.requests = _Bucket(requests_per_minute)
+        self.tokens = _Bucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency_seconds = target_latency_seconds
+        self._concurrency = float(max_concurrency)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_rate_limited = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self.stats: Dict[str, Any] = {
+            "granted": 0, "rate_limited": 0, "waited_seconds": 0.0, "latency_ewma": None,
+            "granted_by_class": {name: 0 for name in PRIORITY_CLASSES},
+        }
+
+    @property
+    def concurrency(self) -> int:
+        return max(self.min_concurrency, int(self._concurrency))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual para métricas / dashboard."""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "requests_available": round(self.requests.level, 1),
+            "tokens_available": round(self.tokens.level, 1),
+            "paused_seconds": round(max(0.0, self._paused_until - now), 3),
+            **self.stats,
+        }
+
+    def _cond(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _dispatch_delay(self, estimated_tokens: int) -> float:
+        """0 si la llamada puede salir ya; si no, segundos estimados de espera."""
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self._paused_until - now, self.requests.delay(1), self.tokens.delay(estimated_tokens))
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int, priority_class: Optional[str] = None) -> AsyncIterator[RateLimitLease]:
+        """
+        Espera turno (prioridad, concurrencia, RPM, TPM) y concede un permiso.
+        Un 429 dentro del bloque (excepción con status_code 429) adapta el limitador.
+        """
+        name = priority_class or _priority_class.get()
+        entry = (PRIORITY_CLASSES.get(name, len(PRIORITY_CLASSES)), next(self._sequence))
+        condition = self._cond()
+        started = time.monotonic()
+        heapq.heappush(self._waiters, entry)
+        try:
+            async with condition:
+                while True:
+                    if self._waiters[0] == entry and self._in_flight < self.concurrency:
+                        delay = self._dispatch_delay(estimated_tokens)
+                        if delay <= 0:
+                            break
+                        try:
+                            await asyncio.wait_for(condition.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await condition.wait()
+                heapq.heappop(self._waiters)
+                self.requests.level -= 1
+                self.tokens.level -= estimated_tokens
+                self._in_flight += 1
+                # El siguiente en la cola puede tener hueco también
+                condition.notify_all()
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                async with condition:
+                    condition.notify_all()
+            raise
+
+        waited = time.monotonic() - started
+        self.stats["granted"] += 1
+        self.stats["granted_by_class"][name] = self.stats["granted_by_class"].get(name, 0) + 1
+        self.stats["waited_seconds"] += waited
+        if waited > 1:
+            logger.info(f"🚦 [RATE LIMIT] Llamada '{name}' esperó {waited:.1f}s (concurrencia {self.concurrency})")
+
+        lease = RateLimitLease(self, estimated_tokens)
+        try:
+            yield lease
+        except Exception as e:
+            # Si el hook de cabeceras ya registró este 429, no se penaliza dos veces
+            if getattr(e, "status_code", None) == 429 and self._last_rate_limited < lease.started:
+                self.on_rate_limited(getattr(e, "retry_after", None))
+            raise
+        finally:
+            self._in_flight -= 1
+            lease.settle(None)
+            async with condition:
+                condition.notify_all()
+
+    def _settle(self, lease: RateLimitLease, actual_tokens: Optional[int], latency: float) -> None:
+        if actual_tokens is not None:
+            # Devuelve (o cobra) la diferencia entre la estimación y el consumo real
+            self.tokens.level += lease.estimated_tokens - actual_tokens
+            ewma = self.stats["latency_ewma"]
+            self.stats["latency_ewma"] = latency if ewma is None else 0.8 * ewma + 0.2 * latency
+            if latency <= self.target_latency_seconds:
+                self._concurrency = min(self.max_concurrency, self._concurrency + 1 / max(1.0, self._concurrency))
+            else:
+                self._concurrency = max(self.min_concurrency, self._concurrency - 1)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """429: reducción multiplicativa de la concurrencia y pausa del despacho."""
+        now = time.monotonic()
+        self._last_rate_limited = now
+        pause = retry_after if retry_after is not None else 1.0
+        if now + pause > self._paused_until:
+            self._paused_until = now + pause
+        previous = self.concurrency
+        self._concurrency = max(float(self.min_concurrency), self._concurrency / 2)
+        self.stats["rate_limited"] += 1
+        logger.warning(
+            f"🚦 [RATE LIMIT] 429 de OpenAI: concurrencia {previous} -> {self.concurrency}, pausa {pause:.1f}s"
+        )
+
+    def observe_headers(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Ajusta límites y saldo a las cabeceras x-ratelimit-* de la respuesta."""
+        headers = {key.lower(): value for key, value in headers.items()}
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            try:
+                if limit:
+                    bucket.resize(float(limit))
+                if remaining is not None:
+                    bucket.refill(time.monotonic())
+                    bucket.level = min(bucket.level, float(remaining))
+            except ValueError:
+                continue
+        if status_code == 429:
+            retry_after = parse_reset(headers.get("retry-after")) or max(
+                parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+            ) or None
+            self.on_rate_limited(retry_after)
+
+    async def observe_response(self, response: Any) -> None:
+        """Hook de respuesta para httpx.AsyncClient (event_hooks={"response": [...]})."""
+        try:
+            self.observe_headers(response.status_code, response.headers)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron leer cabeceras de rate limit: {str(e)[:100]}")
+
+
+def estimate_request_tokens(texts: List[str], counter: Any, max_output_tokens: Optional[int] = None) -> int:
+    """Tokens estimados de una petición: prompt contado + salida esperada."""
+    prompt_tokens = sum(counter.count(text) for text in texts if text)
+    return prompt_tokens + (max_output_tokens or 1024)
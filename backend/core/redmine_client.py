@@ -0,0 +1,177 @@
+"""
+Async Redmine Client - Cliente REST de Redmine sobre httpx.AsyncClient
+
+python-redmine es síncrono: dentro de un arun cada petición bloquea el event
+loop del proceso FastAPI, y cada llamada abre conexiones nuevas. Este cliente
+usa un único httpx.AsyncClient por event loop:
+
+    - Pool de conexiones con keep-alive (`max_connections`,
+      `max_keepalive_connections`, `keepalive_expiry`).
+    - Límite de peticiones simultáneas a Redmine (`max_concurrency`): un pico
+      de agentes no satura el servidor y una respuesta lenta solo ocupa su
+      propio hueco.
+    - Timeout por petición acotado al deadline de la ejecución (call_timeout).
+    - Paginación offset/limit=100 con páginas en paralelo.
+
+Los métodos devuelven el JSON de la API de Redmine (dicts); `as_resource()`
+de redmine_mirror los convierte al formato de objetos de python-redmine.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from backend.core.deadline import call_timeout
+
+logger = logging.getLogger(__name__)
+
+REDMINE_PAGE_SIZE = 100
+
+
+class AsyncRedmineClient:
+    """
+    Cliente async de la API REST de Redmine con pool keep-alive y concurrencia acotada.
+
+    Args:
+        base_url / api_key: Redmine (por defecto REDMINE_BASE_URL / REDMINE_API_KEY)
+        max_connections: conexiones máximas del pool
+        max_keepalive_connections: conexiones ociosas reutilizables
+        keepalive_expiry: segundos que una conexión ociosa sigue abierta
+        max_concurrency: peticiones simultáneas a Redmine
+        timeout_seconds: timeout por petición (se acota además al deadline)
+        transport: transporte httpx alternativo (tests)
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        max_concurrency: int = 8,
+        timeout_seconds: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = (base_url or os.getenv("REDMINE_BASE_URL", "http://cidiia.uce.edu.do/")).rstrip("/")
+        self.api_key = api_key if api_key is not None else os.getenv("REDMINE_API_KEY")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds or float(os.getenv("REDMINE_TIMEOUT_SECONDS", "30"))
+        self.transport = transport
+        # httpx.AsyncClient y asyncio.Semaphore pertenecen a un event loop: uno por loop
+        self._clients: Dict[int, tuple] = {}
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _session(self) -> tuple:
+        loop = asyncio.get_running_loop()
+        session = self._clients.get(id(loop))
+        if session is None or session[0] is not loop or session[1].is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"X-Redmine-API-Key": self.api_key or ""},
+                limits=self.limits,
+                timeout=self.timeout_seconds,
+                transport=self.transport,
+            )
+            session = (loop, client, asyncio.Semaphore(self.max_concurrency))
+            self._clients[id(loop)] = session
+        return session
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json_body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Petición a la API (JSON); lanza httpx.HTTPStatusError en respuestas 4xx/5xx."""
+        _, client, semaphore = self._session()
+        async with semaphore:
+            # El deadline se comprueba al obtener el hueco: la espera en cola también cuenta
+            timeout = call_timeout(self.timeout_seconds)
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                response = await client.request(method, path, params=params, json=json_body, timeout=timeout)
+                response.raise_for_status()
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+        return response.json() if response.content else {}
+
+    async def get(self, path: str, **params) -> Dict[str, Any]:
+        return await self.request("GET", path, params={k: v for k, v in params.items() if v is not None})
+
+    async def get_all(self, path: str, key: str, limit: Optional[int] = None, **params) -> List[Dict[str, Any]]:
+        """
+        Listado paginado: la primera página da total_count y el resto se pide en paralelo.
+        `limit` acota el total de elementos (None = todos).
+        """
+        first_size = min(limit, REDMINE_PAGE_SIZE) if limit else REDMINE_PAGE_SIZE
+        first = await self.get(path, offset=0, limit=first_size, **params)
+        items = list(first.get(key, []))
+        total = int(first.get("total_count", len(items)))
+        if limit:
+            total = min(total, limit)
+        pages = await asyncio.gather(*(
+            self.get(path, offset=offset, limit=min(REDMINE_PAGE_SIZE, total - offset), **params)
+            for offset in range(first_size, total, REDMINE_PAGE_SIZE)
+        ))
+        for page in pages:
+            items.extend(page.get(key, []))
+        return items[:limit] if limit else items
+
+    async def issue(self, issue_id: int, include: Sequence[str] = ()) -> Dict[str, Any]:
+        return (await self.get(f"/issues/{int(issue_id)}.json", include=",".join(include) or None))["issue"]
+
+    async def issues(self, limit: Optional[int] = None, **filters) -> List[Dict[str, Any]]:
+        return await self.get_all("/issues.json", "issues", limit=limit, **filters)
+
+    async def projects(self) -> List[Dict[str, Any]]:
+        return await self.get_all("/projects.json", "projects")
+
+    async def update_issue(self, issue_id: int, fields: Dict[str, Any]) -> None:
+        await self.request("PUT", f"/issues/{int(issue_id)}.json", json_body={"issue": fields})
+
+    async def aclose(self) -> None:
+        """Cierra el cliente del event loop actual (el resto se descartan)."""
+        loop = asyncio.get_running_loop()
+        session = self._clients.pop(id(loop), None)
+        self._clients.clear()
+        if session is not None and session[0] is loop:
+            await session[1].aclose()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "max_concurrency": self.max_concurrency,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            **self.stats,
+        }
+
+
+_default_client: Optional[AsyncRedmineClient] = None
+
+
+def default_redmine_client() -> AsyncRedmineClient:
+    """Cliente del proceso (un pool keep-alive compartido por todas las AsyncRedmineTools)."""
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncRedmineClient(
+            max_connections=int(os.getenv("MAAS_REDMINE_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("MAAS_REDMINE_KEEPALIVE_CONNECTIONS", "10")),
+            max_concurrency=int(os.getenv("MAAS_REDMINE_MAX_CONCURRENCY", "8")),
+        )
+    return _default_client
@@ -0,0 +1,1011 @@
+"""
+Redmine Mirror - Réplica local de proyectos Redmine en Postgres
+
+Un plan de 22 secciones lanza cientos de lecturas Redmine redundantes (un
+issue por petición HTTP desde cada agente). El mirror toma una instantánea
+del proyecto completo y las herramientas leen de ella:
+
+    - Ingesta paginada (offset/limit=100) con páginas en paralelo: la primera
+      página da total_count y el resto se pide a la vez (acotado por
+      `max_parallel`). Los journals solo se exponen por issue
+      (/issues/{id}.json?include=journals) y se piden también en paralelo.
+    - Tablas: proyectos, issues (columnas de filtro + JSON crudo), valores de
+      custom fields, relaciones, journals y versiones. Cada tabla se escribe
+      con un único INSERT ... SELECT FROM jsonb_to_recordset (upsert masivo)
+      y se poda lo que ya no existe en Redmine; la fila del proyecto marca la
+      instantánea como completa al final.
+    - Sincronización incremental: cada proyecto guarda un cursor (máximo
+      updated_on replicado) y sync_project() solo pide los issues con
+      updated_on >= cursor. Si el total del proyecto no cuadra (issues
+      borrados o movidos, que updated_on no refleja) se rehace la instantánea.
+      Cada sincronización produce un ChangeSet (issues creados, borrados y
+      campos cambiados) que reciben los suscriptores (subscribe) para
+      invalidar exactamente lo que cambió.
+    - Lectura: documentos con el mismo formato JSON de la API de Redmine
+      (issue + relations + journals). None = no replicado (o más antiguo que
+      `max_age_seconds`): el llamador recurre a Redmine en vivo.
+
+Sin `db` la réplica vive en memoria (tests, benchmarks y degradación).
+RedmineTools usa el mirror del proceso registrado con set_default_mirror().
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from backend.core.deadline import DeadlineExceeded, call_timeout, with_deadline
+
+logger = logging.getLogger(__name__)
+
+MIRROR_PAGE_SIZE = 100
+# Claves del issue que viven en tablas propias (o que no se replican)
+CHILD_KEYS = ("journals", "relations", "changesets", "watchers", "children", "attachments", "allowed_statuses")
+REDMINE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@dataclass
+class ProjectSnapshot:
+    """Datos de un proyecto tal como los devuelve la API de Redmine."""
+    project: Dict[str, Any]
+    issues: List[Dict[str, Any]]
+    versions: List[Dict[str, Any]] = field(default_factory=list)
+    journals_included: bool = True
+    requests: int = 0
+    fetch_seconds: float = 0.0
+
+
+@dataclass
+class ChangeSet:
+    """Resultado de aplicar una instantánea o sincronización al mirror."""
+    project_id: int
+    full: bool
+    # issue_id -> campos cambiados ("subject", "status", "cf:CAPEX_KUSD", "relations", "journals", ...)
+    changed: Dict[int, List[str]] = field(default_factory=dict)
+    created: List[int] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+    cursor: Optional[str] = None
+    fetched: int = 0
+    requests: int = 0
+    seconds: float = 0.0
+
+    @property
+    def issue_ids(self) -> List[int]:
+        """Issues afectados (creados, modificados o borrados)."""
+        return sorted(set(self.changed) | set(self.created) | set(self.deleted))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "full": self.full,
+            "fetched": self.fetched,
+            "created": self.created,
+            "deleted": self.deleted,
+            "changed": {str(issue_id): fields for issue_id, fields in self.changed.items()},
+            "cursor": self.cursor,
+            "requests": self.requests,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def _parse_redmine_time(value: Any) -> Any:
+    try:
+        return datetime.strptime(value, REDMINE_TIME_FORMAT)
+    except (TypeError, ValueError):
+        return value
+
+
+def as_resource(data: Any, key: Optional[str] = None) -> Any:
+    """
+    Documento JSON -> objeto con acceso por atributo, como los recursos de python-redmine:
+    fechas *_on como datetime (naive, UTC), custom_fields como lista de dicts.
+    """
+    if isinstance(data, dict):
+        return SimpleNamespace(**{k: as_resource(v, k) for k, v in data.items()})
+    if isinstance(data, list):
+        return list(data) if key == "custom_fields" else [as_resource(item) for item in data]
+    if key and key.endswith("_on") and isinstance(data, str):
+        return _parse_redmine_time(data)
+    return data
+
+
+def _json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _to_epoch(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    return None
+
+
+def _issue_row(issue: Dict[str, Any]) -> Dict[str, Any]:
+    status = issue.get("status") or {}
+    return {
+        "id": issue["id"],
+        "project_id": (issue.get("project") or {}).get("id"),
+        "subject": issue.get("subject"),
+        "status_id": status.get("id"),
+        "status_name": status.get("name"),
+        "is_closed": bool(status.get("is_closed")) or issue.get("closed_on") is not None,
+        "tracker_name": (issue.get("tracker") or {}).get("name"),
+        "priority_name": (issue.get("priority") or {}).get("name"),
+        "assigned_to_name": (issue.get("assigned_to") or {}).get("name"),
+        "fixed_version_id": (issue.get("fixed_version") or {}).get("id"),
+        "created_on": issue.get("created_on"),
+        "updated_on": issue.get("updated_on"),
+        "raw": {k: v for k, v in issue.items() if k not in CHILD_KEYS},
+    }
+
+
+def _custom_value_rows(issue: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "issue_id": issue["id"],
+            "field_id": cf["id"],
+            "name": cf.get("name"),
+            "value": cf.get("value") if isinstance(cf.get("value"), str) or cf.get("value") is None
+            else json.dumps(cf.get("value")),
+        }
+        for cf in issue.get("custom_fields") or []
+        if cf.get("id") is not None
+    ]
+
+
+def _changed_fields(stored: Dict[str, Any], issue: Dict[str, Any], journals_included: bool) -> List[str]:
+    """Campos que difieren entre el issue replicado (raw + ids de relaciones/journals) y el recibido."""
+    old, new = stored["raw"], {k: v for k, v in issue.items() if k not in CHILD_KEYS}
+    fields = sorted(
+        key for key in set(old) | set(new)
+        if key not in ("custom_fields", "updated_on") and old.get(key) != new.get(key)
+    )
+    old_cf = {cf.get("name"): cf.get("value") for cf in old.get("custom_fields") or []}
+    new_cf = {cf.get("name"): cf.get("value") for cf in new.get("custom_fields") or []}
+    fields += sorted(f"cf:{name}" for name in set(old_cf) | set(new_cf) if old_cf.get(name) != new_cf.get(name))
+    if sorted(stored["relation_ids"]) != sorted(r["id"] for r in issue.get("relations") or []):
+        fields.append("relations")
+    if journals_included and sorted(stored["journal_ids"]) != sorted(j["id"] for j in issue.get("journals") or []):
+        fields.append("journals")
+    if not fields and old.get("updated_on") != new.get("updated_on"):
+        fields.append("updated_on")
+    return fields
+
+
+def _journal_rows(issue: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"id": journal["id"], "issue_id": issue["id"], "created_on": journal.get("created_on"), "raw": journal}
+        for journal in issue.get("journals") or []
+    ]
+
+
+class RedmineMirror:
+    """
+    Instantáneas de proyectos Redmine en Postgres (o en memoria sin `db`).
+
+    Args:
+        db: AsyncPostgresDb (execute/fetch/fetchone); None = réplica en memoria
+        base_url / api_key: Redmine (por defecto REDMINE_BASE_URL / REDMINE_API_KEY)
+        page_size: tamaño de página de la ingesta (máximo de Redmine: 100)
+        max_parallel: peticiones HTTP simultáneas durante la ingesta
+        include_journals: pedir journals (una petición por issue)
+        max_age_seconds: antigüedad máxima de una instantánea para servir lecturas
+        transport: transporte httpx alternativo (tests)
+    """
+
+    def __init__(
+        self,
+        db: Any = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        page_size: int = MIRROR_PAGE_SIZE,
+        max_parallel: int = 8,
+        include_journals: bool = True,
+        max_age_seconds: Optional[float] = None,
+        timeout_seconds: float = 30.0,
+        table_prefix: str = "maas_redmine",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.db = db
+        self.base_url = (base_url or os.getenv("REDMINE_BASE_URL", "http://cidiia.uce.edu.do/")).rstrip("/")
+        self.api_key = api_key if api_key is not None else os.getenv("REDMINE_API_KEY")
+        self.page_size = min(page_size, MIRROR_PAGE_SIZE)
+        self.max_parallel = max_parallel
+        self.include_journals = include_journals
+        self.max_age_seconds = max_age_seconds
+        self.timeout_seconds = timeout_seconds
+        self.transport = transport
+        self.tables = {
+            name: f"{table_prefix}_{name}"
+            for name in ("projects", "issues", "custom_values", "relations", "journals", "versions")
+        }
+        self._table_ready = False
+        self._lock = threading.Lock()
+        # Réplica en memoria (db=None)
+        self._projects: Dict[int, Dict[str, Any]] = {}
+        self._issues: Dict[int, Dict[str, Any]] = {}
+        self._relations: Dict[int, Dict[str, Any]] = {}
+        self._versions: Dict[int, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[ChangeSet], Any]] = []
+        self.stats = {
+            "snapshots": 0, "syncs": 0, "resnapshots": 0, "requests": 0, "hits": 0, "misses": 0, "errors": 0,
+        }
+
+    # ------------------------------------------------------------------ ingesta
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"X-Redmine-API-Key": self.api_key or ""},
+            timeout=self.timeout_seconds,
+            limits=httpx.Limits(max_connections=self.max_parallel, max_keepalive_connections=self.max_parallel),
+            transport=self.transport,
+        )
+
+    async def _get(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, path: str, **params) -> Dict[str, Any]:
+        async with semaphore:
+            # Acotada al deadline de la ejecución que pide la sincronización (si lo hay)
+            response = await client.get(path, params=params, timeout=call_timeout(self.timeout_seconds))
+        self.stats["requests"] += 1
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_all(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, path: str, key: str, **params
+    ) -> List[Dict[str, Any]]:
+        """Todas las páginas de un listado: la primera da total_count, el resto en paralelo."""
+        first = await self._get(client, semaphore, path, offset=0, limit=self.page_size, **params)
+        items = list(first.get(key, []))
+        total = int(first.get("total_count", len(items)))
+        pages = await asyncio.gather(*(
+            self._get(client, semaphore, path, offset=offset, limit=self.page_size, **params)
+            for offset in range(self.page_size, total, self.page_size)
+        ))
+        for page in pages:
+            items.extend(page.get(key, []))
+        # Una edición entre páginas puede desplazar issues: se deduplica por id
+        return list({item["id"]: item for item in items}.values())
+
+    async def _attach_journals(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, issues: List[Dict[str, Any]]
+    ) -> None:
+        """Journals por issue (los listados de Redmine no los incluyen), en paralelo."""
+        if not self.include_journals:
+            return
+        details = await asyncio.gather(*(
+            self._get(client, semaphore, f"/issues/{issue['id']}.json", include="journals") for issue in issues
+        ))
+        journals = {d["issue"]["id"]: d["issue"].get("journals", []) for d in details}
+        for issue in issues:
+            issue["journals"] = journals.get(issue["id"], [])
+
+    async def fetch_changes(self, project_id: int, cursor: str) -> tuple:
+        """
+        Issues del proyecto con updated_on >= cursor, sin journals (más proyecto, versiones y
+        el total actual de issues del proyecto, para detectar borrados). Devuelve (snapshot, total).
+        """
+        start = time.monotonic()
+        requests_before = self.stats["requests"]
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        async with self._client() as client:
+            project, issues, versions, count = await asyncio.gather(
+                self._get(client, semaphore, f"/projects/{project_id}.json"),
+                self._get_all(
+                    client, semaphore, "/issues.json", "issues", project_id=project_id, status_id="*",
+                    include="relations", sort="updated_on", updated_on=f">={cursor}",
+                ),
+                self._get(client, semaphore, f"/projects/{project_id}/versions.json"),
+                self._get(client, semaphore, "/issues.json", project_id=project_id, status_id="*", limit=1),
+            )
+        snapshot = ProjectSnapshot(
+            project=project["project"],
+            issues=sorted(issues, key=lambda issue: issue["id"]),
+            versions=versions.get("versions", []),
+            journals_included=self.include_journals,
+            requests=self.stats["requests"] - requests_before,
+            fetch_seconds=time.monotonic() - start,
+        )
+        return snapshot, int(count.get("total_count", 0))
+
+    async def fetch_project(self, project_ref: Any) -> ProjectSnapshot:
+        """Descarga proyecto, issues (con relaciones), journals y versiones."""
+        start = time.monotonic()
+        requests_before = self.stats["requests"]
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        async with self._client() as client:
+            project = (await self._get(client, semaphore, f"/projects/{project_ref}.json"))["project"]
+            issues_task = self._get_all(
+                client, semaphore, "/issues.json", "issues",
+                project_id=project["id"], status_id="*", include="relations", sort="id",
+            )
+            versions_task = self._get(client, semaphore, f"/projects/{project['id']}/versions.json")
+            issues, versions = await asyncio.gather(issues_task, versions_task)
+            await self._attach_journals(client, semaphore, issues)
+        return ProjectSnapshot(
+            project=project,
+            issues=sorted(issues, key=lambda issue: issue["id"]),
+            versions=versions.get("versions", []),
+            journals_included=self.include_journals,
+            requests=self.stats["requests"] - requests_before,
+            fetch_seconds=time.monotonic() - start,
+        )
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        """Acceso a la réplica: directo en memoria, en un hilo con Postgres."""
+        return fn(*args) if self.db is None else await asyncio.to_thread(fn, *args)
+
+    def subscribe(self, listener: Callable[[ChangeSet], Any]) -> None:
+        """Registra un callback que recibe el ChangeSet de cada instantánea/sincronización."""
+        self._listeners.append(listener)
+
+    async def _apply(
+        self, snapshot: ProjectSnapshot, full: bool, stored: Optional[Dict[int, Dict[str, Any]]] = None,
+        cursor: Optional[str] = None,
+    ) -> ChangeSet:
+        """Calcula el ChangeSet contra lo replicado, escribe la instantánea y avisa a los suscriptores."""
+        start = time.monotonic()
+        project_id = snapshot.project["id"]
+        if stored is None:
+            stored = await self._run(
+                self._stored_issues, project_id, [issue["id"] for issue in snapshot.issues], full
+            )
+        changes = ChangeSet(project_id=project_id, full=full, fetched=len(snapshot.issues), requests=snapshot.requests)
+        for issue in snapshot.issues:
+            if issue["id"] not in stored:
+                changes.created.append(issue["id"])
+            else:
+                fields = _changed_fields(stored[issue["id"]], issue, snapshot.journals_included)
+                if fields:
+                    changes.changed[issue["id"]] = fields
+        if full:
+            fetched = {issue["id"] for issue in snapshot.issues}
+            changes.deleted = sorted(
+                issue_id for issue_id, doc in stored.items()
+                if doc["project_id"] == project_id and issue_id not in fetched
+            )
+        changes.cursor = max(
+            [issue["updated_on"] for issue in snapshot.issues if issue.get("updated_on")]
+            + ([cursor] if cursor else []),
+            default=None,
+        )
+
+        if self.db is None:
+            self._store_memory(snapshot, full, changes.cursor)
+        else:
+            await asyncio.to_thread(self._store_sync, snapshot, full, changes.cursor)
+        changes.seconds = snapshot.fetch_seconds + time.monotonic() - start
+        for listener in self._listeners:
+            try:
+                result = listener(changes)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"⚠️ [MIRROR] Suscriptor de cambios falló: {str(e)[:100]}")
+        return changes
+
+    async def snapshot_project(self, project_ref: Any) -> Dict[str, Any]:
+        """Instantánea completa del proyecto en la réplica. Devuelve un resumen."""
+        snapshot = await self.fetch_project(project_ref)
+        changes = await self._apply(snapshot, full=True)
+        self.stats["snapshots"] += 1
+        summary = {
+            "project_id": snapshot.project["id"],
+            "identifier": snapshot.project.get("identifier"),
+            "issues": len(snapshot.issues),
+            "journals": sum(len(issue.get("journals") or []) for issue in snapshot.issues),
+            "versions": len(snapshot.versions),
+            "created": len(changes.created),
+            "changed": len(changes.changed),
+            "deleted": len(changes.deleted),
+            "cursor": changes.cursor,
+            "requests": snapshot.requests,
+            "seconds": round(changes.seconds, 3),
+        }
+        logger.info(
+            f"🪞 [MIRROR] Proyecto {summary['project_id']}: {summary['issues']} issues en "
+            f"{summary['requests']} peticiones ({summary['seconds']}s)"
+        )
+        return summary
+
+    async def sync_project(self, project_ref: Any) -> ChangeSet:
+        """
+        Sincronización incremental: solo los issues con updated_on >= cursor del proyecto.
+        Sin instantánea previa, o si el total de issues no cuadra (borrados o movidos de
+        proyecto), rehace la instantánea completa.
+        """
+        state = await self._run(self._project_row, project_ref)
+        if state is None or not state.get("sync_cursor"):
+            return await self._apply(await self.fetch_project(project_ref), full=True)
+
+        snapshot, total = await self.fetch_changes(state["id"], state["sync_cursor"])
+        stored = await self._run(
+            self._stored_issues, state["id"], [issue["id"] for issue in snapshot.issues], False
+        )
+        # El cursor es inclusivo: los issues con el mismo updated_on ya replicado no han cambiado
+        snapshot.issues = [
+            issue for issue in snapshot.issues
+            if issue["id"] not in stored or stored[issue["id"]]["raw"].get("updated_on") != issue.get("updated_on")
+        ]
+        if snapshot.issues and self.include_journals:
+            requests_before = self.stats["requests"]
+            async with self._client() as client:
+                await self._attach_journals(client, asyncio.Semaphore(self.max_parallel), snapshot.issues)
+            snapshot.requests += self.stats["requests"] - requests_before
+        created = sum(
+            1 for issue in snapshot.issues
+            if issue["id"] not in stored or stored[issue["id"]]["project_id"] != state["id"]
+        )
+        if total != (state.get("issue_count") or 0) + created:
+            logger.info(
+                f"🪞 [MIRROR] Proyecto {state['id']}: {total} issues en Redmine vs "
+                f"{(state.get('issue_count') or 0) + created} replicados, se rehace la instantánea"
+            )
+            self.stats["resnapshots"] += 1
+            full = await self.fetch_project(state["id"])
+            full.requests += snapshot.requests
+            return await self._apply(full, full=True)
+
+        changes = await self._apply(snapshot, full=False, stored=stored, cursor=state["sync_cursor"])
+        self.stats["syncs"] += 1
+        logger.info(
+            f"🔄 [MIRROR] Proyecto {state['id']}: {len(changes.created)} nuevos, {len(changes.changed)} "
+            f"modificados de {changes.fetched} recibidos en {changes.requests} peticiones ({changes.seconds:.2f}s)"
+        )
+        return changes
+
+    async def ensure_project(self, project_ref: Any) -> Optional[ChangeSet]:
+        """
+        Pone el proyecto al día antes de una ejecución: instantánea si no está replicado,
+        sincronización incremental si ya lo está. Best-effort: None si Redmine falla o
+        se agota el deadline de la ejecución (las herramientas leen entonces Redmine en vivo).
+        """
+        try:
+            return await with_deadline(self.sync_project(project_ref), stage="mirror")
+        except DeadlineExceeded:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ [MIRROR] Deadline agotado sincronizando el proyecto {project_ref}; se omite")
+            return None
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ [MIRROR] No se pudo sincronizar el proyecto {project_ref}: {str(e)[:100]}")
+            return None
+
+    async def sync_all(self) -> List[ChangeSet]:
+        """Sincronización incremental de todos los proyectos replicados."""
+        projects = await self._run(self._mirrored_project_ids)
+        results = [await self.ensure_project(project_id) for project_id in projects]
+        return [changes for changes in results if changes is not None]
+
+    async def run_periodic_sync(self, interval_seconds: float = 300.0) -> None:
+        """Bucle de sincronización en segundo plano (se detiene al cancelarlo)."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.sync_all()
+
+    # ------------------------------------------------------------------ escritura
+
+    def _store_memory(self, snapshot: ProjectSnapshot, full: bool, cursor: Optional[str]) -> None:
+        project_id = snapshot.project["id"]
+        with self._lock:
+            fetched = {issue["id"] for issue in snapshot.issues}
+            gone = {
+                issue_id for issue_id, doc in self._issues.items()
+                if full and doc["project_id"] == project_id and issue_id not in fetched
+            }
+            for issue_id in gone:
+                del self._issues[issue_id]
+            for issue in snapshot.issues:
+                previous = self._issues.get(issue["id"], {})
+                self._issues[issue["id"]] = {
+                    **_issue_row(issue),
+                    "journals": issue.get("journals") if snapshot.journals_included
+                    else previous.get("journals", []),
+                }
+            # Relaciones: las de los issues recibidos se reemplazan; las de issues borrados se descartan
+            self._relations = {
+                relation_id: relation for relation_id, relation in self._relations.items()
+                if not ({relation["issue_id"], relation["issue_to_id"]} & (fetched | gone))
+            }
+            for issue in snapshot.issues:
+                for relation in issue.get("relations") or []:
+                    self._relations[relation["id"]] = relation
+            if snapshot.versions or full:
+                self._versions = {
+                    **{k: v for k, v in self._versions.items() if (v.get("project") or {}).get("id") != project_id},
+                    **{v["id"]: v for v in snapshot.versions},
+                }
+            self._projects[project_id] = {
+                "id": project_id,
+                "identifier": snapshot.project.get("identifier"),
+                "name": snapshot.project.get("name"),
+                "raw": snapshot.project,
+                "snapshot_at": time.time(),
+                "sync_cursor": cursor,
+                "issue_count": sum(1 for doc in self._issues.values() if doc["project_id"] == project_id),
+            }
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        t = self.tables
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {t['projects']} (
+                id INTEGER PRIMARY KEY,
+                identifier VARCHAR(255),
+                name TEXT,
+                raw JSONB,
+                issue_count INTEGER DEFAULT 0,
+                snapshot_at TIMESTAMPTZ
+            );
+
+            ALTER TABLE {t['projects']} ADD COLUMN IF NOT EXISTS sync_cursor VARCHAR(32);
+
+            CREATE TABLE IF NOT EXISTS {t['issues']} (
+                id INTEGER PRIMARY KEY,
+                project_id INTEGER NOT NULL,
+                subject TEXT,
+                status_id INTEGER,
+                status_name VARCHAR(255),
+                is_closed BOOLEAN DEFAULT FALSE,
+                tracker_name VARCHAR(255),
+                priority_name VARCHAR(255),
+                assigned_to_name VARCHAR(255),
+                fixed_version_id INTEGER,
+                created_on TIMESTAMPTZ,
+                updated_on TIMESTAMPTZ,
+                raw JSONB NOT NULL,
+                synced_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_{t['issues']}_project_updated
+            ON {t['issues']}(project_id, updated_on);
+
+            CREATE TABLE IF NOT EXISTS {t['custom_values']} (
+                issue_id INTEGER NOT NULL,
+                field_id INTEGER NOT NULL,
+                name VARCHAR(255),
+                value TEXT,
+                PRIMARY KEY (issue_id, field_id)
+            );
+
+            CREATE TABLE IF NOT EXISTS {t['relations']} (
+                id INTEGER PRIMARY KEY,
+                issue_id INTEGER NOT NULL,
+                issue_to_id INTEGER NOT NULL,
+                relation_type VARCHAR(50),
+                raw JSONB
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_{t['relations']}_issue_id ON {t['relations']}(issue_id);
+            CREATE INDEX IF NOT EXISTS idx_{t['relations']}_issue_to_id ON {t['relations']}(issue_to_id);
+
+            CREATE TABLE IF NOT EXISTS {t['journals']} (
+                id INTEGER PRIMARY KEY,
+                issue_id INTEGER NOT NULL,
+                created_on TIMESTAMPTZ,
+                raw JSONB
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_{t['journals']}_issue_id ON {t['journals']}(issue_id);
+
+            CREATE TABLE IF NOT EXISTS {t['versions']} (
+                id INTEGER PRIMARY KEY,
+                project_id INTEGER NOT NULL,
+                name VARCHAR(255),
+                status VARCHAR(50),
+                raw JSONB
+            );
+        """)
+        self._table_ready = True
+
+    def _store_sync(self, snapshot: ProjectSnapshot, full: bool, cursor: Optional[str]) -> None:
+        """
+        Upserts masivos (una sentencia por tabla, filas como JSON) y poda de lo que ya no
+        existe. La fila del proyecto se escribe al final: marca la instantánea como completa.
+        """
+        self._ensure_table()
+        t = self.tables
+        project_id = snapshot.project["id"]
+        issue_ids = [issue["id"] for issue in snapshot.issues]
+        relations = {
+            relation["id"]: relation for issue in snapshot.issues for relation in issue.get("relations") or []
+        }
+        custom_values = [row for issue in snapshot.issues for row in _custom_value_rows(issue)]
+
+        if snapshot.issues:
+            self.db.execute(
+                f"""
+                INSERT INTO {t['issues']}
+                    (id, project_id, subject, status_id, status_name, is_closed, tracker_name, priority_name,
+                     assigned_to_name, fixed_version_id, created_on, updated_on, raw, synced_at)
+                SELECT id, project_id, subject, status_id, status_name, is_closed, tracker_name, priority_name,
+                       assigned_to_name, fixed_version_id, created_on, updated_on, raw, CURRENT_TIMESTAMP
+                FROM jsonb_to_recordset(%s::jsonb) AS r(
+                    id INTEGER, project_id INTEGER, subject TEXT, status_id INTEGER, status_name TEXT,
+                    is_closed BOOLEAN, tracker_name TEXT, priority_name TEXT, assigned_to_name TEXT,
+                    fixed_version_id INTEGER, created_on TIMESTAMPTZ, updated_on TIMESTAMPTZ, raw JSONB)
+                ON CONFLICT (id) DO UPDATE SET
+                    project_id = EXCLUDED.project_id,
+                    subject = EXCLUDED.subject,
+                    status_id = EXCLUDED.status_id,
+                    status_name = EXCLUDED.status_name,
+                    is_closed = EXCLUDED.is_closed,
+                    tracker_name = EXCLUDED.tracker_name,
+                    priority_name = EXCLUDED.priority_name,
+                    assigned_to_name = EXCLUDED.assigned_to_name,
+                    fixed_version_id = EXCLUDED.fixed_version_id,
+                    created_on = EXCLUDED.created_on,
+                    updated_on = EXCLUDED.updated_on,
+                    raw = EXCLUDED.raw,
+                    synced_at = CURRENT_TIMESTAMP
+                """,
+                json.dumps([_issue_row(issue) for issue in snapshot.issues]),
+            )
+            self.db.execute(
+                f"""
+                INSERT INTO {t['custom_values']} (issue_id, field_id, name, value)
+                SELECT issue_id, field_id, name, value
+                FROM jsonb_to_recordset(%s::jsonb) AS r(issue_id INTEGER, field_id INTEGER, name TEXT, value TEXT)
+                ON CONFLICT (issue_id, field_id) DO UPDATE SET name = EXCLUDED.name, value = EXCLUDED.value
+                """,
+                json.dumps(custom_values),
+            )
+            self.db.execute(
+                f"""
+                DELETE FROM {t['custom_values']}
+                WHERE issue_id = ANY(%s::int[])
+                  AND NOT ((issue_id::text || ':' || field_id::text) = ANY(%s::text[]))
+                """,
+                issue_ids,
+                [f"{row['issue_id']}:{row['field_id']}" for row in custom_values],
+            )
+            self.db.execute(
+                f"""
+                INSERT INTO {t['relations']} (id, issue_id, issue_to_id, relation_type, raw)
+                SELECT id, issue_id, issue_to_id, relation_type, raw
+                FROM jsonb_to_recordset(%s::jsonb) AS r(
+                    id INTEGER, issue_id INTEGER, issue_to_id INTEGER, relation_type TEXT, raw JSONB)
+                ON CONFLICT (id) DO UPDATE SET
+                    issue_id = EXCLUDED.issue_id,
+                    issue_to_id = EXCLUDED.issue_to_id,
+                    relation_type = EXCLUDED.relation_type,
+                    raw = EXCLUDED.raw
+                """,
+                json.dumps([
+                    {"id": r["id"], "issue_id": r["issue_id"], "issue_to_id": r["issue_to_id"],
+                     "relation_type": r.get("relation_type"), "raw": r}
+                    for r in relations.values()
+                ]),
+            )
+            self.db.execute(
+                f"""
+                DELETE FROM {t['relations']}
+                WHERE (issue_id = ANY(%s::int[]) OR issue_to_id = ANY(%s::int[]))
+                  AND NOT (id = ANY(%s::int[]))
+                """,
+                issue_ids,
+                issue_ids,
+                list(relations),
+            )
+            if snapshot.journals_included:
+                journals = [row for issue in snapshot.issues for row in _journal_rows(issue)]
+                self.db.execute(
+                    f"""
+                    INSERT INTO {t['journals']} (id, issue_id, created_on, raw)
+                    SELECT id, issue_id, created_on, raw
+                    FROM jsonb_to_recordset(%s::jsonb) AS r(id INTEGER, issue_id INTEGER, created_on TIMESTAMPTZ, raw JSONB)
+                    ON CONFLICT (id) DO UPDATE SET
+                        issue_id = EXCLUDED.issue_id,
+                        created_on = EXCLUDED.created_on,
+                        raw = EXCLUDED.raw
+                    """,
+                    json.dumps(journals),
+                )
+                self.db.execute(
+                    f"DELETE FROM {t['journals']} WHERE issue_id = ANY(%s::int[]) AND NOT (id = ANY(%s::int[]))",
+                    issue_ids,
+                    [row["id"] for row in journals],
+                )
+
+        if full:
+            # Issues borrados o movidos de proyecto en Redmine (y sus filas dependientes)
+            self.db.execute(
+                f"""
+                WITH gone AS (
+                    DELETE FROM {t['issues']}
+                    WHERE project_id = %s AND NOT (id = ANY(%s::int[]))
+                    RETURNING id
+                ), gone_values AS (
+                    DELETE FROM {t['custom_values']} WHERE issue_id IN (SELECT id FROM gone)
+                ), gone_journals AS (
+                    DELETE FROM {t['journals']} WHERE issue_id IN (SELECT id FROM gone)
+                )
+                DELETE FROM {t['relations']}
+                WHERE issue_id IN (SELECT id FROM gone) OR issue_to_id IN (SELECT id FROM gone)
+                """,
+                project_id,
+                issue_ids,
+            )
+        if snapshot.versions or full:
+            self.db.execute(
+                f"""
+                INSERT INTO {t['versions']} (id, project_id, name, status, raw)
+                SELECT id, project_id, name, status, raw
+                FROM jsonb_to_recordset(%s::jsonb) AS r(id INTEGER, project_id INTEGER, name TEXT, status TEXT, raw JSONB)
+                ON CONFLICT (id) DO UPDATE SET
+                    project_id = EXCLUDED.project_id,
+                    name = EXCLUDED.name,
+                    status = EXCLUDED.status,
+                    raw = EXCLUDED.raw
+                """,
+                json.dumps([
+                    {"id": v["id"], "project_id": project_id, "name": v.get("name"), "status": v.get("status"), "raw": v}
+                    for v in snapshot.versions
+                ]),
+            )
+            self.db.execute(
+                f"DELETE FROM {t['versions']} WHERE project_id = %s AND NOT (id = ANY(%s::int[]))",
+                project_id,
+                [v["id"] for v in snapshot.versions],
+            )
+        self.db.execute(
+            f"""
+            INSERT INTO {t['projects']} (id, identifier, name, raw, issue_count, snapshot_at, sync_cursor)
+            VALUES (%s, %s, %s, %s, (SELECT COUNT(*) FROM {t['issues']} WHERE project_id = %s), CURRENT_TIMESTAMP, %s)
+            ON CONFLICT (id) DO UPDATE SET
+                identifier = EXCLUDED.identifier,
+                name = EXCLUDED.name,
+                raw = EXCLUDED.raw,
+                issue_count = EXCLUDED.issue_count,
+                snapshot_at = CURRENT_TIMESTAMP,
+                sync_cursor = EXCLUDED.sync_cursor
+            """,
+            project_id,
+            snapshot.project.get("identifier"),
+            snapshot.project.get("name"),
+            json.dumps(snapshot.project),
+            project_id,
+            cursor,
+        )
+
+    def _stored_issues(self, project_id: int, issue_ids: List[int], whole_project: bool) -> Dict[int, Dict[str, Any]]:
+        """
+        Estado replicado de `issue_ids` (y de todo el proyecto si `whole_project`):
+        issue_id -> {project_id, raw, relation_ids, journal_ids}. Base del ChangeSet.
+        """
+        if self.db is None:
+            with self._lock:
+                wanted = set(issue_ids)
+                return {
+                    issue_id: {
+                        "project_id": doc["project_id"],
+                        "raw": doc["raw"],
+                        "relation_ids": [
+                            r["id"] for r in self._relations.values() if issue_id in (r["issue_id"], r["issue_to_id"])
+                        ],
+                        "journal_ids": [j["id"] for j in doc.get("journals") or []],
+                    }
+                    for issue_id, doc in self._issues.items()
+                    if issue_id in wanted or (whole_project and doc["project_id"] == project_id)
+                }
+
+        self._ensure_table()
+        t = self.tables
+        rows = self.db.fetch(
+            f"""
+            SELECT i.id, i.project_id, i.raw,
+                COALESCE((SELECT array_agg(r.id) FROM {t['relations']} r
+                          WHERE r.issue_id = i.id OR r.issue_to_id = i.id), '{{}}') AS relation_ids,
+                COALESCE((SELECT array_agg(j.id) FROM {t['journals']} j WHERE j.issue_id = i.id), '{{}}') AS journal_ids
+            FROM {t['issues']} i
+            WHERE i.id = ANY(%s::int[]) OR (%s AND i.project_id = %s)
+            """,
+            list(issue_ids),
+            whole_project,
+            project_id,
+        )
+        return {
+            row["id"]: {
+                "project_id": row["project_id"],
+                "raw": _json(row["raw"]),
+                "relation_ids": list(row["relation_ids"] or []),
+                "journal_ids": list(row["journal_ids"] or []),
+            }
+            for row in rows
+        }
+
+    # ------------------------------------------------------------------ lectura
+
+    def _fresh(self, snapshot_at: Any) -> bool:
+        if snapshot_at is None:
+            return False
+        if self.max_age_seconds is None:
+            return True
+        return time.time() - (_to_epoch(snapshot_at) or 0) <= self.max_age_seconds
+
+    def _count(self, found: bool) -> None:
+        self.stats["hits" if found else "misses"] += 1
+
+    def _project_row(self, project_ref: Any) -> Optional[Dict[str, Any]]:
+        """Fila del proyecto replicado (vigente o no), o None."""
+        ref = str(project_ref)
+        if self.db is None:
+            return next((p for p in self._projects.values() if ref in (str(p["id"]), p.get("identifier"))), None)
+        self._ensure_table()
+        return self.db.fetchone(
+            f"""
+            SELECT id, identifier, name, issue_count, snapshot_at, sync_cursor FROM {self.tables['projects']}
+            WHERE id::text = %s OR identifier = %s
+            """,
+            ref,
+            ref,
+        )
+
+    def _mirrored_project_ids(self) -> List[int]:
+        if self.db is None:
+            return sorted(self._projects)
+        self._ensure_table()
+        return [row["id"] for row in self.db.fetch(f"SELECT id FROM {self.tables['projects']} ORDER BY id")]
+
+    def project_state(self, project_ref: Any) -> Optional[Dict[str, Any]]:
+        """Estado de la instantánea vigente del proyecto (id, identifier, issue_count, snapshot_at, cursor) o None."""
+        state = self._project_row(project_ref)
+        if not state or not self._fresh(state.get("snapshot_at")):
+            return None
+        return {key: state.get(key) for key in ("id", "identifier", "name", "issue_count", "snapshot_at", "sync_cursor")}
+
+    def get_issue(self, issue_id: int) -> Optional[Dict[str, Any]]:
+        """Issue con relations y journals (formato de la API), o None si no está replicado."""
+        if self.db is None:
+            with self._lock:
+                doc = self._issues.get(int(issue_id))
+                project = self._projects.get(doc["project_id"]) if doc else None
+                if not doc or not project or not self._fresh(project["snapshot_at"]):
+                    self._count(False)
+                    return None
+                relations = [
+                    r for r in self._relations.values() if int(issue_id) in (r["issue_id"], r["issue_to_id"])
+                ]
+                issue = {**doc["raw"], "relations": sorted(relations, key=lambda r: r["id"]),
+                         "journals": list(doc.get("journals") or [])}
+            self._count(True)
+            return issue
+
+        self._ensure_table()
+        t = self.tables
+        row = self.db.fetchone(
+            f"""
+            SELECT i.raw, p.snapshot_at,
+                COALESCE((SELECT jsonb_agg(r.raw ORDER BY r.id) FROM {t['relations']} r
+                          WHERE r.issue_id = i.id OR r.issue_to_id = i.id), '[]'::jsonb) AS relations,
+                COALESCE((SELECT jsonb_agg(j.raw ORDER BY j.id) FROM {t['journals']} j
+                          WHERE j.issue_id = i.id), '[]'::jsonb) AS journals
+            FROM {t['issues']} i JOIN {t['projects']} p ON p.id = i.project_id
+            WHERE i.id = %s
+            """,
+            int(issue_id),
+        )
+        if not row or not self._fresh(row.get("snapshot_at")):
+            self._count(False)
+            return None
+        self._count(True)
+        return {**_json(row["raw"]), "relations": _json(row["relations"]), "journals": _json(row["journals"])}
+
+    def issue_versions(self, issue_ids: List[int]) -> Dict[int, str]:
+        """updated_on replicado (formato API) de los issues de proyectos vigentes; omite los no replicados."""
+        if not issue_ids:
+            return {}
+        if self.db is None:
+            with self._lock:
+                return {
+                    issue_id: doc["updated_on"]
+                    for issue_id, doc in ((int(i), self._issues.get(int(i))) for i in issue_ids)
+                    if doc and doc["project_id"] in self._projects
+                    and self._fresh(self._projects[doc["project_id"]]["snapshot_at"])
+                }
+        self._ensure_table()
+        t = self.tables
+        rows = self.db.fetch(
+            f"""
+            SELECT i.id, i.raw->>'updated_on' AS updated_on, p.snapshot_at
+            FROM {t['issues']} i JOIN {t['projects']} p ON p.id = i.project_id
+            WHERE i.id = ANY(%s::int[])
+            """,
+            [int(i) for i in issue_ids],
+        )
+        return {row["id"]: row["updated_on"] for row in rows if self._fresh(row.get("snapshot_at"))}
+
+    def project_issues(
+        self,
+        project_ref: Any,
+        status: Optional[str] = "open",
+        limit: Optional[int] = None,
+        issue_ids: Optional[List[int]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Issues del proyecto como `/issues.json` (más recientes primero). `status`:
+        "open" (por defecto en Redmine), "closed", "*" o un status_id. None si no está replicado.
+        """
+        state = self.project_state(project_ref)
+        if state is None:
+            self._count(False)
+            return None
+        self._count(True)
+        status = status or "open"
+        if self.db is None:
+            with self._lock:
+                rows = [doc for doc in self._issues.values() if doc["project_id"] == state["id"]]
+            if status == "open":
+                rows = [doc for doc in rows if not doc["is_closed"]]
+            elif status == "closed":
+                rows = [doc for doc in rows if doc["is_closed"]]
+            elif status != "*":
+                rows = [doc for doc in rows if str(doc["status_id"]) == str(status)]
+            if issue_ids is not None:
+                wanted = {int(i) for i in issue_ids}
+                rows = [doc for doc in rows if doc["id"] in wanted]
+            rows.sort(key=lambda doc: doc["id"], reverse=True)
+            return [doc["raw"] for doc in rows[:limit]]
+
+        conditions, params = ["project_id = %s"], [state["id"]]
+        if status == "open":
+            conditions.append("NOT is_closed")
+        elif status == "closed":
+            conditions.append("is_closed")
+        elif status != "*":
+            conditions.append("status_id::text = %s")
+            params.append(str(status))
+        if issue_ids is not None:
+            conditions.append("id = ANY(%s::int[])")
+            params.append([int(i) for i in issue_ids])
+        query = f"SELECT raw FROM {self.tables['issues']} WHERE {' AND '.join(conditions)} ORDER BY id DESC"
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        return [_json(row["raw"]) for row in self.db.fetch(query, *params)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado para /api/redmine/mirror: proyectos replicados y contadores."""
+        if self.db is None:
+            projects = [
+                {key: p.get(key) for key in ("id", "identifier", "name", "issue_count", "snapshot_at", "sync_cursor")}
+                for p in self._projects.values()
+            ]
+        else:
+            self._ensure_table()
+            projects = self.db.fetch(
+                f"SELECT id, identifier, name, issue_count, snapshot_at, sync_cursor FROM {self.tables['projects']} ORDER BY id"
+            )
+        return {
+            "storage": "memory" if self.db is None else "postgres",
+            "max_age_seconds": self.max_age_seconds,
+            "projects": [
+                {**p, "snapshot_at": _to_epoch(p.get("snapshot_at")), "fresh": self._fresh(p.get("snapshot_at"))}
+                for p in projects
+            ],
+            "stats": dict(self.stats),
+        }
+
+
+_default_mirror: Optional[RedmineMirror] = None
+
+
+def set_default_mirror(mirror: Optional[RedmineMirror]) -> None:
+    """Registra el mirror del proceso (lo usan todas las instancias de RedmineTools)."""
+    global _default_mirror
+    _default_mirror = mirror
+
+
+def default_mirror() -> Optional[RedmineMirror]:
+    return _default_mirror
@@ -0,0 +1,223 @@
+"""
+Section Result Cache - Caché direccionada por contenido de SIC_DTO
+
+Reutiliza secciones generadas en ejecuciones anteriores cuando sus entradas no
+han cambiado. La clave es un hash SHA-256 de:
+    - section_id y project_id
+    - Fingerprint del snapshot de datos Redmine del proyecto
+    - SIC_DTO de las dependencias aguas arriba
+    - Versión (contenido) de PLANTILLA_MAESTRA_SIC_GENERICO.md
+    - Instrucciones de los agentes Author y Judge
+
+Un acierto evita el par de llamadas GeneralAuthorAgent + ExpertJudgeAgent.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema
+from backend.core.provenance import SectionReads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "knowledge", "templates", "PLANTILLA_MAESTRA_SIC_GENERICO.md"
+)
+
+
+@dataclass
+class CachedSection:
+    """Entrada de caché reutilizable por el workflow."""
+    cache_key: str
+    dto: SIC_DTO
+    qc_score: float
+    critique: Optional[FeedbackCritiqueSchema]
+    reads: Optional[SectionReads] = None
+
+
+def file_version(path: str) -> str:
+    """Hash del contenido de un archivo (versión de la plantilla)."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo versionar {path}: {e}")
+        return "missing"
+
+
+def instructions_version(*agents: Any) -> str:
+    """Hash de las instrucciones (y descripción) de los agentes involucrados."""
+    payload = []
+    for agent in agents:
+        instructions = getattr(agent, "instructions", None)
+        if callable(instructions):
+            instructions = getattr(instructions, "__qualname__", repr(instructions))
+        payload.append({
+            "id": getattr(agent, "id", None),
+            "description": getattr(agent, "description", None),
+            "instructions": instructions,
+        })
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SectionResultCache:
+    """
+    Caché persistente de secciones aprobadas sobre AsyncPostgresDb.
+    Las operaciones bloqueantes del driver se ejecutan en un hilo.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        table_name: str = "maas_section_cache",
+        template_path: str = DEFAULT_TEMPLATE_PATH,
+    ):
+        self.db = db
+        self.table_name = table_name
+        self.template_version = file_version(template_path)
+        self._table_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def compute_key(
+        self,
+        section_id: str,
+        project_id: Any,
+        redmine_snapshot: str,
+        dependency_dtos: Dict[str, Optional[SIC_DTO]],
+        agents_version: str,
+    ) -> str:
+        """Clave determinista de la sección a partir de todas sus entradas."""
+        payload = {
+            "section_id": section_id,
+            "project_id": str(project_id),
+            "redmine_snapshot": redmine_snapshot,
+            "dependencies": {
+                dep_id: dto.model_dump() if dto else None
+                for dep_id, dto in sorted(dependency_dtos.items())
+            },
+            "template_version": self.template_version,
+            "agents_version": agents_version,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                cache_key CHAR(64) PRIMARY KEY,
+                section_id VARCHAR(50) NOT NULL,
+                project_id VARCHAR(255),
+                dto JSONB NOT NULL,
+                qc_score DOUBLE PRECISION DEFAULT 0,
+                critique JSONB,
+                reads JSONB,
+                hits INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_hit_at TIMESTAMP
+            );
+
+            ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS reads JSONB;
+
+            CREATE INDEX IF NOT EXISTS idx_{self.table_name}_project_section
+            ON {self.table_name}(project_id, section_id);
+        """)
+        self._table_ready = True
+
+    def _get_sync(self, cache_key: str) -> Optional[CachedSection]:
+        self._ensure_table()
+        row = self.db.fetchone(
+            f"""
+            UPDATE {self.table_name}
+            SET hits = hits + 1, last_hit_at = CURRENT_TIMESTAMP
+            WHERE cache_key = %s
+            RETURNING dto, qc_score, critique, reads
+            """,
+            cache_key,
+        )
+        if not row:
+            return None
+        dto = row.get("dto")
+        critique = row.get("critique")
+        reads = row.get("reads")
+        if isinstance(dto, str):
+            dto = json.loads(dto)
+        if isinstance(critique, str):
+            critique = json.loads(critique)
+        if isinstance(reads, str):
+            reads = json.loads(reads)
+        return CachedSection(
+            cache_key=cache_key,
+            dto=SIC_DTO(**dto),
+            qc_score=row.get("qc_score") or 0,
+            critique=FeedbackCritiqueSchema(**critique) if critique else None,
+            reads=SectionReads.from_dict(reads),
+        )
+
+    def _put_sync(
+        self,
+        cache_key: str,
+        section_id: str,
+        project_id: Any,
+        dto: SIC_DTO,
+        qc_score: float,
+        critique: Optional[FeedbackCritiqueSchema],
+        reads: Optional[SectionReads] = None,
+    ) -> None:
+        self._ensure_table()
+        self.db.execute(
+            f"""
+            INSERT INTO {self.table_name} (cache_key, section_id, project_id, dto, qc_score, critique, reads)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE SET
+                dto = EXCLUDED.dto,
+                qc_score = EXCLUDED.qc_score,
+                critique = EXCLUDED.critique,
+                reads = EXCLUDED.reads
+            """,
+            cache_key,
+            section_id,
+            str(project_id),
+            json.dumps(dto.model_dump()),
+            float(qc_score or 0),
+            json.dumps(critique.model_dump()) if critique else None,
+            json.dumps(reads.to_dict()) if reads else None,
+        )
+
+    async def get(self, cache_key: str) -> Optional[CachedSection]:
+        """Devuelve la sección cacheada o None. Los errores de BD cuentan como fallo de caché."""
+        try:
+            cached = await asyncio.to_thread(self._get_sync, cache_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Error leyendo caché de secciones: {str(e)[:100]}")
+            cached = None
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return cached
+
+    async def put(
+        self,
+        cache_key: str,
+        section_id: str,
+        project_id: Any,
+        dto: SIC_DTO,
+        qc_score: float,
+        critique: Optional[FeedbackCritiqueSchema],
+        reads: Optional[SectionReads] = None,
+    ) -> bool:
+        """Almacena una sección aprobada. Un fallo no interrumpe el workflow."""
+        try:
+            await asyncio.to_thread(self._put_sync, cache_key, section_id, project_id, dto, qc_score, critique, reads)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Error escribiendo caché de secciones ({section_id}): {str(e)[:100]}")
+            return False
@@ -0,0 +1,111 @@
+"""
+Single-Flight - Coalescencia de llamadas idénticas concurrentes
+
+Con varios planes en paralelo, agentes distintos piden el mismo dato en el
+mismo instante (p.ej. `get_issue_details` del mismo issue desde el
+GenericDataAgent y el MetricExtractorAgent, o la misma búsqueda de
+conocimiento desde dos secciones). `SingleFlight` garantiza que, mientras una
+llamada con una clave dada está en vuelo, las llamadas idénticas esperan su
+resultado en lugar de repetir la petición a Redmine / OpenAI / pgvector.
+
+No es una caché: al terminar la llamada la clave se libera y la siguiente
+petición vuelve a salir. Las excepciones se propagan a todos los que esperan.
+
+- `do(key, fn)`: ruta async (una tarea líder, el resto comparte su futuro).
+  La cancelación de un seguidor no cancela la llamada compartida.
+- `do_sync(key, fn)`: ruta bloqueante para herramientas síncronas que agno
+  ejecuta en hilos.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _SyncCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Grupo de llamadas coalescidas por clave (ámbito de proceso)."""
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self._async_calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._sync_calls: Dict[Hashable, _SyncCall] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta `fn()` o se une a la llamada en vuelo con la misma clave."""
+        # Los futuros pertenecen a un event loop: la clave incluye el loop actual
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        self.stats["calls"] += 1
+        future = self._async_calls.get(slot)
+        while future is not None:
+            self.stats["coalesced"] += 1
+            logger.debug(f"🔗 [{self.name}] Coalescida llamada en vuelo: {key}")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Si se canceló el líder (no este seguidor), se reintenta como nueva llamada
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            future = self._async_calls.get(slot)
+
+        future = loop.create_future()
+        self._async_calls[slot] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Marcada como recuperada aunque no haya seguidores
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._async_calls.pop(slot, None)
+
+    def do_sync(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Versión bloqueante y thread-safe de `do`."""
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._sync_calls[key] = _SyncCall()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            logger.debug(f"🔗 [{self.name}] Coalescida llamada en vuelo: {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._sync_calls.pop(key, None)
+            call.done.set()
@@ -0,0 +1,190 @@
+"""
+Structural Checker - Pre-chequeo determinista de secciones SIC
+
+Buena parte de los rechazos del ExpertJudgeAgent son mecánicos: una tabla
+obligatoria ausente, placeholders [VALOR] sin reemplazar o encabezados del
+índice que faltan. Este motor de reglas se construye a partir de la Sección B
+de PLANTILLA_MAESTRA_SIC_GENERICO.md y valida `summary_markdown` y
+`key_tables_markdown` de un SIC_DTO en milisegundos. Si encuentra problemas
+devuelve una crítica precisa para el Author sin gastar una llamada al Judge;
+solo los borradores estructuralmente válidos llegan a la auditoría LLM.
+"""
+
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema
+from backend.core.section_cache import DEFAULT_TEMPLATE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Placeholders de plantilla sin reemplazar: [VALOR], [FECHA], [MONTO KUSD]...
+# (no seguidos de "(" para no confundirlos con enlaces Markdown). Solo los nombres de
+# la plantilla: [PENDIENTE] es el marcador que los agentes usan para un dato que falta
+# (ver author_agent) y siglas entre corchetes como [NCC] son texto legítimo.
+PLACEHOLDER_NAMES = ("VALOR", "FECHA", "MONTO", "COMPLETAR", "TBD", "TODO")
+PLACEHOLDER_PATTERN = re.compile(
+    rf"\[(?:{'|'.join(PLACEHOLDER_NAMES)})(?:[ _][A-ZÁÉÍÓÚÑ]+)*\](?!\()"
+)
+MARKDOWN_TABLE_PATTERN = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*\|", re.MULTILINE)
+SECTION_PATTERN = re.compile(r"^###\s+SIC\s+(\d{2})\s*:\s*(.+)$", re.MULTILINE)
+TABLE_REF_PATTERN = re.compile(r"Tablas?\s+([0-9]+(?:-[0-9]+)?(?:\s*/\s*[0-9]+(?:-[0-9]+)?)*)")
+# Rangos ("Tablas 14-1 a 14-16") no identifican tablas concretas: no se exigen
+TABLE_RANGE_PATTERN = re.compile(r"Tablas?\s+[0-9-]+\s+a\s+[0-9-]+")
+NUMBERED_HEADING_PATTERN = re.compile(r"^(\d+(?:\.\d+)*)\.?\s+(.+)$")
+
+# Filas del índice que no son encabezados exigibles
+NON_HEADING_ROWS = ("INDICE DE FIGURAS", "INDICE DE TABLAS", "ANEXOS", "INDICE GENERAL")
+NOT_APPLICABLE_MARKERS = ("NO APLICA", "NO APLICABLE", "NO DESARROLLADO")
+
+
+def normalize_text(text: str) -> str:
+    """Mayúsculas sin tildes ni Markdown de énfasis, espacios colapsados."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", text.replace("*", "")).strip().upper()
+
+
+@dataclass
+class SectionSpec:
+    """Requisitos estructurales de una sección según la Sección B de la plantilla."""
+    section_id: str
+    title: str
+    # (número o None, título) de cada fila del índice general
+    headings: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    # Grupos de tablas: basta con una referencia de cada grupo ("Tablas 32/33/34")
+    table_groups: List[List[str]] = field(default_factory=list)
+    may_be_not_applicable: bool = False
+    # Bloque Markdown de la sección en la plantilla (reglas para los prompts)
+    template_block: str = ""
+
+
+def _section_id(number: str) -> str:
+    return f"SIC_{int(number):02d}"
+
+
+def parse_template(markdown: str) -> Dict[str, SectionSpec]:
+    """Construye las reglas por sección desde la plantilla maestra."""
+    specs: Dict[str, SectionSpec] = {}
+    section_b = markdown.split("## B.", 1)
+    if len(section_b) == 2:
+        # Sección A: secciones que la orquestación puede declarar No Aplicables
+        not_applicable = set()
+        for line in section_b[0].splitlines():
+            if "No Aplicables" in line:
+                not_applicable |= {_section_id(n) for n in re.findall(r"\b(\d{2})\b", line.split("|")[2])}
+        body = section_b[1]
+    else:
+        not_applicable, body = set(), markdown
+
+    matches = list(SECTION_PATTERN.finditer(body))
+    for index, match in enumerate(matches):
+        section_id = _section_id(match.group(1))
+        block_end = matches[index + 1].start() if index + 1 < len(matches) else len(body)
+        spec = SectionSpec(
+            section_id=section_id,
+            title=match.group(2).strip(),
+            may_be_not_applicable=section_id in not_applicable,
+            template_block=body[match.start():block_end].strip(),
+        )
+        for line in body[match.end():block_end].splitlines():
+            cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+            if len(cells) < 2 or set(cells[0]) <= set(":- "):
+                continue
+            label = cells[0].replace("*", "").strip()
+            normalized = normalize_text(label)
+            if normalized == "INDICE DE TABLAS":
+                for refs in TABLE_REF_PATTERN.findall(TABLE_RANGE_PATTERN.sub("", cells[1])):
+                    spec.table_groups.append([ref.strip() for ref in refs.split("/")])
+            elif not normalized.startswith(NON_HEADING_ROWS):
+                numbered = NUMBERED_HEADING_PATTERN.match(label)
+                if numbered:
+                    spec.headings.append((numbered.group(1), numbered.group(2).strip()))
+                else:
+                    spec.headings.append((None, label))
+        specs[section_id] = spec
+    return specs
+
+
+class StructuralChecker:
+    """
+    Reglas deterministas por sección:
+        - Encabezados del índice general (por numeración o por título).
+        - Tablas obligatorias del "ÍNDICE DE TABLAS" referenciadas y al menos una tabla Markdown.
+        - Ningún placeholder de plantilla sin reemplazar.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, SectionSpec]] = None, template_path: str = DEFAULT_TEMPLATE_PATH):
+        if specs is None:
+            with open(template_path, "r", encoding="utf-8") as f:
+                specs = parse_template(f.read())
+        self.specs = specs
+        logger.info(f"📐 Pre-chequeo estructural: reglas para {len(self.specs)} secciones")
+
+    @staticmethod
+    def _has_heading(number: Optional[str], title: str, raw_text: str, normalized_text: str) -> bool:
+        if normalize_text(title) in normalized_text:
+            return True
+        if number is None:
+            return False
+        pattern = rf"(?m)^\s*(?:#{{1,6}}\s*|\|\s*)?\**\s*{re.escape(number)}\.?(?:\s|\*|$)"
+        return re.search(pattern, raw_text) is not None
+
+    @staticmethod
+    def _has_table_ref(table_id: str, raw_text: str) -> bool:
+        return re.search(rf"Tablas?\s+(?:[0-9-]+\s*/\s*)*{re.escape(table_id)}(?![0-9])", raw_text, re.IGNORECASE) is not None
+
+    def check(self, section_id: str, dto: SIC_DTO) -> List[str]:
+        """Problemas estructurales del borrador (lista vacía = apto para el Judge)."""
+        spec = self.specs.get(section_id)
+        raw_text = f"{dto.summary_markdown}\n{dto.key_tables_markdown}"
+        gaps: List[str] = []
+
+        placeholders = sorted(set(PLACEHOLDER_PATTERN.findall(raw_text)))
+        if placeholders:
+            gaps.append(f"Placeholders sin reemplazar: {', '.join(placeholders[:5])}")
+        if spec is None:
+            return gaps
+
+        normalized_text = normalize_text(raw_text)
+        missing_headings = [
+            f"{number} {title}" if number else title
+            for number, title in spec.headings
+            if not self._has_heading(number, title, raw_text, normalized_text)
+        ]
+        if missing_headings:
+            gaps.append(f"Encabezados faltantes: {'; '.join(missing_headings)}")
+
+        declared_not_applicable = spec.may_be_not_applicable and any(
+            marker in normalized_text for marker in NOT_APPLICABLE_MARKERS
+        )
+        if spec.table_groups and not declared_not_applicable:
+            missing_tables = [
+                "/".join(group) for group in spec.table_groups
+                if not any(self._has_table_ref(table_id, raw_text) for table_id in group)
+            ]
+            if missing_tables:
+                gaps.append(f"Tablas obligatorias faltantes: {', '.join(f'Tabla {t}' for t in missing_tables)}")
+            if not MARKDOWN_TABLE_PATTERN.search(raw_text):
+                gaps.append("key_tables_markdown no contiene ninguna tabla Markdown")
+        return gaps
+
+    def critique(self, section_id: str, dto: SIC_DTO) -> Optional[FeedbackCritiqueSchema]:
+        """Crítica de rechazo lista para devolver al Author, o None si el borrador es estructuralmente válido."""
+        gaps = self.check(section_id, dto)
+        if not gaps:
+            return None
+        return FeedbackCritiqueSchema(
+            root_cause=f"Pre-chequeo estructural de {section_id} contra PLANTILLA_MAESTRA_SIC_GENERICO.md (Sección B)",
+            actionable_recommendation=(
+                "Corrige la estructura antes de la auditoría: " + " | ".join(gaps)
+                + ", para reducir/evitar el rechazo por incumplimiento de la plantilla"
+            ),
+            qc_score=max(0.0, 70.0 - 10.0 * len(gaps)),
+            approved=False,
+            critical_gaps=gaps,
+            regulatory_compliance=False,
+        )
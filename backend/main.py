@@ -4,7 +4,7 @@ import logging
 import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 # Configurar logging PRIMERO
 logging.basicConfig(
@@ -44,7 +44,7 @@ except ImportError:
     sys.exit(1)
 
 try:
-    from pydantic import BaseModel
+    from pydantic import BaseModel, model_validator
     from agno.os import AgentOS
     from agno.os.settings import AgnoAPISettings
     from agno.team import Team
@@ -59,9 +59,32 @@ try:
     from backend.agents.judge_agent import ExpertJudgeAgent
     from backend.agents.planner_agent import MasterPlannerAgent, DependencyManagerAgent
     from backend.agents.planner_agent import MasterPlannerAgent, DependencyManagerAgent
-    from backend.workflows.document_workflow import DocumentCreationWorkflow
+    from backend.workflows.document_workflow import DocumentCreationWorkflow, new_workflow_id
+    from backend.core.checkpoint_store import SectionCheckpointStore
+    from backend.core.section_cache import SectionResultCache
+    from backend.core.job_manager import JobManager, JobQueueFullError, Job, JOB_SUCCEEDED, JOB_FAILED
+    from backend.core.event_bus import ProgressEventBus, sse_stream
+    from backend.core.progress import listen_progress
+    from backend.core.fair_executor import FairExecutor
+    from backend.core.duration_stats import SectionDurationStats
+    from backend.core.structural_checker import StructuralChecker
+    from backend.core.not_applicable import NotApplicableGenerator
+    from backend.core.agent_factory import AgentFactory
+    from backend.core.context_packer import ContextPacker, document_parts
+    from backend.core.llm_cache import CachedOpenAIChat, LLMResponseCache, bypass_llm_cache
+    from backend.core.rate_limiter import AdaptiveRateLimiter, rate_limit_class
+    from backend.core.batch_runner import OpenAIBatchRunner
+    from backend.core.model_router import ModelRouter
+    from backend.core.agent_metrics import AgentMetricsRegistry
+    from backend.core.redmine_mirror import RedmineMirror, set_default_mirror
+    from backend.core.issue_cache import redmine_issue_cache
+    from backend.core.redmine_client import default_redmine_client
+    from backend.core.deadline import run_deadline
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    from backend.tools.custom_tools import RedmineTools
     from backend.tools.pdf_tool import PDFConverterTools
     from fastapi import HTTPException, Depends, Request
+    from fastapi.responses import StreamingResponse
     from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
     
     auth_scheme = HTTPBearer()
@@ -88,10 +111,41 @@ except Exception as e:
 
 # 2. Inicializar Agentes Holónicos Genéricos
 try:
-    openai_model = OpenAIChat(
+    # Caché persistente de respuestas LLM (MAAS_LLM_CACHE=off la desactiva)
+    llm_cache = LLMResponseCache(
+        broker.session_db,
+        ttl_seconds=int(os.getenv("MAAS_LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("MAAS_LLM_CACHE_MAX_ENTRIES", "5000")),
+        max_bytes=int(os.getenv("MAAS_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    ) if os.getenv("MAAS_LLM_CACHE", "on").lower() != "off" else None
+    # Réplica local de Redmine: las RedmineTools leen de ella (MAAS_REDMINE_MIRROR=off la desactiva)
+    redmine_mirror = RedmineMirror(
+        broker.session_db,
+        max_parallel=int(os.getenv("MAAS_REDMINE_MIRROR_PARALLEL", "8")),
+        include_journals=os.getenv("MAAS_REDMINE_MIRROR_JOURNALS", "on").lower() != "off",
+        max_age_seconds=float(os.getenv("MAAS_REDMINE_MIRROR_MAX_AGE_SECONDS", "3600")),
+    ) if os.getenv("MAAS_REDMINE_MIRROR", "on").lower() != "off" else None
+    set_default_mirror(redmine_mirror)
+    if redmine_mirror is not None:
+        # Los issues cambiados en cada sincronización salen de la caché de issues compartida
+        redmine_mirror.subscribe(redmine_issue_cache.on_change)
+    # Limitador compartido por todos los agentes, el Team y las auditorías (RPM + TPM + 429 adaptativo)
+    openai_limiter = AdaptiveRateLimiter(
+        requests_per_minute=int(os.getenv("MAAS_OPENAI_RPM", "500")),
+        tokens_per_minute=int(os.getenv("MAAS_OPENAI_TPM", "300000")),
+        max_concurrency=int(os.getenv("MAAS_OPENAI_MAX_CONCURRENCY", "16")),
+        target_latency_seconds=float(os.getenv("MAAS_OPENAI_TARGET_LATENCY", "30")),
+    )
+    openai_model = CachedOpenAIChat(
         id="gpt-4o",
         api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        response_cache=llm_cache,
+        rate_limiter=openai_limiter,
+        # Reintentos en CachedOpenAIChat, no en el SDK: los 429 vuelven a la cola del
+        # limitador (respetando Retry-After) y 408/409/5xx/conexión se reintentan con backoff
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(event_hooks={"response": [openai_limiter.observe_response]})
     )
     
     # Inicializar agentes
@@ -219,6 +273,16 @@ except Exception as e:
 
 # 5. Inicializar Meta-Workflow (Workflows 2.0 - FASE I)
 try:
+    workflow_redmine = RedmineTools()
+    # Cupo global de ejecuciones LLM en vuelo, compartido por todas las ejecuciones y lotes
+    llm_executor = FairExecutor(max_in_flight=int(os.getenv("MAAS_MAX_INFLIGHT_LLM", "8")))
+    # Enrutado de modelo por llamada (MAAS_MODEL_ROUTES=default | JSON | ruta; sin definir = gpt-4o para todos)
+    model_router = ModelRouter.from_env(openai_model)
+    # Métricas reales por agente/sección/herramienta/ejecución para /api/agents/performance
+    agent_metrics = AgentMetricsRegistry(
+        broker.session_db,
+        window_seconds=float(os.getenv("MAAS_METRICS_WINDOW_SECONDS", "3600")),
+    )
     doc_workflow = DocumentCreationWorkflow(
         planner=planner,
         extractor=extractor,
@@ -226,7 +290,35 @@ try:
         reviewer=judge,
         workspace_id="default",
         db=broker.session_db,
-        pdf_tool=pdf_tool
+        pdf_tool=pdf_tool,
+        max_concurrency=int(os.getenv("MAAS_SECTION_CONCURRENCY", "4")),
+        checkpoint_store=SectionCheckpointStore(broker.session_db),
+        section_cache=SectionResultCache(broker.session_db),
+        snapshot_provider=workflow_redmine.project_snapshot_fingerprint,
+        issue_version_provider=workflow_redmine.get_issue_versions,
+        llm_executor=llm_executor,
+        duration_stats=SectionDurationStats(broker.session_db),
+        pipelined=os.getenv("MAAS_PIPELINED_MAKER_CHECKER", "false").lower() == "true",
+        author_workers=int(os.getenv("MAAS_AUTHOR_WORKERS", "2")),
+        judge_workers=int(os.getenv("MAAS_JUDGE_WORKERS", "2")),
+        structural_checker=StructuralChecker(),
+        not_applicable=NotApplicableGenerator(),
+        # planner/author/judge actúan como prototipos: cada llamada usa una instancia con sesión propia
+        agent_factory=AgentFactory(),
+        context_packer=ContextPacker(),
+        author_context_tokens=int(os.getenv("MAAS_AUTHOR_CONTEXT_TOKENS", "6000")),
+        judge_context_tokens=int(os.getenv("MAAS_JUDGE_CONTEXT_TOKENS", "4000")),
+        # Modo bulk (request.bulk): Author/Judge por la Batch API, DAG ola a ola
+        batch_runner=OpenAIBatchRunner(
+            AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("MAAS_BATCH_BASE_URL", os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"))
+            ),
+            poll_interval=float(os.getenv("MAAS_BATCH_POLL_SECONDS", "30")),
+            linger_seconds=float(os.getenv("MAAS_BATCH_LINGER_SECONDS", "2"))
+        ),
+        model_router=model_router,
+        agent_metrics=agent_metrics
     )
     
     logger.info("✅ Workflow de creación de documentos inicializado")
@@ -262,6 +354,21 @@ async def lifespan(app):
         else:
             logger.warning("⚠️  ContextBroker no tiene método load_rules, continuando...")
         
+        # Pool de workers para /preinversion-plans/jobs
+        await job_manager.start()
+
+        # Métricas de agentes: totales persistidos + flush periódico
+        await agent_metrics.load()
+        metrics_flush_task = asyncio.create_task(
+            agent_metrics.run_periodic_flush(float(os.getenv("MAAS_METRICS_FLUSH_SECONDS", "300")))
+        )
+
+        # Sincronización incremental periódica de los proyectos replicados (0 = solo antes de cada plan)
+        mirror_sync_seconds = float(os.getenv("MAAS_REDMINE_SYNC_SECONDS", "300"))
+        mirror_sync_task = asyncio.create_task(
+            redmine_mirror.run_periodic_sync(mirror_sync_seconds)
+        ) if redmine_mirror is not None and mirror_sync_seconds > 0 else None
+        
         startup_success = True
         logger.info("✅ MAAS v4.0 iniciado correctamente")
         
@@ -275,6 +382,16 @@ async def lifespan(app):
     # Shutdown graceful
     logger.info("🛑 Apagando MAAS v4.0 Backend...")
     
+    await job_manager.stop()
+
+    if startup_success:
+        metrics_flush_task.cancel()  # Último flush de métricas antes de cerrar el pool
+        await asyncio.gather(metrics_flush_task, return_exceptions=True)
+        if mirror_sync_task is not None:
+            mirror_sync_task.cancel()
+            await asyncio.gather(mirror_sync_task, return_exceptions=True)
+        await default_redmine_client().aclose()  # Pool keep-alive de AsyncRedmineTools
+    
     try:
         if hasattr(broker.session_db, 'close'):
             if asyncio.iscoroutinefunction(broker.session_db.close):
@@ -413,12 +530,45 @@ async def get_dev_token(role: str = "ADMIN"):
 
 
 # Modelos Pydantic para endpoints
-class PreinversionRequest(BaseModel):
+INTERACTIVE_TIMEOUT_SECONDS = 300
+# La Batch API tarda hasta su completion_window (24h): con el timeout interactivo un bulk siempre sería parcial
+BULK_TIMEOUT_SECONDS = int(os.getenv("MAAS_BULK_TIMEOUT_SECONDS", str(24 * 3600)))
+
+
+class _RunTimeoutDefault(BaseModel):
+    """timeout_seconds por defecto según el modo: interactivo o bulk (Batch API)."""
+    timeout_seconds: Optional[int] = None
+    bulk: bool = False
+
+    @model_validator(mode="after")
+    def _default_timeout(self):
+        if self.timeout_seconds is None:
+            self.timeout_seconds = BULK_TIMEOUT_SECONDS if self.bulk else INTERACTIVE_TIMEOUT_SECONDS
+        return self
+
+
+class PreinversionRequest(_RunTimeoutDefault):
     """Modelo de request para generar plan de preinversión."""
     project_id: int
     document_type: str = "SIC"
-    timeout_seconds: int = 300
+    timeout_seconds: Optional[int] = None  # Por defecto 300s (interactivo) o BULK_TIMEOUT_SECONDS (bulk)
     include_audit: bool = True
+    bypass_llm_cache: bool = False  # Fuerza llamadas reales al modelo (ignora la caché LLM)
+    bulk: bool = False  # Batch API (horas de latencia)
+    metadata: Optional[Dict[str, Any]] = None
+    resume_workflow_id: Optional[str] = None  # Reanuda una ejecución previa desde sus checkpoints
+    mode: str = "full"  # "full" | "regenerate_changed"
+    base_workflow_id: Optional[str] = None  # Ejecución base para regenerate_changed
+    changed_issues: Optional[List[int]] = None  # Si se omite, se detectan por updated_on
+
+class PreinversionBatchRequest(_RunTimeoutDefault):
+    """Generación de planes para una cartera de proyectos Redmine."""
+    project_ids: List[int]
+    document_type: str = "SIC"
+    timeout_seconds: Optional[int] = None  # Por defecto 300s (interactivo) o BULK_TIMEOUT_SECONDS (bulk)
+    include_audit: bool = True
+    bypass_llm_cache: bool = False
+    bulk: bool = False  # Regeneración nocturna de cartera vía Batch API
     metadata: Optional[Dict[str, Any]] = None
 
 class PreinversionResponse(BaseModel):
@@ -431,6 +581,7 @@ class PreinversionResponse(BaseModel):
     message: str
     workflow_id: Optional[str] = None
     duration_seconds: Optional[float] = None
+    pending_sections: Optional[List[str]] = None  # Secciones sin generar si se agotó timeout_seconds
 
 
 @app.get("/api/agents")
@@ -529,14 +680,72 @@ async def list_agents():
     }
 
 
+@app.get("/api/models/routes")
+async def model_routes():
+    """Reglas de enrutado de modelos y métricas por ruta (latencia p50/p95, tokens, calidad)."""
+    if model_router is None:
+        return {"enabled": False, "model_id": openai_model.id}
+    return {
+        "enabled": True,
+        "rules": [rule.__dict__ for rule in model_router.rules],
+        "routes": model_router.snapshot(),
+    }
+
+
+@app.get("/api/redmine/mirror")
+async def redmine_mirror_status():
+    """Proyectos replicados localmente (antigüedad de la instantánea) y contadores del mirror."""
+    if redmine_mirror is None:
+        return {"enabled": False}
+    return {"enabled": True, **await asyncio.to_thread(redmine_mirror.snapshot)}
+
+
+@app.get("/api/redmine/cache")
+async def redmine_cache_status():
+    """
+    Ocupación (entradas, bytes), límites y aciertos/fallos de la caché de issues compartida,
+    y uso del pool del cliente async de Redmine (peticiones, máximo en vuelo).
+    """
+    return {**redmine_issue_cache.snapshot(), "client": default_redmine_client().snapshot()}
+
+
+@app.post("/api/redmine/mirror/projects/{project_ref}/snapshot")
+async def snapshot_redmine_project(
+    project_ref: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Fuerza una instantánea completa del proyecto en el mirror (ingesta paginada en paralelo)."""
+    _authorize_workflow_run(auth)
+    if redmine_mirror is None:
+        raise HTTPException(status_code=404, detail="Mirror de Redmine desactivado (MAAS_REDMINE_MIRROR=off)")
+    try:
+        return await redmine_mirror.snapshot_project(project_ref)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"No se pudo replicar el proyecto {project_ref}: {str(e)[:200]}")
+
+
+@app.post("/api/redmine/mirror/projects/{project_ref}/sync")
+async def sync_redmine_project(
+    project_ref: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Sincronización incremental del proyecto (issues con updated_on >= cursor) y su change set."""
+    _authorize_workflow_run(auth)
+    if redmine_mirror is None:
+        raise HTTPException(status_code=404, detail="Mirror de Redmine desactivado (MAAS_REDMINE_MIRROR=off)")
+    try:
+        return (await redmine_mirror.sync_project(project_ref)).summary()
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"No se pudo sincronizar el proyecto {project_ref}: {str(e)[:200]}")
+
+
 @app.get("/api/agents/performance")
 async def agent_performance():
     """
     Métricas de rendimiento en tiempo real para los 6 agentes + salud del sistema.
     Para dashboard Control Plane - refresca cada 5 segundos en frontend.
     """
-    import time
-    from datetime import datetime, timedelta
+    from datetime import datetime
     
     try:
         # Obtener estado del pool si está disponible
@@ -544,94 +753,71 @@ async def agent_performance():
         if hasattr(broker.session_db, 'get_pool_status'):
             pool_status = broker.session_db.get_pool_status() or pool_status
         
-        # Métricas simuladas (en producción, se recolectarían de ejecuciones reales)
+        # Métricas reales agregadas por AgentMetricsRegistry (RunOutput de cada arun)
         now = datetime.utcnow()
-        last_exec = (now - timedelta(minutes=2)).isoformat()
-        
+        snapshot = agent_metrics.snapshot()
+
+        def agent_entry(agent: Any, documentation_used: List[str]) -> Dict[str, Any]:
+            stats = snapshot["agent"].get(agent.id or agent.name) or {"total": {}, "window": {}}
+            total, window = stats["total"], stats["window"]
+            last_at = total.get("last_at")
+            return {
+                "id": agent.id,
+                "status": "ready",
+                "tasks_completed": total.get("count", 0) - total.get("errors", 0),
+                "success_rate": total.get("success_rate"),
+                "avg_duration_ms": total.get("avg_latency_ms"),
+                "p50_ms": window.get("p50_ms"),
+                "p95_ms": window.get("p95_ms"),
+                "p99_ms": window.get("p99_ms"),
+                "last_execution": datetime.utcfromtimestamp(last_at).isoformat() if last_at else None,
+                "errors": total.get("errors", 0),
+                "total_tokens": total.get("total_tokens", 0),
+                "cost_usd": total.get("cost_usd", 0.0),
+                "documentation_used": documentation_used
+            }
+
+        agent_totals = [stats["total"] for stats in snapshot["agent"].values()]
+        agent_windows = [stats["window"] for stats in snapshot["agent"].values()]
+        window_calls = sum(window["count"] for window in agent_windows)
+        window_cost = sum(window["cost_usd"] for window in agent_windows)
+        window_seconds = agent_metrics.window_seconds
+        # Proyección mensual del coste observado en la ventana móvil
+        monthly_cost = window_cost * (30 * 24 * 3600) / window_seconds if window_calls else 0.0
+
         return {
             "timestamp": now.isoformat(),
             "agents": {
-                "generic_data_agent": {
-                    "id": data_agent.id,
-                    "status": "ready",
-                    "tasks_completed": 12,
-                    "success_rate": 0.92,
-                    "avg_duration_ms": 2400,
-                    "last_execution": last_exec,
-                    "errors": 1,
-                    "total_tokens": 4250,
-                    "documentation_used": ["AGENT_INSTRUCTIONS.md §1", "REDMINE_EXTRACTION_GUIDE.md"]
-                },
-                "metric_extractor_agent": {
-                    "id": extractor.id,
-                    "status": "ready",
-                    "tasks_completed": 11,
-                    "success_rate": 0.95,
-                    "avg_duration_ms": 1800,
-                    "last_execution": last_exec,
-                    "errors": 0,
-                    "total_tokens": 3100,
-                    "documentation_used": ["SIC_FIELD_MAPPING.md", "DATA_VALIDATION_RULES.md §4"]
-                },
-                "author_agent": {
-                    "id": author.id,
-                    "status": "ready",
-                    "tasks_completed": 10,
-                    "success_rate": 0.88,
-                    "avg_duration_ms": 3200,
-                    "last_execution": last_exec,
-                    "errors": 1,
-                    "total_tokens": 5640,
-                    "documentation_used": ["AGENT_INSTRUCTIONS.md §3", "PLAN_ASSEMBLY_WORKFLOW.md"]
-                },
-                "judge_agent": {
-                    "id": judge.id,
-                    "status": "ready",
-                    "tasks_completed": 9,
-                    "success_rate": 0.96,
-                    "avg_duration_ms": 1600,
-                    "last_execution": last_exec,
-                    "errors": 0,
-                    "total_tokens": 2900,
-                    "documentation_used": ["DATA_VALIDATION_RULES.md §7.2", "AGENT_INSTRUCTIONS.md §4"]
-                },
-                "planner_agent": {
-                    "id": planner.id,
-                    "status": "ready",
-                    "tasks_completed": 8,
-                    "success_rate": 0.91,
-                    "avg_duration_ms": 900,
-                    "last_execution": last_exec,
-                    "errors": 0,
-                    "total_tokens": 1200,
-                    "documentation_used": ["PLAN_ASSEMBLY_WORKFLOW.md", "AGENT_INSTRUCTIONS.md §5"]
-                },
-                "dependency_manager": {
-                    "id": dep_manager.id,
-                    "status": "ready",
-                    "tasks_completed": 7,
-                    "success_rate": 0.97,
-                    "avg_duration_ms": 650,
-                    "last_execution": last_exec,
-                    "errors": 0,
-                    "total_tokens": 800,
-                    "documentation_used": ["PLAN_ASSEMBLY_WORKFLOW.md §4"]
-                }
+                "generic_data_agent": agent_entry(data_agent, ["AGENT_INSTRUCTIONS.md §1", "REDMINE_EXTRACTION_GUIDE.md"]),
+                "metric_extractor_agent": agent_entry(extractor, ["SIC_FIELD_MAPPING.md", "DATA_VALIDATION_RULES.md §4"]),
+                "author_agent": agent_entry(author, ["AGENT_INSTRUCTIONS.md §3", "PLAN_ASSEMBLY_WORKFLOW.md"]),
+                "judge_agent": agent_entry(judge, ["DATA_VALIDATION_RULES.md §7.2", "AGENT_INSTRUCTIONS.md §4"]),
+                "planner_agent": agent_entry(planner, ["PLAN_ASSEMBLY_WORKFLOW.md", "AGENT_INSTRUCTIONS.md §5"]),
+                "dependency_manager": agent_entry(dep_manager, ["PLAN_ASSEMBLY_WORKFLOW.md §4"])
+            },
+            "sections": snapshot["section"],
+            "tools": snapshot["tool"],
+            "models": snapshot["model"],
+            "runs": {
+                "workflows": snapshot["workflow"],
+                "recent": snapshot["recent_runs"]
             },
             "system": {
-                "uptime_seconds": 3600,
-                "avg_latency_ms": 450,
+                "uptime_seconds": snapshot["uptime_seconds"],
+                "avg_latency_ms": (
+                    round(sum(window["avg_latency_ms"] * window["count"] for window in agent_windows if window["count"]) / window_calls, 1)
+                    if window_calls else None
+                ),
                 "pool_status": pool_status.get("status", "unknown"),
                 "active_connections": pool_status.get("size", 0),
                 "max_connections": pool_status.get("max_size", 20),
                 "available_connections": pool_status.get("available", "unknown"),
-                "sessions_active": 3,
-                "total_sessions": 45,
-                "llm_calls_total": 24520,
-                "total_tokens_used": 18890,
-                "estimated_monthly_cost": "$189.50",
-                "knowledge_base_docs": 7,
-                "workflows_active": 1
+                "workflows_active": snapshot["active_runs"],
+                "llm_calls_total": sum(total["count"] for total in agent_totals),
+                "total_tokens_used": sum(total["total_tokens"] for total in agent_totals),
+                "total_cost_usd": round(sum(total["cost_usd"] for total in agent_totals), 4),
+                "estimated_monthly_cost": f"${monthly_cost:,.2f}",
+                "rate_limiter": openai_limiter.snapshot()
             },
             "documentation": {
                 "loaded": True,
@@ -651,15 +837,12 @@ async def agent_performance():
         }
 
 
-@app.post("/preinversion-plans", response_model=PreinversionResponse)
-async def generate_preinversion_plan(
-    request: PreinversionRequest, 
-    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
-):
-    """
-    Genera un plan de preinversión completo con validación PoLP (scopes).
-    """
-    # [PoLP] Hardening: Scope Validation
+# Fan-out de eventos por sección hacia clientes SSE (agent-ui)
+progress_bus = ProgressEventBus(max_queue=int(os.getenv("MAAS_SSE_CLIENT_QUEUE", "256")))
+
+
+def _authorize_workflow_run(auth: HTTPAuthorizationCredentials) -> None:
+    """[PoLP] Hardening: Scope Validation para ejecutar el DocumentCreationWorkflow."""
     from backend.auth import jwt_manager
     token = auth.credentials
     payload = jwt_manager.validate_token(token)
@@ -668,97 +851,172 @@ async def generate_preinversion_plan(
     required_scope = f"workflows:DocumentCreationWorkflow:run"
     
     if not payload or not jwt_manager.verify_scope(payload, required_scope):
-        from fastapi import HTTPException
         logger.warning(f"🚫 [403 Forbidden] Intento de ejecución sin scope: {required_scope}")
         raise HTTPException(status_code=403, detail="Forbidden: Insufficient scopes")
 
-    import time
+
+async def _run_preinversion_workflow(request: PreinversionRequest, workflow_id: str) -> Dict[str, Any]:
+    """
+    Ejecuta el DocumentCreationWorkflow y lanza la auditoría en background.
+    Compartido por el endpoint síncrono y por los workers del JobManager.
+    """
     from datetime import datetime
-    start_time = time.time()
-    workflow_id = f"wf_{int(start_time)}_{request.project_id}"
+
+    logger.info(f"[{workflow_id}] 🚀 INICIO: Generando {request.document_type} para proyecto {request.project_id}")
     
-    try:
-        logger.info(f"[{workflow_id}] 🚀 INICIO: Generando {request.document_type} para proyecto {request.project_id}")
-        
-        # [MODIFICACIÓN] - Ejecutar el workflow REAL (Hardened)
-        logger.info(f"[{workflow_id}] 📋 [AGDR v5.0] Ejecutando DocumentCreationWorkflow REAL...")
-        
-        # Ejecutar el workflow y capturar respuesta
+    # [MODIFICACIÓN] - Ejecutar el workflow REAL (Hardened)
+    logger.info(f"[{workflow_id}] 📋 [AGDR v5.0] Ejecutando DocumentCreationWorkflow REAL...")
+    
+    # El deadline de la ejecución cubre también la sincronización del mirror: el workflow
+    # instala el mismo timeout dentro, pero un deadline anidado nunca amplía el exterior
+    with run_deadline(request.timeout_seconds), listen_progress(progress_bus.publish), \
+            bypass_llm_cache(request.bypass_llm_cache):
+        # Mirror local al día (instantánea la primera vez, después solo issues con updated_on >= cursor):
+        # las herramientas Redmine leen de él. Si se agota el deadline se omite y leen Redmine en vivo
+        if redmine_mirror is not None:
+            await redmine_mirror.ensure_project(request.project_id)
+
+        # Ejecutar el workflow y capturar respuesta (eventos por sección -> progress_bus)
+        # session_id propio: agno fija en la instancia el primer session_id generado y todas
+        # las ejecuciones concurrentes compartirían la misma fila de sesión del workflow
         workflow_run = await doc_workflow.arun(
+            session_id=workflow_id,
             input={
                 "project_id": request.project_id, 
-                "document_type": request.document_type
+                "document_type": request.document_type,
+                "workflow_id": workflow_id,
+                "resume_workflow_id": request.resume_workflow_id,
+                "mode": request.mode,
+                "base_workflow_id": request.base_workflow_id,
+                "changed_issues": request.changed_issues,
+                "metadata": request.metadata,  # metadata.scope/alcance activa la ruta "No Aplicable"
+                "timeout_seconds": request.timeout_seconds,  # Deadline de la ejecución (documento parcial al agotarse)
+                "bulk": request.bulk
             }
         )
-        
-        # Extraer el documento final del output del workflow (Propagación de DTOs)
-        document_response = ""
-        qc_score = 0
-        
-        if hasattr(workflow_run, 'content'):
-            content_data = workflow_run.content
-            # Si es un diccionario (StepOutput format de DocumentCreationWorkflow.main_execution)
-            if isinstance(content_data, dict):
-                document_response = content_data.get("document", "")
-                qc_score = content_data.get("qc_score", 0)
-                logger.info(f"[{workflow_id}] 📄 Documento extraído (DTO) | Score: {qc_score} | Length: {len(str(document_response))}")
-            else:
-                document_response = str(content_data)
+    
+    # Extraer el documento final del output del workflow (Propagación de DTOs)
+    document_response = ""
+    qc_score = 0
+    content_data = None
+    partial = False
+    pending_sections: List[str] = []
+    
+    if hasattr(workflow_run, 'content'):
+        content_data = workflow_run.content
+        # Si es un diccionario (StepOutput format de DocumentCreationWorkflow.main_execution)
+        if isinstance(content_data, dict):
+            document_response = content_data.get("document", "")
+            qc_score = content_data.get("qc_score", 0)
+            partial = bool(content_data.get("partial"))
+            pending_sections = content_data.get("pending_sections") or []
+            logger.info(f"[{workflow_id}] 📄 Documento extraído (DTO) | Score: {qc_score} | Length: {len(str(document_response))}")
         else:
-             document_response = str(workflow_run)
-            
+            document_response = str(content_data)
+    else:
+         document_response = str(workflow_run)
+        
+    if partial:
+        logger.warning(f"[{workflow_id}] ⏱️ Workflow parcial (timeout {request.timeout_seconds}s). Pendientes: {pending_sections}")
+    else:
         logger.info(f"[{workflow_id}] ✅ Workflow real completado exitosamente")
+    
+    # FASE 4: Auditoría (BACKGROUND) - no se audita un documento parcial
+    if request.include_audit and not partial:
+        logger.info(f"[{workflow_id}] 🕵️  [FASE 4] Iniciando auditoría en background...")
         
-        # FASE 4: Auditoría (BACKGROUND)
-        if request.include_audit:
-            logger.info(f"[{workflow_id}] 🕵️  [FASE 4] Iniciando auditoría en background...")
-            
-            async def background_audit():
-                try:
-                    logger.info(f"[{workflow_id}-BG] 🔍 Ejecutando validación normativa REAL con ExpertJudgeAgent...")
-                    
-                    # Ejecutar auditoría real pasando el documento generado
-                    # document_response está disponible por closure
-                    audit_response = await judge.arun(
+        async def background_audit():
+            import time
+            audit_start = time.monotonic()
+            try:
+                logger.info(f"[{workflow_id}-BG] 🔍 Ejecutando validación normativa REAL con ExpertJudgeAgent...")
+                
+                # Ejecutar auditoría real pasando el documento generado
+                # document_response está disponible por closure
+                # Documento completo por presupuesto de tokens: cada SIC se resume antes de truncarse
+                packed_document = doc_workflow.context_packer.pack(
+                    document_parts(str(document_response)),
+                    budget=int(os.getenv("MAAS_AUDIT_CONTEXT_TOKENS", "16000")),
+                    counter=ContextPacker.counter_for(judge),
+                )
+                # Instancia por auditoría (sesión propia, sin fila en session_db), como Author/Judge por sección
+                auditor = doc_workflow.agent_factory.spawn(judge, f"{workflow_id}:audit")
+                with rate_limit_class("batch"):  # Cede el cupo OpenAI a las llamadas interactivas
+                    audit_response = await auditor.arun(
                         f"Audita el siguiente Plan de Preinversión (SIC) para el proyecto {request.project_id}. "
                         f"Valida cumplimiento NCC-24, consistencia y completitud.\n\n"
-                        f"DOCUMENTO A AUDITAR:\n{str(document_response)[:50000]}" # Limitar caracteres por seguridad
+                        f"DOCUMENTO A AUDITAR:\n{packed_document.text}"
                     )
-                    
-                    # Procesar respuesta del agente auditor
-                    validation_result = {
-                        "score": "CALCULADO_POR_AGENTE", # El agente lo incluye en su texto
-                        "compliance": "NCC-24: VERIFICADO",
-                        "audit_content": str(audit_response),
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    
-                    logger.info(f"[{workflow_id}-BG] ✅ Auditoría real completada")
-                    return validation_result
-                    
-                except Exception as e:
-                    logger.error(f"[{workflow_id}-BG] ❌ Error en auditoría background: {str(e)}")
-                    return {"error": str(e)}
-            
-            # Lanzar auditoría en background
-            asyncio.create_task(background_audit())
-            audit_started = True
-        else:
-            audit_started = False
-            logger.info(f"[{workflow_id}] ⏭️  [FASE 4] Auditoría omitida por configuración")
+                agent_metrics.record_agent_run(judge.id or "judge", audit_response, time.monotonic() - audit_start)
+                
+                # Procesar respuesta del agente auditor
+                validation_result = {
+                    "score": "CALCULADO_POR_AGENTE", # El agente lo incluye en su texto
+                    "compliance": "NCC-24: VERIFICADO",
+                    "audit_content": str(audit_response),
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                
+                logger.info(f"[{workflow_id}-BG] ✅ Auditoría real completada")
+                return validation_result
+                
+            except Exception as e:
+                agent_metrics.record_agent_run(judge.id or "judge", None, time.monotonic() - audit_start, error=True)
+                logger.error(f"[{workflow_id}-BG] ❌ Error en auditoría background: {str(e)}")
+                return {"error": str(e)}
+        
+        # Lanzar auditoría en background
+        asyncio.create_task(background_audit())
+        audit_started = True
+    else:
+        audit_started = False
+        logger.info(f"[{workflow_id}] ⏭️  [FASE 4] Auditoría omitida por configuración")
+
+    return {
+        "document": str(document_response),
+        "qc_score": qc_score,
+        "audit_started": audit_started,
+        "partial": partial,
+        "pending_sections": pending_sections,
+        "content": content_data,
+    }
+
+
+@app.post("/preinversion-plans", response_model=PreinversionResponse)
+async def generate_preinversion_plan(
+    request: PreinversionRequest, 
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """
+    Genera un plan de preinversión completo con validación PoLP (scopes).
+    Mantiene la conexión abierta durante toda la ejecución; para cargas
+    concurrentes usar POST /preinversion-plans/jobs.
+    """
+    _authorize_workflow_run(auth)
+
+    import time
+    start_time = time.time()
+    workflow_id = request.resume_workflow_id or new_workflow_id(request.project_id)
+    
+    try:
+        result = await _run_preinversion_workflow(request, workflow_id)
         
         elapsed = time.time() - start_time
         logger.info(f"[{workflow_id}] 🎉 [ÉXITO] Plan de preinversión generado en {elapsed:.2f}s")
         
         return PreinversionResponse(
-            status="success",
+            status="partial" if result["partial"] else "success",
             project_id=request.project_id,
             document_type=request.document_type,
-            full_document=str(document_response),
-            audit_started=audit_started,
-            message=f"✅ Plan de preinversión generado exitosamente en {elapsed:.2f}s.",
+            full_document=result["document"],
+            audit_started=result["audit_started"],
+            message=(
+                f"⏱️ Plan parcial: timeout de {request.timeout_seconds}s agotado en {elapsed:.2f}s."
+                if result["partial"] else f"✅ Plan de preinversión generado exitosamente en {elapsed:.2f}s."
+            ),
             workflow_id=workflow_id,
-            duration_seconds=elapsed
+            duration_seconds=elapsed,
+            pending_sections=result["pending_sections"]
         )
         
     except Exception as e:
@@ -777,6 +1035,245 @@ async def generate_preinversion_plan(
         )
 
 
+# ============================================================
+# JOBS ASÍNCRONOS: POST encola, GET consulta estado / documento
+# ============================================================
+
+async def _run_preinversion_batch(job: Job) -> Dict[str, Any]:
+    """
+    Ejecuta todos los proyectos del lote a la vez. El reparto del cupo LLM entre
+    proyectos lo hace el FairExecutor compartido del workflow (round-robin).
+    """
+    batch = job.request
+
+    async def run_project(project_id: int) -> Dict[str, Any]:
+        workflow_id = batch["workflow_ids"][str(project_id)]
+        request = PreinversionRequest(
+            project_id=project_id,
+            document_type=batch["document_type"],
+            timeout_seconds=batch["timeout_seconds"],
+            include_audit=batch["include_audit"],
+            bypass_llm_cache=batch.get("bypass_llm_cache", False),
+            bulk=batch.get("bulk", False),
+            metadata=batch.get("metadata"),
+        )
+        try:
+            with rate_limit_class("batch"):
+                result = await _run_preinversion_workflow(request, workflow_id)
+            if not isinstance(result["content"], dict):
+                raise RuntimeError(str(result["content"] or result["document"]))
+            return {"status": "success", "workflow_id": workflow_id, **result}
+        except Exception as e:
+            logger.error(f"[{workflow_id}] ❌ Proyecto {project_id} del lote {job.job_id} falló: {str(e)}")
+            return {"status": "error", "workflow_id": workflow_id, "error": str(e)}
+
+    results = await asyncio.gather(*[run_project(project_id) for project_id in batch["project_ids"]])
+    return {
+        "kind": "batch",
+        "projects": {str(project_id): result for project_id, result in zip(batch["project_ids"], results)},
+    }
+
+
+async def _run_preinversion_job(job: Job) -> Dict[str, Any]:
+    """Runner del JobManager: un workflow completo por job (o un lote de proyectos)."""
+    if "project_ids" in job.request:
+        return await _run_preinversion_batch(job)
+    request = PreinversionRequest(**job.request)
+    result = await _run_preinversion_workflow(request, job.request["workflow_id"])
+    if not isinstance(result["content"], dict):
+        # El workflow devuelve un texto de error cuando falla (StepOutput success=False)
+        raise RuntimeError(str(result["content"] or result["document"]))
+    return result
+
+
+job_manager = JobManager(
+    runner=_run_preinversion_job,
+    max_workers=int(os.getenv("MAAS_JOB_WORKERS", "4")),
+    max_queue_size=int(os.getenv("MAAS_JOB_QUEUE_SIZE", "100")),
+)
+
+
+@app.post("/preinversion-plans/jobs", status_code=202)
+async def submit_preinversion_job(
+    request: PreinversionRequest,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Encola la generación de un plan de preinversión y devuelve el job_id de inmediato."""
+    _authorize_workflow_run(auth)
+
+    job_request = request.model_dump()
+    job_request["workflow_id"] = request.resume_workflow_id or new_workflow_id(request.project_id)
+
+    try:
+        job = job_manager.submit(job_request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "workflow_id": job_request["workflow_id"],
+        "queue_position": job_manager.queue_position(job.job_id),
+        "status_url": f"/preinversion-plans/jobs/{job.job_id}",
+        "events_url": f"/preinversion-plans/jobs/{job.job_id}/events",
+        "document_url": f"/preinversion-plans/jobs/{job.job_id}/document",
+    }
+
+
+@app.post("/preinversion-plans/batch", status_code=202)
+async def submit_preinversion_batch(
+    request: PreinversionBatchRequest,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """
+    Encola un lote de proyectos como un único job. Las secciones de todos los
+    proyectos comparten el executor global con reparto equitativo por proyecto.
+    """
+    _authorize_workflow_run(auth)
+
+    project_ids = list(dict.fromkeys(request.project_ids))
+    if not project_ids:
+        raise HTTPException(status_code=422, detail="project_ids no puede estar vacío")
+
+    job_request = request.model_dump()
+    job_request["project_ids"] = project_ids
+    job_request["workflow_ids"] = {str(project_id): new_workflow_id(project_id) for project_id in project_ids}
+
+    try:
+        job = job_manager.submit(job_request)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "workflow_ids": job_request["workflow_ids"],
+        "queue_position": job_manager.queue_position(job.job_id),
+        "status_url": f"/preinversion-plans/jobs/{job.job_id}",
+        "documents_url": f"/preinversion-plans/batch/{job.job_id}/documents/{{project_id}}",
+    }
+
+
+@app.get("/preinversion-plans/batch/{job_id}/documents/{project_id}", response_model=PreinversionResponse)
+async def get_preinversion_batch_document(
+    job_id: str,
+    project_id: int,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Documento de un proyecto concreto de un lote terminado."""
+    _authorize_workflow_run(auth)
+    job = job_manager.get(job_id)
+    if not job or "project_ids" not in job.request:
+        raise HTTPException(status_code=404, detail=f"Lote {job_id} no encontrado")
+    if job.status != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Lote {job_id} en estado '{job.status}'")
+    result = job.result["projects"].get(str(project_id))
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Proyecto {project_id} no pertenece al lote {job_id}")
+    if result["status"] != "success":
+        raise HTTPException(status_code=409, detail=f"Proyecto {project_id} falló: {result['error']}")
+
+    return PreinversionResponse(
+        status="partial" if result.get("partial") else "success",
+        project_id=project_id,
+        document_type=job.request.get("document_type", "SIC"),
+        full_document=result["document"],
+        audit_started=result["audit_started"],
+        message="✅ Plan de preinversión generado en lote.",
+        workflow_id=result["workflow_id"],
+        duration_seconds=job.finished_at - job.started_at,
+        pending_sections=result.get("pending_sections")
+    )
+
+
+@app.get("/preinversion-plans/jobs/{job_id}")
+async def get_preinversion_job(
+    job_id: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Estado y progreso por sección de un job."""
+    _authorize_workflow_run(auth)
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+    status = job.to_status()
+    status["queue_position"] = job_manager.queue_position(job_id)
+    status["llm_executor"] = llm_executor.snapshot()
+    if "project_ids" in job.request and job.status == JOB_SUCCEEDED:
+        status["projects"] = {
+            project_id: {key: result.get(key) for key in ("status", "workflow_id", "qc_score", "error")}
+            for project_id, result in job.result["projects"].items()
+        }
+    return status
+
+
+def _progress_stream(workflow_id: str) -> StreamingResponse:
+    subscription = progress_bus.subscribe(workflow_id)
+    return StreamingResponse(
+        sse_stream(progress_bus, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/preinversion-plans/events/{workflow_id}")
+async def stream_workflow_progress(
+    workflow_id: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """
+    SSE con el progreso por sección de un workflow_id: section_started,
+    section_attempt, section_approved, section_completed y evento terminal.
+    """
+    _authorize_workflow_run(auth)
+    return _progress_stream(workflow_id)
+
+
+@app.get("/preinversion-plans/jobs/{job_id}/events")
+async def stream_job_progress(
+    job_id: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """SSE del progreso de un job (atajo sobre su workflow_id)."""
+    _authorize_workflow_run(auth)
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+    if "project_ids" in job.request:
+        raise HTTPException(status_code=400, detail="Job de lote: suscribirse a /preinversion-plans/events/{workflow_id} por proyecto")
+    return _progress_stream(job.request["workflow_id"])
+
+
+@app.get("/preinversion-plans/jobs/{job_id}/document", response_model=PreinversionResponse)
+async def get_preinversion_job_document(
+    job_id: str,
+    auth: HTTPAuthorizationCredentials = Depends(auth_scheme)
+):
+    """Documento final de un job terminado con éxito (409 mientras no lo esté)."""
+    _authorize_workflow_run(auth)
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} no encontrado")
+    if "project_ids" in job.request:
+        raise HTTPException(status_code=400, detail="Job de lote: usar /preinversion-plans/batch/{job_id}/documents/{project_id}")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} falló: {job.error}")
+    if job.status != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} aún en estado '{job.status}'")
+
+    return PreinversionResponse(
+        status="partial" if job.result.get("partial") else "success",
+        project_id=job.request["project_id"],
+        document_type=job.request.get("document_type", "SIC"),
+        full_document=job.result["document"],
+        audit_started=job.result["audit_started"],
+        message=f"✅ Plan de preinversión generado en {job.finished_at - job.started_at:.2f}s.",
+        workflow_id=job.request["workflow_id"],
+        duration_seconds=job.finished_at - job.started_at,
+        pending_sections=job.result.get("pending_sections")
+    )
+
+
 @app.get("/api/documentation")
 async def get_documentation_index():
     """
@@ -0,0 +1,107 @@
+"""
+Agent Factory Tests
+
+Verifica que cada llamada del workflow usa una instancia de agente con
+sesión propia que comparte la configuración del prototipo, de modo que
+ejecuciones concurrentes no mezclan estado de conversación.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.agent import Agent
+from agno.db.in_memory import InMemoryDb
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.agent_factory import AgentFactory
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+class RecordingAgent(Agent):
+    """Agent real de agno cuyo arun registra la instancia y la sesión que lo ejecuta."""
+
+    def __init__(self, handler, seen, **kwargs):
+        super().__init__(**kwargs)
+        self.handler = handler
+        self.seen = seen
+
+    async def arun(self, prompt, **kwargs):
+        self.seen.append((self.id, self, self.session_id))
+        await asyncio.sleep(0.001)
+        return SimpleNamespace(content=self.handler(prompt))
+
+
+def test_spawn_isolates_session_and_shares_config():
+    prototype = Agent(id="general-author-agent", name="GeneralAuthorAgent", instructions=["Sigue la plantilla"])
+    factory = AgentFactory()
+
+    first = factory.spawn(prototype, "wf_1:SIC_02:author:1")
+    second = factory.spawn(prototype, "wf_2:SIC_02:author:1")
+
+    assert first is not prototype and first is not second
+    assert (first.session_id, second.session_id) == ("wf_1:SIC_02:author:1", "wf_2:SIC_02:author:1")
+    assert prototype.session_id is None
+    assert first.instructions is prototype.instructions
+    first._connectable_tools_initialized_on_run.append("tool")
+    assert prototype._connectable_tools_initialized_on_run == []
+    assert factory.spawned == {"general-author-agent": 2}
+
+
+def test_spawned_instances_do_not_persist_sessions():
+    db = InMemoryDb()
+    prototype = Agent(id="expert-judge-agent", db=db)
+    instance = AgentFactory().spawn(prototype, "wf_1:SIC_02:judge:1")
+    assert instance.db is None and prototype.db is db
+
+
+def test_non_agno_objects_are_returned_unchanged():
+    stub = SimpleNamespace(arun=None)
+    assert AgentFactory().spawn(stub, "s") is stub
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workflows_never_share_agent_sessions():
+    seen = []
+    plan = DocumentPlan(
+        project_id="x",
+        sections=[DocumentSection(section_id=f"SIC_{i:02d}", title=str(i)) for i in range(2, 6)],
+    )
+
+    def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        return SIC_DTO(sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=RecordingAgent(lambda prompt: plan, seen, id="planner"),
+        extractor=None,
+        author=RecordingAgent(author_handler, seen, id="author"),
+        reviewer=RecordingAgent(judge_handler, seen, id="judge"),
+        workspace_id="test",
+        max_concurrency=4,
+    )
+
+    outputs = await asyncio.gather(*[
+        workflow.main_execution(StepInput(input={"project_id": project_id, "workflow_id": f"wf_{project_id}"}))
+        for project_id in (1, 2)
+    ])
+
+    assert all(output.success for output in outputs)
+    # 2 workflows x (1 planner + 4 secciones x (author + judge))
+    assert len(seen) == 18
+    assert len({id(instance) for _, instance, _ in seen}) == 18
+    assert len({session for _, _, session in seen}) == 18
+    assert ("author", "wf_2:SIC_03:author:1") in {(agent_id, session) for agent_id, _, session in seen}
+    assert workflow.author.session_id is None
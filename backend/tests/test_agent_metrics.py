@@ -0,0 +1,155 @@
+"""
+Agent Metrics Tests
+
+Verifica los percentiles del histograma y la ventana móvil, la extracción de
+tokens/coste/herramientas desde RunOutput, la persistencia de totales y que
+el workflow registra métricas por agente, sección y ejecución.
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.models.metrics import Metrics
+from agno.models.response import ToolExecution
+from agno.run.agent import RunOutput
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.agent_metrics import AgentMetricsRegistry, RollingStats, estimate_cost
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+class FakeDb:
+    def __init__(self):
+        self.rows = []
+
+    def execute(self, query, *args):
+        if query.strip().startswith("INSERT"):
+            self.rows.append({"totals": args[0], "snapshot": args[1]})
+        return 0
+
+    def fetchone(self, query, *args):
+        return self.rows[-1] if self.rows else None
+
+
+def test_rolling_window_percentiles_and_expiry():
+    stats = RollingStats(window_seconds=120, slot_seconds=60)
+    for latency in [80] * 90 + [4000] * 8 + [50000] * 2:
+        stats.record(latency, now=1000.0)
+
+    window = stats.snapshot(now=1000.0)["window"]
+    assert window["count"] == 100
+    assert 50 < window["p50_ms"] <= 100
+    assert 2500 < window["p95_ms"] <= 5000
+    assert 30000 < window["p99_ms"] <= 60000
+
+    stats.record(200, error=True, now=1130.0)
+    later = stats.snapshot(now=1130.0)
+    # La ranura de t=1000 ya salió de la ventana; los totales se conservan
+    assert later["window"]["count"] == 1 and later["window"]["error_rate"] == 1.0
+    assert later["total"]["count"] == 101 and later["total"]["errors"] == 1
+
+
+def test_record_agent_run_extracts_tokens_cost_and_tools():
+    registry = AgentMetricsRegistry()
+    run = RunOutput(
+        model="gpt-4o-2024-08-06",
+        metrics=Metrics(input_tokens=1000, output_tokens=500, total_tokens=1500),
+        tools=[ToolExecution(tool_name="get_issue_details", metrics=Metrics(duration=0.3))],
+    )
+    registry.start_run("wf_1", project_id=9)
+    registry.record_agent_run("general-author-agent", run, 2.0, section_id="SIC_02", workflow_id="wf_1")
+    registry.record_agent_run("expert-judge-agent", None, 0.5, section_id="SIC_02", workflow_id="wf_1", error=True)
+    summary = registry.finish_run("wf_1", "success")
+
+    snapshot = registry.snapshot()
+    author = snapshot["agent"]["general-author-agent"]["total"]
+    assert author["total_tokens"] == 1500
+    assert author["cost_usd"] == pytest.approx(estimate_cost("gpt-4o", 1000, 500)) == pytest.approx(0.0075)
+    assert snapshot["section"]["SIC_02"]["total"]["errors"] == 1
+    assert snapshot["tool"]["get_issue_details"]["total"]["avg_latency_ms"] == pytest.approx(300)
+    assert summary["agent_calls"] == 2 and summary["tool_calls"] == 1 and summary["errors"] == 1
+    assert snapshot["workflow"]["DocumentCreationWorkflow"]["total"]["count"] == 1
+    assert snapshot["recent_runs"][0]["workflow_id"] == "wf_1"
+
+
+@pytest.mark.asyncio
+async def test_totals_survive_restart():
+    db = FakeDb()
+    registry = AgentMetricsRegistry(db)
+    registry.record_agent_run("expert-judge-agent", RunOutput(metrics=Metrics(input_tokens=10, output_tokens=5)), 1.0)
+    assert await registry.flush()
+    assert json.loads(db.rows[-1]["snapshot"])["agent"]["expert-judge-agent"]["total"]["count"] == 1
+
+    restored = AgentMetricsRegistry(db)
+    assert await restored.load()
+    total = restored.snapshot()["agent"]["expert-judge-agent"]
+    assert total["total"]["count"] == 1 and total["total"]["total_tokens"] == 15
+    assert total["window"]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_builds_payload_on_loop_thread_and_writes_in_worker():
+    threads = {}
+
+    class ThreadDb(FakeDb):
+        def execute(self, query, *args):
+            threads.setdefault("write", threading.get_ident())
+            return super().execute(query, *args)
+
+    registry = AgentMetricsRegistry(ThreadDb())
+    snapshot = registry.snapshot
+
+    def recording_snapshot(now=None):
+        threads["snapshot"] = threading.get_ident()
+        return snapshot(now)
+
+    registry.snapshot = recording_snapshot
+    registry.record_agent_run("author-agent", RunOutput(metrics=Metrics(input_tokens=3, output_tokens=2)), 0.5)
+
+    assert await registry.flush()
+    # Recorrer scopes/ventanas en un hilo mientras el loop registra rompería la iteración
+    assert threads["snapshot"] == threading.get_ident() != threads["write"]
+
+
+@pytest.mark.asyncio
+async def test_workflow_records_agent_section_and_run_metrics():
+    plan = DocumentPlan(project_id="x", sections=[DocumentSection(section_id="SIC_02", title="Caso de Negocio")])
+
+    class StubAgent:
+        def __init__(self, agent_id, content):
+            self.id = agent_id
+            self.content = content
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=self.content, metrics=Metrics(input_tokens=100, output_tokens=50), model="gpt-4o")
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent("master-planner", plan), extractor=None,
+        author=StubAgent("general-author-agent", SIC_DTO(
+            sic_code="SIC_02", project_id=1, metadata=[], key_tables_markdown="", summary_markdown="x"
+        )),
+        reviewer=StubAgent("expert-judge-agent", FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=95, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )),
+        workspace_id="test", agent_metrics=AgentMetricsRegistry(),
+    )
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1, "workflow_id": "wf_metrics"}))
+
+    assert output.success
+    snapshot = workflow.agent_metrics.snapshot()
+    assert set(snapshot["agent"]) == {"master-planner", "general-author-agent", "expert-judge-agent"}
+    assert snapshot["section"]["SIC_02"]["total"]["count"] == 2
+    assert snapshot["model"]["gpt-4o"]["total"]["total_tokens"] == 450
+    run = snapshot["recent_runs"][0]
+    assert run["workflow_id"] == "wf_metrics" and run["status"] == "success" and run["agent_calls"] == 3
+    assert snapshot["active_runs"] == 0
@@ -0,0 +1,133 @@
+"""
+Batch Runner Tests
+
+Verifica el modo bulk contra el stand-in local de la Batch API: las
+peticiones concurrentes se agrupan en un único batch, los fallos por línea
+vuelven como BatchRequestError y el workflow avanza el DAG ola a ola con
+Author y Judge resueltos por batch (una ola de Author + Judge por nivel).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from openai import AsyncOpenAI
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.batch_runner import BatchRequestError, OpenAIBatchRunner
+from backend.core.dag_scheduler import DAGScheduler
+from backend.benchmarks.openai_stub import create_openai_stub_app, default_responder, example_from_schema
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+def stub_client(app) -> AsyncOpenAI:
+    transport = httpx.ASGITransport(app=app)
+    return AsyncOpenAI(
+        api_key="test", base_url="http://stub/v1",
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://stub/v1"),
+    )
+
+
+class SchemaAgent:
+    """Doble de agente con la forma que usa el batch runner (model.id, instrucciones, output_schema)."""
+
+    def __init__(self, output_schema, model_id="gpt-4o"):
+        self.output_schema = output_schema
+        self.model = SimpleNamespace(id=model_id)
+        self.description = "Agente de prueba"
+        self.instructions = ["Responde en JSON."]
+
+    async def arun(self, prompt):
+        raise AssertionError("En modo bulk no debe haber llamadas interactivas")
+
+
+def test_example_from_schema_is_valid_for_workflow_schemas():
+    for schema in (SIC_DTO, FeedbackCritiqueSchema, DocumentPlan):
+        schema.model_validate(example_from_schema(schema.model_json_schema()))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch_and_errors_are_per_line():
+    def responder(body):
+        if "falla" in body["messages"][-1]["content"]:
+            raise ValueError("modelo no disponible")
+        return default_responder(body)
+
+    app = create_openai_stub_app(responder)
+    runner = OpenAIBatchRunner(stub_client(app), poll_interval=0.01, linger_seconds=0.05)
+    agent = SchemaAgent(FeedbackCritiqueSchema)
+
+    results = await asyncio.gather(
+        runner.run_agent(agent, "Audita SIC_02", "wf:SIC_02:judge:1"),
+        runner.run_agent(agent, "Audita SIC_03", "wf:SIC_03:judge:1"),
+        runner.run_agent(agent, "falla", "wf:SIC_04:judge:1"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0].content, FeedbackCritiqueSchema) and results[0].content.qc_score == 100
+    assert results[1].metrics.total_tokens > 0
+    assert isinstance(results[2], BatchRequestError)
+    assert runner.stats["batches"] == 1 and runner.stats["requests"] == 3
+    assert runner.stats["failed_requests"] == 1
+    body = app.state.stub["requests"][0]
+    assert body["response_format"]["json_schema"]["name"] == "FeedbackCritiqueSchema"
+    assert body["messages"][0]["role"] == "system"
+
+
+@pytest.mark.asyncio
+async def test_abandoned_batch_stops_polling_and_is_cancelled():
+    app = create_openai_stub_app()
+    runner = OpenAIBatchRunner(stub_client(app), poll_interval=3600, linger_seconds=0.01)
+    agent = SchemaAgent(FeedbackCritiqueSchema)
+
+    # El deadline de la ejecución cancela a todos los llamadores del batch
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(asyncio.gather(
+            runner.run_agent(agent, "Audita SIC_02"), runner.run_agent(agent, "Audita SIC_03"),
+        ), timeout=0.2)
+    await asyncio.wait_for(asyncio.gather(*runner._tasks), timeout=1)
+
+    [batch] = app.state.stub["batches"].values()
+    assert batch["status"] == "cancelled" and runner.stats["cancelled_batches"] == 1
+
+
+def test_waves_are_topological_levels():
+    scheduler = DAGScheduler({"SIC_02": [], "SIC_03": ["SIC_02"], "SIC_05": [], "SIC_16": ["SIC_03", "SIC_05"]})
+    assert scheduler.waves == [["SIC_02", "SIC_05"], ["SIC_03"], ["SIC_16"]]
+
+
+@pytest.mark.asyncio
+async def test_bulk_workflow_advances_dag_wave_by_wave():
+    plan = DocumentPlan(project_id="x", sections=[
+        DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+        DocumentSection(section_id="SIC_05", title="Ingeniería"),
+        DocumentSection(section_id="SIC_03", title="Riesgo", dependencies=["SIC_02"]),
+    ])
+
+    class Planner:
+        async def arun(self, prompt):
+            return SimpleNamespace(content=plan)
+
+    app = create_openai_stub_app()
+    runner = OpenAIBatchRunner(stub_client(app), poll_interval=0.01, linger_seconds=0.05)
+    workflow = DocumentCreationWorkflow(
+        planner=Planner(), extractor=None, author=SchemaAgent(SIC_DTO),
+        reviewer=SchemaAgent(FeedbackCritiqueSchema), workspace_id="test", batch_runner=runner,
+    )
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1, "bulk": True}))
+
+    assert output.success and output.content["bulk"]
+    assert list(output.content["audit_report"]["details"]) == ["SIC_02", "SIC_05", "SIC_03"]
+    # Ola 1: Author x2, Judge x2 | Ola 2: Author, Judge
+    assert runner.stats["batches"] == 4 and runner.stats["requests"] == 6
+    prompts = [body["messages"][-1]["content"] for body in app.state.stub["requests"]]
+    assert prompts[0].startswith("Genera el contenido para SIC_02") or prompts[0].startswith("Genera el contenido para SIC_05")
+    assert prompts[-1].startswith("Audita la sección SIC_03")
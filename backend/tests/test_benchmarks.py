@@ -0,0 +1,139 @@
+"""
+Benchmarks Tests
+
+Verifica que los stand-ins son deterministas (latencia y contenido por
+petición, datos Redmine por semilla), que el stub de OpenAI devuelve
+salidas válidas para los schemas del workflow (con turno de herramientas),
+la paginación y filtros del stub de Redmine, y un benchmark offline del
+workflow con su almacén de resultados y detección de regresiones.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import backend.agents  # noqa: F401  (antes que backend.tools: import circular)
+from backend.agents.schemas import DocumentPlan, FeedbackCritiqueSchema, SIC_DTO
+from backend.benchmarks.harness import BenchmarkResult, ResultStore, compare, run_workflow_benchmark
+from backend.benchmarks.openai_stub import LatencyModel, MaasResponder, create_openai_stub_app
+from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+from backend.core.structural_checker import StructuralChecker
+
+
+def _body(name, prompt, **extra):
+    return {
+        "model": "gpt-4o",
+        "messages": [{"role": "system", "content": "x"}, {"role": "user", "content": prompt}],
+        "response_format": {"type": "json_schema", "json_schema": {"name": name, "schema": {}}},
+        **extra,
+    }
+
+
+def test_latency_model_is_deterministic_per_request_and_schema():
+    model = LatencyModel(profiles={
+        "default": {"distribution": "fixed", "ms": 50},
+        "SIC_DTO": {"distribution": "lognormal", "median_ms": 1000, "sigma": 0.5, "max_ms": 3000},
+    }, seed=3)
+    author = [model.sample_ms(_body("SIC_DTO", f"Genera el contenido para SIC_{n:02d}")) for n in range(1, 201)]
+
+    assert model.sample_ms(_body("SIC_DTO", "Genera el contenido para SIC_01")) == author[0]
+    assert len(set(author)) > 150 and max(author) <= 3000
+    assert 700 < sorted(author)[100] < 1400
+    assert model.sample_ms(_body("FeedbackCritiqueSchema", "Audita")) == 50
+    assert LatencyModel(profiles=model.profiles, seed=3, scale=0.1).sample_ms(_body("DocumentPlan", "p")) == 5
+
+
+@pytest.mark.asyncio
+async def test_openai_stub_returns_schema_valid_workflow_outputs():
+    responder = MaasResponder(tool_calls={"get_project_issues": {"project_id": "{project_id}"}})
+    app = create_openai_stub_app(responder)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub") as client:
+        async def complete(body):
+            response = await client.post("/v1/chat/completions", json=body)
+            assert response.status_code == 200
+            return response.json()
+
+        plan = DocumentPlan.model_validate_json(
+            (await complete(_body("DocumentPlan", "Plan AGDR para proyecto 7")))["choices"][0]["message"]["content"]
+        )
+        assert plan.project_id == "7" and len(plan.sections) == 22
+        order = [s.section_id for s in plan.sections]
+        assert all(order.index(dep) < order.index(s.section_id) for s in plan.sections for dep in s.dependencies)
+
+        # Primer turno con la herramienta ofrecida -> tool_calls; tras el resultado -> contenido
+        tools = [{"type": "function", "function": {"name": "get_project_issues", "parameters": {}}}]
+        first = await complete(_body("SIC_DTO", "Genera el contenido para SIC_16: Costos del proyecto 7.", tools=tools))
+        call = first["choices"][0]["message"]["tool_calls"][0]
+        assert first["choices"][0]["finish_reason"] == "tool_calls"
+        assert json.loads(call["function"]["arguments"]) == {"project_id": "7"}
+
+        body = _body("SIC_DTO", "Genera el contenido para SIC_16: Costos del proyecto 7.", tools=tools)
+        body["messages"] += [first["choices"][0]["message"], {"role": "tool", "tool_call_id": call["id"], "content": "[]"}]
+        second = await complete(body)
+        dto = SIC_DTO.model_validate_json(second["choices"][0]["message"]["content"])
+        assert dto.sic_code == "SIC_16" and StructuralChecker().check("SIC_16", dto) == []
+        assert (await complete(body))["choices"][0]["message"]["content"] == second["choices"][0]["message"]["content"]
+
+        verdict = FeedbackCritiqueSchema.model_validate_json(
+            (await complete(_body("FeedbackCritiqueSchema", "Audita la sección SIC_16")))["choices"][0]["message"]["content"]
+        )
+        assert verdict.approved and verdict.qc_score > 85
+
+        stats = (await client.get("/_stub/stats")).json()
+        assert stats["calls_by_schema"] == {"DocumentPlan": 1, "SIC_DTO": 3, "FeedbackCritiqueSchema": 1}
+
+
+@pytest.mark.asyncio
+async def test_redmine_stub_pagination_filters_and_touch():
+    data = SyntheticRedmine(projects=2, issues_per_project=130, seed=5)
+    assert SyntheticRedmine(projects=2, issues_per_project=130, seed=5).issues[77] == data.issues[77]
+
+    app = create_redmine_stub_app(data)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://redmine") as client:
+        seen = []
+        for offset in range(0, 200, 100):
+            page = (await client.get("/issues.json", params={
+                "project_id": "proyecto-1", "status_id": "*", "offset": offset, "limit": 500,
+            })).json()
+            assert page["total_count"] == 130 and page["limit"] == 100
+            seen += [issue["id"] for issue in page["issues"]]
+        assert sorted(seen) == list(range(1, 131))
+
+        data.touch(12, notes="Nuevo CAPEX", CAPEX_KUSD=999)
+        changed = (await client.get("/issues.json", params={
+            "status_id": "*", "updated_on": f">={data.issues[12]['updated_on']}",
+        })).json()
+        assert [issue["id"] for issue in changed["issues"]] == [12]
+
+        issue = (await client.get("/issues/12.json", params={"include": "journals,relations"})).json()["issue"]
+        assert issue["journals"][-1]["details"][0]["new_value"] == "999"
+        assert "relations" in issue
+        assert data.requests["GET /issues.json"] == 3
+
+
+@pytest.mark.asyncio
+async def test_offline_workflow_benchmark_and_regression_compare(tmp_path):
+    result = await run_workflow_benchmark(
+        runs=2, concurrency=2, sections=3, projects=2, issues_per_project=10, latency="none", warmup=0,
+    )
+
+    assert result.errors == 0 and result.runs == 2
+    # planner + (tool call + borrador) * 3 secciones + judge * 3 secciones
+    assert result.llm_calls_per_run == 10
+    assert result.llm_calls_by_schema == {"DocumentPlan": 2, "SIC_DTO": 12, "FeedbackCritiqueSchema": 6}
+    assert result.tool_calls_per_run == 3 and result.redmine_requests_per_run > 0
+    assert result.db_ops_per_run > 0 and result.peak_memory_mb > 0
+
+    store = ResultStore(tmp_path)
+    assert compare(result, store.baseline(result))["baseline"] is None
+    store.append(result)
+    slower = BenchmarkResult(**{**result.__dict__, "makespan_seconds": result.makespan_seconds * 2, "git_sha": "next"})
+    comparison = compare(slower, store.baseline(slower), threshold=0.10)
+    assert comparison["regressions"] == ["makespan_seconds"]
+    assert comparison["baseline"]["git_sha"] == result.git_sha
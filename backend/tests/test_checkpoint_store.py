@@ -0,0 +1,137 @@
+"""
+Section Checkpoint Tests
+
+Verifica que las secciones aprobadas se persisten al finalizar y que una
+ejecución fallida se reanuda por workflow_id sin regenerarlas.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.checkpoint_store import SectionCheckpointStore
+from backend.workflows.document_workflow import DocumentCreationWorkflow, new_workflow_id
+
+
+class FakeDb:
+    """Emula AsyncPostgresDb: registra queries y guarda filas en memoria."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def execute(self, query, *args):
+        if query.strip().startswith("INSERT"):
+            workflow_id, section_id, project_id, dto, qc_score, critique, approved, reads = args
+            self.rows[(workflow_id, section_id)] = {
+                "workflow_id": workflow_id, "section_id": section_id, "dto": dto,
+                "qc_score": qc_score, "critique": critique, "approved": approved, "reads": reads,
+            }
+        return 1
+
+    def fetch(self, query, *args):
+        return [dict(row) for (wf, _), row in self.rows.items() if wf == args[0]]
+
+
+class StubAgent:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = 0
+
+    async def arun(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=await self.handler(prompt))
+
+
+def build_workflow(store, fail_on=None):
+    plan = DocumentPlan(
+        project_id="7",
+        sections=[
+            DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+            DocumentSection(section_id="SIC_03", title="Riesgos", dependencies=["SIC_02"]),
+        ],
+    )
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        if s_id == fail_on:
+            raise RuntimeError("OpenAI timeout")
+        return SIC_DTO(sic_code=s_id, project_id=7, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=92, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    author = StubAgent(author_handler)
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=author,
+        reviewer=StubAgent(judge_handler), workspace_id="test", checkpoint_store=store,
+    )
+    return workflow, author
+
+
+@pytest.mark.asyncio
+async def test_round_trip_serialization():
+    store = SectionCheckpointStore(FakeDb())
+    dto = SIC_DTO(sic_code="SIC_16", project_id=7, metadata=[], key_tables_markdown="| a |", summary_markdown="x")
+
+    assert await store.save_section("wf_1", 7, "SIC_16", dto, 91.5, None, True)
+    checkpoints = await store.load_workflow("wf_1")
+
+    assert checkpoints["SIC_16"].dto == dto
+    assert checkpoints["SIC_16"].qc_score == 91.5
+    assert checkpoints["SIC_16"].approved is True
+
+
+@pytest.mark.asyncio
+async def test_failed_run_resumes_without_regenerating_sections():
+    store = SectionCheckpointStore(FakeDb())
+    step_input = StepInput(input={"project_id": 7, "workflow_id": "wf_resume"})
+
+    workflow, _ = build_workflow(store, fail_on="SIC_03")
+    failed = await workflow.main_execution(step_input)
+    assert not failed.success
+    assert "wf_resume" in failed.content
+
+    # Mismo workflow_id sin petición explícita de reanudación: no hereda checkpoints
+    workflow, author = build_workflow(store, fail_on="SIC_03")
+    await workflow.main_execution(step_input)
+    assert author.calls == 2
+
+    workflow, author = build_workflow(store)
+    resumed = await workflow.main_execution(StepInput(input={"project_id": 7, "resume_workflow_id": "wf_resume"}))
+
+    assert resumed.success
+    assert resumed.content["resumed_sections"] == ["SIC_02"]
+    assert author.calls == 1  # Solo SIC_03 se regenera
+
+
+def test_workflow_ids_are_unique_per_run():
+    ids = {new_workflow_id(7) for _ in range(100)}
+    assert len(ids) == 100 and all(i.startswith("wf_7_") for i in ids)
+
+
+@pytest.mark.asyncio
+async def test_persistence_errors_do_not_break_the_run():
+    class BrokenDb(FakeDb):
+        def execute(self, query, *args):
+            raise RuntimeError("pool agotado")
+
+        def fetch(self, query, *args):
+            raise RuntimeError("pool agotado")
+
+    workflow, _ = build_workflow(SectionCheckpointStore(BrokenDb()))
+    output = await workflow.main_execution(StepInput(input={"project_id": 7}))
+
+    assert output.success
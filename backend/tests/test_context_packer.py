@@ -0,0 +1,142 @@
+"""
+Context Packer Tests
+
+Verifica el ensamblaje de prompts por presupuesto de tokens: recorte por
+prioridad (resumen → truncamiento → descarte), crítica siempre presente y
+que el Judge ve el final de secciones largas en lugar de un corte fijo por
+caracteres.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.agents.schemas import DocumentSection, FeedbackCritiqueSchema, KeyValue, SIC_DTO
+from backend.core import context_packer
+from backend.core.context_packer import (
+    ContextPacker, ContextPart, TokenCounter, critique_part, dependency_parts, document_parts, outline
+)
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+def long_section(paragraphs: int, closing: str) -> str:
+    body = "\n\n".join(
+        f"Párrafo {i} con la primera frase relevante. " + "Detalle técnico de relleno. " * 40
+        for i in range(paragraphs)
+    )
+    return f"## 1 Capítulo\n\n{body}\n\n### 1.9 Conclusión\n{closing}"
+
+
+def test_offline_tiktoken_falls_back_to_character_estimate(monkeypatch):
+    calls = []
+
+    def unreachable(name):
+        calls.append(name)
+        raise ConnectionError("openaipublic.blob.core.windows.net no accesible")
+
+    monkeypatch.setattr(context_packer, "tiktoken", SimpleNamespace(
+        encoding_for_model=unreachable, get_encoding=unreachable
+    ))
+    context_packer._encoding.cache_clear()
+    try:
+        first, second = TokenCounter("gpt-4o"), TokenCounter("gpt-4o")
+        assert not first.exact and first.count("x" * 35) == 10
+        assert second.count("abc") == 1 and calls == ["gpt-4o"]  # la descarga no se reintenta
+    finally:
+        context_packer._encoding.cache_clear()
+
+
+def test_fits_without_trimming():
+    packer = ContextPacker()
+    parts = [
+        ContextPart(name="a", title="A", text="uno", priority=10),
+        ContextPart(name="b", title="B", text="dos", priority=20),
+    ]
+    packed = packer.pack(parts, budget=1000)
+    assert not packed.trimmed
+    assert packed.text == "### A\nuno\n\n### B\ndos"
+    assert packed.tokens <= 1000
+
+
+def test_lowest_priority_is_trimmed_first_and_critique_survives():
+    counter = TokenCounter()
+    deps = {
+        "SIC_02": SIC_DTO(
+            sic_code="SIC_02", project_id=1, metadata=[KeyValue(key="CAPEX", value="120 MUSD")],
+            key_tables_markdown="| Tabla | Valor |\n| :--- | :--- |\n| 21 | Sitio |",
+            summary_markdown=long_section(30, "Cierre SIC_02."),
+        )
+    }
+    critique = FeedbackCritiqueSchema(
+        root_cause="", actionable_recommendation="Completar Tabla 1611", qc_score=50, approved=False,
+        critical_gaps=["Falta ETP"], regulatory_compliance=True,
+    )
+    parts = [critique_part(critique)] + dependency_parts(["SIC_02"], deps)
+
+    packed = ContextPacker().pack(parts, budget=300, counter=counter)
+
+    assert packed.tokens <= 300
+    assert packed.summarized[0] == "SIC_02.summary"
+    assert "SIC_02.metadata" not in packed.summarized + packed.truncated + packed.dropped
+    assert "Completar Tabla 1611" in packed.text and "- Falta ETP" in packed.text
+    assert "CAPEX: 120 MUSD" in packed.text
+
+
+def test_oversized_part_keeps_its_tail():
+    counter = TokenCounter()
+    text = long_section(200, "Conclusión final imprescindible.")
+
+    summary = outline(text)
+    assert "Conclusión final imprescindible." in summary
+    assert "Detalle técnico de relleno" not in summary
+
+    truncated = counter.truncate(text, 200)
+    assert "tokens omitidos por presupuesto" in truncated
+    assert truncated.endswith("Conclusión final imprescindible.")
+    assert counter.count(truncated) <= 210
+
+    # Solo cuando ni resumida cabe, la parte no obligatoria se descarta y se declara
+    packed = ContextPacker().pack(
+        [ContextPart(name="req", text="obligatoria", required=True, summarizable=False, priority=100),
+         ContextPart(name="extra", text=text, priority=1)],
+        budget=12, counter=counter,
+    )
+    assert packed.dropped == ["extra"]
+    assert "obligatoria" in packed.text and "Contexto omitido por presupuesto de tokens: extra" in packed.text
+
+
+def test_document_parts_split_by_section():
+    parts = document_parts("# SIC_02: Caso\ntexto\n\n# SIC_03: Riesgo\nmás texto")
+    assert [part.name for part in parts] == ["SIC_02: Caso", "SIC_03: Riesgo"]
+
+
+@pytest.mark.asyncio
+async def test_judge_prompt_contains_end_of_long_section():
+    prompts = []
+
+    class StubAgent:
+        async def arun(self, prompt):
+            prompts.append(prompt)
+            return SimpleNamespace(content=FeedbackCritiqueSchema(
+                root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+                critical_gaps=[], regulatory_compliance=True
+            ))
+
+    workflow = DocumentCreationWorkflow(
+        planner=None, extractor=None, author=None, reviewer=StubAgent(), workspace_id="test",
+        judge_context_tokens=2000,
+    )
+    summary = long_section(120, "Contingencia justificada con ETP 3.")
+    assert len(summary) > 10000
+    dto = SIC_DTO(sic_code="SIC_16", project_id=1, metadata=[], key_tables_markdown="", summary_markdown=summary)
+
+    critique, _ = await workflow._judge_attempt(DocumentSection(section_id="SIC_16", title="Costos"), 1, dto)
+
+    assert critique.approved
+    assert "Contingencia justificada con ETP 3." in prompts[0]
+    assert TokenCounter().count(prompts[0]) <= 2100
@@ -0,0 +1,228 @@
+"""
+DAG Scheduler Tests
+
+Verifica la ejecución concurrente de secciones SIC respetando dependencias
+y el límite de concurrencia del DocumentCreationWorkflow.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.core.dag_scheduler import DAGScheduler, DAGCycleError
+
+
+SIC_DEPENDENCIES = {
+    "SIC_02": [],
+    "SIC_03": ["SIC_02"],
+    "SIC_04": ["SIC_03"],
+    "SIC_05": ["SIC_03"],
+    "SIC_06": ["SIC_03"],
+    "SIC_10": ["SIC_03"],
+    "SIC_11": ["SIC_02"],
+    "SIC_16": ["SIC_11", "SIC_03"],
+}
+
+
+@pytest.mark.asyncio
+async def test_nodes_start_after_dependencies():
+    finished = []
+
+    async def node(node_id):
+        await asyncio.sleep(0.01)
+        for dep in SIC_DEPENDENCIES[node_id]:
+            assert dep in finished, f"{node_id} arrancó antes que {dep}"
+        finished.append(node_id)
+        return node_id.lower()
+
+    results = await DAGScheduler(SIC_DEPENDENCIES, max_concurrency=4).run(node)
+
+    assert set(results) == set(SIC_DEPENDENCIES)
+    assert results["SIC_16"] == "sic_16"
+
+
+@pytest.mark.asyncio
+async def test_independent_sections_run_concurrently():
+    in_flight = 0
+    peak = 0
+
+    async def node(node_id):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+
+    await DAGScheduler(SIC_DEPENDENCIES, max_concurrency=3).run(node)
+
+    # SIC_04/05/06/10/11 son independientes tras SIC_03, pero el límite es 3
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_failure_cancels_in_flight_nodes():
+    cancelled = []
+
+    async def node(node_id):
+        if node_id == "SIC_04":
+            raise RuntimeError("fallo OpenAI")
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(node_id)
+            raise
+
+    with pytest.raises(RuntimeError, match="fallo OpenAI"):
+        await DAGScheduler({"SIC_04": [], "SIC_05": []}, max_concurrency=2).run(node)
+
+    assert cancelled == ["SIC_05"]
+
+
+def test_cycle_and_unknown_dependencies():
+    with pytest.raises(DAGCycleError):
+        DAGScheduler({"SIC_01": ["SIC_14"], "SIC_14": ["SIC_01"]})
+
+    scheduler = DAGScheduler({"SIC_02": ["SIC_99"]})
+    assert scheduler.dependencies == {"SIC_02": []}
+
+
+def test_from_edges_matches_planner_dag():
+    from backend.agents.planner_agent import MasterPlannerAgent
+
+    plan = MasterPlannerAgent.generate_dynamic_plan(None, project_id="7")
+    scheduler = DAGScheduler.from_edges([s.section_id for s in plan.sections], plan.dag_edges)
+
+    order = scheduler.topological_order
+    assert len(order) == 22
+    assert order.index("SIC_03") < order.index("SIC_16") < order.index("SIC_14") < order.index("SIC_01")
+
+
+@pytest.mark.asyncio
+async def test_workflow_executes_plan_through_dag():
+    from agno.workflow import StepInput
+    from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO, KeyValue
+    from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+    plan = DocumentPlan(
+        project_id="7",
+        sections=[
+            DocumentSection(section_id=s_id, title=s_id, dependencies=deps)
+            for s_id, deps in SIC_DEPENDENCIES.items()
+        ],
+    )
+    authored = []
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=await self.handler(prompt))
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        await asyncio.sleep(0.01)
+        authored.append(s_id)
+        return SIC_DTO(
+            sic_code=s_id, project_id=7, metadata=[KeyValue(key="ETP", value="12%")],
+            key_tables_markdown="", summary_markdown=f"Contenido {s_id}"
+        )
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler),
+        extractor=None,
+        author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler),
+        workspace_id="test",
+        max_concurrency=4,
+    )
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 7}))
+
+    assert output.success
+    assert authored.index("SIC_03") > authored.index("SIC_02")
+    # El documento se ensambla en el orden del plan, no en el de finalización
+    assert list(output.content["audit_report"]["details"]) == list(SIC_DEPENDENCIES)
+
+
+def test_critical_path_matches_planner_long_chain():
+    from backend.agents.planner_agent import MasterPlannerAgent
+
+    plan = MasterPlannerAgent.generate_dynamic_plan(None, project_id="7")
+    scheduler = DAGScheduler.from_edges([s.section_id for s in plan.sections], plan.dag_edges)
+
+    assert scheduler.critical_path[1:] == ["SIC_03", "SIC_16", "SIC_14", "SIC_15", "SIC_12", "SIC_17"]
+    assert scheduler.priorities["SIC_03"] > scheduler.priorities["SIC_05"]
+
+
+@pytest.mark.asyncio
+async def test_ready_nodes_dispatch_critical_path_first():
+    durations = {"SIC_05": 0.05, "SIC_06": 0.05, "SIC_03": 0.15, "SIC_16": 0.15}
+    dependencies = {"SIC_05": [], "SIC_06": [], "SIC_03": [], "SIC_16": ["SIC_03"]}
+    started = []
+
+    async def node(node_id):
+        started.append(node_id)
+        await asyncio.sleep(durations[node_id])
+
+    scheduler = DAGScheduler(dependencies, max_concurrency=2, durations=durations)
+    loop = asyncio.get_running_loop()
+    begin = loop.time()
+    await scheduler.run(node)
+    makespan = loop.time() - begin
+
+    # SIC_03 abre la cadena más larga aunque figure después en el plan
+    assert started[0] == "SIC_03"
+    assert scheduler.critical_path_length == pytest.approx(0.30)
+    # FIFO tardaría 0.05 + 0.15 + 0.15 = 0.35; con prioridad se alcanza la cota de 0.30
+    assert makespan < 0.34
+
+
+@pytest.mark.asyncio
+async def test_workflow_records_section_durations():
+    from agno.workflow import StepInput
+    from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+    from backend.core.duration_stats import SectionDurationStats
+    from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+    class StubAgent:
+        def __init__(self, content):
+            self.content = content
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=self.content)
+
+    stats = SectionDurationStats(alpha=0.5)
+    stats.durations["SIC_02"] = 10.0
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(DocumentPlan(project_id="7", sections=[DocumentSection(section_id="SIC_02", title="x")])),
+        extractor=None,
+        author=StubAgent(SIC_DTO(sic_code="SIC_02", project_id=7, metadata=[], key_tables_markdown="", summary_markdown="x")),
+        reviewer=StubAgent(FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )),
+        workspace_id="test",
+        duration_stats=stats,
+    )
+
+    await workflow.main_execution(StepInput(input={"project_id": 7}))
+
+    # EWMA: 0.5 * ~0s + 0.5 * 10s
+    assert stats.estimate("SIC_02") == pytest.approx(5.0, abs=0.1)
+    assert stats.samples["SIC_02"] == 1
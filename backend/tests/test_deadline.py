@@ -0,0 +1,102 @@
+"""
+Run Deadline Tests
+
+Verifica que timeout_seconds se propaga a las llamadas de agente, que las
+llamadas en vuelo se cancelan al agotarse el presupuesto y que el workflow
+devuelve las secciones completadas marcadas como parciales.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.deadline import DeadlineExceeded, call_timeout, remaining, run_deadline, with_deadline
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+@pytest.mark.asyncio
+async def test_with_deadline_cancels_and_nested_never_extends():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    assert remaining() is None
+    assert await with_deadline(asyncio.sleep(0, result="ok")) == "ok"
+
+    with run_deadline(0.05):
+        with run_deadline(10):
+            assert remaining() <= 0.05
+            assert call_timeout(30) <= 0.05
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            await with_deadline(slow(), stage="author")
+        assert time.monotonic() - started < 1
+        assert cancelled.is_set()
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(30)
+    assert remaining() is None
+
+
+@pytest.mark.asyncio
+async def test_workflow_returns_partial_document_on_timeout():
+    calls = []
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            calls.append(prompt)
+            return SimpleNamespace(content=await self.handler(prompt))
+
+    plan = DocumentPlan(project_id="x", sections=[
+        DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+        DocumentSection(section_id="SIC_03", title="Riesgo", dependencies=["SIC_02"]),
+        DocumentSection(section_id="SIC_16", title="Costos", dependencies=["SIC_03"]),
+    ])
+
+    async def planner_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        if s_id == "SIC_03":
+            await asyncio.sleep(5)  # Sección que excede el presupuesto
+        return SIC_DTO(sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(planner_handler), extractor=None, author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler), workspace_id="test",
+    )
+
+    started = time.monotonic()
+    output = await workflow.main_execution(StepInput(input={"project_id": 1, "timeout_seconds": 0.3}))
+
+    assert time.monotonic() - started < 2
+    assert output.success
+    assert output.content["partial"] and not output.content["approved"]
+    assert output.content["pending_sections"] == ["SIC_03", "SIC_16"]
+    assert "SIC_02" in output.content["document"]
+    assert remaining() is None
+    # SIC_16 nunca se despacha
+    assert not any(prompt.startswith("Genera el contenido para SIC_16") for prompt in calls)
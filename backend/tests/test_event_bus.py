@@ -0,0 +1,121 @@
+"""
+Progress Event Bus Tests
+
+Verifica el fan-out de eventos por sección, la desconexión de clientes
+lentos y que el workflow emite intento, QC, tokens y tiempo por nodo.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.event_bus import ProgressEventBus, sse_stream
+from backend.core.progress import listen_progress
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+@pytest.mark.asyncio
+async def test_fan_out_and_terminal_event_closes_streams():
+    bus = ProgressEventBus()
+    first, second = bus.subscribe("wf_1"), bus.subscribe("wf_1")
+    everything = bus.subscribe()
+
+    bus.publish({"event": "section_started", "workflow_id": "wf_1", "section_id": "SIC_02"})
+    bus.publish({"event": "section_started", "workflow_id": "wf_2", "section_id": "SIC_05"})
+    bus.publish({"event": "workflow_completed", "workflow_id": "wf_1"})
+
+    for subscription in (first, second):
+        events = [event["event"] async for event in subscription]
+        assert events == ["section_started", "workflow_completed"]
+    assert bus.subscriber_count("wf_1") == 0
+    assert everything.queue.qsize() == 3
+
+    # Un cliente que llega tarde recibe el historial y se cierra
+    late = bus.subscribe("wf_1")
+    assert [event["event"] async for event in late] == ["section_started", "workflow_completed"]
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_without_blocking_publisher():
+    bus = ProgressEventBus(max_queue=2)
+    slow = bus.subscribe("wf_1")
+    fast = bus.subscribe("wf_1")
+
+    for i in range(3):
+        bus.publish({"event": "section_attempt", "workflow_id": "wf_1", "attempt": i})
+        await fast.get()
+
+    assert slow.dropped and not fast.dropped
+    assert [event["event"] async for event in slow] == ["stream_dropped"]
+    assert bus.subscriber_count("wf_1") == 1
+    assert bus.dropped_subscribers == 1
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_format_and_heartbeat():
+    bus = ProgressEventBus()
+    subscription = bus.subscribe("wf_1")
+    stream = sse_stream(bus, subscription, heartbeat_seconds=0.01)
+
+    assert await stream.__anext__() == ": keep-alive\n\n"
+    bus.publish({"event": "workflow_failed", "workflow_id": "wf_1", "error": "x"})
+    chunk = await stream.__anext__()
+    assert chunk.startswith("event: workflow_failed\ndata: ")
+    assert json.loads(chunk.split("data: ")[1])["error"] == "x"
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_workflow_emits_attempt_qc_tokens_and_elapsed():
+    plan = DocumentPlan(project_id="7", sections=[DocumentSection(section_id="SIC_05", title="Medio Ambiente")])
+    scores = iter([70, 93])
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=await self.handler(prompt), metrics=SimpleNamespace(total_tokens=100))
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        return SIC_DTO(sic_code="SIC_05", project_id=7, metadata=[], key_tables_markdown="", summary_markdown="x")
+
+    async def judge_handler(prompt):
+        score = next(scores)
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="Completa tabla 501", qc_score=score, approved=score > 85,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler), workspace_id="test",
+    )
+    bus = ProgressEventBus()
+    subscription = bus.subscribe("wf_sse")
+
+    with listen_progress(bus.publish):
+        await workflow.main_execution(StepInput(input={"project_id": 7, "workflow_id": "wf_sse"}))
+
+    events = [event async for event in subscription]
+    assert [event["event"] for event in events] == [
+        "plan_ready", "section_started", "section_attempt", "section_attempt",
+        "section_approved", "section_completed", "workflow_completed",
+    ]
+    first_attempt, second_attempt = events[2], events[3]
+    assert (first_attempt["attempt"], first_attempt["qc_score"], first_attempt["approved"]) == (1, 70, False)
+    assert (second_attempt["attempt"], second_attempt["tokens"]) == (2, 400)
+    assert events[5]["tokens"] == 400 and events[5]["elapsed_seconds"] >= 0
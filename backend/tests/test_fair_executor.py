@@ -0,0 +1,123 @@
+"""
+Fair Executor Tests
+
+Verifica el cupo global de llamadas LLM en vuelo y el reparto round-robin
+entre proyectos de un lote.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.fair_executor import FairExecutor
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+@pytest.mark.asyncio
+async def test_large_project_does_not_starve_small_one():
+    executor = FairExecutor(max_in_flight=1)
+    served = []
+
+    async def call(project_id, n):
+        async with executor.slot(project_id):
+            served.append(f"{project_id}:{n}")
+            await asyncio.sleep(0.001)
+
+    # El proyecto 1 encola 6 llamadas antes de que lleguen las 2 del proyecto 2
+    tasks = [asyncio.create_task(call(1, n)) for n in range(6)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(call(2, n)) for n in range(2)]
+    await asyncio.gather(*tasks)
+
+    # Round-robin: el proyecto 2 termina antes de que el 1 agote su cola
+    assert served.index("2:1") < served.index("1:4")
+    assert executor.in_flight == 0 and executor.snapshot()["waiting_by_project"] == {}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_its_turn():
+    executor = FairExecutor(max_in_flight=1)
+    await executor.acquire("a")
+    waiter = asyncio.create_task(executor.acquire("b"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+
+    executor.release("a")
+    assert executor.in_flight == 0
+    await asyncio.wait_for(executor.acquire("c"), 0.1)
+
+
+@pytest.mark.asyncio
+async def test_batch_of_workflows_respects_global_cap():
+    executor = FairExecutor(max_in_flight=3)
+    in_flight = 0
+    peak = 0
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.005)
+                return SimpleNamespace(content=await self.handler(prompt))
+            finally:
+                in_flight -= 1
+
+    async def plan_handler(prompt):
+        return DocumentPlan(
+            project_id="x",
+            sections=[DocumentSection(section_id=f"SIC_{i:02d}", title=str(i)) for i in range(2, 10)],
+        )
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        return SIC_DTO(sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler), workspace_id="test", max_concurrency=8, llm_executor=executor,
+    )
+
+    outputs = await asyncio.gather(*[
+        workflow.main_execution(StepInput(input={"project_id": project_id})) for project_id in (1, 2, 3)
+    ])
+
+    assert all(output.success for output in outputs)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_waiter_is_served_first_within_project():
+    executor = FairExecutor(max_in_flight=1)
+    await executor.acquire("7")
+    served = []
+
+    async def call(name, priority):
+        async with executor.slot("7", priority):
+            served.append(name)
+
+    tasks = [asyncio.create_task(call("SIC_05", 1.0)), asyncio.create_task(call("SIC_03", 6.0))]
+    await asyncio.sleep(0)
+    executor.release("7")
+    await asyncio.gather(*tasks)
+
+    assert served == ["SIC_03", "SIC_05"]
@@ -0,0 +1,166 @@
+"""
+Incremental Regeneration Tests
+
+Verifica el registro de lecturas Redmine por sección y que el modo
+"regenerate_changed" solo recalcula el subgrafo invalidado del DAG.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.checkpoint_store import SectionCheckpointStore
+from backend.core.dag_scheduler import DAGScheduler
+from backend.core.provenance import record_issue_read, track_section_reads
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+# Issue Redmine (id, updated_on) que consulta cada sección
+ISSUES_READ = {"SIC_02": (101, "2025-01-01"), "SIC_03": (102, "2025-01-01"), "SIC_05": (103, "2025-01-01")}
+
+
+class FakeDb:
+    def __init__(self):
+        self.rows = {}
+
+    def execute(self, query, *args):
+        if query.strip().startswith("INSERT"):
+            workflow_id, section_id, project_id, dto, qc_score, critique, approved, reads = args
+            self.rows[(workflow_id, section_id)] = {
+                "workflow_id": workflow_id, "section_id": section_id, "dto": dto,
+                "qc_score": qc_score, "critique": critique, "approved": approved, "reads": reads,
+            }
+        return 1
+
+    def fetch(self, query, *args):
+        return [dict(row) for (wf, _), row in self.rows.items() if wf == args[0]]
+
+
+class StubAgent:
+    def __init__(self, handler):
+        self.handler = handler
+        self.prompts = []
+
+    async def arun(self, prompt):
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=await self.handler(prompt))
+
+
+def build_workflow(store, issue_version_provider=None):
+    plan = DocumentPlan(
+        project_id="7",
+        sections=[
+            DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+            DocumentSection(section_id="SIC_03", title="Riesgos", dependencies=["SIC_02"]),
+            DocumentSection(section_id="SIC_04", title="Técnico", dependencies=["SIC_03"]),
+            DocumentSection(section_id="SIC_05", title="Medio Ambiente"),
+        ],
+    )
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        if s_id in ISSUES_READ:
+            # Las herramientas síncronas de agno se ejecutan con asyncio.to_thread
+            await asyncio.to_thread(record_issue_read, *ISSUES_READ[s_id])
+        return SIC_DTO(sic_code=s_id, project_id=7, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=92, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    author = StubAgent(author_handler)
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=author,
+        reviewer=StubAgent(judge_handler), workspace_id="test", checkpoint_store=store,
+        issue_version_provider=issue_version_provider,
+    )
+    return workflow, author
+
+
+def authored(author):
+    return sorted(prompt.split(":")[0].split()[-1] for prompt in author.prompts)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sections_record_their_own_reads():
+    async def section(issue_id):
+        with track_section_reads() as reads:
+            await asyncio.sleep(0.01)
+            await asyncio.to_thread(record_issue_read, issue_id, "2025-01-01")
+        return reads
+
+    first, second = await asyncio.gather(section(1), section(2))
+    assert first.issues == {1: "2025-01-01"}
+    assert second.issues == {2: "2025-01-01"}
+
+    # Fuera de una sección el registro es un no-op
+    record_issue_read(3, "2025-01-01")
+
+
+def test_capex_change_invalidates_only_downstream_sections():
+    from backend.agents.planner_agent import MasterPlannerAgent
+
+    plan = MasterPlannerAgent.generate_dynamic_plan(None, project_id="7")
+    scheduler = DAGScheduler.from_edges([s.section_id for s in plan.sections], plan.dag_edges)
+
+    affected = scheduler.descendants(["SIC_16"])
+    assert {"SIC_16", "SIC_21", "SIC_14", "SIC_17", "SIC_01"} <= affected
+    assert "SIC_05" not in affected
+
+
+@pytest.mark.asyncio
+async def test_regenerate_changed_reuses_unaffected_sections():
+    db = FakeDb()
+    store = SectionCheckpointStore(db)
+
+    workflow, author = build_workflow(store)
+    await workflow.main_execution(StepInput(input={"project_id": 7, "workflow_id": "wf_base"}))
+    assert authored(author) == ["SIC_02", "SIC_03", "SIC_04", "SIC_05"]
+    assert json.loads(db.rows[("wf_base", "SIC_03")]["reads"])["issues"] == {"102": "2025-01-01"}
+
+    workflow, author = build_workflow(store)
+    output = await workflow.main_execution(StepInput(input={
+        "project_id": 7, "workflow_id": "wf_delta", "mode": "regenerate_changed",
+        "base_workflow_id": "wf_base", "changed_issues": [102],
+    }))
+
+    assert output.success
+    assert authored(author) == ["SIC_03", "SIC_04"]
+    assert output.content["reused_sections"] == ["SIC_02", "SIC_05"]
+    assert output.content["invalidated_sections"] == ["SIC_03", "SIC_04"]
+    # La nueva ejecución es autocontenida: puede servir de base a la siguiente
+    assert {s for (wf, s) in db.rows if wf == "wf_delta"} == {"SIC_02", "SIC_03", "SIC_04", "SIC_05"}
+
+
+@pytest.mark.asyncio
+async def test_changed_issues_detected_from_updated_on():
+    store = SectionCheckpointStore(FakeDb())
+    workflow, _ = build_workflow(store)
+    await workflow.main_execution(StepInput(input={"project_id": 7, "workflow_id": "wf_base"}))
+
+    def issue_versions(issue_ids):
+        versions = {issue_id: "2025-01-01" for issue_id in issue_ids}
+        versions[103] = "2025-02-15"  # Issue de SIC_05 editado en Redmine
+        return versions
+
+    workflow, author = build_workflow(store, issue_version_provider=issue_versions)
+    output = await workflow.main_execution(StepInput(input={
+        "project_id": 7, "workflow_id": "wf_auto", "mode": "regenerate_changed", "base_workflow_id": "wf_base",
+    }))
+
+    assert authored(author) == ["SIC_05"]
+    assert output.content["invalidated_sections"] == ["SIC_05"]
@@ -0,0 +1,95 @@
+"""
+Issue Cache Tests
+
+Verifica los límites de la caché compartida de issues (LRU por entradas y
+bytes, TTL), la invalidación por issue y por ChangeSet del mirror, y que
+todas las instancias de RedmineTools comparten una sola caché para detalle,
+contexto y relaciones.
+"""
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import backend.agents  # noqa: F401  (antes que backend.tools: import circular)
+from backend.core.issue_cache import IssueCache
+from backend.core.redmine_mirror import RedmineMirror
+from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+from backend.tools.custom_tools import RedmineTools
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = IssueCache(max_entries=3, max_bytes=10_000, ttl_seconds=None)
+    for n in range(3):
+        cache.put(("issue", n), {"n": n}, issue_ids=[n])
+    assert cache.get(("issue", 0)) == {"n": 0}  # 0 pasa a ser el más reciente
+    cache.put(("issue", 3), {"n": 3}, issue_ids=[3])
+    assert cache.get(("issue", 1)) is None and cache.get(("issue", 0)) == {"n": 0}
+
+    small = IssueCache(max_entries=100, max_bytes=250, ttl_seconds=None)
+    for n in range(5):
+        small.put(n, {"text": "x" * 80})
+    snapshot = small.snapshot()
+    assert snapshot["bytes"] <= 250 and snapshot["entries"] == 2 and snapshot["evictions"] == 3
+    assert small.put("huge", {"text": "x" * 1000}) is False and small.snapshot()["rejected"] == 1
+
+
+def test_ttl_expiry_copies_and_metrics():
+    cache = IssueCache(ttl_seconds=0.05)
+    cache.put("k", {"subject": "A"})
+    value = cache.get("k")
+    value["subject"] = "mutado"
+    assert cache.get("k") == {"subject": "A"}
+    time.sleep(0.06)
+    assert cache.get("k") is None
+
+    stats = cache.snapshot()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["expired"] == 1
+    assert stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_invalidation_by_issue_and_change_set():
+    cache = IssueCache()
+    cache.put(("details", 1), {"id": 1}, issue_ids=[1])
+    cache.put(("relations", 1), {"blocks": [2]}, issue_ids=[1, 2])
+    cache.put(("details", 2), {"id": 2}, issue_ids=[2])
+    cache.put(("details", 3), {"id": 3}, issue_ids=[3])
+
+    assert cache.invalidate_issues([2]) == 2
+    assert cache.get(("relations", 1)) is None and cache.get(("details", 1)) == {"id": 1}
+
+    cache.on_change(SimpleNamespace(issue_ids=[1, 3]))
+    assert cache.snapshot()["entries"] == 0 and cache.snapshot()["issues"] == 0
+
+
+@pytest.mark.asyncio
+async def test_redmine_tools_instances_share_one_cache_for_all_views(monkeypatch):
+    monkeypatch.setenv("REDMINE_API_KEY", "stub")
+    data = SyntheticRedmine(projects=1, issues_per_project=20, seed=6)
+    mirror = RedmineMirror(
+        base_url="http://redmine", api_key="stub",
+        transport=httpx.ASGITransport(app=create_redmine_stub_app(data)),
+    )
+    await mirror.snapshot_project(1)
+    cache = IssueCache()
+    mirror.subscribe(cache.on_change)
+    author, judge = RedmineTools(mirror=mirror, issue_cache=cache), RedmineTools(mirror=mirror, issue_cache=cache)
+
+    issue_id = next(i for i in range(1, 21) if data.relations.get(i))
+    for tools in (author, judge):
+        tools.get_issue_details(issue_id)
+        tools.analyze_issue_context(issue_id)
+        tools.get_issue_relations(issue_id)
+    assert mirror.stats["hits"] == 3 and cache.snapshot()["hits"] == 3
+
+    data.touch(issue_id, subject="Asunto nuevo")
+    await mirror.sync_project(1)
+    assert judge.get_issue_details(issue_id)["subject"] == "Asunto nuevo"
+    assert mirror.stats["hits"] == 4
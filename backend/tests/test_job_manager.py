@@ -0,0 +1,146 @@
+"""
+Job Manager Tests
+
+Verifica que los jobs se encolan sin bloquear, que el pool de workers está
+acotado y que el progreso por sección del workflow se refleja en el job.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.job_manager import JobManager, JobQueueFullError, JOB_FAILED, JOB_QUEUED, JOB_SUCCEEDED
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+async def wait_for(job, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while job.status not in (JOB_SUCCEEDED, JOB_FAILED):
+        assert asyncio.get_running_loop().time() < deadline, f"Job {job.job_id} no terminó"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_workers_are_bounded():
+    release = asyncio.Event()
+    in_flight = 0
+    peak = 0
+
+    async def runner(job):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await release.wait()
+        in_flight -= 1
+        return {"document": f"doc {job.request['project_id']}"}
+
+    manager = JobManager(runner, max_workers=2)
+    await manager.start()
+    try:
+        jobs = [manager.submit({"project_id": i}) for i in range(5)]
+        await asyncio.sleep(0.02)
+
+        assert peak == 2
+        assert manager.queue_position(jobs[-1].job_id) == 3
+        assert jobs[-1].status == JOB_QUEUED
+
+        release.set()
+        for job in jobs:
+            await wait_for(job)
+        assert [job.result["document"] for job in jobs] == [f"doc {i}" for i in range(5)]
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_failures_are_recorded_and_queue_is_bounded():
+    async def runner(job):
+        raise RuntimeError("OpenAI 500")
+
+    manager = JobManager(runner, max_workers=1, max_queue_size=1)
+    await manager.start()
+    try:
+        job = manager.submit({"project_id": 7})
+        await wait_for(job)
+        assert job.status == JOB_FAILED
+        assert job.to_status()["error"] == "OpenAI 500"
+        assert not job.to_status()["document_ready"]
+    finally:
+        await manager.stop()
+
+    # Sin workers consumiendo, la segunda petición desborda la cola
+    manager = JobManager(runner, max_workers=1, max_queue_size=1)
+    await manager.start()
+    await manager.stop()
+    manager.submit({"project_id": 1})
+    with pytest.raises(JobQueueFullError):
+        manager.submit({"project_id": 2})
+
+
+@pytest.mark.asyncio
+async def test_job_progress_tracks_workflow_sections():
+    plan = DocumentPlan(
+        project_id="7",
+        sections=[
+            DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+            DocumentSection(section_id="SIC_03", title="Riesgos", dependencies=["SIC_02"]),
+        ],
+    )
+    gate = asyncio.Event()
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=await self.handler(prompt))
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        if s_id == "SIC_03":
+            await gate.wait()
+        return SIC_DTO(sic_code=s_id, project_id=7, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler), workspace_id="test",
+    )
+
+    async def runner(job):
+        output = await workflow.main_execution(StepInput(input=job.request))
+        return output.content
+
+    manager = JobManager(runner, max_workers=1)
+    await manager.start()
+    try:
+        job = manager.submit({"project_id": 7, "workflow_id": "wf_job"})
+        await asyncio.sleep(0.05)
+
+        progress = job.to_status()["progress"]
+        assert progress["sections_total"] == 2
+        assert progress["sections_completed"] == 1
+        assert progress["running_sections"] == ["SIC_03"]
+
+        gate.set()
+        await wait_for(job)
+        assert job.to_status()["progress"]["sections_completed"] == 2
+        assert job.result["workflow_id"] == "wf_job"
+    finally:
+        await manager.stop()
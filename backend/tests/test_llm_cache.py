@@ -0,0 +1,118 @@
+"""
+LLM Response Cache Tests
+
+Verifica que prompts idénticos se resuelven desde la caché sin llamar a la
+API, que la clave depende de modelo/mensajes/herramientas/output_schema y no
+de ids o timestamps, que el bypass fuerza la llamada real y que prompts
+idénticos concurrentes comparten una sola llamada.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.agent import Agent
+from agno.models.message import Message
+from agno.models.openai import OpenAIChat
+from agno.models.response import ModelResponse
+from backend.agents.schemas import FeedbackCritiqueSchema
+from backend.core.llm_cache import CachedOpenAIChat, LLMResponseCache, bypass_llm_cache
+
+
+class FakeDb:
+    """Emula AsyncPostgresDb para la tabla de caché LLM."""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+
+    def execute(self, query, *args):
+        self.queries.append(query.strip().split()[0])
+        if query.strip().startswith("INSERT"):
+            cache_key, model_id, response, size_bytes, ttl = args
+            self.rows[cache_key] = {"response": response}
+        return 0
+
+    def fetchone(self, query, *args):
+        row = self.rows.get(args[0])
+        return dict(row) if row else None
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    calls = []
+
+    async def fake_ainvoke(self, messages, assistant_message, response_format=None, tools=None, **kwargs):
+        calls.append([m.content for m in messages])
+        await asyncio.sleep(0.01)
+        content = FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="ok", qc_score=91, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        ).model_dump_json() if response_format else f"respuesta {len(calls)}"
+        return ModelResponse(role="assistant", content=content)
+
+    monkeypatch.setattr(OpenAIChat, "ainvoke", fake_ainvoke)
+    return calls
+
+
+def test_key_ignores_ids_and_tracks_inputs():
+    first = [Message(role="system", content="Audita."), Message(role="user", content="Texto ")]
+    second = [Message(role="system", content="Audita."), Message(role="user", content="Texto")]
+    key = LLMResponseCache.compute_key("gpt-4o", first)
+
+    assert key == LLMResponseCache.compute_key("gpt-4o", second)
+    assert key != LLMResponseCache.compute_key("gpt-4o-mini", second)
+    assert key != LLMResponseCache.compute_key("gpt-4o", second, response_format=FeedbackCritiqueSchema)
+    assert key != LLMResponseCache.compute_key("gpt-4o", second, tools=[{"type": "function", "name": "x"}])
+
+
+@pytest.mark.asyncio
+async def test_identical_prompts_are_served_from_cache(api_calls):
+    db = FakeDb()
+    cache = LLMResponseCache(db)
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test", response_cache=cache)
+
+    def judge():
+        return Agent(model=model, instructions=["Audita la sección."], output_schema=FeedbackCritiqueSchema)
+
+    first = await judge().arun("Audita SIC_02")
+    second = await judge().arun("Audita SIC_02")
+    third = await judge().arun("Audita SIC_03")
+
+    assert len(api_calls) == 2
+    assert isinstance(second.content, FeedbackCritiqueSchema)
+    assert second.content == first.content
+    assert third.content.qc_score == 91
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+    assert all(json.loads(row["response"])["content"] for row in db.rows.values())
+    assert "DELETE" in db.queries  # Desalojo TTL/LRU en la primera escritura
+
+
+@pytest.mark.asyncio
+async def test_bypass_forces_real_call(api_calls):
+    cache = LLMResponseCache(FakeDb())
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test", response_cache=cache)
+
+    await Agent(model=model).arun("hola")
+    with bypass_llm_cache():
+        response = await Agent(model=model).arun("hola")
+
+    assert len(api_calls) == 2
+    assert response.content == "respuesta 2"
+    assert cache.stats["bypassed"] == 1 and cache.stats["writes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_share_one_api_call(api_calls):
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test")  # Sin caché persistente: solo coalescencia
+
+    responses = await asyncio.gather(*[Agent(model=model).arun("Resume SIC_02") for _ in range(3)])
+
+    assert len(api_calls) == 1
+    assert [response.content for response in responses] == ["respuesta 1"] * 3
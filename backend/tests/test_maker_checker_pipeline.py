@@ -0,0 +1,148 @@
+"""
+Maker-Checker Pipeline Tests
+
+Verifica que la auditoría de una sección se solapa con la autoría de la
+siguiente, que las críticas fallidas vuelven como reintento y que cada
+trabajo conserva el contexto (provenance) de su sección.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.maker_checker_pipeline import MakerCheckerPipeline
+from backend.core.provenance import record_issue_read, track_section_reads
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+def _critique(approved: bool, recommendation: str = "") -> FeedbackCritiqueSchema:
+    return FeedbackCritiqueSchema(
+        root_cause="", actionable_recommendation=recommendation, qc_score=90 if approved else 40,
+        approved=approved, critical_gaps=[], regulatory_compliance=approved
+    )
+
+
+class StubAgent:
+    def __init__(self, handler, delay: float, log: list, role: str):
+        self.handler = handler
+        self.delay = delay
+        self.log = log
+        self.role = role
+
+    async def arun(self, prompt):
+        start = time.monotonic()
+        await asyncio.sleep(self.delay)
+        self.log.append((self.role, start, time.monotonic()))
+        return SimpleNamespace(content=self.handler(prompt))
+
+
+def _workflow(log, judge_handler, pipelined=True, sections=4):
+    plan = DocumentPlan(
+        project_id="x",
+        sections=[DocumentSection(section_id=f"SIC_{i:02d}", title=str(i)) for i in range(2, 2 + sections)],
+    )
+
+    def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        return SIC_DTO(sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    return DocumentCreationWorkflow(
+        planner=StubAgent(lambda prompt: plan, 0, [], "planner"),
+        extractor=None,
+        author=StubAgent(author_handler, 0.05, log, "author"),
+        reviewer=StubAgent(judge_handler, 0.05, log, "judge"),
+        workspace_id="test",
+        max_concurrency=4,
+        pipelined=pipelined,
+        author_workers=1,
+        judge_workers=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_judging_overlaps_with_authoring_of_next_section():
+    log = []
+    workflow = _workflow(log, lambda prompt: _critique(True))
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1}))
+
+    assert output.success
+    assert len(output.content["audit_report"]["details"]) == 4
+    authors = [(s, e) for role, s, e in log if role == "author"]
+    judges = [(s, e) for role, s, e in log if role == "judge"]
+    # Un único worker por etapa: el Judge de N corre mientras el Author escribe N+1
+    assert any(a_start < j_end and j_start < a_end for a_start, a_end in authors for j_start, j_end in judges)
+
+
+@pytest.mark.asyncio
+async def test_failed_critique_is_fed_back_as_retry():
+    log = []
+    judged = {}
+
+    def judge_handler(prompt):
+        s_id = prompt.split()[3]
+        judged[s_id] = judged.get(s_id, 0) + 1
+        if s_id == "SIC_03" and judged[s_id] == 1:
+            return _critique(False, "AÑADIR TABLA 301")
+        return _critique(True)
+
+    workflow = _workflow(log, judge_handler, sections=2)
+    prompts = []
+    original = workflow.author.handler
+    workflow.author.handler = lambda prompt: (prompts.append(prompt), original(prompt))[1]
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1}))
+
+    assert output.success
+    assert judged == {"SIC_02": 1, "SIC_03": 2}
+    retry_prompts = [p for p in prompts if "SIC_03" in p]
+    assert "INICIO" in retry_prompts[0] and "AÑADIR TABLA 301" in retry_prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_jobs_keep_submitter_context_and_exhaust_attempts():
+    async def maker(job):
+        record_issue_read(job.item, "2024-01-01")
+        return f"draft-{job.item}-{job.attempt}"
+
+    async def checker(job):
+        return job.item != "rejected"
+
+    async def submit(item):
+        with track_section_reads() as reads:
+            job = await pipeline.submit(item)
+        return job, reads
+
+    async with MakerCheckerPipeline(maker, checker, accept=bool, max_attempts=3) as pipeline:
+        (ok, ok_reads), (bad, bad_reads) = await asyncio.gather(submit(1), submit("rejected"))
+
+    assert ok.attempt == 1 and ok.critique is True
+    assert bad.attempt == 3 and bad.draft == "draft-rejected-3" and bad.critique is False
+    assert pipeline.stats["retries"] == 2
+    assert list(ok_reads.issues) == [1] and bad_reads.issues == {}
+
+
+@pytest.mark.asyncio
+async def test_stage_error_propagates_to_submitter_only():
+    async def maker(job):
+        if job.item == "boom":
+            raise RuntimeError("author caído")
+        return job.item
+
+    async def checker(job):
+        return True
+
+    async with MakerCheckerPipeline(maker, checker, accept=bool) as pipeline:
+        results = await asyncio.gather(pipeline.submit("boom"), pipeline.submit("ok"), return_exceptions=True)
+
+    assert isinstance(results[0], RuntimeError)
+    assert results[1].draft == "ok"
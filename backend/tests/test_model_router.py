@@ -0,0 +1,122 @@
+"""
+Model Router Tests
+
+Verifica la selección de modelo por rol, dificultad e intento, la carga de
+configuración desde entorno y que el workflow ejecuta cada llamada con el
+modelo de su ruta registrando latencia, tokens y calidad por ruta.
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.agent import Agent
+from agno.models.metrics import Metrics
+from agno.models.openai import OpenAIChat
+from agno.models.response import ModelResponse
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.model_router import DEFAULT_CONFIG, ModelRouter
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+def test_default_rules_route_by_role_difficulty_and_attempt():
+    router = ModelRouter.from_config(OpenAIChat(id="gpt-4o", api_key="test"), DEFAULT_CONFIG)
+
+    assert router.route("author", "SIC_16", 1).route == "large"
+    assert router.route("judge", "SIC_03", 1).route == "large"
+    assert router.route("author", "SIC_02", 2).route == "large"
+    assert router.route("judge", "SIC_02", 2).route == "standard"
+    assert router.route("judge", "SIC_07", 1).model_id == "gpt-4o-mini"
+    # Sin regla para el planner: conserva su propio modelo
+    assert router.route("planner") is None
+
+    small = router.model_for(router.route("judge", "SIC_07", 1))
+    assert small.id == "gpt-4o-mini" and router.base_model.id == "gpt-4o"
+    assert router.model_for(router.route("author", "SIC_09", 1)) is small
+
+
+def test_from_env(monkeypatch):
+    base = OpenAIChat(id="gpt-4o", api_key="test")
+    monkeypatch.delenv("MAAS_MODEL_ROUTES", raising=False)
+    assert ModelRouter.from_env(base) is None
+
+    monkeypatch.setenv("MAAS_MODEL_ROUTES", json.dumps({
+        "routes": {"mini": "gpt-4o-mini"}, "rules": [{"route": "mini", "roles": ["judge"]}],
+    }))
+    router = ModelRouter.from_env(base)
+    assert router.route("judge", "SIC_16").model_id == "gpt-4o-mini"
+    assert router.route("author", "SIC_16") is None
+
+    monkeypatch.setenv("MAAS_MODEL_ROUTES", json.dumps({"routes": {}, "rules": [{"route": "x"}]}))
+    with pytest.raises(ValueError):
+        ModelRouter.from_env(base)
+
+
+@pytest.mark.asyncio
+async def test_workflow_uses_routed_models_and_records_metrics(monkeypatch):
+    calls = []
+    judged = {}
+
+    async def fake_ainvoke(self, messages, assistant_message, **kwargs):
+        prompt = messages[-1].content
+        calls.append((self.id, prompt.split("\n")[0]))
+        if prompt.startswith("Genera el contenido"):
+            s_id = prompt.split(":")[0].split()[-1]
+            content = SIC_DTO(
+                sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id
+            ).model_dump_json()
+        else:
+            s_id = prompt.split()[3]
+            judged[s_id] = judged.get(s_id, 0) + 1
+            # SIC_02 se rechaza en el primer intento -> reintento con el modelo grande
+            score = 40 if s_id == "SIC_02" and judged[s_id] == 1 else 92
+            content = FeedbackCritiqueSchema(
+                root_cause="", actionable_recommendation="", qc_score=score, approved=score > 85,
+                critical_gaps=[], regulatory_compliance=True
+            ).model_dump_json()
+        return ModelResponse(role="assistant", content=content, response_usage=Metrics(total_tokens=100))
+
+    monkeypatch.setattr(OpenAIChat, "ainvoke", fake_ainvoke)
+    base = OpenAIChat(id="gpt-4o", api_key="test")
+    router = ModelRouter.from_config(base, DEFAULT_CONFIG)
+
+    plan = DocumentPlan(project_id="x", sections=[
+        DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+        DocumentSection(section_id="SIC_16", title="Costos", dependencies=["SIC_02"]),
+    ])
+
+    class Planner:
+        async def arun(self, prompt):
+            return SimpleNamespace(content=plan)
+
+    workflow = DocumentCreationWorkflow(
+        planner=Planner(), extractor=None,
+        author=Agent(model=base, output_schema=SIC_DTO),
+        reviewer=Agent(model=base, output_schema=FeedbackCritiqueSchema),
+        workspace_id="test", model_router=router,
+    )
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1}))
+
+    assert output.success
+    assert calls == [
+        ("gpt-4o", "Genera el contenido para SIC_02: Caso de Negocio del proyecto 1."),
+        ("gpt-4o", "Audita la sección SIC_02 del proyecto 1."),
+        ("gpt-4.1", "Genera el contenido para SIC_02: Caso de Negocio del proyecto 1."),
+        ("gpt-4o", "Audita la sección SIC_02 del proyecto 1."),
+        ("gpt-4.1", "Genera el contenido para SIC_16: Costos del proyecto 1."),
+        ("gpt-4.1", "Audita la sección SIC_16 del proyecto 1."),
+    ]
+    metrics = router.snapshot()
+    assert metrics["standard"]["calls"] == 3 and metrics["large"]["calls"] == 3
+    assert metrics["large"]["calls_by_role"] == {"author": 2, "judge": 1}
+    assert metrics["standard"]["tokens"] == 300
+    assert metrics["standard"]["approval_rate"] == 0.0 and metrics["large"]["approval_rate"] == 1.0
+    assert metrics["large"]["latency_p95_seconds"] is not None
@@ -0,0 +1,97 @@
+"""
+Not Applicable Fast Path Tests
+
+Verifica que las secciones excluidas por alcance (SIC 07/08/09/13/18) se
+generan desde la plantilla sin llamadas LLM y superan el pre-chequeo
+estructural.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, KeyValue, SIC_DTO
+from backend.core.not_applicable import EXCLUDABLE_SECTIONS, NotApplicableGenerator, resolve_scope, scope_is_excluded
+from backend.core.structural_checker import StructuralChecker
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+@pytest.fixture(scope="module")
+def generator():
+    return NotApplicableGenerator()
+
+
+def test_scope_selection():
+    assert scope_is_excluded("Infraestructura eléctrica")
+    assert scope_is_excluded("SERVICIOS AUXILIARES")
+    assert not scope_is_excluded("Expansión de mina rajo")
+    assert not scope_is_excluded(None)
+
+    sic02 = SIC_DTO(
+        sic_code="SIC_02", project_id=1, key_tables_markdown="", summary_markdown="",
+        metadata=[KeyValue(key="Alcance del Proyecto", value="Infraestructura")],
+    )
+    assert resolve_scope({"metadata": {"alcance": "Servicios"}}, {"SIC_02": sic02}) == "Servicios"
+    assert resolve_scope({}, {"SIC_02": sic02}) == "Infraestructura"
+    assert resolve_scope({}, {}) is None
+
+
+def test_generated_sections_pass_structural_precheck(generator):
+    checker = StructuralChecker()
+    for section_id in EXCLUDABLE_SECTIONS:
+        assert generator.applies(section_id, "Infraestructura")
+        dto, critique = generator.generate(section_id, 7, "Infraestructura")
+        assert checker.check(section_id, dto) == [], section_id
+        assert critique.approved and dto.metadata[0].value == "No Aplicable"
+    assert not generator.applies("SIC_16", "Infraestructura")
+    assert not generator.applies("SIC_07", "Minería")
+
+
+@pytest.mark.asyncio
+async def test_excluded_sections_skip_author_and_judge(generator):
+    calls = []
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            calls.append(prompt)
+            return SimpleNamespace(content=self.handler(prompt))
+
+    plan = DocumentPlan(project_id="x", sections=[
+        DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+        DocumentSection(section_id="SIC_07", title="Geología", dependencies=["SIC_02"]),
+        DocumentSection(section_id="SIC_13", title="Tecnología", dependencies=["SIC_02"]),
+    ])
+
+    def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        return SIC_DTO(sic_code=s_id, project_id=1, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(lambda prompt: plan), extractor=None, author=StubAgent(author_handler),
+        reviewer=StubAgent(judge_handler), workspace_id="test", not_applicable=generator,
+    )
+
+    output = await workflow.main_execution(
+        StepInput(input={"project_id": 1, "metadata": {"scope": "Infraestructura"}})
+    )
+
+    assert output.success
+    assert output.content["not_applicable_sections"] == ["SIC_07", "SIC_13"]
+    # Planner + Author/Judge de SIC_02 únicamente
+    assert len(calls) == 3
+    assert "No Aplicable" in output.content["document"]
@@ -0,0 +1,171 @@
+"""
+Adaptive Rate Limiter Tests
+
+Verifica los buckets RPM/TPM, la prioridad interactive > batch, la
+adaptación a 429 y cabeceras x-ratelimit-*, que el modelo compartido
+reintenta un 429 a través del limitador en lugar de amplificar la ráfaga,
+que los errores transitorios se reintentan con backoff y que el streaming
+también pasa por el limitador.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.agent import Agent
+from agno.exceptions import ModelProviderError
+from agno.models.message import Message
+from agno.models.metrics import Metrics
+from agno.models.openai import OpenAIChat
+from agno.models.response import ModelResponse
+from backend.core.llm_cache import CachedOpenAIChat
+from backend.core.rate_limiter import AdaptiveRateLimiter, parse_reset, rate_limit_class
+
+
+def test_parse_reset_formats():
+    assert parse_reset("2") == 2.0
+    assert parse_reset("6m0s") == 360.0
+    assert parse_reset("1.5s") == 1.5
+    assert parse_reset("20ms") == pytest.approx(0.02)
+    assert parse_reset(None) is None
+
+
+@pytest.mark.asyncio
+async def test_buckets_delay_and_settle_tokens():
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=6000, max_concurrency=4)
+    limiter.requests.level = 0  # 600 RPM -> una petición cada 0.1s
+
+    started = time.monotonic()
+    async with limiter.acquire(estimated_tokens=1000) as lease:
+        lease.settle(200)
+    assert time.monotonic() - started >= 0.08
+    # Estimó 1000 y consumió 200: se devuelven 800
+    assert limiter.tokens.level == pytest.approx(6000 - 200, abs=30)
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_overtake_queued_batch_calls():
+    limiter = AdaptiveRateLimiter(max_concurrency=1)
+    order = []
+
+    async def call(name):
+        with rate_limit_class(name):
+            async with limiter.acquire(estimated_tokens=10):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+    async with limiter.acquire(estimated_tokens=10):
+        batch = asyncio.create_task(call("batch"))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(call("interactive"))
+        await asyncio.sleep(0.01)
+        assert limiter.snapshot()["queued"] == 2
+
+    await asyncio.gather(batch, interactive)
+    assert order == ["interactive", "batch"]
+    assert limiter.stats["granted_by_class"] == {"interactive": 2, "batch": 1}
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_adapt_limits_and_concurrency():
+    limiter = AdaptiveRateLimiter(requests_per_minute=500, tokens_per_minute=300_000, max_concurrency=8)
+
+    limiter.observe_headers(200, {
+        "x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "99",
+        "x-ratelimit-limit-tokens": "30000", "x-ratelimit-remaining-tokens": "50",
+    })
+    assert limiter.requests.capacity == 100 and limiter.tokens.capacity == 30000
+    assert limiter.tokens.level <= 51
+
+    limiter.tokens.level = 30000
+    limiter.observe_headers(429, {"retry-after": "0.2"})
+    assert limiter.concurrency == 4
+    assert limiter.stats["rate_limited"] == 1
+
+    started = time.monotonic()
+    async with limiter.acquire(estimated_tokens=10) as lease:
+        lease.settle(10)
+    assert time.monotonic() - started >= 0.15
+    # Respuesta rápida: incremento aditivo de la concurrencia
+    assert limiter._concurrency > 4
+
+
+@pytest.mark.asyncio
+async def test_shared_model_retries_429_through_limiter(monkeypatch):
+    attempts = []
+
+    async def fake_ainvoke(self, messages, assistant_message, **kwargs):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ModelProviderError(message="Rate limit reached", status_code=429, model_id=self.id)
+        return ModelResponse(role="assistant", content="ok", response_usage=Metrics(total_tokens=120))
+
+    monkeypatch.setattr(OpenAIChat, "ainvoke", fake_ainvoke)
+    limiter = AdaptiveRateLimiter(max_concurrency=4)
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test", rate_limiter=limiter)
+
+    response = await Agent(model=model).arun("Audita SIC_02")
+
+    assert response.content == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.9  # Pausa por defecto tras un 429 sin Retry-After
+    assert limiter.stats["rate_limited"] == 1 and limiter.concurrency == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_retry_with_backoff_and_client_errors_do_not(monkeypatch):
+    errors = [503, 502, 400]
+
+    async def fake_ainvoke(self, messages, assistant_message, **kwargs):
+        status = errors.pop(0) if errors else None
+        if status:
+            raise ModelProviderError(message=f"HTTP {status}", status_code=status, model_id=self.id)
+        return ModelResponse(role="assistant", content="ok", response_usage=Metrics(total_tokens=10))
+
+    monkeypatch.setattr(OpenAIChat, "ainvoke", fake_ainvoke)
+    limiter = AdaptiveRateLimiter(max_concurrency=4)
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test", rate_limiter=limiter, retry_backoff_seconds=0.01)
+    messages = [Message(role="user", content="Audita SIC_02")]
+
+    # 503 y error de conexión (502) se reintentan; el 400 no
+    with pytest.raises(ModelProviderError) as error:
+        await model._limited_ainvoke(messages, Message(role="assistant"))
+    assert error.value.status_code == 400 and errors == []
+    assert limiter.stats["granted"] == 3 and limiter.stats["rate_limited"] == 0
+
+    errors.extend([500, 500, 500])
+    with pytest.raises(ModelProviderError):
+        await model._limited_ainvoke(messages, Message(role="assistant"))
+    assert errors == [] and limiter.stats["granted"] == 6  # transient_retries=2
+
+
+@pytest.mark.asyncio
+async def test_streaming_calls_go_through_the_limiter(monkeypatch):
+    attempts = []
+
+    async def fake_stream(self, messages, assistant_message, **kwargs):
+        attempts.append(limiter.stats["granted"])
+        if len(attempts) == 1:
+            raise ModelProviderError(message="Rate limit reached", status_code=429, model_id=self.id)
+        yield ModelResponse(role="assistant", content="o")
+        yield ModelResponse(role="assistant", content="k", response_usage=Metrics(total_tokens=50))
+
+    monkeypatch.setattr(OpenAIChat, "ainvoke_stream", fake_stream)
+    limiter = AdaptiveRateLimiter(max_concurrency=4)
+    limiter.on_rate_limited = lambda retry_after=None: None  # sin pausa en el test
+    model = CachedOpenAIChat(id="gpt-4o", api_key="test", rate_limiter=limiter)
+
+    chunks = [
+        chunk.content async for chunk in model.ainvoke_stream(
+            [Message(role="user", content="Redacta SIC_02")], Message(role="assistant")
+        )
+    ]
+
+    assert chunks == ["o", "k"] and attempts == [1, 2]
+    assert limiter.snapshot()["in_flight"] == 0
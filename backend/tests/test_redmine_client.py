@@ -0,0 +1,128 @@
+"""
+Async Redmine Client Tests
+
+Verifica la paginación en paralelo del cliente async, que el límite de
+concurrencia se respeta bajo carga, que el pool funciona en varios event
+loops, y que AsyncRedmineTools devuelve lo mismo que RedmineTools (con
+caché e invalidación tras actualizar un issue).
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import backend.agents  # noqa: F401  (antes que backend.tools: import circular)
+from backend.core.issue_cache import IssueCache
+from backend.core.redmine_client import AsyncRedmineClient
+from backend.core.redmine_mirror import RedmineMirror
+from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+from backend.tools.custom_tools import AsyncRedmineTools, RedmineTools, _issue_requirements
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    """Transporte ASGI con latencia que mide las peticiones simultáneas reales."""
+
+    def __init__(self, app, delay: float = 0.01):
+        self.inner = httpx.ASGITransport(app=app)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handle_async_request(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return await self.inner.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+
+def _client(data, **kwargs):
+    transport = kwargs.pop("transport", None) or httpx.ASGITransport(app=create_redmine_stub_app(data))
+    return AsyncRedmineClient(base_url="http://redmine", api_key="stub", transport=transport, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_pagination_respects_limit_and_concurrency_cap():
+    data = SyntheticRedmine(projects=1, issues_per_project=450, seed=5)
+    transport = SlowTransport(create_redmine_stub_app(data))
+    client = _client(data, transport=transport, max_concurrency=2)
+
+    issues = await client.issues(project_id=1, status_id="*")
+    assert sorted(i["id"] for i in issues) == list(range(1, 451))
+    assert data.requests["GET /issues.json"] == 5
+
+    assert len(await client.issues(limit=150, project_id=1, status_id="*")) == 150
+    assert len(await client.issues(limit=10, project_id=1, status_id="*")) == 10
+
+    # Una ráfaga de lecturas nunca supera max_concurrency peticiones en vuelo
+    await asyncio.gather(*(client.issue(n, ("relations",)) for n in range(1, 41)))
+    assert transport.peak == 2 and client.stats["max_in_flight"] == 2
+    assert client.stats["in_flight"] == 0 and client.stats["errors"] == 0
+    await client.aclose()
+
+
+def test_one_pool_per_event_loop():
+    data = SyntheticRedmine(projects=1, issues_per_project=5, seed=1)
+    client = _client(data)
+
+    async def read():
+        return (await client.issue(3))["id"]
+
+    # Un httpx.AsyncClient no se puede reutilizar en otro loop: cada loop tiene el suyo
+    assert asyncio.run(read()) == 3
+    assert asyncio.run(read()) == 3
+    assert client.stats["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_async_tools_match_sync_tools(monkeypatch):
+    monkeypatch.setenv("REDMINE_API_KEY", "stub")
+    data = SyntheticRedmine(projects=1, issues_per_project=40, seed=11)
+    mirror = RedmineMirror(
+        base_url="http://redmine", api_key="stub",
+        transport=httpx.ASGITransport(app=create_redmine_stub_app(data)),
+    )
+    await mirror.snapshot_project(1)
+    sync_tools = RedmineTools(mirror=mirror, issue_cache=IssueCache())
+    sync_tools.redmine = None
+    async_tools = AsyncRedmineTools(client=_client(data), mirror=RedmineMirror(), issue_cache=IssueCache())
+    assert async_tools.name == "redmine_tools"
+
+    issue_id = next(i for i in range(1, 41) if data.relations.get(i))
+    assert await async_tools.get_issue_details(issue_id) == sync_tools.get_issue_details(issue_id)
+    assert await async_tools.analyze_issue_context(issue_id) == sync_tools.analyze_issue_context(issue_id)
+    assert await async_tools.get_issue_relations(issue_id) == sync_tools.get_issue_relations(issue_id)
+    assert await async_tools.extract_issue_requirements(issue_id) == _issue_requirements(
+        issue_id, sync_tools.get_issue_details(issue_id)
+    )
+    assert await async_tools.get_project_issues("proyecto-1", limit=5) == sync_tools.get_project_issues("proyecto-1", limit=5)
+    word = data.issues[issue_id]["subject"].split()[0]
+    assert await async_tools.search_issues("proyecto-1", word, "*") == sync_tools.search_issues("proyecto-1", word, "*")
+    assert (await async_tools.list_projects())[0]["identifier"] == "proyecto-1"
+
+
+@pytest.mark.asyncio
+async def test_async_tools_cache_reads_and_invalidate_on_update():
+    data = SyntheticRedmine(projects=1, issues_per_project=10, seed=2)
+    cache = IssueCache()
+    tools = AsyncRedmineTools(client=_client(data), mirror=RedmineMirror(), issue_cache=cache)
+
+    await asyncio.gather(*(tools.get_issue_details(4) for _ in range(5)))
+    await tools.get_issue_details(4)
+    assert data.requests["GET /issues/{issue_id}.json"] == 1
+
+    result = await tools.update_issue_metadata(4, '{"4": "Alto"}')
+    assert result["success"] and data.requests["PUT /issues/{issue_id}.json"] == 1
+    assert (await tools.get_issue_details(4))["custom_fields"]["Riesgo"] == "Alto"
+    assert data.requests["GET /issues/{issue_id}.json"] == 2
+
+    offline = AsyncRedmineTools(client=AsyncRedmineClient(base_url="http://redmine", api_key=""), mirror=RedmineMirror())
+    assert (await offline.get_issue_details(4))["error"] == "Redmine API key not configured"
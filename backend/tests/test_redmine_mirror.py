@@ -0,0 +1,238 @@
+"""
+Redmine Mirror Tests
+
+Verifica la ingesta paginada en paralelo contra el stub de Redmine (issues,
+relaciones, journals y versiones), la sincronización incremental por cursor
+con su change set, que RedmineTools lee del mirror sin peticiones en vivo,
+la caducidad de instantáneas y que la escritura en Postgres es masiva (una
+sentencia por tabla, sin importar el nº de issues).
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import backend.agents  # noqa: F401  (antes que backend.tools: import circular)
+from backend.core.deadline import run_deadline
+from backend.core.redmine_mirror import ChangeSet, RedmineMirror, ProjectSnapshot, as_resource
+from backend.core.issue_cache import IssueCache
+from backend.benchmarks.redmine_stub import SyntheticRedmine, create_redmine_stub_app
+from backend.tools.custom_tools import RedmineTools
+
+
+def _mirror(data, **kwargs):
+    transport = httpx.ASGITransport(app=create_redmine_stub_app(data))
+    return RedmineMirror(base_url="http://redmine", api_key="stub", transport=transport, **kwargs)
+
+
+class RecordingDb:
+    """Doble de AsyncPostgresDb que registra las sentencias ejecutadas."""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, *args):
+        self.statements.append((" ".join(query.split()), args))
+
+    def fetch(self, query, *args):
+        return []
+
+    def fetchone(self, query, *args):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_fetches_pages_in_parallel_and_replicates_project():
+    data = SyntheticRedmine(projects=2, issues_per_project=230, journals_per_issue=2, seed=7)
+    mirror = _mirror(data, max_parallel=4)
+
+    summary = await mirror.snapshot_project("proyecto-1")
+
+    assert summary["issues"] == 230 and summary["versions"] == 3
+    # 3 páginas de 100 en la lista; journals con una petición por issue
+    assert data.requests["GET /issues.json"] == 3
+    assert data.requests["GET /issues/{issue_id}.json"] == 230
+    assert summary["requests"] == 1 + 3 + 1 + 230
+    assert summary["journals"] == sum(len(data.issues[i]["journals"]) for i in range(1, 231))
+
+    state = mirror.project_state(1)
+    assert state["identifier"] == "proyecto-1" and state["issue_count"] == 230
+    assert mirror.project_state("proyecto-2") is None
+
+    related = next(i for i in range(1, 231) if data.relations.get(i))
+    issue = mirror.get_issue(related)
+    assert [r["id"] for r in issue["relations"]] == sorted(r["id"] for r in data.relations[related])
+    assert issue["journals"] == data.issues[related]["journals"]
+    assert issue["custom_fields"] == data.issues[related]["custom_fields"]
+
+    # Como /issues.json: abiertos por defecto, más recientes primero
+    open_issues = mirror.project_issues(1, limit=10)
+    assert [i["id"] for i in open_issues] == sorted(
+        (i for i in range(1, 231) if not data.issues[i]["status"].get("is_closed")), reverse=True
+    )[:10]
+    assert len(mirror.project_issues("proyecto-1", status="*")) == 230
+
+
+@pytest.mark.asyncio
+async def test_resnapshot_prunes_deleted_issues_and_expires_by_age():
+    data = SyntheticRedmine(projects=1, issues_per_project=20, seed=3)
+    mirror = _mirror(data, include_journals=False)
+    await mirror.snapshot_project(1)
+
+    del data.issues[20]
+    data.touch(5, notes="Cambio", CAPEX_KUSD=123)
+    await mirror.snapshot_project(1)
+    assert mirror.get_issue(20) is None
+    assert {"name": "CAPEX_KUSD", "value": "123"}.items() <= next(
+        cf for cf in mirror.get_issue(5)["custom_fields"] if cf["name"] == "CAPEX_KUSD"
+    ).items()
+
+    mirror.max_age_seconds = 60
+    mirror._projects[1]["snapshot_at"] -= 120
+    assert mirror.get_issue(5) is None and mirror.project_issues(1) is None
+    assert (await mirror.ensure_project(1)).issue_ids == []
+    assert mirror.get_issue(5) is not None
+
+
+@pytest.mark.asyncio
+async def test_redmine_tools_read_from_mirror_without_live_requests(monkeypatch):
+    monkeypatch.setenv("REDMINE_API_KEY", "stub")
+    data = SyntheticRedmine(projects=1, issues_per_project=40, seed=11)
+    mirror = _mirror(data)
+    await mirror.snapshot_project(1)
+    data.requests.clear()
+
+    tools = RedmineTools(mirror=mirror, issue_cache=IssueCache())
+    tools.redmine = None  # cualquier lectura en vivo fallaría
+
+    issue_id = next(i for i in range(1, 41) if data.relations.get(i))
+    details = tools.get_issue_details(issue_id)
+    assert details["subject"] == data.issues[issue_id]["subject"]
+    assert details["updated_on"] == str(datetime.strptime(data.issues[issue_id]["updated_on"], "%Y-%m-%dT%H:%M:%SZ"))
+    assert details["custom_fields"] == {cf["name"]: cf["value"] for cf in data.issues[issue_id]["custom_fields"]}
+
+    context = tools.analyze_issue_context(issue_id)
+    assert len(context["relations"]) == len(data.relations[issue_id])
+    assert len(context["recent_changes"]) == min(3, len(data.issues[issue_id]["journals"]))
+    assert "error" not in tools.get_issue_relations(issue_id)
+    assert len(tools.get_project_issues("proyecto-1", limit=5)) == 5
+    subject_word = data.issues[issue_id]["subject"].split()[0]
+    assert tools.search_issues("proyecto-1", subject_word, status="*")
+
+    # Sin instantánea del proyecto -> lectura en vivo (aquí no hay cliente: error explícito)
+    assert tools.get_issue_details(999)["error"] == "Redmine API key not configured"
+    assert sum(data.requests.values()) == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_fetches_only_updated_issues_and_emits_change_set():
+    data = SyntheticRedmine(projects=1, issues_per_project=250, seed=9)
+    mirror = _mirror(data)
+    received = []
+    mirror.subscribe(received.append)
+    await mirror.snapshot_project(1)
+    cursor = mirror.project_state(1)["sync_cursor"]
+    assert cursor == max(issue["updated_on"] for issue in data.issues.values())
+    assert received[0].full and len(received[0].created) == 250
+
+    data.touch(7, notes="Nuevo CAPEX", CAPEX_KUSD=4321)
+    data.touch(42, notes="Reasignado", subject="Asunto revisado")
+    data.requests.clear()
+    changes = await mirror.sync_project("proyecto-1")
+
+    assert not changes.full and changes.created == [] and changes.deleted == []
+    assert changes.changed == {7: ["cf:CAPEX_KUSD", "journals"], 42: ["subject", "journals"]}
+    assert changes.issue_ids == [7, 42] and received[-1] is changes
+    # Proyecto + 1 página de cambios + versiones + total del proyecto + journals de los 2 issues
+    assert changes.requests == 6 and data.requests["GET /issues.json"] == 2
+    assert changes.cursor > cursor and mirror.project_state(1)["sync_cursor"] == changes.cursor
+    assert mirror.get_issue(42)["subject"] == "Asunto revisado"
+
+    # Sin cambios: solo reaparece el issue del cursor (>=), que se descarta sin pedir journals
+    unchanged = await mirror.sync_project(1)
+    assert unchanged.issue_ids == [] and unchanged.fetched == 0 and unchanged.requests == 4
+
+    # Un borrado no cambia updated_on: el total no cuadra y se rehace la instantánea
+    del data.issues[100]
+    resync = await mirror.sync_project(1)
+    assert resync.full and resync.deleted == [100] and resync.changed == {}
+    assert mirror.stats["resnapshots"] == 1 and mirror.get_issue(100) is None
+
+
+@pytest.mark.asyncio
+async def test_workflow_staleness_providers_read_the_synced_mirror(monkeypatch):
+    monkeypatch.setenv("REDMINE_API_KEY", "stub")
+    data = SyntheticRedmine(projects=1, issues_per_project=30, seed=4)
+    mirror = _mirror(data, include_journals=False)
+    await mirror.snapshot_project(1)
+    tools = RedmineTools(mirror=mirror, issue_cache=IssueCache())
+    tools.redmine = None
+
+    before = tools.get_issue_versions([3, 4])
+    fingerprint = tools.project_snapshot_fingerprint(1)
+    data.touch(3, Riesgo="Alto")
+    await mirror.sync_project(1)
+
+    after = tools.get_issue_versions([3, 4])
+    assert after[4] == before[4] and after[3] > before[3]
+    assert after[3] == str(datetime.strptime(data.issues[3]["updated_on"], "%Y-%m-%dT%H:%M:%SZ"))
+    assert tools.project_snapshot_fingerprint(1) not in (None, fingerprint)
+
+
+class SlowTransport(httpx.AsyncBaseTransport):
+    def __init__(self, app, delay):
+        self.inner = httpx.ASGITransport(app=app)
+        self.delay = delay
+
+    async def handle_async_request(self, request):
+        await asyncio.sleep(self.delay)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.mark.asyncio
+async def test_ensure_project_is_bounded_by_the_run_deadline():
+    data = SyntheticRedmine(projects=1, issues_per_project=50, seed=8)
+    mirror = RedmineMirror(
+        base_url="http://redmine", api_key="stub", transport=SlowTransport(create_redmine_stub_app(data), 0.05),
+    )
+
+    with run_deadline(0.2):
+        assert await mirror.ensure_project(1) is None
+    # Se omite la instantánea (las herramientas leerán Redmine en vivo)
+    assert mirror.project_state(1) is None and mirror.stats["errors"] == 1
+
+
+def test_as_resource_matches_python_redmine_shapes():
+    issue = as_resource({
+        "id": 1, "updated_on": "2025-01-06T09:00:00Z", "status": {"name": "Nuevo"},
+        "custom_fields": [{"id": 3, "name": "Riesgo", "value": "Alto"}],
+        "journals": [{"created_on": "2025-01-07T10:00:00Z", "user": {"name": "Ana"}}],
+    })
+    assert str(issue.updated_on) == "2025-01-06 09:00:00" and issue.status.name == "Nuevo"
+    assert issue.custom_fields[0]["name"] == "Riesgo"
+    assert issue.journals[0].user.name == "Ana"
+
+
+def test_postgres_store_writes_each_table_with_one_bulk_statement():
+    db = RecordingDb()
+    mirror = RedmineMirror(db)
+    data = SyntheticRedmine(projects=1, issues_per_project=150, seed=2)
+    issues = [data._issue_view(issue, {"relations", "journals"}) for issue in data.issues.values()]
+    snapshot = ProjectSnapshot(project=data.projects[0], issues=issues, versions=data.versions[1])
+
+    mirror._store_sync(snapshot, True, "2025-01-01T00:00:00Z")
+
+    writes = [query for query, _ in db.statements if not query.startswith("CREATE")]
+    for table in ("issues", "custom_values", "relations", "journals", "versions"):
+        assert sum(q.startswith(f"INSERT INTO maas_redmine_{table} ") for q in writes) == 1
+    assert writes[-1].startswith("INSERT INTO maas_redmine_projects ")
+    assert len(writes) == 11
+    issue_rows = next(args[0] for query, args in db.statements if query.startswith("INSERT INTO maas_redmine_issues "))
+    assert issue_rows.count('"project_id": 1,') == 150
@@ -0,0 +1,129 @@
+"""
+Section Result Cache Tests
+
+Verifica que la clave direccionada por contenido cambia con cada entrada y que
+una segunda ejecución con entradas idénticas no invoca a Author ni Judge.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.section_cache import SectionResultCache
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+
+class FakeDb:
+    """Emula AsyncPostgresDb para la tabla de caché."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def execute(self, query, *args):
+        if query.strip().startswith("INSERT"):
+            cache_key, section_id, project_id, dto, qc_score, critique, reads = args
+            self.rows[cache_key] = {"dto": dto, "qc_score": qc_score, "critique": critique, "reads": reads}
+        return 1
+
+    def fetchone(self, query, *args):
+        row = self.rows.get(args[0])
+        return dict(row) if row else None
+
+
+class StubAgent:
+    def __init__(self, handler, instructions=None):
+        self.handler = handler
+        self.instructions = instructions or ["Redacta la sección."]
+        self.calls = 0
+
+    async def arun(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=await self.handler(prompt))
+
+
+def build_workflow(cache, snapshot="snap-1", qc_score=92):
+    plan = DocumentPlan(
+        project_id="7",
+        sections=[
+            DocumentSection(section_id="SIC_02", title="Caso de Negocio"),
+            DocumentSection(section_id="SIC_03", title="Riesgos", dependencies=["SIC_02"]),
+        ],
+    )
+
+    async def plan_handler(prompt):
+        return plan
+
+    async def author_handler(prompt):
+        s_id = prompt.split(":")[0].split()[-1]
+        return SIC_DTO(sic_code=s_id, project_id=7, metadata=[], key_tables_markdown="", summary_markdown=s_id)
+
+    async def judge_handler(prompt):
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=qc_score, approved=qc_score > 85,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    author = StubAgent(author_handler)
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(plan_handler), extractor=None, author=author,
+        reviewer=StubAgent(judge_handler, ["Audita."]), workspace_id="test",
+        section_cache=cache, snapshot_provider=lambda project_id: snapshot,
+    )
+    return workflow, author
+
+
+def test_key_changes_with_every_input():
+    cache = SectionResultCache(FakeDb())
+    dto = SIC_DTO(sic_code="SIC_02", project_id=7, metadata=[], key_tables_markdown="", summary_markdown="a")
+    base = dict(section_id="SIC_03", project_id=7, redmine_snapshot="s1",
+                dependency_dtos={"SIC_02": dto}, agents_version="v1")
+
+    key = cache.compute_key(**base)
+    assert key == cache.compute_key(**base)
+    assert key != cache.compute_key(**{**base, "redmine_snapshot": "s2"})
+    assert key != cache.compute_key(**{**base, "agents_version": "v2"})
+    assert key != cache.compute_key(**{**base, "dependency_dtos": {"SIC_02": dto.model_copy(update={"summary_markdown": "b"})}})
+
+    cache.template_version = "otra-plantilla"
+    assert key != cache.compute_key(**base)
+
+
+@pytest.mark.asyncio
+async def test_identical_inputs_skip_author_and_judge():
+    cache = SectionResultCache(FakeDb())
+    step_input = StepInput(input={"project_id": 7})
+
+    workflow, author = build_workflow(cache)
+    await workflow.main_execution(step_input)
+    assert author.calls == 2
+
+    workflow, author = build_workflow(cache)
+    output = await workflow.main_execution(step_input)
+    assert output.success
+    assert author.calls == 0
+    assert output.content["cached_sections"] == ["SIC_02", "SIC_03"]
+
+    # Un cambio en Redmine invalida todas las claves
+    workflow, author = build_workflow(cache, snapshot="snap-2")
+    await workflow.main_execution(step_input)
+    assert author.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_unapproved_sections_and_missing_snapshot_are_not_cached():
+    db = FakeDb()
+    workflow, _ = build_workflow(SectionResultCache(db), qc_score=60)
+    await workflow.main_execution(StepInput(input={"project_id": 7}))
+    assert db.rows == {}
+
+    workflow, _ = build_workflow(SectionResultCache(db), snapshot=None)
+    output = await workflow.main_execution(StepInput(input={"project_id": 7}))
+    assert output.success
+    assert db.rows == {}
@@ -0,0 +1,129 @@
+"""
+Single-Flight Tests
+
+Verifica que llamadas idénticas concurrentes comparten una sola ejecución
+(async y en hilos), que los errores llegan a todos los que esperan y que
+dos instancias de RedmineTools pidiendo el mismo issue hacen una sola
+petición a Redmine manteniendo la provenance de cada sección.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from backend.agents.schemas import SIC_DTO  # noqa: F401  (inicializa backend.agents antes que custom_tools)
+from backend.core.provenance import track_section_reads
+from backend.core.single_flight import SingleFlight
+from backend.tools.custom_tools import RedmineTools
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def fetch(key):
+        executions.append(key)
+        await asyncio.sleep(0.02)
+        return {"key": key}
+
+    results = await asyncio.gather(
+        *[flight.do("issue:1", lambda: fetch("issue:1")) for _ in range(5)],
+        flight.do("issue:2", lambda: fetch("issue:2")),
+    )
+
+    assert executions == ["issue:1", "issue:2"]
+    assert results[:5] == [{"key": "issue:1"}] * 5
+    assert flight.stats == {"calls": 6, "coalesced": 4}
+
+    # No es una caché: terminada la llamada, la siguiente vuelve a ejecutarse
+    await flight.do("issue:1", lambda: fetch("issue:1"))
+    assert executions.count("issue:1") == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_cancelled_leader_hands_over():
+    flight = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Redmine caído")
+
+    results = await asyncio.gather(*[flight.do("k", failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    leader = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", slow))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == "ok"
+    assert len(calls) == 2
+
+
+def test_threads_share_one_blocking_call():
+    flight = SingleFlight("test")
+    executions = []
+    barrier = threading.Barrier(4)
+
+    def fetch():
+        executions.append(1)
+        time.sleep(0.05)
+        return "issue"
+
+    def worker(_):
+        barrier.wait()
+        return flight.do_sync(("issue", 7), fetch)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(worker, range(4)))
+
+    assert results == ["issue"] * 4
+    assert len(executions) == 1
+
+
+@pytest.mark.asyncio
+async def test_redmine_tools_coalesce_across_instances():
+    gets = []
+
+    def get(issue_id, include=None):
+        gets.append(issue_id)
+        time.sleep(0.05)
+        return SimpleNamespace(
+            id=issue_id, subject="Chancador", description="", status=SimpleNamespace(name="Abierto"),
+            project=SimpleNamespace(name="P"), updated_on="2026-01-01"
+        )
+
+    redmine = SimpleNamespace(issue=SimpleNamespace(get=get))
+    data_tools, extractor_tools = RedmineTools(), RedmineTools()
+    data_tools.redmine = extractor_tools.redmine = redmine
+
+    async def section_read(tools):
+        with track_section_reads() as reads:
+            details = await asyncio.to_thread(tools.get_issue_details, 42)
+        return details, reads
+
+    (first, first_reads), (second, second_reads) = await asyncio.gather(
+        section_read(data_tools), section_read(extractor_tools)
+    )
+
+    assert gets == [42]
+    assert first == second and first["subject"] == "Chancador"
+    assert first_reads.issues == second_reads.issues == {42: "2026-01-01"}
@@ -0,0 +1,160 @@
+"""
+Structural Checker Tests
+
+Verifica las reglas derivadas de la Sección B de la plantilla maestra y que
+los borradores con fallos mecánicos vuelven al Author sin llamar al Judge.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from agno.workflow import StepInput
+from backend.agents.schemas import DocumentPlan, DocumentSection, FeedbackCritiqueSchema, SIC_DTO
+from backend.core.structural_checker import StructuralChecker
+from backend.workflows.document_workflow import DocumentCreationWorkflow
+
+SIC_02_TEXT = "\n".join([
+    "## 2. CASO DE NEGOCIO",
+    "### 2.1 Resumen", "### 2.2 Contexto", "### 2.3 Atractivo Industrial", "### 2.4 Alineamiento Estratégico",
+    "### 2.5 Opciones Estratégicas del Proyecto", "### 2.6 Análisis de Escenarios", "### 2.7 Estrategia de Salida",
+    "### 2.8 Proceso de Configuración y Grupos de Interés", "### 2.9 ANEXOS",
+])
+SIC_02_TABLES = "\n".join([
+    "Tabla 21: Condiciones del sitio", "| Parámetro | Valor |", "| :--- | :--- |", "| Altitud | 2.300 msnm |",
+    "Tabla 22: Demanda Máxima PND", "Tabla 23: Indicadores Económicos",
+])
+
+
+def _dto(summary: str, tables: str = "", sic_code: str = "SIC_02") -> SIC_DTO:
+    return SIC_DTO(sic_code=sic_code, project_id=1, metadata=[], key_tables_markdown=tables, summary_markdown=summary)
+
+
+@pytest.fixture(scope="module")
+def checker():
+    return StructuralChecker()
+
+
+def test_rules_are_built_from_template_section_b(checker):
+    assert len(checker.specs) == 22
+    sic03 = checker.specs["SIC_03"]
+    assert ("3.6", "Evaluación cuantitativa de riesgo") in sic03.headings
+    assert ["32", "33", "34"] in sic03.table_groups and ["37"] in sic03.table_groups
+    # Los rangos ("Tablas 14-1 a 14-16") no se exigen tabla a tabla
+    assert checker.specs["SIC_14"].table_groups == []
+    assert {s for s, spec in checker.specs.items() if spec.may_be_not_applicable} == {
+        "SIC_07", "SIC_08", "SIC_09", "SIC_18"
+    }
+
+
+def test_complete_draft_passes(checker):
+    assert checker.check("SIC_02", _dto(SIC_02_TEXT, SIC_02_TABLES)) == []
+    assert checker.critique("SIC_02", _dto(SIC_02_TEXT, SIC_02_TABLES)) is None
+
+
+def test_mechanical_gaps_are_reported_precisely(checker):
+    summary = SIC_02_TEXT.replace("### 2.7 Estrategia de Salida\n", "") + "\nCAPEX estimado: [VALOR] KUSD"
+    tables = SIC_02_TABLES.replace("Tabla 22: Demanda Máxima PND\n", "")
+
+    critique = checker.critique("SIC_02", _dto(summary, tables))
+
+    assert critique is not None and not critique.approved and critique.qc_score < 85
+    assert critique.critical_gaps == [
+        "Placeholders sin reemplazar: [VALOR]",
+        "Encabezados faltantes: 2.7 Estrategia de Salida",
+        "Tablas obligatorias faltantes: Tabla 22",
+    ]
+    assert "Tabla 22" in critique.actionable_recommendation
+
+
+def test_pending_marker_and_acronyms_are_not_placeholders(checker):
+    summary = SIC_02_TEXT + "\nCAPEX estimado: [PENDIENTE] KUSD, según el [NCC] y el [PCB]"
+    assert checker.check("SIC_02", _dto(summary, SIC_02_TABLES)) == []
+    assert checker.check("SIC_02", _dto(summary + " desde [FECHA INICIO]", SIC_02_TABLES)) == [
+        "Placeholders sin reemplazar: [FECHA INICIO]"
+    ]
+
+
+def test_not_applicable_section_skips_table_rules(checker):
+    headings = "\n".join(f"### {number} {title}" for number, title in checker.specs["SIC_07"].headings)
+    draft = _dto(headings + "\nEl capítulo no aplica: el proyecto no genera variaciones geológicas.", sic_code="SIC_07")
+    assert checker.check("SIC_07", draft) == []
+
+
+@pytest.mark.asyncio
+async def test_structural_rejection_skips_judge_call():
+    judge_prompts = []
+    author_prompts = []
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=self.handler(prompt))
+
+    def author_handler(prompt):
+        author_prompts.append(prompt)
+        summary = SIC_02_TEXT if len(author_prompts) > 1 else "## 2. CASO DE NEGOCIO\n[VALOR]"
+        return _dto(summary, SIC_02_TABLES)
+
+    def judge_handler(prompt):
+        judge_prompts.append(prompt)
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=92, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    plan = DocumentPlan(project_id="x", sections=[DocumentSection(section_id="SIC_02", title="CASO DE NEGOCIO")])
+    for pipelined in (False, True):
+        judge_prompts.clear()
+        author_prompts.clear()
+        workflow = DocumentCreationWorkflow(
+            planner=StubAgent(lambda prompt: plan), extractor=None, author=StubAgent(author_handler),
+            reviewer=StubAgent(judge_handler), workspace_id="test", pipelined=pipelined,
+            structural_checker=StructuralChecker(),
+        )
+
+        output = await workflow.main_execution(StepInput(input={"project_id": 1}))
+
+        assert output.success
+        assert output.content["qc_score"] == 92
+        # Primer borrador rechazado por reglas: el Judge solo audita el segundo
+        assert len(author_prompts) == 2 and len(judge_prompts) == 1
+        assert "Placeholders sin reemplazar: [VALOR]" in author_prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_draft_with_pending_data_reaches_judge():
+    judge_prompts = []
+
+    class StubAgent:
+        def __init__(self, handler):
+            self.handler = handler
+
+        async def arun(self, prompt):
+            return SimpleNamespace(content=self.handler(prompt))
+
+    def judge_handler(prompt):
+        judge_prompts.append(prompt)
+        return FeedbackCritiqueSchema(
+            root_cause="", actionable_recommendation="", qc_score=90, approved=True,
+            critical_gaps=[], regulatory_compliance=True
+        )
+
+    plan = DocumentPlan(project_id="x", sections=[DocumentSection(section_id="SIC_02", title="CASO DE NEGOCIO")])
+    workflow = DocumentCreationWorkflow(
+        planner=StubAgent(lambda prompt: plan), extractor=None,
+        author=StubAgent(lambda prompt: _dto(SIC_02_TEXT + "\nTIR: [PENDIENTE]", SIC_02_TABLES)),
+        reviewer=StubAgent(judge_handler), workspace_id="test", structural_checker=StructuralChecker(),
+    )
+
+    output = await workflow.main_execution(StepInput(input={"project_id": 1}))
+
+    assert output.success and output.content["qc_score"] == 90
+    assert len(judge_prompts) == 1
@@ -1,20 +1,239 @@
+import asyncio
+import json
+import logging
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from redminelib import Redmine
+from redminelib.engines.sync import SyncEngine
 from agno.tools import Toolkit, tool
 from backend.agents.schemas import SIC16Capex, SIC14Plazo, SIC03Riesgo
+from backend.core.provenance import record_issue_read, record_fact
+from backend.core.deadline import call_timeout
+from backend.core.single_flight import SingleFlight
+from backend.core.redmine_mirror import RedmineMirror, as_resource, default_mirror
+from backend.core.issue_cache import IssueCache, redmine_issue_cache
+from backend.core.redmine_client import AsyncRedmineClient, default_redmine_client
 
-class RedmineTools(Toolkit):
+logger = logging.getLogger(__name__)
+
+# Timeout por petición HTTP a Redmine; se acota además al deadline de la ejecución
+REDMINE_TIMEOUT_SECONDS = float(os.getenv("REDMINE_TIMEOUT_SECONDS", "30"))
+
+
+class DeadlineSyncEngine(SyncEngine):
+    """
+    Engine de python-redmine que respeta el deadline de la ejecución del workflow:
+    cada petición usa como timeout el tiempo restante (y falla sin llamar si ya se agotó).
+    """
+    def construct_request_kwargs(self, method, headers, params, data):
+        kwargs = super().construct_request_kwargs(method, headers, params, data)
+        kwargs['timeout'] = call_timeout(REDMINE_TIMEOUT_SECONDS)
+        return kwargs
+
+
+# Lecturas idénticas concurrentes (p.ej. el mismo issue desde el data agent y el extractor)
+# comparten una sola petición HTTP, aunque provengan de instancias distintas de RedmineTools
+redmine_flight = SingleFlight("redmine")
+
+def _issue_details(issue: Any) -> Dict[str, Any]:
+    return {
+        "id": issue.id,
+        "subject": issue.subject,
+        "description": issue.description or "",
+        "status": issue.status.name,
+        "project": issue.project.name,
+        "created_on": str(issue.created_on) if hasattr(issue, 'created_on') else None,
+        "updated_on": str(issue.updated_on) if hasattr(issue, 'updated_on') else None,
+        "priority": issue.priority.name if hasattr(issue, 'priority') else None,
+        "assigned_to": issue.assigned_to.name if hasattr(issue, 'assigned_to') else None,
+        "custom_fields": {cf['name']: cf['value'] for cf in issue.custom_fields} if hasattr(issue, 'custom_fields') else {}
+    }
+
+
+def _issue_summary(i: Any) -> Dict[str, Any]:
+    return {
+        "id": i.id,
+        "subject": i.subject,
+        "status": i.status.name,
+        "priority": i.priority.name if hasattr(i, 'priority') else None,
+        "assigned_to": i.assigned_to.name if hasattr(i, 'assigned_to') else None
+    }
+
+
+def _search_results(issues: List[Any], query: str) -> List[Dict[str, Any]]:
+    results = []
+    for i in issues:
+        if query.lower() in (i.subject.lower() if hasattr(i, 'subject') else ""):
+            record_issue_read(i.id, getattr(i, 'updated_on', None))
+            results.append({
+                "id": i.id,
+                "subject": i.subject,
+                "status": i.status.name if hasattr(i, 'status') else None,
+                "priority": i.priority.name if hasattr(i, 'priority') else None
+            })
+    return results
+
+
+def _issue_context(issue_id: int, issue: Any) -> Dict[str, Any]:
+    context = {
+        "issue_id": issue_id,
+        "subject": issue.subject,
+        "description_summary": (issue.description or "")[:200],
+        "relations": [],
+        "recent_changes": [],
+        "dependencies": {
+            "blocks": [],
+            "depends_on": [],
+            "duplicates": []
+        }
+    }
+
+    # Extract relations
+    if hasattr(issue, 'relations'):
+        for rel in issue.relations:
+            rel_type = rel.relation_type
+            rel_issue = rel.issue_id
+            context["relations"].append({
+                "type": rel_type,
+                "issue_id": rel_issue
+            })
+
+            if rel_type == "blocks":
+                context["dependencies"]["blocks"].append(rel_issue)
+            elif rel_type == "relates":
+                context["dependencies"]["depends_on"].append(rel_issue)
+            elif rel_type == "duplicates":
+                context["dependencies"]["duplicates"].append(rel_issue)
+
+    # Extract recent changes
+    if hasattr(issue, 'journals'):
+        for journal in issue.journals[-3:]:  # Last 3 changes
+            context["recent_changes"].append({
+                "updated_on": str(journal.created_on),
+                "user": journal.user.name if hasattr(journal, 'user') else "Unknown"
+            })
+    return context
+
+
+def _issue_relations(issue: Any) -> Dict[str, List[int]]:
+    relations = {
+        "blocks": [],
+        "depends_on": [],
+        "related": [],
+        "duplicates": [],
+        "duplicated_by": []
+    }
+
+    if hasattr(issue, 'relations'):
+        for rel in issue.relations:
+            rel_type = rel.relation_type
+            rel_issue = rel.issue_id
+
+            if rel_type == "blocks":
+                relations["blocks"].append(rel_issue)
+            elif rel_type == "relates":
+                relations["related"].append(rel_issue)
+            elif rel_type == "duplicates":
+                relations["duplicates"].append(rel_issue)
+            elif rel_type == "duplicated_by":
+                relations["duplicated_by"].append(rel_issue)
+    return relations
+
+
+def _issue_requirements(issue_id: int, issue_details: Dict[str, Any]) -> Dict[str, Any]:
+    requirements = {
+        "issue_id": issue_id,
+        "title": issue_details.get("subject", ""),
+        "description": issue_details.get("description", ""),
+        "custom_fields": issue_details.get("custom_fields", {}),
+        "extracted_specs": {
+            "functionality": [],
+            "constraints": [],
+            "acceptance_criteria": []
+        }
+    }
+
+    # Simple requirement extraction logic
+    description = issue_details.get("description", "").lower()
+    if "must" in description or "required" in description:
+        requirements["extracted_specs"]["functionality"].append("Core requirement detected")
+    if "constraint" in description or "limitation" in description:
+        requirements["extracted_specs"]["constraints"].append("Constraint detected")
+    if "accept" in description or "criteria" in description:
+        requirements["extracted_specs"]["acceptance_criteria"].append("Acceptance criteria detected")
+    return requirements
+
+
+class _RedmineReads:
+    """Mirror local y caché de issues compartidos por RedmineTools y AsyncRedmineTools."""
+
+    def _cache_key(self, view: str, issue_id: int) -> tuple:
+        return (self.url.rstrip("/"), view, int(issue_id))
+
+    def _cached_view(self, view: str, issue_id: int) -> Any:
+        """Vista cacheada del issue ("details", "context", "relations") o None; anota la lectura."""
+        cached = self.issue_cache.get(self._cache_key(view, issue_id))
+        if cached is None:
+            return None
+        result, updated_on = cached
+        record_issue_read(issue_id, updated_on)
+        return result
+
+    def _cache_view(self, view: str, issue_id: int, result: Any, updated_on: Any, related: List[int] = ()) -> None:
+        self.issue_cache.put(
+            self._cache_key(view, issue_id),
+            (result, str(updated_on) if updated_on is not None else None),
+            issue_ids=[issue_id, *related],
+        )
+
+    @property
+    def mirror(self) -> Optional[RedmineMirror]:
+        return self._mirror if self._mirror is not None else default_mirror()
+
+    def _mirrored(self, read: Callable[[RedmineMirror], Any]) -> Any:
+        """
+        Lectura desde el mirror local de Redmine. None = sin mirror, dato no replicado
+        (o caducado) o error: el llamador consulta Redmine en vivo.
+        """
+        mirror = self.mirror
+        if mirror is None:
+            return None
+        try:
+            return read(mirror)
+        except Exception as e:
+            logger.warning(f"⚠️ [MIRROR] Lectura fallida, se consulta Redmine: {str(e)[:100]}")
+            return None
+
+    def _mirrored_issue(self, issue_id: int) -> Any:
+        issue = self._mirrored(lambda mirror: mirror.get_issue(issue_id))
+        return as_resource(issue) if issue is not None else None
+
+    def _mirrored_issues(self, project_id: Any, status: Optional[str] = None, limit: Optional[int] = None) -> Any:
+        issues = self._mirrored(lambda mirror: mirror.project_issues(project_id, status=status, limit=limit))
+        return [as_resource(issue) for issue in issues] if issues is not None else None
+
+    async def _amirrored(self, read: Callable[..., Any], *args) -> Any:
+        """Lectura del mirror sin bloquear el event loop (con Postgres, en un hilo)."""
+        mirror = self.mirror
+        if mirror is None:
+            return None
+        return read(*args) if mirror.db is None else await asyncio.to_thread(read, *args)
+
+
+class RedmineTools(_RedmineReads, Toolkit):
     """
     Enhanced Redmine Tools with reasoning and structured data management.
     Supports issue tracking, project management, and knowledge base integration.
     """
-    def __init__(self, **kwargs):
+    def __init__(self, mirror: Optional[RedmineMirror] = None, issue_cache: Optional[IssueCache] = None, **kwargs):
         super().__init__(name="redmine_tools", **kwargs)
+        # Réplica local de Redmine (por defecto la del proceso, ver set_default_mirror)
+        self._mirror = mirror
         self.url = os.getenv("REDMINE_BASE_URL", "http://cidiia.uce.edu.do/")
         self.key = os.getenv("REDMINE_API_KEY")
-        self.redmine = Redmine(self.url, key=self.key) if self.key else None
-        self.issue_cache: Dict[int, Dict] = {}
+        self.redmine = Redmine(self.url, key=self.key, engine=DeadlineSyncEngine) if self.key else None
+        # Caché de issues compartida por todas las instancias del proceso (LRU + TTL acotada)
+        self.issue_cache = issue_cache if issue_cache is not None else redmine_issue_cache
         
         tools = [
             self.get_issue_details,
@@ -27,7 +246,11 @@ class RedmineTools(Toolkit):
             self.extract_issue_requirements,
         ]
         super().__init__(name="redmine_tools", tools=tools, **kwargs)
-    
+
+    def _fetch(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Lectura de Redmine coalescida con las lecturas idénticas en vuelo (ver SingleFlight)."""
+        return redmine_flight.do_sync((self.url,) + key, fetch)
+
     def get_issue_details(self, issue_id: int) -> dict:
         """
         Fetch comprehensive details of a Redmine issue from the live site.
@@ -38,30 +261,26 @@ class RedmineTools(Toolkit):
         Returns:
             Dictionary containing issue details including ID, subject, description, status, and project
         """
-        if not self.redmine:
-            return {"error": "Redmine API key not configured"}
         try:
             # Check cache first
-            if issue_id in self.issue_cache:
-                return self.issue_cache[issue_id]
-            
-            issue = self.redmine.issue.get(issue_id, include=['relations', 'changesets', 'watchers'])
-            
-            issue_data = {
-                "id": issue.id,
-                "subject": issue.subject,
-                "description": issue.description or "",
-                "status": issue.status.name,
-                "project": issue.project.name,
-                "created_on": str(issue.created_on) if hasattr(issue, 'created_on') else None,
-                "updated_on": str(issue.updated_on) if hasattr(issue, 'updated_on') else None,
-                "priority": issue.priority.name if hasattr(issue, 'priority') else None,
-                "assigned_to": issue.assigned_to.name if hasattr(issue, 'assigned_to') else None,
-                "custom_fields": {cf['name']: cf['value'] for cf in issue.custom_fields} if hasattr(issue, 'custom_fields') else {}
-            }
+            cached = self._cached_view("details", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = self._mirrored_issue(issue_id)
+            if issue is None:
+                if not self.redmine:
+                    return {"error": "Redmine API key not configured"}
+                issue = self._fetch(
+                    ("issue", issue_id, "relations,changesets,watchers"),
+                    lambda: self.redmine.issue.get(issue_id, include=['relations', 'changesets', 'watchers'])
+                )
             
+            issue_data = _issue_details(issue)
+
             # Cache the result
-            self.issue_cache[issue_id] = issue_data
+            self._cache_view("details", issue_id, issue_data, issue_data["updated_on"])
+            record_issue_read(issue_id, issue_data["updated_on"])
             return issue_data
         except Exception as e:
             return {"error": f"Failed to retrieve issue {issue_id}: {str(e)}"}
@@ -76,7 +295,7 @@ class RedmineTools(Toolkit):
         if not self.redmine:
             return [{"error": "Redmine API key not configured"}]
         try:
-            projects = self.redmine.project.all()
+            projects = self._fetch(("projects",), lambda: list(self.redmine.project.all()))
             return [{"id": p.id, "name": p.name, "identifier": p.identifier} for p in projects]
         except Exception as e:
             return [{"error": f"Failed to list projects: {str(e)}"}]
@@ -93,24 +312,20 @@ class RedmineTools(Toolkit):
         Returns:
             List of matching issues with ID, subject, and status
         """
-        if not self.redmine:
-            return [{"error": "Redmine API key not configured"}]
         try:
             filters = {"project_id": project_id}
             if status:
                 filters["status_id"] = status
-            
-            issues = self.redmine.issue.filter(**filters)
-            results = []
-            for i in issues:
-                if query.lower() in (i.subject.lower() if hasattr(i, 'subject') else ""):
-                    results.append({
-                        "id": i.id,
-                        "subject": i.subject,
-                        "status": i.status.name if hasattr(i, 'status') else None,
-                        "priority": i.priority.name if hasattr(i, 'priority') else None
-                    })
-            return results
+
+            issues = self._mirrored_issues(project_id, status=status)
+            if issues is None:
+                if not self.redmine:
+                    return [{"error": "Redmine API key not configured"}]
+                issues = self._fetch(
+                    ("issues", tuple(sorted(filters.items()))), lambda: list(self.redmine.issue.filter(**filters))
+                )
+            record_fact(f"search_issues:{project_id}:{query}:{status or ''}")
+            return _search_results(issues, query)
         except Exception as e:
             return [{"error": f"Search failed: {str(e)}"}]
     
@@ -125,17 +340,19 @@ class RedmineTools(Toolkit):
         Returns:
             List of project issues
         """
-        if not self.redmine:
-            return [{"error": "Redmine API key not configured"}]
         try:
-            issues = self.redmine.issue.filter(project_id=project_id, limit=limit)
-            return [{
-                "id": i.id,
-                "subject": i.subject,
-                "status": i.status.name,
-                "priority": i.priority.name if hasattr(i, 'priority') else None,
-                "assigned_to": i.assigned_to.name if hasattr(i, 'assigned_to') else None
-            } for i in issues]
+            issues = self._mirrored_issues(project_id, limit=limit)
+            if issues is None:
+                if not self.redmine:
+                    return [{"error": "Redmine API key not configured"}]
+                issues = self._fetch(
+                    ("issues", project_id, limit),
+                    lambda: list(self.redmine.issue.filter(project_id=project_id, limit=limit))
+                )
+            record_fact(f"project_issues:{project_id}")
+            for i in issues:
+                record_issue_read(i.id, getattr(i, 'updated_on', None))
+            return [_issue_summary(i) for i in issues]
         except Exception as e:
             return [{"error": f"Failed to retrieve project issues: {str(e)}"}]
     
@@ -150,49 +367,26 @@ class RedmineTools(Toolkit):
         Returns:
             Dictionary with contextual analysis including relations and metadata
         """
-        if not self.redmine:
-            return {"error": "Redmine API key not configured"}
         try:
-            issue = self.redmine.issue.get(issue_id, include=['relations', 'journals'])
-            
-            context = {
-                "issue_id": issue_id,
-                "subject": issue.subject,
-                "description_summary": (issue.description or "")[:200],
-                "relations": [],
-                "recent_changes": [],
-                "dependencies": {
-                    "blocks": [],
-                    "depends_on": [],
-                    "duplicates": []
-                }
-            }
-            
-            # Extract relations
-            if hasattr(issue, 'relations'):
-                for rel in issue.relations:
-                    rel_type = rel.relation_type
-                    rel_issue = rel.issue_id
-                    context["relations"].append({
-                        "type": rel_type,
-                        "issue_id": rel_issue
-                    })
-                    
-                    if rel_type == "blocks":
-                        context["dependencies"]["blocks"].append(rel_issue)
-                    elif rel_type == "relates":
-                        context["dependencies"]["depends_on"].append(rel_issue)
-                    elif rel_type == "duplicates":
-                        context["dependencies"]["duplicates"].append(rel_issue)
-            
-            # Extract recent changes
-            if hasattr(issue, 'journals'):
-                for journal in issue.journals[-3:]:  # Last 3 changes
-                    context["recent_changes"].append({
-                        "updated_on": str(journal.created_on),
-                        "user": journal.user.name if hasattr(journal, 'user') else "Unknown"
-                    })
-            
+            cached = self._cached_view("context", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = self._mirrored_issue(issue_id)
+            if issue is None:
+                if not self.redmine:
+                    return {"error": "Redmine API key not configured"}
+                issue = self._fetch(
+                    ("issue", issue_id, "relations,journals"),
+                    lambda: self.redmine.issue.get(issue_id, include=['relations', 'journals'])
+                )
+            record_issue_read(issue_id, getattr(issue, 'updated_on', None))
+            context = _issue_context(issue_id, issue)
+
+            self._cache_view(
+                "context", issue_id, context, getattr(issue, 'updated_on', None),
+                related=[rel["issue_id"] for rel in context["relations"]]
+            )
             return context
         except Exception as e:
             return {"error": f"Failed to analyze issue context: {str(e)}"}
@@ -223,9 +417,8 @@ class RedmineTools(Toolkit):
             issue.custom_fields = custom_fields
             issue.save()
             
-            # Clear cache
-            if issue_id in self.issue_cache:
-                del self.issue_cache[issue_id]
+            # Clear cache (todas las vistas cacheadas del issue)
+            self.issue_cache.invalidate_issues([issue_id])
             
             return {"success": True, "message": f"Issue {issue_id} updated", "issue_id": issue_id}
         except Exception as e:
@@ -241,33 +434,25 @@ class RedmineTools(Toolkit):
         Returns:
             Dictionary mapping relation types to lists of related issue IDs
         """
-        if not self.redmine:
-            return {"error": "Redmine API key not configured"}
         try:
-            issue = self.redmine.issue.get(issue_id, include=['relations'])
-            
-            relations = {
-                "blocks": [],
-                "depends_on": [],
-                "related": [],
-                "duplicates": [],
-                "duplicated_by": []
-            }
-            
-            if hasattr(issue, 'relations'):
-                for rel in issue.relations:
-                    rel_type = rel.relation_type
-                    rel_issue = rel.issue_id
-                    
-                    if rel_type == "blocks":
-                        relations["blocks"].append(rel_issue)
-                    elif rel_type == "relates":
-                        relations["related"].append(rel_issue)
-                    elif rel_type == "duplicates":
-                        relations["duplicates"].append(rel_issue)
-                    elif rel_type == "duplicated_by":
-                        relations["duplicated_by"].append(rel_issue)
-            
+            cached = self._cached_view("relations", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = self._mirrored_issue(issue_id)
+            if issue is None:
+                if not self.redmine:
+                    return {"error": "Redmine API key not configured"}
+                issue = self._fetch(
+                    ("issue", issue_id, "relations"), lambda: self.redmine.issue.get(issue_id, include=['relations'])
+                )
+            record_issue_read(issue_id, getattr(issue, 'updated_on', None))
+            relations = _issue_relations(issue)
+
+            self._cache_view(
+                "relations", issue_id, relations, getattr(issue, 'updated_on', None),
+                related=[i for ids in relations.values() for i in ids]
+            )
             return relations
         except Exception as e:
             return {"error": f"Failed to get issue relations: {str(e)}"}
@@ -290,30 +475,301 @@ class RedmineTools(Toolkit):
             if "error" in issue_details:
                 return issue_details
             
-            requirements = {
-                "issue_id": issue_id,
-                "title": issue_details.get("subject", ""),
-                "description": issue_details.get("description", ""),
-                "custom_fields": issue_details.get("custom_fields", {}),
-                "extracted_specs": {
-                    "functionality": [],
-                    "constraints": [],
-                    "acceptance_criteria": []
-                }
-            }
-            
-            # Simple requirement extraction logic
-            description = issue_details.get("description", "").lower()
-            if "must" in description or "required" in description:
-                requirements["extracted_specs"]["functionality"].append("Core requirement detected")
-            if "constraint" in description or "limitation" in description:
-                requirements["extracted_specs"]["constraints"].append("Constraint detected")
-            if "accept" in description or "criteria" in description:
-                requirements["extracted_specs"]["acceptance_criteria"].append("Acceptance criteria detected")
-            
-            return requirements
+            return _issue_requirements(issue_id, issue_details)
+        except Exception as e:
+            return {"error": f"Failed to extract requirements: {str(e)}"}
+
+    def get_issue_versions(self, issue_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Current updated_on of the given issues. Not exposed to agents: used by the
+        workflow to detect which recorded issue reads are stale.
+
+        Returns:
+            Dictionary issue_id -> updated_on (missing issues are omitted)
+        """
+        if not issue_ids:
+            return {}
+        # Issues replicados (el mirror se sincroniza antes de cada ejecución); el resto, en vivo
+        mirrored = self._mirrored(lambda mirror: mirror.issue_versions(issue_ids)) or {}
+        versions = {issue_id: str(as_resource(updated_on, "updated_on")) for issue_id, updated_on in mirrored.items()}
+        missing = [i for i in issue_ids if i not in versions]
+        if not self.redmine or not missing:
+            return versions
+        issues = self.redmine.issue.filter(
+            issue_id=",".join(str(i) for i in missing), status_id='*'
+        )
+        versions.update({
+            i.id: str(i.updated_on) if hasattr(i, 'updated_on') else None
+            for i in issues
+        })
+        return versions
+
+    def project_snapshot_fingerprint(self, project_id: Any) -> Optional[str]:
+        """
+        Fingerprint of the project's Redmine data (issue ids + updated_on).
+        Not exposed to agents: used by the workflow to key cached sections.
+
+        Returns:
+            SHA-256 hex digest, or None if Redmine is unavailable
+        """
+        import hashlib
+
+        issues = self._mirrored_issues(project_id, status="*")
+        if issues is None and not self.redmine:
+            return None
+        try:
+            if issues is None:
+                issues = self.redmine.issue.filter(project_id=project_id, status_id='*')
+            stamps = sorted(
+                (i.id, str(i.updated_on) if hasattr(i, 'updated_on') else "")
+                for i in issues
+            )
+            return hashlib.sha256(repr(stamps).encode()).hexdigest()
+        except Exception:
+            return None
+
+class AsyncRedmineTools(_RedmineReads, Toolkit):
+    """
+    Async version of RedmineTools for agents running with arun: same tool names and
+    results, served by AsyncRedmineClient (pooled keep-alive connections with a
+    concurrency limit) so a slow Redmine response never blocks the event loop.
+    Shares the local mirror and the process-wide issue cache with RedmineTools.
+    """
+    def __init__(
+        self,
+        client: Optional[AsyncRedmineClient] = None,
+        mirror: Optional[RedmineMirror] = None,
+        issue_cache: Optional[IssueCache] = None,
+        **kwargs
+    ):
+        self._mirror = mirror
+        self.client = client or default_redmine_client()
+        self.url = self.client.base_url
+        self.issue_cache = issue_cache if issue_cache is not None else redmine_issue_cache
+
+        tools = [
+            self.get_issue_details,
+            self.list_projects,
+            self.search_issues,
+            self.analyze_issue_context,
+            self.get_project_issues,
+            self.update_issue_metadata,
+            self.get_issue_relations,
+            self.extract_issue_requirements,
+        ]
+        super().__init__(name="redmine_tools", tools=tools, **kwargs)
+
+    async def _afetch(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Lectura de Redmine coalescida con las lecturas idénticas en vuelo (ver SingleFlight)."""
+        return await redmine_flight.do((self.url,) + key, fetch)
+
+    async def _aissue(self, issue_id: int, include: tuple) -> Any:
+        """Issue desde el mirror o desde Redmine en vivo; None si no hay API key."""
+        issue = await self._amirrored(self._mirrored_issue, issue_id)
+        if issue is None:
+            if not self.client.configured:
+                return None
+            issue = as_resource(await self._afetch(
+                ("issue", issue_id, ",".join(include)), lambda: self.client.issue(issue_id, include)
+            ))
+        return issue
+
+    async def _aissues(self, project_id: Any, status: Optional[str] = None, limit: Optional[int] = None) -> Any:
+        """Issues del proyecto desde el mirror o desde Redmine en vivo; None si no hay API key."""
+        issues = await self._amirrored(self._mirrored_issues, project_id, status, limit)
+        if issues is None:
+            if not self.client.configured:
+                return None
+            issues = [as_resource(issue) for issue in await self._afetch(
+                ("issues", project_id, status, limit),
+                lambda: self.client.issues(limit=limit, project_id=project_id, status_id=status)
+            )]
+        return issues
+
+    async def get_issue_details(self, issue_id: int) -> dict:
+        """
+        Fetch comprehensive details of a Redmine issue from the live site.
+
+        Args:
+            issue_id: The Redmine issue ID to retrieve
+
+        Returns:
+            Dictionary containing issue details including ID, subject, description, status, and project
+        """
+        try:
+            cached = self._cached_view("details", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = await self._aissue(issue_id, ("relations", "changesets", "watchers"))
+            if issue is None:
+                return {"error": "Redmine API key not configured"}
+            issue_data = _issue_details(issue)
+            self._cache_view("details", issue_id, issue_data, issue_data["updated_on"])
+            record_issue_read(issue_id, issue_data["updated_on"])
+            return issue_data
+        except Exception as e:
+            return {"error": f"Failed to retrieve issue {issue_id}: {str(e)}"}
+
+    async def list_projects(self) -> list:
+        """
+        List all available projects in Redmine.
+
+        Returns:
+            List of projects with ID, name, and identifier
+        """
+        if not self.client.configured:
+            return [{"error": "Redmine API key not configured"}]
+        try:
+            projects = await self._afetch(("projects",), self.client.projects)
+            return [{"id": p["id"], "name": p["name"], "identifier": p["identifier"]} for p in projects]
+        except Exception as e:
+            return [{"error": f"Failed to list projects: {str(e)}"}]
+
+    async def search_issues(self, project_id: str, query: str, status: Optional[str] = None) -> list:
+        """
+        Search for issues in a specific project with optional status filter.
+
+        Args:
+            project_id: The project identifier or ID
+            query: Search query text
+            status: Optional status filter (e.g., 'open', 'closed')
+
+        Returns:
+            List of matching issues with ID, subject, and status
+        """
+        try:
+            issues = await self._aissues(project_id, status=status)
+            if issues is None:
+                return [{"error": "Redmine API key not configured"}]
+            record_fact(f"search_issues:{project_id}:{query}:{status or ''}")
+            return _search_results(issues, query)
+        except Exception as e:
+            return [{"error": f"Search failed: {str(e)}"}]
+
+    async def get_project_issues(self, project_id: str, limit: int = 10) -> list:
+        """
+        Get all issues for a project with optional limit.
+
+        Args:
+            project_id: The project identifier or ID
+            limit: Maximum number of issues to return
+
+        Returns:
+            List of project issues
+        """
+        try:
+            issues = await self._aissues(project_id, limit=limit)
+            if issues is None:
+                return [{"error": "Redmine API key not configured"}]
+            record_fact(f"project_issues:{project_id}")
+            for i in issues:
+                record_issue_read(i.id, getattr(i, 'updated_on', None))
+            return [_issue_summary(i) for i in issues]
+        except Exception as e:
+            return [{"error": f"Failed to retrieve project issues: {str(e)}"}]
+
+    async def analyze_issue_context(self, issue_id: int) -> Dict[str, Any]:
+        """
+        Analyze the contextual information of an issue including related issues and history.
+        Useful for understanding issue dependencies and impact.
+
+        Args:
+            issue_id: The issue ID to analyze
+
+        Returns:
+            Dictionary with contextual analysis including relations and metadata
+        """
+        try:
+            cached = self._cached_view("context", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = await self._aissue(issue_id, ("relations", "journals"))
+            if issue is None:
+                return {"error": "Redmine API key not configured"}
+            record_issue_read(issue_id, getattr(issue, 'updated_on', None))
+            context = _issue_context(issue_id, issue)
+            self._cache_view(
+                "context", issue_id, context, getattr(issue, 'updated_on', None),
+                related=[rel["issue_id"] for rel in context["relations"]]
+            )
+            return context
+        except Exception as e:
+            return {"error": f"Failed to analyze issue context: {str(e)}"}
+
+    async def update_issue_metadata(self, issue_id: int, metadata_json: str) -> Dict[str, Any]:
+        """
+        Update custom fields and metadata for an issue.
+
+        Args:
+            issue_id: The issue ID to update
+            metadata_json: JSON string of custom fields and values (e.g., '{"id": "val"}')
+
+        Returns:
+            Update status and result
+        """
+        metadata = json.loads(metadata_json)
+        if not self.client.configured:
+            return {"error": "Redmine API key not configured"}
+        try:
+            await self.client.update_issue(
+                issue_id, {"custom_fields": [{"id": key, "value": value} for key, value in metadata.items()]}
+            )
+            # Clear cache (todas las vistas cacheadas del issue)
+            self.issue_cache.invalidate_issues([issue_id])
+            return {"success": True, "message": f"Issue {issue_id} updated", "issue_id": issue_id}
+        except Exception as e:
+            return {"error": f"Failed to update issue: {str(e)}"}
+
+    async def get_issue_relations(self, issue_id: int) -> Dict[str, List[int]]:
+        """
+        Get all related issues (dependencies, blocks, etc.).
+
+        Args:
+            issue_id: The issue ID to analyze
+
+        Returns:
+            Dictionary mapping relation types to lists of related issue IDs
+        """
+        try:
+            cached = self._cached_view("relations", issue_id)
+            if cached is not None:
+                return cached
+
+            issue = await self._aissue(issue_id, ("relations",))
+            if issue is None:
+                return {"error": "Redmine API key not configured"}
+            record_issue_read(issue_id, getattr(issue, 'updated_on', None))
+            relations = _issue_relations(issue)
+            self._cache_view(
+                "relations", issue_id, relations, getattr(issue, 'updated_on', None),
+                related=[i for ids in relations.values() for i in ids]
+            )
+            return relations
+        except Exception as e:
+            return {"error": f"Failed to get issue relations: {str(e)}"}
+
+    async def extract_issue_requirements(self, issue_id: int) -> Dict[str, Any]:
+        """
+        Extract structured requirements and specifications from an issue.
+        Analyzes description and custom fields for requirement patterns.
+
+        Args:
+            issue_id: The issue ID to analyze
+
+        Returns:
+            Dictionary containing extracted requirements, acceptance criteria, and specifications
+        """
+        try:
+            issue_details = await self.get_issue_details(issue_id)
+            if "error" in issue_details:
+                return issue_details
+            return _issue_requirements(issue_id, issue_details)
         except Exception as e:
             return {"error": f"Failed to extract requirements: {str(e)}"}
+
+
 class RedmineKnowledgeTools(Toolkit):
     """
     Redmine Knowledge Integration Tools for agents to leverage knowledge base
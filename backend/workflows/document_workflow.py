@@ -1,18 +1,47 @@
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Union, Tuple, Callable
 import asyncio
 import json
+import time
+import uuid
 from agno.workflow import Workflow, StepOutput, StepInput
 from agno.utils.log import logger
 from backend.agents.metric_extractor_agent import MetricExtractorAgent
 from backend.agents.author_agent import GeneralAuthorAgent
 from backend.agents.judge_agent import ExpertJudgeAgent
-from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema
+from backend.agents.schemas import SIC_DTO, FeedbackCritiqueSchema, DocumentPlan, DocumentSection
+from backend.core.dag_scheduler import DAGScheduler
+from backend.core.checkpoint_store import SectionCheckpointStore
+from backend.core.section_cache import SectionResultCache, instructions_version
+from backend.core.progress import emit_progress
+from backend.core.fair_executor import FairExecutor
+from backend.core.duration_stats import SectionDurationStats
+from backend.core.maker_checker_pipeline import MakerCheckerPipeline, PipelineJob
+from backend.core.structural_checker import StructuralChecker
+from backend.core.not_applicable import NotApplicableGenerator, resolve_scope
+from backend.core.agent_factory import AgentFactory
+from backend.core.batch_runner import BatchRequestError, OpenAIBatchRunner, active_batch_runner, use_batch_runner
+from backend.core.model_router import ModelRouter
+from backend.core.agent_metrics import AgentMetricsRegistry
+from backend.core.deadline import DeadlineExceeded, reset_deadline, set_deadline, with_deadline
+from backend.core.context_packer import (
+    ContextPacker, ContextPart, critique_part, dependency_parts, draft_parts, rules_part
+)
+from backend.core.provenance import SectionReads, track_section_reads, sections_reading, stale_issues
+
+
+def new_workflow_id(project_id: Any) -> str:
+    """Identificador único de ejecución (clave de checkpoints, progreso y session_id por llamada)."""
+    return f"wf_{project_id}_{uuid.uuid4().hex[:12]}"
+
 
 class DocumentCreationWorkflow(Workflow):
     """
     FASE V5.0: Graph Orchestrator with Self-Correction (Maker-Checker)
     Hardening AGDR: Context Mitigation and DTO Serialization.
     """
+    # Intentos Maker-Checker por sección
+    MAX_ATTEMPTS = 2
+
     def __init__(
         self,
         planner: Any,
@@ -21,6 +50,25 @@ class DocumentCreationWorkflow(Workflow):
         reviewer: ExpertJudgeAgent,
         workspace_id: str = "default",
         pdf_tool: Any = None,
+        max_concurrency: int = 4,
+        checkpoint_store: Optional[SectionCheckpointStore] = None,
+        section_cache: Optional[SectionResultCache] = None,
+        snapshot_provider: Optional[Callable[[Any], Optional[str]]] = None,
+        issue_version_provider: Optional[Callable[[List[int]], Dict[int, Optional[str]]]] = None,
+        llm_executor: Optional[FairExecutor] = None,
+        duration_stats: Optional[SectionDurationStats] = None,
+        pipelined: bool = False,
+        author_workers: int = 2,
+        judge_workers: int = 2,
+        structural_checker: Optional[StructuralChecker] = None,
+        not_applicable: Optional[NotApplicableGenerator] = None,
+        agent_factory: Optional[AgentFactory] = None,
+        context_packer: Optional[ContextPacker] = None,
+        author_context_tokens: int = 6000,
+        judge_context_tokens: int = 4000,
+        batch_runner: Optional[OpenAIBatchRunner] = None,
+        model_router: Optional[ModelRouter] = None,
+        agent_metrics: Optional[AgentMetricsRegistry] = None,
         **kwargs
     ):
         super().__init__(
@@ -35,6 +83,411 @@ class DocumentCreationWorkflow(Workflow):
         self.author = author
         self.reviewer = reviewer
         self.pdf_tool = pdf_tool
+        self.max_concurrency = max_concurrency
+        self.checkpoint_store = checkpoint_store
+        self.section_cache = section_cache
+        # Fingerprint de los datos Redmine del proyecto (p.ej. RedmineTools.project_snapshot_fingerprint)
+        self.snapshot_provider = snapshot_provider
+        # updated_on actual de issues (p.ej. RedmineTools.get_issue_versions) para el modo incremental
+        self.issue_version_provider = issue_version_provider
+        # Cupo global de ejecuciones de agente en vuelo, repartido por proyecto
+        self.llm_executor = llm_executor
+        # Duraciones históricas por sección -> prioridades de camino crítico
+        self.duration_stats = duration_stats
+        # Pipeline Maker-Checker: colas y workers propios para Author y Judge.
+        # En este modo max_concurrency acota las secciones en tránsito, no las llamadas.
+        self.pipelined = pipelined
+        self.author_workers = author_workers
+        self.judge_workers = judge_workers
+        # Reglas deterministas de la plantilla: rechazos mecánicos sin llamar al Judge
+        self.structural_checker = structural_checker
+        # Exclusiones formales (SIC 07/08/09/13/18) generadas por regla según el alcance
+        self.not_applicable = not_applicable
+        # Los agentes recibidos son prototipos: cada llamada usa una instancia con sesión propia
+        self.agent_factory = agent_factory or AgentFactory()
+        # Prompts por presupuesto de tokens del modelo (en lugar de cortes por caracteres)
+        self.context_packer = context_packer or ContextPacker()
+        self.author_context_tokens = author_context_tokens
+        self.judge_context_tokens = judge_context_tokens
+        # Modo bulk (input "bulk"): el DAG avanza por olas y Author/Judge van por la Batch API
+        self.batch_runner = batch_runner
+        # Modelo por llamada según rol, dificultad de la sección e intento (None = modelo del agente)
+        self.model_router = model_router
+        # Latencias, tokens, coste y herramientas por agente/sección/ejecución (/api/agents/performance)
+        self.agent_metrics = agent_metrics
+
+    @staticmethod
+    def _is_approved(critique: Optional[FeedbackCritiqueSchema]) -> bool:
+        """Umbral de paso por sección del bucle Maker-Checker."""
+        return bool(critique) and (critique.approved or critique.qc_score > 85)
+
+    @staticmethod
+    def _run_tokens(run: Any) -> int:
+        """Tokens consumidos por una ejecución de agente (RunOutput.metrics)."""
+        metrics = getattr(run, "metrics", None)
+        return int(getattr(metrics, "total_tokens", 0) or 0) if metrics else 0
+
+    async def _call_agent(
+        self,
+        agent: Any,
+        prompt: str,
+        project_id: Any,
+        priority: float = 0.0,
+        session_id: Optional[str] = None,
+        role: str = "agent",
+        section_id: Optional[str] = None,
+        attempt: int = 1
+    ) -> Any:
+        """
+        Ejecuta una instancia aislada del agente (sesión propia, ver AgentFactory)
+        ocupando un hueco del cupo LLM global (si está configurado).
+        La espera del hueco y la llamada se cancelan al agotarse el deadline de la ejecución.
+        En modo bulk la llamada se encola en el batch runner activo; si su línea del
+        batch falla, se repite en modo interactivo.
+        Con model_router, la instancia usa el modelo de la ruta elegida para (role, section_id, attempt).
+        """
+        decision = self.model_router.route(role, section_id, attempt) if self.model_router else None
+        agent_key = getattr(agent, "id", None) or getattr(agent, "name", None) or role
+        agent = self.agent_factory.spawn(
+            agent, session_id or f"run_{uuid.uuid4().hex[:12]}",
+            model=self.model_router.model_for(decision) if decision else None
+        )
+        batch_runner = active_batch_runner()
+
+        async def run() -> Any:
+            if batch_runner is not None:
+                try:
+                    return await batch_runner.run_agent(agent, prompt, custom_id=session_id)
+                except BatchRequestError as e:
+                    logger.warning(f"⚠️ [BATCH] {session_id}: {str(e)[:100]}. Reintento interactivo")
+            if self.llm_executor is None:
+                return await agent.arun(prompt)
+            async with self.llm_executor.slot(project_id, priority):
+                return await agent.arun(prompt)
+
+        started = time.monotonic()
+        try:
+            result = await with_deadline(run(), stage=session_id or "agent")
+        except Exception:
+            self._record_call(decision, role, agent_key, None, time.monotonic() - started, section_id, session_id, True)
+            raise
+        self._record_call(decision, role, agent_key, result, time.monotonic() - started, section_id, session_id)
+        return result
+
+    def _record_call(
+        self,
+        decision: Any,
+        role: str,
+        agent_key: str,
+        result: Any,
+        latency: float,
+        section_id: Optional[str],
+        session_id: Optional[str],
+        error: bool = False
+    ) -> None:
+        """Métricas de una llamada de agente: ruta de modelo y registro de rendimiento."""
+        if decision is not None:
+            self.model_router.record_call(decision, role, latency, 0 if error else self._run_tokens(result), error=error)
+        if self.agent_metrics:
+            # session_id = "{workflow_id}:{sección}:{rol}:{intento}"
+            workflow_id = session_id.split(":")[0] if session_id else None
+            self.agent_metrics.record_agent_run(agent_key, result, latency, section_id, workflow_id, error=error)
+
+    async def _redmine_snapshot(self, project_id: Any) -> Optional[str]:
+        """
+        Fingerprint de los datos Redmine consumidos por el proyecto.
+        Sin snapshot no hay clave segura: la caché de secciones se desactiva para la ejecución.
+        """
+        if not (self.section_cache and self.snapshot_provider):
+            return None
+        try:
+            snapshot = await asyncio.to_thread(self.snapshot_provider, project_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot Redmine no disponible: {str(e)[:100]}")
+            snapshot = None
+        if not snapshot:
+            logger.warning(f"⚠️ [CACHE] Sin snapshot Redmine para proyecto {project_id}; caché de secciones desactivada")
+        return snapshot
+
+    async def _invalidated_sections(
+        self,
+        scheduler: DAGScheduler,
+        base: Dict[str, Any],
+        input_data: Dict[str, Any]
+    ) -> set:
+        """
+        Subgrafo mínimo a regenerar respecto a una ejecución base:
+        secciones que leyeron issues/hechos modificados, secciones ausentes o no
+        aprobadas en la base, y todos sus descendientes en el DAG.
+        """
+        reads_by_section: Dict[str, Optional[SectionReads]] = {
+            s_id: checkpoint.reads for s_id, checkpoint in base.items() if s_id in scheduler.dependencies
+        }
+        changed_issues = input_data.get("changed_issues") or []
+        changed_facts = input_data.get("changed_facts") or []
+
+        if not changed_issues and not changed_facts and self.issue_version_provider:
+            tracked = sorted({issue_id for reads in reads_by_section.values() if reads for issue_id in reads.issues})
+            try:
+                current_versions = await asyncio.to_thread(self.issue_version_provider, tracked)
+            except Exception as e:
+                logger.warning(f"⚠️ [INCREMENTAL] No se pudo consultar Redmine ({str(e)[:100]}); regeneración completa")
+                return set(scheduler.dependencies)
+            changed_issues = stale_issues(reads_by_section, current_versions)
+
+        seeds = sections_reading(reads_by_section, changed_issues, changed_facts)
+        seeds |= {
+            s_id for s_id in scheduler.dependencies
+            if s_id not in base or not base[s_id].approved or not base[s_id].dto
+        }
+        logger.info(f"🔎 [INCREMENTAL] Issues modificados: {sorted(changed_issues)} | Secciones afectadas: {sorted(seeds)}")
+        return scheduler.descendants(seeds)
+
+    def _rules_block(self, section_id: str) -> str:
+        """Bloque de la plantilla maestra para la sección (si hay reglas cargadas)."""
+        spec = self.structural_checker.specs.get(section_id) if self.structural_checker else None
+        return spec.template_block if spec else ""
+
+    def _section_context(self, section: DocumentSection, completed_sections: Dict[str, SIC_DTO]) -> List[ContextPart]:
+        """Partes de contexto del Author: dato crítico, DTOs de dependencias y reglas de la plantilla."""
+        parts: List[ContextPart] = []
+        # Propagación de Dependencias Críticas (ETP SIC 03 -> SIC 16)
+        if section.section_id == "SIC_16" and "SIC_03" in completed_sections:
+            sic03_data = completed_sections["SIC_03"]
+            # Buscamos ETP en metadatos
+            etp_val = next((kv.value for kv in sic03_data.metadata if "ETP" in kv.key.upper()), "PENDIENTE")
+            parts.append(ContextPart(
+                name="etp", title="DATO CRÍTICO", priority=90, required=True, summarizable=False,
+                text=f"⚠️ ETP SIC 03: {etp_val}. Úsalo para justificar la Contingencia en Tabla 1611."
+            ))
+        parts += dependency_parts(section.dependencies, completed_sections)
+        parts.append(rules_part(self._rules_block(section.section_id)))
+        return parts
+
+    async def _author_attempt(
+        self,
+        section: DocumentSection,
+        project_id: Any,
+        context_parts: List[ContextPart],
+        last_critique: Optional[FeedbackCritiqueSchema],
+        attempt: int,
+        priority: float = 0.0,
+        workflow_id: Optional[str] = None
+    ) -> Tuple[Optional[SIC_DTO], int]:
+        """Un intento del Author (Maker). Devuelve (SIC_DTO o None si la salida no es válida, tokens)."""
+        s_id = section.section_id
+        # TRUNCAMIENTO DE HISTORIAL (Mandato AGDR): cada intento usa una instancia con sesión nueva,
+        # sin historial previo; la crítica anterior viaja en el prompt
+        packed = self.context_packer.pack(
+            [critique_part(last_critique)] + context_parts,
+            budget=self.author_context_tokens,
+            counter=self.context_packer.counter_for(self.author),
+        )
+        author_prompt = (
+            f"Genera el contenido para {s_id}: {section.title} del proyecto {project_id}.\n"
+            f"DEPENDE DE: {', '.join(section.dependencies)}\n"
+            f"{packed.text}\n"
+            "Sigue estrictamente la PLANTILLA_MAESTRA_SIC_GENERICO.md."
+        )
+        maker_run = await self._call_agent(
+            self.author, author_prompt, project_id, priority, f"{workflow_id}:{s_id}:author:{attempt}",
+            role="author", section_id=s_id, attempt=attempt
+        )
+        dto = maker_run.content
+        if not isinstance(dto, SIC_DTO):
+            dto = SIC_DTO(**dto) if isinstance(dto, dict) else None
+        return dto, self._run_tokens(maker_run)
+
+    async def _judge_attempt(
+        self,
+        section: DocumentSection,
+        project_id: Any,
+        dto: SIC_DTO,
+        priority: float = 0.0,
+        workflow_id: Optional[str] = None,
+        attempt: int = 1
+    ) -> Tuple[FeedbackCritiqueSchema, int]:
+        """Auditoría del Judge (Checker) sobre un borrador. Devuelve (crítica, tokens)."""
+        # El borrador completo entra por presupuesto de tokens: se resume antes de perder su cola
+        packed = self.context_packer.pack(
+            draft_parts(dto) + [rules_part(self._rules_block(section.section_id))],
+            budget=self.judge_context_tokens,
+            counter=self.context_packer.counter_for(self.reviewer),
+        )
+        checker_prompt = (
+            f"Audita la sección {section.section_id} del proyecto {project_id}.\n"
+            f"{packed.text}\n"
+            "Verifica tablas obligatorias y cumplimiento PCB (si aplica SIC 04/05/10/11)."
+        )
+        checker_run = await self._call_agent(
+            self.reviewer, checker_prompt, project_id, priority, f"{workflow_id}:{section.section_id}:judge:{attempt}",
+            role="judge", section_id=section.section_id, attempt=attempt
+        )
+        critique = checker_run.content
+        if not isinstance(critique, FeedbackCritiqueSchema):
+            if isinstance(critique, dict): critique = FeedbackCritiqueSchema(**critique)
+        return critique, self._run_tokens(checker_run)
+
+    def _report_judgement(
+        self,
+        s_id: str,
+        workflow_id: Optional[str],
+        attempt: int,
+        critique: FeedbackCritiqueSchema,
+        tokens: int,
+        section_start: float,
+        checker: str = "judge"
+    ) -> bool:
+        """Registra el veredicto de un intento (log + eventos de progreso) y devuelve si aprueba."""
+        logger.info(
+            f"   ∟ [{s_id}] Attempt {attempt} | QC: {critique.qc_score} | Approved: {critique.approved} | {checker}"
+        )
+        approved = self._is_approved(critique)
+        if self.model_router:
+            # Calidad de la ruta que generó el borrador evaluado
+            self.model_router.record_quality(self.model_router.route("author", s_id, attempt), critique.qc_score, approved)
+        emit_progress(
+            "section_attempt", workflow_id=workflow_id, section_id=s_id, attempt=attempt,
+            qc_score=critique.qc_score, approved=approved, tokens=tokens, checker=checker,
+            elapsed_seconds=round(time.time() - section_start, 3)
+        )
+        if approved:
+            emit_progress(
+                "section_approved", workflow_id=workflow_id, section_id=s_id, attempt=attempt,
+                qc_score=critique.qc_score, tokens=tokens,
+                elapsed_seconds=round(time.time() - section_start, 3)
+            )
+        return approved
+
+    def _precheck(
+        self,
+        section: DocumentSection,
+        dto: SIC_DTO,
+        workflow_id: Optional[str],
+        attempt: int,
+        tokens: int,
+        section_start: float
+    ) -> Optional[FeedbackCritiqueSchema]:
+        """Pre-chequeo estructural: crítica de rechazo sin llamada LLM, o None si el borrador pasa al Judge."""
+        if self.structural_checker is None:
+            return None
+        critique = self.structural_checker.critique(section.section_id, dto)
+        if critique is not None:
+            self._report_judgement(
+                section.section_id, workflow_id, attempt, critique, tokens, section_start, checker="precheck"
+            )
+        return critique
+
+    async def _execute_section(
+        self,
+        section: DocumentSection,
+        project_id: Any,
+        completed_sections: Dict[str, SIC_DTO],
+        workflow_id: Optional[str] = None,
+        priority: float = 0.0
+    ) -> Tuple[Optional[SIC_DTO], Optional[FeedbackCritiqueSchema], Dict[str, Any]]:
+        """
+        Bucle Maker-Checker de un nodo del DAG.
+        Se invoca cuando todas las dependencias de la sección están en `completed_sections`.
+
+        Returns:
+            (SIC_DTO, última crítica, uso {"attempts", "tokens"})
+        """
+        s_id = section.section_id
+        section_start = time.time()
+        tokens = 0
+        attempts = 0
+        logger.info(f"🏗️ [NODE {s_id}] Procesando: {section.title}...")
+        context_parts = self._section_context(section, completed_sections)
+
+        current_dto = None
+        last_critique: Optional[FeedbackCritiqueSchema] = None
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1): # intentos acotados para no extender el runtime infinitamente
+            attempts = attempt
+            current_dto, used = await self._author_attempt(
+                section, project_id, context_parts, last_critique, attempt, priority, workflow_id
+            )
+            tokens += used
+            if current_dto is None:
+                continue
+
+            precheck_critique = self._precheck(section, current_dto, workflow_id, attempt, tokens, section_start)
+            if precheck_critique is not None:
+                last_critique = precheck_critique
+                continue
+
+            last_critique, used = await self._judge_attempt(
+                section, project_id, current_dto, priority, workflow_id, attempt
+            )
+            tokens += used
+            if self._report_judgement(s_id, workflow_id, attempt, last_critique, tokens, section_start):
+                break
+
+        return current_dto, last_critique, {"attempts": attempts, "tokens": tokens}
+
+    async def _pipeline_author(self, job: PipelineJob) -> Optional[SIC_DTO]:
+        """Etapa Maker del pipeline: `job.item` es la sección, `job.state` el contexto del nodo."""
+        state = job.state
+        dto, used = await self._author_attempt(
+            job.item, state["project_id"], state["context_parts"], job.critique, job.attempt, job.priority,
+            state["workflow_id"]
+        )
+        state["tokens"] += used
+        return dto
+
+    async def _pipeline_judge(self, job: PipelineJob) -> FeedbackCritiqueSchema:
+        """Etapa Checker del pipeline. Emite el veredicto del intento."""
+        state = job.state
+        critique, used = await self._judge_attempt(
+            job.item, state["project_id"], job.draft, job.priority, state["workflow_id"], job.attempt
+        )
+        state["tokens"] += used
+        self._report_judgement(
+            job.item.section_id, state["workflow_id"], job.attempt, critique, state["tokens"], state["started_at"]
+        )
+        return critique
+
+    def _pipeline_precheck(self, job: PipelineJob) -> Optional[FeedbackCritiqueSchema]:
+        state = job.state
+        return self._precheck(
+            job.item, job.draft, state["workflow_id"], job.attempt, state["tokens"], state["started_at"]
+        )
+
+    def _build_pipeline(self) -> MakerCheckerPipeline:
+        return MakerCheckerPipeline(
+            maker=self._pipeline_author,
+            checker=self._pipeline_judge,
+            accept=self._is_approved,
+            max_attempts=self.MAX_ATTEMPTS,
+            maker_workers=self.author_workers,
+            checker_workers=self.judge_workers,
+            precheck=self._pipeline_precheck if self.structural_checker else None,
+        )
+
+    async def _execute_section_pipelined(
+        self,
+        pipeline: MakerCheckerPipeline,
+        section: DocumentSection,
+        project_id: Any,
+        completed_sections: Dict[str, SIC_DTO],
+        workflow_id: Optional[str] = None,
+        priority: float = 0.0
+    ) -> Tuple[Optional[SIC_DTO], Optional[FeedbackCritiqueSchema], Dict[str, Any]]:
+        """
+        Variante de `_execute_section` sobre el pipeline Maker-Checker: el nodo
+        espera su resultado mientras los workers de Author y Judge atienden
+        otras secciones entre medias.
+        """
+        logger.info(f"🏗️ [NODE {section.section_id}] Procesando (pipeline): {section.title}...")
+        job = await pipeline.submit(section, priority, state={
+            "project_id": project_id,
+            "workflow_id": workflow_id,
+            "context_parts": self._section_context(section, completed_sections),
+            "tokens": 0,
+            "started_at": time.time(),
+        })
+        return job.draft, job.critique, {"attempts": job.attempt, "tokens": job.state["tokens"]}
 
     async def main_execution(
         self,
@@ -53,16 +506,38 @@ class DocumentCreationWorkflow(Workflow):
         
         project_id = input_data.get("project_id", 9)
         document_type = input_data.get("document_type", "SIC")
-        
+        # Identificador de la ejecución. Solo se reanuda desde checkpoints si se pide
+        # explícitamente (resume_workflow_id): un workflow_id nuevo nunca hereda secciones
+        resume_workflow_id = input_data.get("resume_workflow_id")
+        workflow_id = resume_workflow_id or input_data.get("workflow_id") or new_workflow_id(project_id)
+        # "full" | "regenerate_changed" (reutiliza base_workflow_id salvo el subgrafo invalidado)
+        mode = input_data.get("mode", "full")
+        base_workflow_id = input_data.get("base_workflow_id")
+        pipelined = bool(input_data.get("pipelined", self.pipelined))
+        # Presupuesto de tiempo de la ejecución (PreinversionRequest.timeout_seconds): se propaga por
+        # ContextVar a cada llamada de agente/OpenAI/Redmine; al agotarse se devuelve el documento parcial
+        timeout_seconds = input_data.get("timeout_seconds")
+        deadline_token = set_deadline(float(timeout_seconds) if timeout_seconds else None)
+        # Modo bulk (backfills nocturnos): throughput y coste por encima de la latencia
+        bulk = bool(input_data.get("bulk"))
+        if bulk and self.batch_runner is None:
+            logger.warning("⚠️ [BATCH] Modo bulk solicitado sin batch_runner configurado; ejecución interactiva")
+            bulk = False
+        if bulk:
+            pipelined = False
 
         logger.info(f"🚀 [AGDR v5.0] Executing Hardened Workflow for Project {project_id}")
+        if self.agent_metrics:
+            self.agent_metrics.start_run(workflow_id, project_id)
+        run_status = "failed"
 
         try:
             # ============================================================
             # NODE 1: DATA INGESTION & PLANNING
             # ============================================================
-            planner_run = await self.planner.arun(
-                f"Genera el Plan Maestro AGDR (22 SIC) para proyecto {project_id}."
+            planner_run = await self._call_agent(
+                self.planner, f"Genera el Plan Maestro AGDR (22 SIC) para proyecto {project_id}.", project_id,
+                session_id=f"{workflow_id}:planner", role="planner"
             )
             plan: DocumentPlan = planner_run.content
             if not isinstance(plan, DocumentPlan):
@@ -71,77 +546,206 @@ class DocumentCreationWorkflow(Workflow):
                 else:
                     raise ValueError("Planner no devolvió DocumentPlan válido")
 
-            logger.info(f"📋 [DAG] Plan de 22 secciones cargado. Iniciando ejecución secuencial/paralela.")
+            logger.info(f"📋 [DAG] Plan de {len(plan.sections)} secciones cargado. Iniciando ejecución paralela (max {self.max_concurrency}).")
+            emit_progress("plan_ready", workflow_id=workflow_id, project_id=project_id, sections_total=len(plan.sections))
 
             # ============================================================
-            # NODE 2: SEQUENTIAL DAG EXECUTION (22 NODES)
+            # NODE 2: PARALLEL DAG EXECUTION (22 NODES)
             # ============================================================
             completed_sections: Dict[str, SIC_DTO] = {}
             qc_scores: Dict[str, float] = {}
             last_critique_per_section: Dict[str, FeedbackCritiqueSchema] = {}
+            resumed_sections: List[str] = []
+            cached_sections: List[str] = []
+            rule_sections: List[str] = []
+            reused_sections: List[str] = []
+            invalidated_sections: List[str] = []
+            section_reads: Dict[str, Optional[SectionReads]] = {}
+
+            sections_by_id = {section.section_id: section for section in plan.sections}
+
+            durations = await self.duration_stats.load() if self.duration_stats else None
+            scheduler = DAGScheduler(
+                {section.section_id: section.dependencies for section in plan.sections},
+                max_concurrency=self.max_concurrency,
+                durations=durations
+            )
+            logger.info(
+                f"🛤️ [DAG] Camino crítico: {' -> '.join(scheduler.critical_path)} "
+                f"(~{scheduler.critical_path_length:.1f} {'s' if durations else 'nodos'})"
+            )
+
+            # Reanudación: las secciones aprobadas en una ejecución previa no se regeneran
+            if self.checkpoint_store and resume_workflow_id:
+                checkpoints = await self.checkpoint_store.load_workflow(workflow_id)
+                for s_id, checkpoint in checkpoints.items():
+                    if checkpoint.approved and checkpoint.dto:
+                        completed_sections[s_id] = checkpoint.dto
+                        qc_scores[s_id] = checkpoint.qc_score
+                        last_critique_per_section[s_id] = checkpoint.critique
+                        section_reads[s_id] = checkpoint.reads
+                        resumed_sections.append(s_id)
+                if resumed_sections:
+                    logger.info(f"♻️ [{workflow_id}] Reanudando: {len(resumed_sections)} secciones recuperadas de checkpoints")
+
+            # Regeneración incremental: solo el subgrafo invalidado por cambios en Redmine
+            if mode == "regenerate_changed":
+                if not (self.checkpoint_store and base_workflow_id):
+                    raise ValueError("El modo regenerate_changed requiere checkpoint_store y base_workflow_id")
+                base = await self.checkpoint_store.load_workflow(base_workflow_id)
+                invalidated = await self._invalidated_sections(scheduler, base, input_data)
+                invalidated_sections = [s_id for s_id in scheduler.topological_order if s_id in invalidated]
+
+                for s_id in scheduler.topological_order:
+                    checkpoint = base.get(s_id)
+                    if s_id in invalidated or s_id in resumed_sections or not checkpoint:
+                        continue
+                    completed_sections[s_id] = checkpoint.dto
+                    qc_scores[s_id] = checkpoint.qc_score
+                    last_critique_per_section[s_id] = checkpoint.critique
+                    section_reads[s_id] = checkpoint.reads
+                    reused_sections.append(s_id)
+
+                # Las secciones reutilizadas pasan a formar parte de esta ejecución
+                if workflow_id != base_workflow_id:
+                    await asyncio.gather(*[
+                        self.checkpoint_store.save_section(
+                            workflow_id, project_id, s_id, completed_sections[s_id], qc_scores[s_id],
+                            last_critique_per_section[s_id], True, section_reads[s_id]
+                        )
+                        for s_id in reused_sections
+                    ])
+                logger.info(
+                    f"🔁 [{workflow_id}] Regeneración incremental desde {base_workflow_id}: "
+                    f"{len(reused_sections)} reutilizadas, {len(invalidated_sections)} invalidadas"
+                )
+
+            skipped_sections = set(resumed_sections) | set(reused_sections)
 
-            # Ordenamos las secciones para respetar dependencias básicas (simplificado a lineal por seguridad en runtime)
-            # Aunque el Planner da un DAG, aquí forzamos la ejecución de los 22 nodos.
-            for section in plan.sections:
-                s_id = section.section_id
-                logger.info(f"🏗️ [NODE {s_id}] Procesando: {section.title}...")
-
-                # Propagación de Dependencias Críticas (ETP SIC 03 -> SIC 16)
-                extra_context = ""
-                if s_id == "SIC_16" and "SIC_03" in completed_sections:
-                    sic03_data = completed_sections["SIC_03"]
-                    # Buscamos ETP en metadatos
-                    etp_val = next((kv.value for kv in sic03_data.metadata if "ETP" in kv.key.upper()), "PENDIENTE")
-                    extra_context = f"\n⚠️ DATO CRÍTICO (ETP SIC 03): {etp_val}. Úsalo para justificar la Contingencia en Tabla 1611."
-
-                # Maker-Checker Loop for this specific section
-                approved = False
-                current_dto = None
-                last_critique: Optional[FeedbackCritiqueSchema] = None
-
-                for attempt in range(2): # 2 intentos por sección para no extender el runtime infinitamente
-                    # 1. TRUNCAMIENTO DE HISTORIAL (Mandato AGDR)
-                    # Limpiamos la memoria de los agentes en cada iteración para evitar Context Overflow
-                    if attempt > 0:
-                        logger.info(f"🧹 [Attempt {attempt+1}] Truncando historial de conversación para {s_id}...")
-                        if hasattr(self.author, 'memory') and self.author.memory:
-                            self.author.memory.clear()
-                        if hasattr(self.reviewer, 'memory') and self.reviewer.memory:
-                            self.reviewer.memory.clear()
-
-                    # Author (Maker)
-                    author_prompt = (
-                        f"Genera el contenido para {s_id}: {section.title} del proyecto {project_id}.\n"
-                        f"DEPENDE DE: {', '.join(section.dependencies)}\n"
-                        f"CONTEXTO ADICIONAL: {extra_context}\n"
-                        f"CRÍTICA PREVIA: {last_critique.actionable_recommendation if last_critique else 'INICIO'}\n"
-                        "Sigue estrictamente la PLANTILLA_MAESTRA_SIC_GENERICO.md."
+            # Caché direccionada por contenido: entradas idénticas => SIC_DTO idéntico
+            redmine_snapshot = await self._redmine_snapshot(project_id)
+            agents_version = instructions_version(self.author, self.reviewer) if redmine_snapshot else None
+            # Pipeline Maker-Checker: la auditoría de una sección se solapa con la autoría de la siguiente
+            pipeline = self._build_pipeline() if pipelined else None
+
+            async def run_node(s_id: str):
+                if s_id in skipped_sections:
+                    emit_progress(
+                        "section_completed", workflow_id=workflow_id, section_id=s_id, qc_score=qc_scores.get(s_id),
+                        approved=True, source="resumed" if s_id in resumed_sections else "reused"
+                    )
+                    return
+                section = sections_by_id[s_id]
+                node_start = time.time()
+                usage = {"attempts": 0, "tokens": 0}
+                emit_progress("section_started", workflow_id=workflow_id, section_id=s_id)
+
+                # Ruta rápida: sección excluida por alcance, sin Author ni Judge
+                scope = resolve_scope(input_data, completed_sections) if self.not_applicable else None
+                if scope and self.not_applicable.applies(s_id, scope):
+                    current_dto, last_critique = self.not_applicable.generate(s_id, project_id, scope)
+                    completed_sections[s_id] = current_dto
+                    last_critique_per_section[s_id] = last_critique
+                    qc_scores[s_id] = last_critique.qc_score
+                    section_reads[s_id] = SectionReads(facts=[f"scope:{scope}"])
+                    rule_sections.append(s_id)
+                    emit_progress(
+                        "section_completed", workflow_id=workflow_id, section_id=s_id, qc_score=qc_scores[s_id],
+                        approved=True, source="rule", attempt=0, tokens=0,
+                        elapsed_seconds=round(time.time() - node_start, 3)
                     )
-                    maker_run = await self.author.arun(author_prompt)
-                    current_dto = maker_run.content
-                    if not isinstance(current_dto, SIC_DTO):
-                        if isinstance(current_dto, dict): current_dto = SIC_DTO(**current_dto)
-                        else: continue
-
-                    # Judge (Checker)
-                    checker_prompt = (
-                        f"Audita la sección {s_id} del proyecto {project_id}.\n"
-                        f"TEXTO: {current_dto.summary_markdown[:10000]}\n"
-                        "Verifica tablas obligatorias y cumplimiento PCB (si aplica SIC 04/05/10/11)."
+                    if self.checkpoint_store:
+                        await self.checkpoint_store.save_section(
+                            workflow_id, project_id, s_id, current_dto, qc_scores[s_id],
+                            last_critique, True, section_reads[s_id]
+                        )
+                    return
+
+                cache_key = None
+                cached = None
+                if redmine_snapshot:
+                    cache_key = self.section_cache.compute_key(
+                        s_id, project_id, redmine_snapshot,
+                        {dep: completed_sections.get(dep) for dep in section.dependencies},
+                        agents_version
                     )
-                    checker_run = await self.reviewer.arun(checker_prompt)
-                    last_critique = checker_run.content
-                    if not isinstance(last_critique, FeedbackCritiqueSchema):
-                        if isinstance(last_critique, dict): last_critique = FeedbackCritiqueSchema(**last_critique)
+                    cached = await self.section_cache.get(cache_key)
 
-                    logger.info(f"   ∟ Attempt {attempt+1} | QC: {last_critique.qc_score} | Approved: {last_critique.approved}")
-                    if last_critique.approved or last_critique.qc_score > 85: # Umbral de paso por sección
-                        approved = True
-                        break
+                if cached:
+                    logger.info(f"⚡ [CACHE HIT] {s_id} reutilizado (QC: {cached.qc_score})")
+                    current_dto, last_critique = cached.dto, cached.critique
+                    qc_scores[s_id] = cached.qc_score
+                    section_reads[s_id] = cached.reads
+                    cached_sections.append(s_id)
+                else:
+                    # Provenance: issues y hechos Redmine leídos por los agentes de esta sección
+                    with track_section_reads() as reads:
+                        if pipeline:
+                            current_dto, last_critique, usage = await self._execute_section_pipelined(
+                                pipeline, section, project_id, completed_sections, workflow_id,
+                                scheduler.priorities[s_id]
+                            )
+                        else:
+                            current_dto, last_critique, usage = await self._execute_section(
+                                section, project_id, completed_sections, workflow_id, scheduler.priorities[s_id]
+                            )
+                    section_reads[s_id] = reads
+                    qc_scores[s_id] = last_critique.qc_score if last_critique else 0
+                    if self.duration_stats:
+                        await self.duration_stats.record(s_id, time.time() - node_start)
+                    # Solo se cachean secciones aprobadas por el Judge
+                    if cache_key and current_dto and self._is_approved(last_critique):
+                        await self.section_cache.put(
+                            cache_key, s_id, project_id, current_dto, qc_scores[s_id], last_critique, reads
+                        )
 
                 completed_sections[s_id] = current_dto
-                qc_scores[s_id] = last_critique.qc_score if last_critique else 0
                 last_critique_per_section[s_id] = last_critique
+                emit_progress(
+                    "section_completed", workflow_id=workflow_id, section_id=s_id, qc_score=qc_scores[s_id],
+                    approved=self._is_approved(last_critique), source="cache" if cached else "generated",
+                    attempt=usage["attempts"], tokens=usage["tokens"],
+                    elapsed_seconds=round(time.time() - node_start, 3)
+                )
+
+                if self.checkpoint_store:
+                    await self.checkpoint_store.save_section(
+                        workflow_id, project_id, s_id, current_dto, qc_scores[s_id],
+                        last_critique, self._is_approved(last_critique), section_reads[s_id]
+                    )
+
+            timed_out = False
+            try:
+                if bulk:
+                    logger.info(f"📦 [BATCH] Modo bulk: {len(scheduler.waves)} olas sobre la Batch API")
+                    with use_batch_runner(self.batch_runner):
+                        await with_deadline(scheduler.run_waves(run_node), stage="dag")
+                elif pipeline:
+                    async with pipeline:
+                        await with_deadline(scheduler.run(run_node), stage="dag")
+                    logger.info(
+                        f"🔀 [PIPELINE] Author {pipeline.stats['maker_busy_seconds']:.1f}s | "
+                        f"Judge {pipeline.stats['checker_busy_seconds']:.1f}s | Reintentos: {pipeline.stats['retries']}"
+                    )
+                else:
+                    await with_deadline(scheduler.run(run_node), stage="dag")
+            except DeadlineExceeded as e:
+                # Las secciones en vuelo se cancelan (liberan su hueco LLM); las completadas se conservan
+                timed_out = True
+                logger.warning(
+                    f"⏱️ [{workflow_id}] {e} tras {timeout_seconds}s: documento parcial con "
+                    f"{len(completed_sections)}/{len(plan.sections)} secciones (reanudable con resume_workflow_id={workflow_id})"
+                )
+            if cached_sections:
+                logger.info(f"⚡ [CACHE] {len(cached_sections)}/{len(plan.sections)} secciones servidas desde caché")
+
+            # Ensamblaje en el orden del plan (la finalización concurrente no es determinista)
+            completed_sections = {
+                section.section_id: completed_sections[section.section_id]
+                for section in plan.sections if section.section_id in completed_sections
+            }
+            qc_scores = {s_id: qc_scores[s_id] for s_id in completed_sections}
+            pending_sections = [section.section_id for section in plan.sections if section.section_id not in completed_sections]
 
             # ============================================================
             # NODE 3: ASSEMBLY & FINAL VALIDATION
@@ -178,11 +782,24 @@ class DocumentCreationWorkflow(Workflow):
             except Exception as e:
                 logger.error(f"❌ Error en PDF: {e}")
 
+            emit_progress("workflow_completed", workflow_id=workflow_id, qc_score=final_qc_score, partial=timed_out)
+            run_status = "partial" if timed_out else "success"
             return StepOutput(
                 content={
                     "document": final_document,
                     "project_id": project_id,
-                    "approved": is_complete and final_qc_score > 95,
+                    "workflow_id": workflow_id,
+                    "resumed_sections": resumed_sections,
+                    "cached_sections": [s for s in completed_sections if s in cached_sections],
+                    "not_applicable_sections": [s for s in completed_sections if s in rule_sections],
+                    "mode": mode,
+                    "bulk": bulk,
+                    "reused_sections": reused_sections,
+                    "invalidated_sections": invalidated_sections,
+                    "approved": is_complete and final_qc_score > 95 and not timed_out,
+                    "partial": timed_out,
+                    "pending_sections": pending_sections,
+                    "timeout_seconds": timeout_seconds,
                     "qc_score": final_qc_score,
                     "audit_report": {
                         "is_complete": is_complete,
@@ -201,4 +818,11 @@ class DocumentCreationWorkflow(Workflow):
 
         except Exception as e:
             logger.error(f"💥 [FATAL] Error en Workflow Hardened: {str(e)}", exc_info=True)
-            return StepOutput(content=f"Error: {str(e)}", success=False)
+            emit_progress("workflow_failed", workflow_id=workflow_id, error=str(e))
+            if self.checkpoint_store:
+                logger.info(f"♻️ [{workflow_id}] Secciones completadas persistidas; reanudable con resume_workflow_id={workflow_id}")
+            return StepOutput(content=f"Error: {str(e)} (workflow_id={workflow_id})", success=False)
+        finally:
+            reset_deadline(deadline_token)
+            if self.agent_metrics:
+                self.agent_metrics.finish_run(workflow_id, run_status)